@@ -0,0 +1,602 @@
+"""Parallel bulk import of activity files.
+
+This module provides the BulkImportService class used to import
+every file placed in the bulk_import directory.
+
+Pipeline:
+- Skip stage: files whose content hash matches an imported file, or
+  a file earlier in the same import, are moved out without parsing
+- Parse stage: a process pool parses files in parallel using the
+  GPX, TCX and FIT parsers, without reverse geocoding
+- Write stage: a single writer resolves the start locations of each
+  batch in one batched lookup, then stores parsed activities, streams,
+  laps, sets and workout steps in batched transactions
+- Progress: updates are pushed to the user over WebSocket
+
+A file that fails to parse or store is moved to the import errors
+directory without affecting the other files.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+import activities.activity.crud as activities_crud
+import activities.activity.utils as activities_utils
+
+import activities.activity_ai_insight_jobs.utils as activity_ai_insight_jobs_utils
+
+import activities.activity_fingerprints.crud as activity_fingerprints_crud
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
+
+import activities.activity_laps.crud as activity_laps_crud
+
+import activities.activity_sets.crud as activity_sets_crud
+
+import activities.activity_streams.crud as activity_streams_crud
+
+import activities.activity_workout_steps.crud as activity_workout_steps_crud
+
+import users.users.crud as users_crud
+
+import users.users_privacy_settings.crud as users_privacy_settings_crud
+
+import notifications.utils as notifications_utils
+
+import websocket.manager as websocket_manager
+import websocket.utils as websocket_utils
+
+import fit.utils as fit_utils
+
+import core.config as core_config
+import core.logger as core_logger
+import core.metrics as core_metrics
+
+from core.database import SessionLocal
+
+
+class BulkImportConfig:
+    """
+    Configuration for bulk import operations.
+
+    Attributes:
+        max_workers: Number of processes parsing files.
+        batch_size: Number of parsed files stored per
+            transaction.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = core_config.BULK_IMPORT_MAX_WORKERS,
+        batch_size: int = core_config.BULK_IMPORT_BATCH_SIZE,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+
+
+def init_parse_worker() -> None:
+    """
+    Initialize a parse worker process.
+
+    Sets up file logging and leaves reverse geocoding to the writer,
+    which resolves the locations of a whole batch at once.
+    """
+    core_logger.setup_main_logger()
+    core_config.REVERSE_GEO_DEFERRED = True
+
+
+def parse_bulk_import_file(user_id: int, file_path: str) -> dict[str, Any]:
+    """
+    Parse a single bulk import file into activity objects.
+
+    Runs inside a worker process with its own database session.
+    Errors are caught and returned so one bad file never stops the
+    rest of the import.
+
+    Args:
+        user_id: ID of the user importing the file.
+        file_path: Path of the file to parse.
+
+    Returns:
+        Dictionary with the (possibly decompressed) file path, its
+        extension, the parsed activities and an error message or
+        None.
+    """
+    result = {
+        "file_path": file_path,
+        "file_extension": None,
+        "activities": [],
+        "error": None,
+    }
+
+    try:
+        _, file_extension = os.path.splitext(file_path)
+        if file_extension.lower() == ".gz":
+            file_path, file_extension = activities_utils.handle_gzipped_file(
+                file_path
+            )
+            result["file_path"] = file_path
+        result["file_extension"] = file_extension
+
+        with SessionLocal() as db:
+            user_privacy_settings = (
+                users_privacy_settings_crud.get_user_privacy_settings_by_user_id(
+                    user_id, db
+                )
+            )
+
+            parsed_info = activities_utils.parse_file(
+                user_id,
+                user_privacy_settings,
+                file_extension,
+                file_path,
+                db,
+            )
+
+            if parsed_info is None:
+                return result
+
+            if file_extension.lower() == ".fit":
+                # Split the records by activity (check for multiple activities in the file)
+                split_records_by_activity = fit_utils.split_records_by_activity(
+                    parsed_info
+                )
+                result["activities"] = fit_utils.create_activity_objects(
+                    split_records_by_activity,
+                    user_id,
+                    user_privacy_settings,
+                    None,
+                    None,
+                    db,
+                )
+            else:
+                result["activities"] = [parsed_info]
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Bulk file import: Error while parsing {file_path} - {str(err)}",
+            "error",
+            exc=err,
+        )
+        result["error"] = str(err)
+
+    return result
+
+
+class BulkImportService:
+    """
+    Service for importing the files of the bulk_import directory.
+
+    Attributes:
+        user_id: ID of the user importing the files.
+        websocket_manager: WebSocket manager for updates.
+        loop: Event loop owning the WebSocket connections.
+        config: Bulk import configuration.
+        counts: Number of files and activities processed.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        websocket_manager: websocket_manager.WebSocketManager,
+        loop: asyncio.AbstractEventLoop | None = None,
+        config: BulkImportConfig | None = None,
+    ):
+        """
+        Initialize the bulk import service.
+
+        Args:
+            user_id: ID of the user importing the files.
+            websocket_manager: WebSocket manager for updates.
+            loop: Event loop owning the WebSocket connections.
+                Progress and notifications are not sent if None.
+            config: Bulk import configuration, defaults from env.
+        """
+        self.user_id = user_id
+        self.websocket_manager = websocket_manager
+        self.loop = loop
+        self.config = config or BulkImportConfig()
+        self.counts = {
+            "files_total": 0,
+            "files_processed": 0,
+            "files_failed": 0,
+            "files_skipped": 0,
+            "activities": 0,
+        }
+
+    def import_files(self, file_paths: list[str]) -> dict[str, int]:
+        """
+        Parse files in parallel and store them in batches.
+
+        Blocking; meant to run in a background thread.
+
+        Args:
+            file_paths: List of file paths to import.
+
+        Returns:
+            Dictionary with file and activity counts.
+        """
+        start_time = time.monotonic()
+        self.counts["files_total"] = len(file_paths)
+
+        with SessionLocal() as db:
+            if users_crud.get_user_by_id(self.user_id, db) is None:
+                core_logger.print_to_log_and_console(
+                    f"Bulk import aborted: user {self.user_id} not found", "error"
+                )
+                return self.counts
+
+            content_hashes = self._skip_known_files(file_paths, db)
+            file_paths = list(content_hashes)
+
+            if not file_paths:
+                self._report_progress(done=True)
+                return self.counts
+
+            max_workers = min(self.config.max_workers, len(file_paths))
+            core_logger.print_to_log_and_console(
+                f"Bulk import: parsing {len(file_paths)} files with "
+                f"{max_workers} worker processes"
+            )
+
+            pending_batch: list[dict[str, Any]] = []
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_parse_worker,
+            ) as executor:
+                futures = {
+                    executor.submit(parse_bulk_import_file, self.user_id, path): path
+                    for path in file_paths
+                }
+
+                for future in as_completed(futures):
+                    try:
+                        parsed_file = future.result()
+                    except Exception as err:
+                        # The worker process died (e.g. out of memory)
+                        parsed_file = {
+                            "file_path": futures[future],
+                            "file_extension": None,
+                            "activities": [],
+                            "error": str(err),
+                        }
+
+                    if parsed_file["error"] is not None:
+                        self._handle_failed_file(parsed_file)
+                        continue
+
+                    parsed_file["content_hash"] = content_hashes[futures[future]]
+
+                    if not parsed_file["activities"]:
+                        self._finish_file()
+                        continue
+
+                    pending_batch.append(parsed_file)
+                    if len(pending_batch) >= self.config.batch_size:
+                        self._store_files(pending_batch, db)
+                        pending_batch = []
+
+            if pending_batch:
+                self._store_files(pending_batch, db)
+
+        elapsed = time.monotonic() - start_time
+        core_logger.print_to_log_and_console(
+            f"Bulk import completed for user {self.user_id}: "
+            f"{self.counts['files_processed']} files processed, "
+            f"{self.counts['files_failed']} failed, "
+            f"{self.counts['files_skipped']} skipped as already imported, "
+            f"{self.counts['activities']} activities created in {elapsed:.1f}s"
+        )
+        self._report_progress(done=True)
+
+        return self.counts
+
+    def _skip_known_files(
+        self, file_paths: list[str], db: Session
+    ) -> dict[str, str | None]:
+        """
+        Skip the files already imported, before parsing them.
+
+        A file is skipped if the user has an activity imported from a file
+        with the same content hash, or if an identical file comes earlier in
+        the list. Skipped files are moved to the processed directory.
+
+        Args:
+            file_paths: List of file paths to import.
+            db: Database session.
+
+        Returns:
+            Content hash of each file to parse, by path, None if the file
+            can't be read.
+        """
+        content_hashes = {}
+        for file_path in file_paths:
+            try:
+                content_hashes[file_path] = activity_fingerprints_utils.hash_file(
+                    file_path
+                )
+            except OSError as err:
+                # Left to the parse stage, which reports the error
+                core_logger.print_to_log(
+                    f"Bulk file import: Unable to hash {file_path} - {str(err)}",
+                    "warning",
+                )
+                content_hashes[file_path] = None
+
+        known_hashes = activity_fingerprints_crud.get_known_content_hashes(
+            self.user_id,
+            [content_hash for content_hash in content_hashes.values() if content_hash],
+            db,
+        )
+
+        to_parse = {}
+        for file_path, content_hash in content_hashes.items():
+            if content_hash is not None and content_hash in known_hashes:
+                self._skip_file(file_path)
+                continue
+            if content_hash is not None:
+                known_hashes.add(content_hash)
+            to_parse[file_path] = content_hash
+
+        core_metrics.count_skipped_imports("bulk_import", self.counts["files_skipped"])
+        return to_parse
+
+    def _skip_file(self, file_path: str) -> None:
+        """
+        Move a file already imported to the processed directory.
+
+        Args:
+            file_path: Path of the file.
+        """
+        try:
+            activities_utils.move_file(
+                core_config.FILES_PROCESSED_DIR,
+                os.path.basename(file_path),
+                file_path,
+            )
+            core_logger.print_to_log(
+                f"Bulk file import: {file_path} was already imported, skipped"
+            )
+        except Exception:
+            core_logger.print_to_log_and_console(
+                f"Bulk file import: Failed to move {file_path} "
+                "to the processed directory.",
+                "warning",
+            )
+
+        self.counts["files_skipped"] += 1
+        self._finish_file()
+
+    def _store_files(self, parsed_files: list[dict[str, Any]], db: Session) -> None:
+        """
+        Store parsed files in a single transaction.
+
+        If the batch fails, each file is retried in its own
+        transaction so only the offending file is rejected.
+
+        Args:
+            parsed_files: Parsed file results from the workers.
+            db: Database session.
+        """
+        # The workers don't geocode, resolve the batch in one pass
+        try:
+            activities_utils.geocode_parsed_activities(
+                [
+                    parsed_info
+                    for parsed_file in parsed_files
+                    for parsed_info in parsed_file["activities"]
+                ]
+            )
+        except Exception as err:
+            core_logger.print_to_log(
+                f"Bulk file import: Unable to resolve the batch locations - {str(err)}",
+                "warning",
+            )
+
+        try:
+            created = [
+                (parsed_file, self._add_file_activities(parsed_file, db))
+                for parsed_file in parsed_files
+            ]
+            db.commit()
+        except Exception as err:
+            db.rollback()
+            if len(parsed_files) > 1:
+                core_logger.print_to_log(
+                    f"Bulk file import: batch of {len(parsed_files)} files failed, "
+                    f"retrying files individually - {str(err)}",
+                    "warning",
+                )
+                for parsed_file in parsed_files:
+                    self._store_files([parsed_file], db)
+                return
+
+            parsed_files[0]["error"] = str(err)
+            self._handle_failed_file(parsed_files[0])
+            return
+
+        for parsed_file, activities in created:
+            self._after_file_stored(parsed_file, activities, db)
+
+        # The AI insight jobs were enqueued with the activities
+        self._run_on_loop(
+            activity_ai_insight_jobs_utils.process_activity_ai_insight_jobs()
+        )
+
+    def _add_file_activities(
+        self, parsed_file: dict[str, Any], db: Session
+    ) -> list[tuple[Any, bool]]:
+        """
+        Add all activities of a parsed file to the session.
+
+        Args:
+            parsed_file: Parsed file result from a worker.
+            db: Database session.
+
+        Returns:
+            List of (activity, is_duplicate) tuples.
+        """
+        created = []
+        for parsed_info in parsed_file["activities"]:
+            activity, is_duplicate = activities_crud.add_activity(
+                parsed_info["activity"], db, parsed_file.get("content_hash")
+            )
+
+            activity_streams = activities_utils.parse_activity_streams_from_file(
+                parsed_info, activity.id
+            )
+            if activity_streams:
+                activity_streams_crud.create_activity_streams(
+                    activity_streams, db, commit=False
+                )
+
+            if parsed_info.get("laps") is not None:
+                activity_laps_crud.create_activity_laps(
+                    parsed_info["laps"], activity.id, db, commit=False
+                )
+
+            if parsed_info.get("workout_steps") is not None:
+                activity_workout_steps_crud.create_activity_workout_steps(
+                    parsed_info["workout_steps"], activity.id, db, commit=False
+                )
+
+            if parsed_info.get("sets") is not None:
+                activity_sets_crud.create_activity_sets(
+                    parsed_info["sets"], activity.id, db, commit=False
+                )
+
+            created.append((activity, is_duplicate))
+        return created
+
+    def _after_file_stored(
+        self,
+        parsed_file: dict[str, Any],
+        activities: list[tuple[Any, bool]],
+        db: Session,
+    ) -> None:
+        """
+        Move a stored file, notify the user and request AI insights.
+
+        Args:
+            parsed_file: Parsed file result from a worker.
+            activities: List of (activity, is_duplicate) tuples.
+            db: Database session.
+        """
+        ids_to_file_name = "_".join(str(activity.id) for activity, _ in activities)
+        new_file_name = f"{ids_to_file_name}{parsed_file['file_extension']}"
+        try:
+            activities_utils.move_file(
+                core_config.FILES_PROCESSED_DIR,
+                new_file_name,
+                parsed_file["file_path"],
+            )
+            core_logger.print_to_log_and_console(
+                f"Bulk file import: File successfully processed and moved. "
+                f"{parsed_file['file_path']} - has become {new_file_name}"
+            )
+        except Exception:
+            core_logger.print_to_log_and_console(
+                f"Bulk file import: Failed to move {parsed_file['file_path']} "
+                "to the processed directory.",
+                "warning",
+            )
+
+        for activity, is_duplicate in activities:
+            if is_duplicate:
+                self._run_on_loop(
+                    notifications_utils.create_new_duplicate_start_time_activity_notification(
+                        activity.user_id, activity.id, self.websocket_manager
+                    )
+                )
+            else:
+                self._run_on_loop(
+                    notifications_utils.create_new_activity_notification(
+                        activity.user_id, activity.id, self.websocket_manager
+                    )
+                )
+
+        self.counts["activities"] += len(activities)
+        self._finish_file()
+
+    def _handle_failed_file(self, parsed_file: dict[str, Any]) -> None:
+        """
+        Move a file that failed to import to the errors directory.
+
+        Args:
+            parsed_file: Parsed file result with an error message.
+        """
+        file_path = parsed_file["file_path"]
+        try:
+            error_file_dir = core_config.FILES_BULK_IMPORT_IMPORT_ERRORS_DIR
+            os.makedirs(error_file_dir, exist_ok=True)
+            activities_utils.move_file(
+                error_file_dir, os.path.basename(file_path), file_path
+            )
+            core_logger.print_to_log_and_console(
+                f"Bulk file import: Due to import error, file {file_path} has been "
+                f"moved to {error_file_dir}"
+            )
+        except Exception:
+            core_logger.print_to_log_and_console(
+                f"Bulk file import: Failed to move the error-producing file "
+                f"{file_path} to the import-error directory."
+            )
+
+        self.counts["files_failed"] += 1
+        self._finish_file()
+
+    def _finish_file(self) -> None:
+        """Count a processed file and report progress."""
+        self.counts["files_processed"] += 1
+        self._report_progress()
+
+    def _report_progress(self, done: bool = False) -> None:
+        """
+        Send bulk import progress to the user over WebSocket.
+
+        Args:
+            done: Whether the import has finished.
+        """
+        self._run_on_loop(
+            websocket_utils.notify_frontend(
+                self.user_id,
+                self.websocket_manager,
+                {
+                    "message": "BULK_IMPORT_PROGRESS",
+                    "files_total": self.counts["files_total"],
+                    "files_processed": self.counts["files_processed"],
+                    "files_failed": self.counts["files_failed"],
+                    "files_skipped": self.counts["files_skipped"],
+                    "activities": self.counts["activities"],
+                    "done": done,
+                },
+            )
+        )
+
+    def _run_on_loop(self, coroutine) -> None:
+        """
+        Schedule a coroutine on the event loop owning the sockets.
+
+        Args:
+            coroutine: Coroutine to schedule without waiting.
+        """
+        if self.loop is None or self.loop.is_closed():
+            coroutine.close()
+            return
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        future.add_done_callback(_log_future_error)
+
+
+def _log_future_error(future) -> None:
+    if future.cancelled() or future.exception() is None:
+        return
+    core_logger.print_to_log(
+        f"Bulk file import: background notification failed - {future.exception()}",
+        "warning",
+    )
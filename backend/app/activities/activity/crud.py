@@ -1,16 +1,22 @@
 from datetime import date, datetime
-from urllib.parse import unquote
 
 import activities.activity.models as activities_models
 import activities.activity.schema as activities_schema
+import activities.activity.search as activities_search
 import activities.activity.utils as activities_utils
-import activities.activity_ai_insights.utils as activity_ai_insights_utils
+import activities.activity_ai_insight_jobs.crud as activity_ai_insight_jobs_crud
+import activities.activity_ai_insight_jobs.utils as activity_ai_insight_jobs_utils
+import activities.activity_daily_rollups.crud as activity_daily_rollups_crud
+import activities.activity_daily_rollups.utils as activity_daily_rollups_utils
+import activities.activity_fingerprints.crud as activity_fingerprints_crud
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
 
 import users.user_activity_stats.crud as user_stats_crud
 
 import followers.models as followers_models
 
 import core.logger as core_logger
+import core.pagination as core_pagination
 import core.sanitization as core_sanitization
 
 import notifications.utils as notifications_utils
@@ -21,7 +27,7 @@ import websocket.manager as websocket_manager
 
 from fastapi import HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy import and_, desc, func, or_
+from sqlalchemy import and_, desc, func, literal_column, or_
 from sqlalchemy.orm import Session, joinedload
 
 
@@ -86,50 +92,18 @@ def get_user_activities(
 ) -> list[activities_schema.Activity] | None:
     try:
         # Base query
-        query = db.query(activities_models.Activity).filter(
-            activities_models.Activity.user_id == user_id
+        query = _filter_user_activities(
+            db.query(activities_models.Activity).filter(
+                activities_models.Activity.user_id == user_id
+            ),
+            user_id,
+            db,
+            activity_type,
+            start_date,
+            end_date,
+            name_search,
         )
 
-        # Apply filters
-        if activity_type:
-            # add filter for activity type
-            query = query.filter(
-                activities_models.Activity.activity_type == activity_type
-            )
-
-        if start_date:
-            # add filter for start date
-            query = query.filter(
-                func.date(activities_models.Activity.start_time) >= start_date
-            )
-
-        if end_date:
-            # add filter for end date
-            query = query.filter(
-                func.date(activities_models.Activity.start_time) <= end_date
-            )
-
-        if name_search:
-            # Decode and prepare search term
-            search_term = unquote(name_search).replace("+", " ").lower()
-            # Apply search across name, town, city, and country
-            query = query.filter(
-                or_(
-                    func.lower(activities_models.Activity.name).like(
-                        f"%{search_term}%"
-                    ),
-                    func.lower(activities_models.Activity.town).like(
-                        f"%{search_term}%"
-                    ),
-                    func.lower(activities_models.Activity.city).like(
-                        f"%{search_term}%"
-                    ),
-                    func.lower(activities_models.Activity.country).like(
-                        f"%{search_term}%"
-                    ),
-                )
-            )
-
         # Apply sorting
         query = query.order_by(desc(activities_models.Activity.start_time))
 
@@ -225,6 +199,122 @@ def get_user_activities_by_user_id_and_garminconnect_gear_set(
         ) from err
 
 
+# Sort keys of the activities lists, nullable columns are coalesced so
+# they can be compared in keyset cursors. Literal defaults keep the
+# expressions identical to the ones of the activities expression indexes.
+_NULL_NUMBER = literal_column("-999999")
+_ACTIVITIES_SORT_COLUMNS = {
+    "type": (activities_models.Activity.activity_type,),
+    "name": (func.coalesce(activities_models.Activity.name, literal_column("''")),),
+    "start_time": (activities_models.Activity.start_time,),
+    "duration": (activities_models.Activity.total_timer_time,),
+    "distance": (activities_models.Activity.distance,),
+    "calories": (func.coalesce(activities_models.Activity.calories, _NULL_NUMBER),),
+    "elevation": (
+        func.coalesce(activities_models.Activity.elevation_gain, _NULL_NUMBER),
+    ),
+    "pace": (func.coalesce(activities_models.Activity.pace, _NULL_NUMBER),),
+    "average_hr": (
+        func.coalesce(activities_models.Activity.average_hr, _NULL_NUMBER),
+    ),
+    "location": (
+        func.coalesce(activities_models.Activity.country, literal_column("''")),
+        func.coalesce(activities_models.Activity.city, literal_column("''")),
+        func.coalesce(activities_models.Activity.town, literal_column("''")),
+    ),
+}
+
+
+def _activities_sort_columns(sort_by: str | None) -> tuple:
+    """
+    Return the sort key of an activities list.
+
+    The activity ID ends every sort key, so activities with the same value
+    keep a stable order between pages.
+
+    Args:
+        sort_by: Sort option of the activities list, defaults to start time.
+
+    Returns:
+        Tuple of column expressions to sort by.
+    """
+    return _ACTIVITIES_SORT_COLUMNS.get(
+        sort_by, _ACTIVITIES_SORT_COLUMNS["start_time"]
+    ) + (activities_models.Activity.id,)
+
+
+def _filter_user_activities(
+    query,
+    user_id: int,
+    db: Session,
+    activity_type: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    name_search: str | None = None,
+    user_is_owner: bool = True,
+):
+    """
+    Apply the filters of the user activities list to a query.
+
+    Args:
+        query: Query on activities.
+        user_id: ID of the user owning the activities.
+        db: Database session.
+        activity_type: Activity type to keep.
+        start_date: First day of the activities to keep.
+        end_date: Last day of the activities to keep.
+        name_search: Text searched in the name, description, location and
+            gear of activities, see activities.activity.search.
+        user_is_owner: Whether the requester owns the activities.
+
+    Returns:
+        The filtered query.
+    """
+    if activity_type:
+        # add filter for activity type
+        query = query.filter(activities_models.Activity.activity_type == activity_type)
+
+    if start_date:
+        # add filter for start date
+        query = query.filter(
+            func.date(activities_models.Activity.start_time) >= start_date
+        )
+
+    if end_date:
+        # add filter for end date
+        query = query.filter(func.date(activities_models.Activity.start_time) <= end_date)
+
+    if name_search:
+        # Indexed search across name, description, location and gear
+        terms = activities_search.search_terms(name_search)
+        query = query.filter(
+            activities_search.search_condition(
+                terms,
+                activities_search.get_matching_gear(user_id, terms, db),
+                db,
+                user_is_owner,
+            )
+        )
+
+    return query
+
+
+def _hide_activity_private_fields(activity: activities_models.Activity) -> None:
+    """Clear the fields of an activity its owner hid from other users."""
+    activity.private_notes = None
+    if activity.hide_start_time:
+        activity.start_time = None
+        activity.end_time = None
+    if activity.hide_location:
+        activity.city = None
+        activity.town = None
+        activity.country = None
+    if activity.hide_gear:
+        activity.gear_id = None
+        activity.strava_gear_id = None
+        activity.garminconnect_gear_id = None
+
+
 def get_user_activities_with_pagination(
     user_id: int,
     db: Session,
@@ -239,105 +329,27 @@ def get_user_activities_with_pagination(
     user_is_owner: bool = False,
 ) -> list[activities_schema.Activity] | None:
     try:
-        # Mapping from frontend sort keys to database model fields
-        SORT_MAP = {
-            "type": activities_models.Activity.activity_type,
-            "name": activities_models.Activity.name,
-            "start_time": activities_models.Activity.start_time,
-            "duration": activities_models.Activity.total_timer_time,
-            "distance": activities_models.Activity.distance,
-            "calories": activities_models.Activity.calories,
-            "elevation": activities_models.Activity.elevation_gain,
-            "pace": activities_models.Activity.pace,
-            "average_hr": activities_models.Activity.average_hr,
-        }
-
         # Base query
-        query = db.query(activities_models.Activity).filter(
-            activities_models.Activity.user_id == user_id,
+        query = _filter_user_activities(
+            db.query(activities_models.Activity).filter(
+                activities_models.Activity.user_id == user_id,
+            ),
+            user_id,
+            db,
+            activity_type,
+            start_date,
+            end_date,
+            name_search,
+            user_is_owner,
         )
 
-        # Apply filters
-        if activity_type:
-            # add filter for activity type
-            query = query.filter(
-                activities_models.Activity.activity_type == activity_type
-            )
-
-        if start_date:
-            # add filter for start date
-            query = query.filter(
-                func.date(activities_models.Activity.start_time) >= start_date
-            )
-
-        if end_date:
-            # add filter for end date
-            query = query.filter(
-                func.date(activities_models.Activity.start_time) <= end_date
-            )
-
-        if name_search:
-            # Decode and prepare search term
-            search_term = unquote(name_search).replace("+", " ").lower()
-            # Apply search across name, town, city, and country
-            query = query.filter(
-                or_(
-                    func.lower(activities_models.Activity.name).like(
-                        f"%{search_term}%"
-                    ),
-                    func.lower(activities_models.Activity.town).like(
-                        f"%{search_term}%"
-                    ),
-                    func.lower(activities_models.Activity.city).like(
-                        f"%{search_term}%"
-                    ),
-                    func.lower(activities_models.Activity.country).like(
-                        f"%{search_term}%"
-                    ),
-                )
-            )
-
         # Apply sorting
         sort_ascending = sort_order and sort_order.lower() == "asc"
-
-        if sort_by == "location":
-            # Special handling for location: sort by country, then city, then town
-            # Handle nulls by using COALESCE with a maximum value for DESC or minimum value for ASC
-            if sort_ascending:
-                query = query.order_by(
-                    func.coalesce(activities_models.Activity.country, "").asc(),
-                    func.coalesce(activities_models.Activity.city, "").asc(),
-                    func.coalesce(activities_models.Activity.town, "").asc(),
-                )
-            else:
-                query = query.order_by(
-                    func.coalesce(activities_models.Activity.country, "").desc(),
-                    func.coalesce(activities_models.Activity.city, "").desc(),
-                    func.coalesce(activities_models.Activity.town, "").desc(),
-                )
+        sort_columns = _activities_sort_columns(sort_by)
+        if sort_ascending:
+            query = query.order_by(*(column.asc() for column in sort_columns))
         else:
-            # Standard sorting for other columns
-            sort_column = SORT_MAP.get(sort_by, activities_models.Activity.start_time)
-
-            # For numeric columns, use COALESCE with a very small/large number
-            if sort_column in [
-                activities_models.Activity.distance,
-                activities_models.Activity.total_timer_time,
-                activities_models.Activity.calories,
-                activities_models.Activity.elevation_gain,
-                activities_models.Activity.pace,
-                activities_models.Activity.average_hr,
-            ]:
-                if sort_ascending:
-                    query = query.order_by(func.coalesce(sort_column, -999999).asc())
-                else:
-                    query = query.order_by(func.coalesce(sort_column, -999999).desc())
-            # For string/date columns
-            else:
-                if sort_ascending:
-                    query = query.order_by(sort_column.asc())
-                else:
-                    query = query.order_by(sort_column.desc())
+            query = query.order_by(*(column.desc() for column in sort_columns))
 
         # Apply pagination
         paginated_query = query.offset((page_number - 1) * num_records).limit(
@@ -352,18 +364,7 @@ def get_user_activities_with_pagination(
         if activities:
             for activity in activities:
                 if not user_is_owner:
-                    activity.private_notes = None
-                    if activity.hide_start_time:
-                        activity.start_time = None
-                        activity.end_time = None
-                    if activity.hide_location:
-                        activity.city = None
-                        activity.town = None
-                        activity.country = None
-                    if activity.hide_gear:
-                        activity.gear_id = None
-                        activity.strava_gear_id = None
-                        activity.garminconnect_gear_id = None
+                    _hide_activity_private_fields(activity)
                 serialized_activities.append(
                     activities_utils.serialize_activity(activity)
                 )
@@ -383,6 +384,95 @@ def get_user_activities_with_pagination(
         ) from err
 
 
+def get_user_activities_with_cursor(
+    user_id: int,
+    db: Session,
+    num_records: int = 5,
+    cursor: str | None = None,
+    activity_type: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    name_search: str | None = None,
+    sort_by: str | None = None,
+    sort_order: str | None = None,
+    user_is_owner: bool = False,
+) -> tuple[list[activities_schema.Activity], str | None]:
+    """
+    Get a page of the activities of a user after a cursor.
+
+    Unlike get_user_activities_with_pagination, the page is read from an
+    index seek after the sort key of the cursor, so every page costs the
+    same however deep the client scrolled.
+
+    Args:
+        user_id: The ID of the user.
+        db: Database session.
+        num_records: Number of activities per page.
+        cursor: Cursor returned with the previous page, None for the first.
+        activity_type: Activity type to keep.
+        start_date: First day of the activities to keep.
+        end_date: Last day of the activities to keep.
+        name_search: Text searched in the name and location of activities.
+        sort_by: Sort option, defaults to start time.
+        sort_order: "asc" or "desc", defaults to "desc".
+        user_is_owner: Whether the requester owns the activities.
+
+    Returns:
+        Tuple of the activities of the page and the cursor of the next page,
+        or None on the last page.
+
+    Raises:
+        HTTPException: 422 if the cursor is invalid, 500 on internal server
+            error.
+    """
+    try:
+        sort_ascending = bool(sort_order and sort_order.lower() == "asc")
+        sort_columns = _activities_sort_columns(sort_by)
+        if sort_by not in _ACTIVITIES_SORT_COLUMNS:
+            sort_by = "start_time"
+        scope = f"activities:{sort_by}:{'asc' if sort_ascending else 'desc'}"
+        cursor_values = (
+            core_pagination.decode_cursor(cursor, scope) if cursor else None
+        )
+
+        query = _filter_user_activities(
+            db.query(activities_models.Activity, *sort_columns).filter(
+                activities_models.Activity.user_id == user_id,
+            ),
+            user_id,
+            db,
+            activity_type,
+            start_date,
+            end_date,
+            name_search,
+            user_is_owner,
+        )
+        rows = core_pagination.paginate_by_keyset(
+            query, sort_columns, not sort_ascending, cursor_values, num_records
+        ).all()
+
+        # The cursor is built from the stored values, before hiding fields
+        activities, next_cursor = core_pagination.split_page(rows, num_records, scope)
+        for activity in activities:
+            activities_utils.serialize_activity(activity)
+            if not user_is_owner:
+                _hide_activity_private_fields(activity)
+
+        return activities, next_cursor
+    except HTTPException:
+        raise
+    except Exception as err:
+        # Log the exception
+        core_logger.print_to_log(
+            f"Error in get_user_activities_with_cursor: {err}", "error", exc=err
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_distinct_activity_types_for_user(user_id: int, db: Session):
     try:
         # Query distinct activity types (IDs) for the user
@@ -662,7 +752,10 @@ def get_user_following_activities_with_pagination(
                 activities_models.Activity.is_hidden.is_(False),
                 activities_models.Activity.strava_activity_id.is_(None),
             )
-            .order_by(desc(activities_models.Activity.start_time))
+            .order_by(
+                desc(activities_models.Activity.start_time),
+                desc(activities_models.Activity.id),
+            )
             .offset((page_number - 1) * num_records)
             .limit(num_records)
             .all()
@@ -704,6 +797,81 @@ def get_user_following_activities_with_pagination(
         ) from err
 
 
+def get_user_following_activities_with_cursor(
+    user_id: int, num_records: int, cursor: str | None, db: Session
+) -> tuple[list[activities_schema.Activity], str | None]:
+    """
+    Get a page of the activities of the users a user follows after a cursor.
+
+    Activities are sorted by start time, newest first.
+
+    Args:
+        user_id: The ID of the following user.
+        num_records: Number of activities per page.
+        cursor: Cursor returned with the previous page, None for the first.
+        db: Database session.
+
+    Returns:
+        Tuple of the activities of the page and the cursor of the next page,
+        or None on the last page.
+
+    Raises:
+        HTTPException: 422 if the cursor is invalid, 500 on internal server
+            error.
+    """
+    try:
+        scope = "following_activities:start_time:desc"
+        sort_columns = (
+            activities_models.Activity.start_time,
+            activities_models.Activity.id,
+        )
+        cursor_values = (
+            core_pagination.decode_cursor(cursor, scope) if cursor else None
+        )
+
+        query = (
+            db.query(activities_models.Activity, *sort_columns)
+            .join(
+                followers_models.Follower,
+                followers_models.Follower.following_id
+                == activities_models.Activity.user_id,
+            )
+            .filter(
+                and_(
+                    followers_models.Follower.follower_id == user_id,
+                    followers_models.Follower.is_accepted,
+                ),
+                activities_models.Activity.visibility.in_([0, 1]),
+                activities_models.Activity.is_hidden.is_(False),
+                activities_models.Activity.strava_activity_id.is_(None),
+            )
+        )
+        rows = core_pagination.paginate_by_keyset(
+            query, sort_columns, True, cursor_values, num_records
+        ).all()
+
+        activities, next_cursor = core_pagination.split_page(rows, num_records, scope)
+        for activity in activities:
+            activities_utils.serialize_activity(activity)
+            _hide_activity_private_fields(activity)
+
+        return activities, next_cursor
+    except HTTPException:
+        raise
+    except Exception as err:
+        # Log the exception
+        core_logger.print_to_log(
+            f"Error in get_user_following_activities_with_cursor: {err}",
+            "error",
+            exc=err,
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
 def get_user_following_activities(user_id, db):
     try:
         # Get the activities from the database
@@ -809,7 +977,10 @@ def get_user_activities_by_gear_id_and_user_id_with_pagination(
                 activities_models.Activity.user_id == user_id,
                 activities_models.Activity.gear_id == gear_id,
             )
-            .order_by(desc(activities_models.Activity.start_time))
+            .order_by(
+                desc(activities_models.Activity.start_time),
+                desc(activities_models.Activity.id),
+            )
             .offset((page_number - 1) * num_records)
             .limit(num_records)
             .all()
@@ -1140,22 +1311,104 @@ def get_activity_by_garminconnect_id_from_user_id(
         ) from err
 
 
-def get_activities_if_contains_name(name: str, user_id: int, db: Session):
+def _query_search_user_activities(
+    user_id: int, terms: list[str], matching_gear: dict, db: Session
+):
+    """
+    Query the activities of a user matching a search, most relevant first.
+
+    Args:
+        user_id: ID of the user owning the activities.
+        terms: Search terms, see activities.activity.search.search_terms.
+        matching_gear: Gear matched by each term.
+        db: Database session.
+
+    Returns:
+        Query of (activity, rank) rows.
+    """
+    rank = activities_search.search_rank(terms, db).label("rank")
+    return (
+        db.query(activities_models.Activity, rank)
+        .filter(
+            activities_models.Activity.user_id == user_id,
+            activities_search.search_condition(terms, matching_gear, db),
+        )
+        .order_by(
+            desc(rank),
+            desc(activities_models.Activity.start_time),
+            desc(activities_models.Activity.id),
+        )
+    )
+
+
+def search_user_activities(
+    user_id: int, search: str, db: Session, num_records: int = 10
+) -> list[activities_schema.ActivitySearchResult]:
+    """
+    Search the activities of a user, ranked and highlighted.
+
+    Args:
+        user_id: ID of the user searching their activities.
+        search: Searched text, see activities.activity.search.
+        db: Database session.
+        num_records: Highest number of results.
+
+    Returns:
+        The matching activities, most relevant first.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
     try:
-        # Define a search term
-        partial_name = unquote(name).replace("+", " ").lower()
+        terms = activities_search.search_terms(search)
+        if not terms:
+            return []
 
-        # Get the activities from the database
-        activities = (
-            db.query(activities_models.Activity)
-            .filter(
-                activities_models.Activity.user_id == user_id,
-                func.lower(activities_models.Activity.name).like(f"%{partial_name}%"),
-            )
-            .order_by(desc(activities_models.Activity.start_time))
+        matching_gear = activities_search.get_matching_gear(user_id, terms, db)
+        rows = (
+            _query_search_user_activities(user_id, terms, matching_gear, db)
+            .limit(num_records)
             .all()
         )
 
+        return [
+            activities_schema.ActivitySearchResult(
+                activity=activities_utils.serialize_activity(activity),
+                rank=float(rank),
+                highlights=activities_search.highlight_activity(
+                    activity, terms, matching_gear
+                ),
+            )
+            for activity, rank in rows
+        ]
+    except Exception as err:
+        # Log the exception
+        core_logger.print_to_log(
+            f"Error in search_user_activities: {err}", "error", exc=err
+        )
+        # Raise an HTTPException with a 500 Internal Server Error status code
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_activities_if_contains_name(name: str, user_id: int, db: Session):
+    try:
+        # Split the searched text into terms
+        terms = activities_search.search_terms(name)
+
+        # Get the matching activities from the database, most relevant first
+        activities = [
+            activity
+            for activity, _rank in _query_search_user_activities(
+                user_id,
+                terms,
+                activities_search.get_matching_gear(user_id, terms, db),
+                db,
+            ).all()
+        ]
+
         # Check if there are activities if not return None
         if not activities:
             return None
@@ -1191,46 +1444,104 @@ def get_activities_if_contains_name(name: str, user_id: int, db: Session):
         ) from err
 
 
+def add_activity(
+    activity: activities_schema.Activity,
+    db: Session,
+    content_hash: str | None = None,
+) -> tuple[activities_schema.Activity, bool]:
+    """
+    Add an activity to the session without committing the transaction.
+
+    The session is flushed so the activity gets its ID, allowing callers to
+    insert dependent rows (streams, laps, sets) in the same transaction. The
+    daily rollup of the activity is refreshed, its fingerprint is stored and
+    its AI insight job is enqueued in the same transaction.
+
+    Args:
+        activity: The activity to add.
+        db: The database session.
+        content_hash: Hash of the file the activity was imported from, None
+            if it wasn't imported from a file.
+
+    Returns:
+        Tuple with the activity (ID and creation date set) and whether an
+        activity with the same start time already existed for the user.
+    """
+    # Check if already is an activity created with the same start time
+    activity_start_time_exists = get_activity_by_start_time(
+        activity.start_time, activity.user_id, db
+    )
+
+    if activity_start_time_exists:
+        activity.is_hidden = True
+
+    # Create a new activity
+    new_activity = activities_utils.transform_schema_activity_to_model_activity(
+        activity
+    )
+
+    # Add the activity to the session and flush to get its ID
+    db.add(new_activity)
+    db.flush()
+
+    activity.id = new_activity.id
+    activity.created_at = new_activity.created_at
+
+    # Keep the summaries of the activity's day up to date
+    activity_daily_rollups_crud.refresh_daily_rollups(
+        {
+            activity_daily_rollups_utils.get_rollup_key(
+                new_activity.user_id,
+                new_activity.start_time,
+                new_activity.activity_type,
+            )
+        },
+        db,
+    )
+
+    # Let the importers skip the activity if it comes again
+    activity_fingerprints_crud.create_activity_fingerprint(
+        new_activity.user_id,
+        new_activity.id,
+        activity_fingerprints_utils.activity_signature(new_activity.start_time),
+        content_hash,
+        db,
+        commit=False,
+    )
+
+    # Generate the AI insight in the background
+    activity_ai_insight_jobs_crud.create_job(
+        activity.id, activity.user_id, db, commit=False
+    )
+
+    return activity, activity_start_time_exists is not None
+
+
 async def create_activity(
     activity: activities_schema.Activity,
     websocket_manager: websocket_manager.WebSocketManager,
     db: Session,
     create_notification: bool = True,
+    content_hash: str | None = None,
 ) -> activities_schema.Activity:
     try:
-        # Check if already is an activity created with the same start time
-        activity_start_time_exists = get_activity_by_start_time(
-            activity.start_time, activity.user_id, db
-        )
-
-        if activity_start_time_exists:
-            activity.is_hidden = True
-
-        # Create a new activity
-        new_activity = activities_utils.transform_schema_activity_to_model_activity(
-            activity
-        )
-
         # Add the activity to the database
-        db.add(new_activity)
+        activity, activity_start_time_exists = add_activity(activity, db, content_hash)
         db.commit()
-        db.refresh(new_activity)
-
-        activity.id = new_activity.id
-        activity.created_at = new_activity.created_at
 
         # Create a notification for the new activity
         if create_notification:
             if activity_start_time_exists:
                 await notifications_utils.create_new_duplicate_start_time_activity_notification(
-                    activity.user_id, new_activity.id, websocket_manager
+                    activity.user_id, activity.id, websocket_manager
                 )
             else:
                 await notifications_utils.create_new_activity_notification(
-                    activity.user_id, new_activity.id, websocket_manager
+                    activity.user_id, activity.id, websocket_manager
                 )
 
-        activity_ai_insights_utils.get_activity_ai_insights(activity, db)
+        # Start generating the AI insight without waiting for it
+        activity_ai_insight_jobs_utils.wake_activity_ai_insight_worker()
 
         # Return the activity
         return activity
@@ -1288,10 +1599,30 @@ def edit_activity(
                 activity_data["private_notes"]
             )
 
+        previous_rollup_key = activity_daily_rollups_utils.get_rollup_key(
+            db_activity.user_id, db_activity.start_time, db_activity.activity_type
+        )
+
         # Iterate over the fields and update the db_activity dynamically
         for key, value in activity_data.items():
             setattr(db_activity, key, value)
 
+        # Write the changes first, the rollups are computed by the database
+        db.flush()
+
+        # Refresh the days the activity was moved from and to
+        activity_daily_rollups_crud.refresh_daily_rollups(
+            {
+                previous_rollup_key,
+                activity_daily_rollups_utils.get_rollup_key(
+                    db_activity.user_id,
+                    db_activity.start_time,
+                    db_activity.activity_type,
+                ),
+            },
+            db,
+        )
+
         # Commit the transaction
         db.commit()
     except HTTPException as http_err:
@@ -1397,6 +1728,16 @@ def delete_activity(activity_id: int, db: Session):
         # Delete the activity
         db.query(activities_models.Activity).filter(activities_models.Activity.id == activity_id).delete()
 
+        # Remove the activity from its day's summaries
+        activity_daily_rollups_crud.refresh_daily_rollups(
+            {
+                activity_daily_rollups_utils.get_rollup_key(
+                    activity.user_id, activity.start_time, activity.activity_type
+                )
+            },
+            db,
+        )
+
         # Commit the transaction
         db.commit()
     except HTTPException as http_err:
@@ -0,0 +1,294 @@
+"""Lap generation for activities without recorded laps.
+
+Splits an activity into laps in a single pass over its streams:
+
+- Timestamps of every stream are parsed once into seconds
+- Lap boundaries are found by binary search over the cumulative distance
+  or elapsed time, advancing a cursor from lap to lap
+- Each stream is sliced per lap by binary search on its own timestamps
+- Averages come from prefix sums, so each sample is visited once
+
+Supported splits are distance based (e.g. 1 km or 5 km auto lap), time
+based (e.g. 10 minute auto lap) and custom, where the lap boundaries are
+given as explicit distance or time marks.
+"""
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+import activities.activity.metrics as activities_metrics
+
+LAP_SPLIT_DISTANCE = "distance"
+LAP_SPLIT_TIME = "time"
+
+# Default auto lap used for activities without recorded laps
+DEFAULT_LAP_DISTANCE_METERS = 1000.0
+
+
+@dataclass(frozen=True)
+class LapSplit:
+    """
+    Lap split definition.
+
+    Attributes:
+        kind: Axis the laps are split on, LAP_SPLIT_DISTANCE (meters) or
+            LAP_SPLIT_TIME (seconds).
+        length: Length of each lap for auto laps.
+        marks: Custom lap boundaries measured from the activity start,
+            used instead of length.
+    """
+
+    kind: str = LAP_SPLIT_DISTANCE
+    length: float | None = DEFAULT_LAP_DISTANCE_METERS
+    marks: Sequence[float] | None = None
+
+    def __post_init__(self):
+        if self.kind not in (LAP_SPLIT_DISTANCE, LAP_SPLIT_TIME):
+            raise ValueError(f"Invalid lap split kind: {self.kind}")
+        if self.marks is None and (self.length is None or self.length <= 0):
+            raise ValueError("Lap split length must be greater than 0")
+
+    @classmethod
+    def distance(cls, meters: float) -> "LapSplit":
+        """Auto lap every meters."""
+        return cls(kind=LAP_SPLIT_DISTANCE, length=meters)
+
+    @classmethod
+    def time(cls, seconds: float) -> "LapSplit":
+        """Auto lap every seconds."""
+        return cls(kind=LAP_SPLIT_TIME, length=seconds)
+
+    @classmethod
+    def custom(cls, kind: str, marks: Sequence[float]) -> "LapSplit":
+        """Laps ending at the given distance or time marks."""
+        return cls(kind=kind, length=None, marks=tuple(sorted(marks)))
+
+
+class _LapStream:
+    """
+    Stream parsed once for per lap slicing.
+
+    Attributes:
+        seconds: Non decreasing time of each waypoint in seconds.
+        values: Waypoint values, NaN where missing.
+        value_sums: Prefix sums of the values, NaN counted as 0.
+        value_counts: Prefix counts of the non NaN values.
+    """
+
+    def __init__(self, waypoints: list[dict], key: str):
+        waypoints = [
+            waypoint for waypoint in waypoints if waypoint["time"] is not None
+        ]
+        try:
+            seconds = activities_metrics.to_seconds(
+                [waypoint["time"] for waypoint in waypoints]
+            )
+            values = np.array(
+                [waypoint[key] for waypoint in waypoints], dtype=np.float64
+            )
+        except (ValueError, KeyError, TypeError):
+            seconds = np.empty(0, dtype=np.float64)
+            values = np.empty(0, dtype=np.float64)
+
+        valid = ~np.isnan(values)
+        self.seconds = np.maximum.accumulate(seconds) if seconds.size else seconds
+        self.values = values
+        self.value_sums = np.concatenate(
+            ([0.0], np.cumsum(np.where(valid, values, 0)))
+        )
+        self.value_counts = np.concatenate(([0], np.cumsum(valid)))
+
+    def lap_slice(self, start_seconds: float, end_seconds: float) -> slice:
+        """Return the waypoints between the times, both inclusive."""
+        start = np.searchsorted(self.seconds, start_seconds, side="left")
+        end = np.searchsorted(self.seconds, end_seconds, side="right")
+        return slice(int(start), int(end))
+
+    def avg_and_max(self, lap: slice) -> tuple[float | None, float | None]:
+        """Return the lap average and maximum, None if the lap has no waypoints."""
+        if lap.stop <= lap.start:
+            return None, None
+        count = self.value_counts[lap.stop] - self.value_counts[lap.start]
+        if count == 0:
+            return 0, 0
+        total = self.value_sums[lap.stop] - self.value_sums[lap.start]
+        return float(total / count), float(np.nanmax(self.values[lap]))
+
+    def valid(self, lap: slice) -> tuple[np.ndarray, np.ndarray]:
+        """Return the lap values and times without missing values."""
+        values = self.values[lap]
+        valid = ~np.isnan(values)
+        return values[valid], self.seconds[lap][valid]
+
+
+def find_lap_boundaries(progress: np.ndarray, lap_split: LapSplit) -> list[int]:
+    """
+    Find the waypoint indexes where laps start and end.
+
+    A lap ends on the first waypoint whose progress since the lap start
+    reaches the lap length (or the next custom mark) and the next lap
+    starts on that same waypoint. The remainder after the last boundary
+    becomes a final, shorter lap.
+
+    Args:
+        progress: Non decreasing cumulative distance or elapsed time of
+            each waypoint, starting at 0.
+        lap_split: Lap split definition.
+
+    Returns:
+        Sorted waypoint indexes, the first being 0 and the last the end
+        of the final lap. Empty if there are less than two waypoints.
+    """
+    if progress.size < 2:
+        return []
+
+    last = progress.size - 1
+    boundaries = [0]
+    marks = iter(lap_split.marks) if lap_split.marks is not None else None
+    start = 0
+
+    while True:
+        if marks is None:
+            target = progress[start] + lap_split.length
+        else:
+            target = next((mark for mark in marks if mark > progress[start]), None)
+            if target is None:
+                break
+
+        index = int(np.searchsorted(progress, target, side="left"))
+        if index > last:
+            break
+
+        boundaries.append(index)
+        start = index
+
+    # Add the final lap if there is progress after the last boundary
+    if progress[last] > progress[start]:
+        boundaries.append(last)
+
+    return boundaries
+
+
+def generate_activity_laps(
+    lat_lon_waypoints: list[dict],
+    ele_waypoints: list[dict],
+    power_waypoints: list[dict],
+    hr_waypoints: list[dict],
+    cad_waypoints: list[dict],
+    vel_waypoints: list[dict],
+    lap_split: LapSplit | None = None,
+) -> list[dict]:
+    """
+    Generate laps from the activity streams.
+
+    Args:
+        lat_lon_waypoints: Waypoints with "time", "lat" and "lon".
+        ele_waypoints: Waypoints with "time" and "ele".
+        power_waypoints: Waypoints with "time" and "power".
+        hr_waypoints: Waypoints with "time" and "hr".
+        cad_waypoints: Waypoints with "time" and "cad".
+        vel_waypoints: Waypoints with "time" and "vel".
+        lap_split: Lap split definition, 1 km auto laps if None.
+
+    Returns:
+        List of lap dicts in the format stored by activity_laps.
+    """
+    lap_split = lap_split or LapSplit()
+    lat_lon_waypoints = [
+        waypoint for waypoint in lat_lon_waypoints if waypoint["time"] is not None
+    ]
+
+    try:
+        seconds = activities_metrics.to_seconds(
+            [waypoint["time"] for waypoint in lat_lon_waypoints]
+        )
+    except (ValueError, KeyError, TypeError):
+        return []
+
+    latitudes = np.array(
+        [waypoint["lat"] for waypoint in lat_lon_waypoints], dtype=np.float64
+    )
+    longitudes = np.array(
+        [waypoint["lon"] for waypoint in lat_lon_waypoints], dtype=np.float64
+    )
+    segment_distances = np.nan_to_num(
+        activities_metrics.vincenty_distances(latitudes, longitudes)
+    )
+    distances = np.concatenate(([0.0], np.cumsum(segment_distances)))
+    elapsed = (
+        np.maximum.accumulate(seconds - seconds[0]) if seconds.size else seconds
+    )
+
+    boundaries = find_lap_boundaries(
+        distances if lap_split.kind == LAP_SPLIT_DISTANCE else elapsed, lap_split
+    )
+
+    ele_stream = _LapStream(ele_waypoints, "ele")
+    power_stream = _LapStream(power_waypoints, "power")
+    hr_stream = _LapStream(hr_waypoints, "hr")
+    cad_stream = _LapStream(cad_waypoints, "cad")
+    vel_stream = _LapStream(vel_waypoints, "vel")
+
+    laps = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        start_seconds = seconds[start]
+        end_seconds = seconds[end]
+        ele_gain, ele_loss = None, None
+        np_value = None
+
+        # Calculate total ascent and descent
+        ele_lap = ele_stream.lap_slice(start_seconds, end_seconds)
+        if ele_lap.stop > ele_lap.start:
+            elevations, _ = ele_stream.valid(ele_lap)
+            ele_gain, ele_loss = activities_metrics.elevation_gain_and_loss(
+                elevations
+            )
+
+        # Calculate average and maximum heart rate, cadence and velocity
+        avg_hr, max_hr = hr_stream.avg_and_max(
+            hr_stream.lap_slice(start_seconds, end_seconds)
+        )
+        avg_cadence, max_cadence = cad_stream.avg_and_max(
+            cad_stream.lap_slice(start_seconds, end_seconds)
+        )
+        avg_speed, max_speed = vel_stream.avg_and_max(
+            vel_stream.lap_slice(start_seconds, end_seconds)
+        )
+
+        # Calculate average, maximum and normalised power
+        power_lap = power_stream.lap_slice(start_seconds, end_seconds)
+        avg_power, max_power = power_stream.avg_and_max(power_lap)
+        if power_lap.stop > power_lap.start:
+            np_value = activities_metrics.normalized_power(
+                *power_stream.valid(power_lap)
+            )
+
+        laps.append(
+            {
+                "start_time": lat_lon_waypoints[start]["time"],
+                "start_position_lat": lat_lon_waypoints[start]["lat"],
+                "start_position_long": lat_lon_waypoints[start]["lon"],
+                "end_position_lat": lat_lon_waypoints[end]["lat"],
+                "end_position_long": lat_lon_waypoints[end]["lon"],
+                "total_elapsed_time": float(end_seconds - start_seconds),
+                "total_timer_time": float(end_seconds - start_seconds),
+                "total_distance": float(distances[end] - distances[start]),
+                "avg_heart_rate": round(avg_hr) if avg_hr else None,
+                "max_heart_rate": round(max_hr) if max_hr else None,
+                "avg_cadence": round(avg_cadence) if avg_cadence else None,
+                "max_cadence": round(max_cadence) if max_cadence else None,
+                "avg_power": round(avg_power) if avg_power else None,
+                "max_power": round(max_power) if max_power else None,
+                "total_ascent": round(ele_gain) if ele_gain else None,
+                "total_descent": round(ele_loss) if ele_loss else None,
+                "normalized_power": round(np_value) if np_value else None,
+                "enhanced_avg_pace": 1 / avg_speed if avg_speed else None,
+                "enhanced_avg_speed": avg_speed,
+                "enhanced_max_pace": 1 / max_speed if max_speed else None,
+                "enhanced_max_speed": max_speed,
+            }
+        )
+
+    return laps
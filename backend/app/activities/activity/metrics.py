@@ -0,0 +1,378 @@
+"""Vectorized metrics for activity streams.
+
+Array based helpers shared by the GPX, TCX, FIT and Strava parsers to
+compute per activity and per lap metrics without per point Python loops:
+
+- Distance: haversine and Vincenty (WGS-84) segment distances
+- Speed: instant speed from timestamps and segment distances
+- Elevation: rolling median and rolling mean smoothing, gain and loss
+- Power: 30 s rolling normalized power
+- Zones: time or sample histograms over zone boundaries
+
+Inputs are sequences or NumPy arrays of floats; missing values should be
+passed as NaN.
+"""
+
+import warnings
+
+import numpy as np
+
+# Mean Earth radius used by the haversine formula
+EARTH_RADIUS_METERS = 6371008.8
+
+# WGS-84 ellipsoid used by the Vincenty formula
+WGS84_SEMI_MAJOR_AXIS = 6378137.0
+WGS84_FLATTENING = 1 / 298.257223563
+WGS84_SEMI_MINOR_AXIS = WGS84_SEMI_MAJOR_AXIS * (1 - WGS84_FLATTENING)
+
+# Vincenty convergence settings
+VINCENTY_MAX_ITERATIONS = 200
+VINCENTY_TOLERANCE = 1e-12
+
+# Rolling window used by normalized power
+NP_WINDOW_SECONDS = 30
+
+
+def waypoint_values(waypoints: list[dict], key: str) -> np.ndarray:
+    """
+    Extract the non null values of a waypoint key as a float array.
+
+    Args:
+        waypoints: List of waypoint dicts, e.g. [{"time": "...", "hr": 142}].
+        key: Key of the value to extract.
+
+    Returns:
+        Float array with the values, skipping None.
+
+    Raises:
+        KeyError: If a waypoint does not have the key.
+        ValueError: If a value can't be converted to float.
+    """
+    return np.array(
+        [waypoint[key] for waypoint in waypoints if waypoint[key] is not None],
+        dtype=np.float64,
+    )
+
+
+def to_seconds(times: list) -> np.ndarray:
+    """
+    Convert waypoint times to seconds.
+
+    Args:
+        times: ISO timestamps ("%Y-%m-%dT%H:%M:%S"), datetimes or numbers
+            of seconds (e.g. Strava time offsets).
+
+    Returns:
+        Float array with seconds, relative to the epoch for timestamps.
+
+    Raises:
+        ValueError: If the times can't be converted.
+    """
+    if len(times) == 0:
+        return np.empty(0, dtype=np.float64)
+    if isinstance(times[0], (int, float, np.number)):
+        return np.asarray(times, dtype=np.float64)
+
+    with warnings.catch_warnings():
+        # Timezone aware strings are parsed as UTC and warn
+        warnings.simplefilter("ignore")
+        timestamps = np.array(
+            [
+                time.replace(tzinfo=None) if hasattr(time, "tzinfo") else time
+                for time in times
+            ],
+            dtype="datetime64[s]",
+        )
+    return timestamps.astype(np.int64).astype(np.float64)
+
+
+def haversine_distances(latitudes, longitudes) -> np.ndarray:
+    """
+    Compute the great circle distance between consecutive points.
+
+    Args:
+        latitudes: Latitudes in degrees.
+        longitudes: Longitudes in degrees.
+
+    Returns:
+        Array with n - 1 distances in meters.
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    if lat.size < 2:
+        return np.empty(0, dtype=np.float64)
+
+    d_lat = np.diff(lat)
+    d_lon = np.diff(lon)
+    a = (
+        np.sin(d_lat / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def vincenty_distances(latitudes, longitudes) -> np.ndarray:
+    """
+    Compute the ellipsoidal distance between consecutive points.
+
+    Uses the Vincenty inverse formula on the WGS-84 ellipsoid, iterating
+    all segments at once. Segments that do not converge (nearly antipodal
+    points) fall back to the haversine distance.
+
+    Args:
+        latitudes: Latitudes in degrees.
+        longitudes: Longitudes in degrees.
+
+    Returns:
+        Array with n - 1 distances in meters.
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    if lat.size < 2:
+        return np.empty(0, dtype=np.float64)
+
+    a = WGS84_SEMI_MAJOR_AXIS
+    b = WGS84_SEMI_MINOR_AXIS
+    f = WGS84_FLATTENING
+
+    u1 = np.arctan((1 - f) * np.tan(lat[:-1]))
+    u2 = np.arctan((1 - f) * np.tan(lat[1:]))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+    big_l = np.diff(lon)
+    lam = big_l.copy()
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        converged = np.zeros(lam.shape, dtype=bool)
+        for _ in range(VINCENTY_MAX_ITERATIONS):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(
+                cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam
+            )
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(
+                sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma
+            )
+            cos2_alpha = 1 - sin_alpha**2
+            cos_2sigma_m = np.where(
+                cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha
+            )
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = big_l + (1 - c) * f * sin_alpha * (
+                sigma
+                + c
+                * sin_sigma
+                * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+            )
+            converged = np.abs(lam - lam_prev) < VINCENTY_TOLERANCE
+            if np.all(converged | np.isnan(lam)):
+                break
+
+        u_sq = cos2_alpha * (a**2 - b**2) / b**2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = (
+            big_b
+            * sin_sigma
+            * (
+                cos_2sigma_m
+                + big_b
+                / 4
+                * (
+                    cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                    - big_b
+                    / 6
+                    * cos_2sigma_m
+                    * (-3 + 4 * sin_sigma**2)
+                    * (-3 + 4 * cos_2sigma_m**2)
+                )
+            )
+        )
+        distances = b * big_a * (sigma - delta_sigma)
+
+    not_converged = ~converged & ~np.isnan(distances)
+    if np.any(not_converged):
+        fallback = haversine_distances(latitudes, longitudes)
+        distances = np.where(not_converged, fallback, distances)
+    return distances
+
+
+def instant_speeds(seconds, distances, fill_value: float = np.nan) -> np.ndarray:
+    """
+    Compute the speed at every point from the previous point.
+
+    Args:
+        seconds: Time of each point in seconds.
+        distances: The n - 1 distances between consecutive points in meters.
+        fill_value: Speed of points without a defined speed (the first
+            point and points whose distance is NaN).
+
+    Returns:
+        Array with n speeds in m/s. Points without elapsed time are 0.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    speeds = np.full(seconds.shape, fill_value, dtype=np.float64)
+    if seconds.size < 2:
+        return speeds
+
+    elapsed = np.diff(seconds)
+    distances = np.asarray(distances, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        speeds[1:] = np.where(elapsed > 0, distances / elapsed, 0.0)
+    speeds[1:][np.isnan(distances)] = fill_value
+    return speeds
+
+
+def rolling_median(values, window_size: int) -> np.ndarray:
+    """
+    Apply a centered rolling median, shrinking the window at the edges.
+
+    Args:
+        values: Input values.
+        window_size: Window size; the window spans window_size // 2 points
+            on each side of every point.
+
+    Returns:
+        Array with the filtered values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window_size < 2 or values.size == 0:
+        return values.copy()
+
+    half = window_size // 2
+    padded = np.pad(values, half, constant_values=np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half + 1)
+    return np.nanmedian(windows, axis=1)
+
+
+def rolling_mean(values, window_size: int) -> np.ndarray:
+    """
+    Apply a centered rolling mean, shrinking the window at the edges.
+
+    Args:
+        values: Input values.
+        window_size: Window size; the window spans window_size // 2 points
+            on each side of every point.
+
+    Returns:
+        Array with the smoothed values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window_size < 2 or values.size == 0:
+        return values.copy()
+
+    half = window_size // 2
+    n = values.size
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    index = np.arange(n)
+    start = np.maximum(index - half, 0)
+    end = np.minimum(index + half + 1, n)
+    return (cumsum[end] - cumsum[start]) / (end - start)
+
+
+def elevation_gain_and_loss(
+    elevations, median_window: int = 6, avg_window: int = 3, threshold: float = 0.1
+) -> tuple[float, float]:
+    """
+    Compute the total elevation gain and loss of a smoothed elevation profile.
+
+    The profile is filtered with a rolling median and then a rolling mean;
+    changes between consecutive points smaller than the threshold are
+    ignored as noise.
+
+    Args:
+        elevations: Elevations in meters.
+        median_window: Rolling median window size.
+        avg_window: Rolling mean window size.
+        threshold: Minimum change in meters counted as gain or loss.
+
+    Returns:
+        Tuple with the total gain and the total loss in meters.
+    """
+    filtered = rolling_mean(rolling_median(elevations, median_window), avg_window)
+    diffs = np.diff(filtered)
+    gain = diffs[diffs > threshold].sum()
+    loss = np.abs(diffs[diffs < -threshold].sum())
+    return float(gain), float(loss)
+
+
+def avg_and_max(values) -> tuple[float, float]:
+    """
+    Compute the average and maximum of the values, ignoring NaN.
+
+    Args:
+        values: Input values.
+
+    Returns:
+        Tuple with the average and maximum, (0, 0) if there are no values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return 0, 0
+    return float(values.mean()), float(values.max())
+
+
+def normalized_power(
+    power, seconds=None, window_seconds: int = NP_WINDOW_SECONDS
+) -> float:
+    """
+    Compute the normalized power of a power stream.
+
+    The stream is resampled to 1 Hz (each sample is held until the next
+    one) when timestamps are given, smoothed with a rolling average over
+    window_seconds, and the fourth root of the mean of the fourth powers
+    of the smoothed values is returned. Efforts shorter than the window
+    use the raw samples instead.
+
+    Args:
+        power: Power values in watts.
+        seconds: Time of each sample in seconds. When None the samples are
+            assumed to be recorded at 1 Hz.
+        window_seconds: Rolling average window in seconds.
+
+    Returns:
+        The normalized power in watts, 0 if there are no values.
+    """
+    power = np.asarray(power, dtype=np.float64)
+    if power.size == 0:
+        return 0
+
+    if seconds is not None and power.size > 1:
+        seconds = np.asarray(seconds, dtype=np.float64)
+        if seconds.shape == power.shape and np.all(np.diff(seconds) >= 0):
+            grid = np.arange(seconds[0], seconds[-1] + 1)
+            power = power[np.searchsorted(seconds, grid, side="right") - 1]
+
+    if power.size < window_seconds:
+        return float(np.mean(power**4) ** 0.25)
+
+    cumsum = np.concatenate(([0.0], np.cumsum(power)))
+    rolling = (cumsum[window_seconds:] - cumsum[:-window_seconds]) / window_seconds
+    return float(np.mean(rolling**4) ** 0.25)
+
+
+def zone_histogram(values, bounds, weights=None) -> np.ndarray:
+    """
+    Count the values falling in each zone.
+
+    Zone 0 holds values below bounds[0], zone i holds values in
+    [bounds[i - 1], bounds[i]) and the last zone values >= bounds[-1].
+    NaN values are ignored.
+
+    Args:
+        values: Input values, e.g. heart rate samples.
+        bounds: Increasing zone boundaries.
+        weights: Optional weight of each value (e.g. seconds per sample).
+
+    Returns:
+        Array with len(bounds) + 1 counts (or summed weights).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[valid]
+    zones = np.digitize(values[valid], np.asarray(bounds, dtype=np.float64))
+    return np.bincount(zones, weights=weights, minlength=len(bounds) + 1)
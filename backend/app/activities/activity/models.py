@@ -8,14 +8,50 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     JSON,
+    Index,
+    literal_column,
+    text,
 )
 from sqlalchemy.orm import relationship
 from core.database import Base
 
+# Text searched by activities.activity.search, the expression of the
+# search indexes and of the search conditions
+SEARCH_DOCUMENT = (
+    "(coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || "
+    "coalesce(town, '') || ' ' || coalesce(city, '') || ' ' || "
+    "coalesce(country, ''))"
+)
+
 
 # Data model for activities table using SQLAlchemy's ORM
 class Activity(Base):
     __tablename__ = "activities"
+    # Keyset pagination indexes, ending with the ID tiebreaker of the sort keys
+    __table_args__ = (
+        Index("idx_activities_user_id_start_time_id", "user_id", "start_time", "id"),
+        Index("idx_activities_start_time_id", "start_time", "id"),
+        Index("idx_activities_user_id_distance_id", "user_id", "distance", "id"),
+        Index(
+            "idx_activities_user_id_pace_id",
+            "user_id",
+            text("coalesce(pace, -999999)"),
+            "id",
+        ),
+        # Search indexes, pg_trgm for substrings and full-text for the word
+        # prefixes too short for trigrams
+        Index(
+            "idx_activities_search_trgm",
+            literal_column(SEARCH_DOCUMENT).label("search_document"),
+            postgresql_using="gin",
+            postgresql_ops={"search_document": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "idx_activities_search_tsvector",
+            text(f"to_tsvector('simple'::regconfig, {SEARCH_DOCUMENT})"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(
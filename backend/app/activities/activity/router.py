@@ -7,6 +7,7 @@ from typing import Annotated, Callable
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
+import activities.activity.bulk_import_service as activities_bulk_import_service
 import activities.activity.crud as activities_crud
 import activities.activity.dependencies as activities_dependencies
 import activities.activity.schema as activities_schema
@@ -377,6 +378,31 @@ async def read_activities_types(
     return activities_crud.get_distinct_activity_types_for_user(token_user_id, db)
 
 
+@router.get(
+    "/search",
+    response_model=list[activities_schema.ActivitySearchResult],
+)
+async def read_activities_search(
+    _check_scopes: Annotated[
+        Callable, Security(auth_security.check_scopes, scopes=["activities:read"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(auth_security.get_sub_from_access_token),
+    ],
+    db: Annotated[
+        Session,
+        Depends(core_database.get_db),
+    ],
+    search: str = Query(min_length=1, max_length=250),
+    num_records: int = Query(10, ge=1, le=100),
+):
+    # Search the user activities, ranked and highlighted
+    return activities_crud.search_user_activities(
+        token_user_id, search, db, num_records
+    )
+
+
 @router.get(
     "/user/{user_id}/page_number/{page_number}/num_records/{num_records}",
     response_model=list[activities_schema.Activity] | None,
@@ -439,6 +465,63 @@ async def read_activities_user_activities_pagination(
     )
 
 
+@router.get(
+    "/user/{user_id}/cursor",
+    response_model=activities_schema.ActivityCursorPage,
+)
+async def read_activities_user_activities_cursor(
+    user_id: int,
+    _validate_user_id: Annotated[
+        Callable, Depends(users_dependencies.validate_user_id)
+    ],
+    _check_scopes: Annotated[
+        Callable, Security(auth_security.check_scopes, scopes=["activities:read"])
+    ],
+    token_user_id: Annotated[
+        int,
+        Depends(auth_security.get_sub_from_access_token),
+    ],
+    db: Annotated[
+        Session,
+        Depends(core_database.get_db),
+    ],
+    _validate_activity_type: Annotated[
+        Callable, Depends(activities_dependencies.validate_activity_type)
+    ],
+    _validate_sort_by: Annotated[
+        Callable, Depends(activities_dependencies.validate_sort_by)
+    ],
+    _validate_sort_order: Annotated[
+        Callable, Depends(activities_dependencies.validate_sort_order)
+    ],
+    num_records: int = Query(5, ge=1, le=100),
+    cursor: str | None = Query(None),
+    activity_type: int | None = Query(None, alias="type"),
+    start_date: date | None = Query(None),
+    end_date: date | None = Query(None),
+    name_search: str | None = Query(None),
+    sort_by: str | None = Query(None),
+    sort_order: str | None = Query(None),
+):
+    # Get the page of activities after the cursor with filters
+    activities, next_cursor = activities_crud.get_user_activities_with_cursor(
+        user_id=user_id,
+        db=db,
+        num_records=num_records,
+        cursor=cursor,
+        activity_type=activity_type,
+        start_date=start_date,
+        end_date=end_date,
+        name_search=name_search,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        user_is_owner=token_user_id == user_id,
+    )
+    return activities_schema.ActivityCursorPage(
+        activities=activities, next_cursor=next_cursor
+    )
+
+
 @router.get(
     "/user/{user_id}/followed/page_number/{page_number}/num_records/{num_records}",
     response_model=list[activities_schema.Activity]
@@ -468,6 +551,36 @@ async def read_activities_followed_user_activities_pagination(
     )
 
 
+@router.get(
+    "/user/{user_id}/followed/cursor",
+    response_model=activities_schema.ActivityCursorPage,
+)
+async def read_activities_followed_user_activities_cursor(
+    user_id: int,
+    _validate_user_id: Annotated[
+        Callable, Depends(users_dependencies.validate_user_id)
+    ],
+    _check_scopes: Annotated[
+        Callable, Security(auth_security.check_scopes, scopes=["activities:read"])
+    ],
+    db: Annotated[
+        Session,
+        Depends(core_database.get_db),
+    ],
+    num_records: int = Query(5, ge=1, le=100),
+    cursor: str | None = Query(None),
+):
+    # Get the page of the following users activities after the cursor
+    activities, next_cursor = (
+        activities_crud.get_user_following_activities_with_cursor(
+            user_id, num_records, cursor, db
+        )
+    )
+    return activities_schema.ActivityCursorPage(
+        activities=activities, next_cursor=next_cursor
+    )
+
+
 @router.get(
     "/user/{user_id}/followed/number",
     response_model=int,
@@ -688,16 +801,14 @@ async def create_activity_with_bulk_import(
                     f"Queuing file for processing: {file_path}"
                 )
 
-        # Submit ONE task that processes all files
-        loop = asyncio.get_event_loop()
+        # Submit ONE task that parses files in parallel and stores them in batches
+        loop = asyncio.get_running_loop()
+        bulk_import_service = activities_bulk_import_service.BulkImportService(
+            token_user_id, ws_manager, loop
+        )
         loop.run_in_executor(
             executor,
-            partial(
-                activities_utils.process_all_files_sync,
-                token_user_id,
-                files_to_process,
-                ws_manager,
-            ),
+            partial(bulk_import_service.import_files, files_to_process),
         )
 
         # Log a success message that explains processing will continue elsewhere.
@@ -62,6 +62,36 @@ class Activity(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class ActivityCursorPage(BaseModel):
+    """
+    Page of activities of a cursor paginated list.
+
+    Attributes:
+        activities: Activities of the page.
+        next_cursor: Cursor to request the next page with, None on the last
+            page.
+    """
+
+    activities: list[Activity]
+    next_cursor: str | None = None
+
+
+class ActivitySearchResult(BaseModel):
+    """
+    Activity matching a search.
+
+    Attributes:
+        activity: Matching activity.
+        rank: Relevance of the activity, higher first.
+        highlights: Character ranges (start, end) of the matches in each
+            field with matches, the gear nickname under "gear".
+    """
+
+    activity: Activity
+    rank: float
+    highlights: dict[str, list[tuple[int, int]]] = {}
+
+
 class ActivityDistances(BaseModel):
     run: float
     bike: float
@@ -0,0 +1,230 @@
+"""Search of the activities by their text.
+
+A search is split into terms, an activity matches when each term is found
+in its name, description, location or gear nickname:
+
+- Terms of at least TRIGRAM_MIN_LENGTH characters match anywhere, served on
+  PostgreSQL by the pg_trgm index of the activities
+- Shorter terms match the start of a word, served on PostgreSQL by the
+  full-text index, so the first keystrokes of a typeahead don't scan the
+  user's activities
+- Gear nicknames are matched in Python against the gear of the user, a
+  handful of rows, and the activities of the matching gear are kept
+
+Other databases get the same matching through LOWER() LIKE, without index.
+Results are ranked by trigram word similarity on PostgreSQL and by the
+number of terms found in the name elsewhere, and highlighted with the
+character ranges of the matches in each field.
+"""
+
+import re
+from urllib.parse import unquote
+
+from sqlalchemy import and_, case, false, func, literal_column, or_
+from sqlalchemy.orm import Session
+
+import activities.activity.models as activities_models
+
+import gears.gear.models as gears_models
+
+# Shortest term matched anywhere, pg_trgm can't narrow shorter patterns
+TRIGRAM_MIN_LENGTH = 3
+
+# Highest number of terms of a search, the others are ignored
+MAX_SEARCH_TERMS = 8
+
+# Activity fields highlighted in the results
+HIGHLIGHT_FIELDS = ("name", "description", "town", "city", "country")
+
+# Words as split by the full-text parser, letters and digits
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def search_terms(search: str | None) -> list[str]:
+    """
+    Split a search into its terms.
+
+    Args:
+        search: Search as received in the URL, "+" standing for spaces.
+
+    Returns:
+        The distinct lowercase terms of the search, in order.
+    """
+    if not search:
+        return []
+    words = _WORD_PATTERN.findall(unquote(search).replace("+", " ").lower())
+    return list(dict.fromkeys(words))[:MAX_SEARCH_TERMS]
+
+
+def is_postgresql(db: Session) -> bool:
+    """Return whether the session is bound to PostgreSQL."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def match_spans(term: str, value: str | None) -> list[tuple[int, int]]:
+    """
+    Find the matches of a term in a text.
+
+    Args:
+        term: Lowercase search term.
+        value: Text searched.
+
+    Returns:
+        The (start, end) character ranges of the matches.
+    """
+    if not value:
+        return []
+    pattern = re.escape(term)
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        # Short terms only match the start of a word
+        pattern = rf"(?<![^\W_]){pattern}"
+    return [match.span() for match in re.finditer(pattern, value, re.IGNORECASE)]
+
+
+def get_matching_gear(user_id: int, terms: list[str], db: Session) -> dict:
+    """
+    Find the gear of a user matched by each search term.
+
+    Args:
+        user_id: ID of the user owning the gear.
+        terms: Search terms.
+        db: Database session.
+
+    Returns:
+        Dictionary of each term to the {gear ID: nickname} of the gear
+        whose nickname it matches.
+    """
+    if not terms:
+        return {}
+
+    gears = (
+        db.query(gears_models.Gear.id, gears_models.Gear.nickname)
+        .filter(gears_models.Gear.user_id == user_id)
+        .all()
+    )
+    return {
+        term: {
+            gear_id: nickname
+            for gear_id, nickname in gears
+            if match_spans(term, nickname)
+        }
+        for term in terms
+    }
+
+
+def _term_condition(term: str, document, postgresql: bool):
+    if postgresql and len(term) >= TRIGRAM_MIN_LENGTH:
+        return document.ilike(f"%{term}%")
+    if postgresql:
+        # Same configuration as the full-text index, so it serves the match
+        simple = literal_column("'simple'::regconfig")
+        return func.to_tsvector(simple, document).op("@@")(
+            func.to_tsquery(simple, f"{term}:*")
+        )
+    if len(term) >= TRIGRAM_MIN_LENGTH:
+        return func.lower(document).like(f"%{term}%")
+    return or_(
+        func.lower(document).like(f"{term}%"),
+        func.lower(document).like(f"% {term}%"),
+    )
+
+
+def search_condition(
+    terms: list[str],
+    matching_gear: dict,
+    db: Session,
+    user_is_owner: bool = True,
+):
+    """
+    Build the condition keeping the activities matching a search.
+
+    Args:
+        terms: Search terms, see search_terms.
+        matching_gear: Gear matched by each term, see get_matching_gear.
+        db: Database session.
+        user_is_owner: Whether the requester owns the activities, the gear
+            of others is only matched when it isn't hidden.
+
+    Returns:
+        The condition, false when the search has no term.
+    """
+    if not terms:
+        return false()
+
+    postgresql = is_postgresql(db)
+    document = literal_column(activities_models.SEARCH_DOCUMENT)
+    conditions = []
+    for term in terms:
+        condition = _term_condition(term, document, postgresql)
+        gear_ids = matching_gear.get(term)
+        if gear_ids:
+            gear_condition = activities_models.Activity.gear_id.in_(list(gear_ids))
+            if not user_is_owner:
+                gear_condition = and_(
+                    gear_condition, activities_models.Activity.hide_gear.is_(False)
+                )
+            condition = or_(condition, gear_condition)
+        conditions.append(condition)
+    return and_(*conditions)
+
+
+def search_rank(terms: list[str], db: Session):
+    """
+    Build the relevance of the activities for a search, higher first.
+
+    Args:
+        terms: Search terms, see search_terms.
+        db: Database session.
+
+    Returns:
+        The rank expression.
+    """
+    name = func.coalesce(activities_models.Activity.name, literal_column("''"))
+    if is_postgresql(db):
+        # Matches in the name count twice
+        search = " ".join(terms)
+        return func.word_similarity(search, name) + func.word_similarity(
+            search, literal_column(activities_models.SEARCH_DOCUMENT)
+        )
+    return sum(
+        (case((_term_condition(term, name, False), 1), else_=0) for term in terms),
+        start=literal_column("0"),
+    )
+
+
+def highlight_activity(
+    activity, terms: list[str], matching_gear: dict
+) -> dict[str, list[tuple[int, int]]]:
+    """
+    Find the matches of a search in the fields of an activity.
+
+    Hidden fields must already be cleared, so they aren't highlighted.
+
+    Args:
+        activity: Matched activity.
+        terms: Search terms, see search_terms.
+        matching_gear: Gear matched by each term, see get_matching_gear.
+
+    Returns:
+        Dictionary of each field with matches, the gear nickname under
+        "gear", to the sorted and merged (start, end) ranges of the matches.
+    """
+    values = {field: getattr(activity, field) for field in HIGHLIGHT_FIELDS}
+    if activity.gear_id is not None:
+        for gear in matching_gear.values():
+            if activity.gear_id in gear:
+                values["gear"] = gear[activity.gear_id]
+                break
+
+    highlights = {}
+    for field, value in values.items():
+        spans = sorted(span for term in terms for span in match_spans(term, value))
+        merged = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        if merged:
+            highlights[field] = merged
+    return highlights
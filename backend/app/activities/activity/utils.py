@@ -1,26 +1,23 @@
+import asyncio
 import gzip
 import os
 import shutil
-import asyncio
+import time
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
-import requests
-import statistics
-import time
-from geopy.distance import geodesic
+import numpy as np
 from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException, status, UploadFile
 
 from datetime import datetime
-from urllib.parse import urlencode
-from statistics import mean
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 import activities.activity.schema as activities_schema
 import activities.activity.crud as activities_crud
+import activities.activity.metrics as activities_metrics
 import activities.activity.models as activities_models
 
 import users.users.crud as users_crud
@@ -28,6 +25,11 @@ import users.users.crud as users_crud
 import users.users_privacy_settings.crud as users_privacy_settings_crud
 import users.users_privacy_settings.models as users_privacy_settings_models
 
+import activities.activity_ai_insight_jobs.utils as activity_ai_insight_jobs_utils
+
+import activities.activity_fingerprints.crud as activity_fingerprints_crud
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
+
 import activities.activity_laps.crud as activity_laps_crud
 
 import activities.activity_sets.crud as activity_sets_crud
@@ -37,17 +39,23 @@ import activities.activity_streams.schema as activity_streams_schema
 
 import activities.activity_workout_steps.crud as activity_workout_steps_crud
 
+import notifications.utils as notifications_utils
+
 import websocket.manager as websocket_manager
 
+import geocoding.utils as geocoding_utils
+
 import gpx.utils as gpx_utils
 import tcx.utils as tcx_utils
 import fit.utils as fit_utils
 
 import core.logger as core_logger
 import core.config as core_config
-import core.database as core_database
+import core.metrics as core_metrics
 import core.sanitization as core_sanitization
 
+from core.database import SessionLocal
+
 # Global Activity Type Mappings (ID to Name)
 ACTIVITY_ID_TO_NAME = {
     1: "Run",
@@ -386,133 +394,43 @@ def handle_gzipped_file(
             return temp_file.name, inner_file_extension
 
 
-async def parse_and_store_activity_from_file(
+def parse_and_store_activity_from_file(
     token_user_id: int,
     file_path: str,
-    websocket_manager: websocket_manager.WebSocketManager,
-    db: Session,
     from_garmin: bool = False,
     garminconnect_gear: dict | None = None,
     activity_name: str | None = None,
-):
-    try:
-        core_logger.print_to_log_and_console(
-            f"Bulk file import: Beginning processing of {file_path}"
-        )
-
-        # Get file extension
-        _, file_extension = os.path.splitext(file_path)
-        garmin_connect_activity_id = None
-
-        if from_garmin:
-            garmin_connect_activity_id = os.path.basename(file_path).split("_")[0]
-
-        if file_extension.lower() == ".gz":
-            file_path, file_extension = handle_gzipped_file(file_path)
-
-        # Open the file and process it
-        with open(file_path, "rb"):
-            user = users_crud.get_user_by_id(token_user_id, db)
-            if user is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found",
-                )
+) -> list[tuple[activities_schema.Activity, bool]] | None:
+    """
+    Parse an activity file and store its activities.
 
-            user_privacy_settings = (
-                users_privacy_settings_crud.get_user_privacy_settings_by_user_id(
-                    user.id, db
-                )
-            )
+    Blocking: parsing, reverse geocoding and the database writes all run
+    in the calling thread, on a session of its own, so the importers run
+    it off the event loop. The notifications of the stored activities are
+    sent afterwards by notify_stored_activities, from the event loop.
 
-            # Parse the file
-            parsed_info = parse_file(
+    Args:
+        token_user_id: ID of the user importing the file.
+        file_path: Path of the file.
+        from_garmin: Whether the file was downloaded from Garmin Connect,
+            its name starting with the Garmin Connect activity ID.
+        garminconnect_gear: Garmin Connect gear of the activity.
+        activity_name: Name of the activity, parsed from the file if None.
+
+    Returns:
+        List of (activity, is_duplicate) tuples of the stored activities,
+        None if the file was already imported or could not be imported.
+    """
+    try:
+        with SessionLocal() as db:
+            return _parse_and_store_activity_from_file(
                 token_user_id,
-                user_privacy_settings,
-                file_extension,
                 file_path,
                 db,
+                from_garmin,
+                garminconnect_gear,
                 activity_name,
             )
-
-            if parsed_info is not None:
-                created_activities = []
-                idsToFileName = ""
-                if file_extension.lower() in (
-                    ".gpx",
-                    ".tcx",
-                ):
-                    # Store the activity in the database
-                    created_activity = await store_activity(
-                        parsed_info, websocket_manager, db
-                    )
-                    created_activities.append(created_activity)
-                    idsToFileName = idsToFileName + str(created_activity.id)
-                elif file_extension.lower() == ".fit":
-                    # Split the records by activity (check for multiple activities in the file)
-                    split_records_by_activity = fit_utils.split_records_by_activity(
-                        parsed_info
-                    )
-
-                    # Create activity objects for each activity in the file
-                    if from_garmin:
-                        created_activities_objects = fit_utils.create_activity_objects(
-                            split_records_by_activity,
-                            token_user_id,
-                            user_privacy_settings,
-                            (
-                                int(garmin_connect_activity_id)
-                                if garmin_connect_activity_id
-                                else None
-                            ),
-                            garminconnect_gear if garminconnect_gear else None,
-                            db,
-                        )
-                    else:
-                        created_activities_objects = fit_utils.create_activity_objects(
-                            split_records_by_activity,
-                            token_user_id,
-                            user_privacy_settings,
-                            None,
-                            None,
-                            db,
-                        )
-
-                    for activity in created_activities_objects:
-                        # Store the activity in the database
-                        created_activity = await store_activity(
-                            activity, websocket_manager, db
-                        )
-                        created_activities.append(created_activity)
-
-                    for index, activity in enumerate(created_activities):
-                        idsToFileName += str(activity.id)  # Add the id to the string
-                        # Add an underscore if it's not the last item
-                        if index < len(created_activities) - 1:
-                            idsToFileName += (
-                                "_"  # Add an underscore if it's not the last item
-                            )
-                else:
-                    # Should no longer get here due to screening of extensions in router.py, but why not.
-                    core_logger.print_to_log_and_console(
-                        f"File extension not supported: {file_extension}", "error"
-                    )
-                # Define the directory where the processed files will be stored
-                processed_dir = core_config.FILES_PROCESSED_DIR
-
-                # Define new file path with activity ID as filename
-                new_file_name = f"{idsToFileName}{file_extension}"
-
-                # Move the file to the processed directory
-                move_file(processed_dir, new_file_name, file_path)
-                core_logger.print_to_log_and_console(
-                    f"Bulk file import: File successfully processed and moved. {file_path} - has become {new_file_name}"
-                )
-
-                # Return the created activity
-                return created_activities
-            else:
-                return None
     # except HTTPException as http_err:
     # This is causing a crash on the back end when the try fails.  Looks like we cannot raise an http exception in a background task.
     # raise http_err
@@ -537,6 +455,225 @@ async def parse_and_store_activity_from_file(
             )
 
 
+def _parse_and_store_activity_from_file(
+    token_user_id: int,
+    file_path: str,
+    db: Session,
+    from_garmin: bool,
+    garminconnect_gear: dict | None,
+    activity_name: str | None,
+) -> list[tuple[activities_schema.Activity, bool]] | None:
+    core_logger.print_to_log_and_console(
+        f"Bulk file import: Beginning processing of {file_path}"
+    )
+
+    # Get file extension
+    _, file_extension = os.path.splitext(file_path)
+    garmin_connect_activity_id = None
+
+    if from_garmin:
+        garmin_connect_activity_id = os.path.basename(file_path).split("_")[0]
+
+    # Skip files already imported before parsing them
+    content_hash = activity_fingerprints_utils.hash_file(file_path)
+    if activity_fingerprints_crud.get_known_content_hashes(
+        token_user_id, [content_hash], db
+    ):
+        move_file(
+            core_config.FILES_PROCESSED_DIR, os.path.basename(file_path), file_path
+        )
+        core_metrics.count_skipped_imports("garmin" if from_garmin else "file")
+        core_logger.print_to_log_and_console(
+            f"Bulk file import: {file_path} was already imported, skipped"
+        )
+        return None
+
+    if file_extension.lower() == ".gz":
+        file_path, file_extension = handle_gzipped_file(file_path)
+
+    # Open the file and process it
+    with open(file_path, "rb"):
+        user = users_crud.get_user_by_id(token_user_id, db)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+
+        user_privacy_settings = (
+            users_privacy_settings_crud.get_user_privacy_settings_by_user_id(
+                user.id, db
+            )
+        )
+
+        # Parse the file
+        parsed_info = parse_file(
+            token_user_id,
+            user_privacy_settings,
+            file_extension,
+            file_path,
+            db,
+            activity_name,
+        )
+
+        if parsed_info is not None:
+            created_activities = []
+            idsToFileName = ""
+            if file_extension.lower() in (
+                ".gpx",
+                ".tcx",
+            ):
+                # Store the activity in the database
+                created_activity, is_duplicate = _store_parsed_activity(
+                    parsed_info, db, content_hash
+                )
+                created_activities.append((created_activity, is_duplicate))
+                idsToFileName = idsToFileName + str(created_activity.id)
+            elif file_extension.lower() == ".fit":
+                # Split the records by activity (check for multiple activities in the file)
+                split_records_by_activity = fit_utils.split_records_by_activity(
+                    parsed_info
+                )
+
+                # Create activity objects for each activity in the file
+                if from_garmin:
+                    created_activities_objects = fit_utils.create_activity_objects(
+                        split_records_by_activity,
+                        token_user_id,
+                        user_privacy_settings,
+                        (
+                            int(garmin_connect_activity_id)
+                            if garmin_connect_activity_id
+                            else None
+                        ),
+                        garminconnect_gear if garminconnect_gear else None,
+                        db,
+                    )
+                else:
+                    created_activities_objects = fit_utils.create_activity_objects(
+                        split_records_by_activity,
+                        token_user_id,
+                        user_privacy_settings,
+                        None,
+                        None,
+                        db,
+                    )
+
+                for activity in created_activities_objects:
+                    # Store the activity in the database
+                    created_activities.append(
+                        _store_parsed_activity(activity, db, content_hash)
+                    )
+
+                for index, (activity, _) in enumerate(created_activities):
+                    idsToFileName += str(activity.id)  # Add the id to the string
+                    # Add an underscore if it's not the last item
+                    if index < len(created_activities) - 1:
+                        idsToFileName += (
+                            "_"  # Add an underscore if it's not the last item
+                        )
+            else:
+                # Should no longer get here due to screening of extensions in router.py, but why not.
+                core_logger.print_to_log_and_console(
+                    f"File extension not supported: {file_extension}", "error"
+                )
+            # Define the directory where the processed files will be stored
+            processed_dir = core_config.FILES_PROCESSED_DIR
+
+            # Define new file path with activity ID as filename
+            new_file_name = f"{idsToFileName}{file_extension}"
+
+            # Move the file to the processed directory
+            move_file(processed_dir, new_file_name, file_path)
+            core_logger.print_to_log_and_console(
+                f"Bulk file import: File successfully processed and moved. {file_path} - has become {new_file_name}"
+            )
+
+            # Return the created activity
+            return created_activities
+        else:
+            return None
+
+
+def _store_parsed_activity(
+    parsed_info: dict, db: Session, content_hash: str | None
+) -> tuple[activities_schema.Activity, bool]:
+    """
+    Store a parsed activity and its streams, laps, steps and sets.
+
+    Everything is committed in one transaction, rolled back on error.
+
+    Args:
+        parsed_info: Parsed activity.
+        db: Database session.
+        content_hash: Hash of the file the activity was parsed from.
+
+    Returns:
+        Tuple of the stored activity schema, usable once the session is
+        closed, and whether an activity with the same start time already
+        existed.
+    """
+    try:
+        activity, is_duplicate = activities_crud.add_activity(
+            parsed_info["activity"], db, content_hash
+        )
+
+        activity_streams = parse_activity_streams_from_file(parsed_info, activity.id)
+        if activity_streams:
+            activity_streams_crud.create_activity_streams(
+                activity_streams, db, commit=False
+            )
+
+        if parsed_info.get("laps") is not None:
+            activity_laps_crud.create_activity_laps(
+                parsed_info["laps"], activity.id, db, commit=False
+            )
+
+        if parsed_info.get("workout_steps") is not None:
+            activity_workout_steps_crud.create_activity_workout_steps(
+                parsed_info["workout_steps"], activity.id, db, commit=False
+            )
+
+        if parsed_info.get("sets") is not None:
+            activity_sets_crud.create_activity_sets(
+                parsed_info["sets"], activity.id, db, commit=False
+            )
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return activity, is_duplicate
+
+
+async def notify_stored_activities(
+    activities: list[tuple[activities_schema.Activity, bool]],
+    websocket_manager: websocket_manager.WebSocketManager,
+) -> None:
+    """
+    Notify the users of activities stored off the event loop.
+
+    Args:
+        activities: List of (activity, is_duplicate) tuples, as returned
+            by parse_and_store_activity_from_file.
+        websocket_manager: WebSocket manager for the notifications.
+    """
+    for activity, is_duplicate in activities:
+        if is_duplicate:
+            await notifications_utils.create_new_duplicate_start_time_activity_notification(
+                activity.user_id, activity.id, websocket_manager
+            )
+        else:
+            await notifications_utils.create_new_activity_notification(
+                activity.user_id, activity.id, websocket_manager
+            )
+
+    if activities:
+        # Start generating the AI insights without waiting for them
+        activity_ai_insight_jobs_utils.wake_activity_ai_insight_worker()
+
+
 async def parse_and_store_activity_from_uploaded_file(
     token_user_id: int,
     file: UploadFile,
@@ -565,6 +702,9 @@ async def parse_and_store_activity_from_uploaded_file(
         with open(file_path, "wb") as save_file:
             save_file.write(file.file.read())
 
+        # Recorded so later imports of the same file are skipped
+        content_hash = activity_fingerprints_utils.hash_file(file_path)
+
         if file_extension.lower() == ".gz":
             file_path, file_extension = handle_gzipped_file(file_path)
 
@@ -596,7 +736,7 @@ async def parse_and_store_activity_from_uploaded_file(
             if file_extension.lower() in (".gpx", ".tcx"):
                 # Store the activity in the database
                 created_activity = await store_activity(
-                    parsed_info, websocket_manager, db
+                    parsed_info, websocket_manager, db, content_hash
                 )
                 created_activities.append(created_activity)
                 idsToFileName = idsToFileName + str(created_activity.id)
@@ -619,7 +759,7 @@ async def parse_and_store_activity_from_uploaded_file(
                 for activity in created_activities_objects:
                     # Store the activity in the database
                     created_activity = await store_activity(
-                        activity, websocket_manager, db
+                        activity, websocket_manager, db, content_hash
                     )
                     created_activities.append(created_activity)
 
@@ -699,6 +839,7 @@ def parse_file(
     try:
         if filename.lower() != "bulk_import/__init__.py":
             core_logger.print_to_log(f"Parsing file: {filename}")
+            parse_started = time.perf_counter()
             # Choose the appropriate parser based on file extension
             if file_extension.lower() == ".gpx":
                 # Parse the GPX file
@@ -726,6 +867,10 @@ def parse_file(
                     status_code=status.HTTP_406_NOT_ACCEPTABLE,
                     detail="File extension not supported. Supported file extensions are .gpx, .fit and .tcx",
                 )
+            core_metrics.observe_parse(
+                file_extension.lower().lstrip("."),
+                time.perf_counter() - parse_started,
+            )
             return parsed_info
         else:
             return None
@@ -745,10 +890,14 @@ async def store_activity(
     parsed_info: dict,
     websocket_manager: websocket_manager.WebSocketManager,
     db: Session,
+    content_hash: str | None = None,
 ):
     # create the activity in the database
     created_activity = await activities_crud.create_activity(
-        parsed_info["activity"], websocket_manager, db
+        parsed_info["activity"],
+        websocket_manager,
+        db,
+        content_hash=content_hash,
     )
 
     # Check if created_activity is None
@@ -897,201 +1046,105 @@ def calculate_activity_distances(activities: list[activities_schema.Activity]):
 
 
 def location_based_on_coordinates(latitude, longitude) -> dict | None:
-    # Check if latitude and longitude are provided
-    if latitude is None or longitude is None:
-        return {
-            "city": None,
-            "town": None,
-            "country": None,
-        }
-
-    # Create a dictionary with the parameters for the request
-    if core_config.REVERSE_GEO_PROVIDER == "nominatim":
-        # Create the URL for the request
-        url_params = {
-            "format": "jsonv2",
-            "lat": latitude,
-            "lon": longitude,
-        }
-        protocol = "https"
-        if not core_config.NOMINATIM_API_USE_HTTPS:
-            protocol = "http"
-        url = f"{protocol}://{core_config.NOMINATIM_API_HOST}/reverse?{urlencode(url_params)}"
-    elif core_config.REVERSE_GEO_PROVIDER == "photon":
-        # Create the URL for the request
-        url_params = {
-            "lat": latitude,
-            "lon": longitude,
-        }
-        protocol = "https"
-        if not core_config.PHOTON_API_USE_HTTPS:
-            protocol = "http"
-        url = f"{protocol}://{core_config.PHOTON_API_HOST}/reverse?{urlencode(url_params)}"
-    elif core_config.REVERSE_GEO_PROVIDER == "geocode":
-        # Check if the API key is set
-        if core_config.GEOCODES_MAPS_API == "changeme":
-            return {
-                "city": None,
-                "town": None,
-                "country": None,
-            }
-        # Create the URL for the request
-        url_params = {
-            "lat": latitude,
-            "lon": longitude,
-            "api_key": core_config.GEOCODES_MAPS_API,
-        }
-        url = f"https://geocode.maps.co/reverse?{urlencode(url_params)}"
-    else:
-        # If no provider is set, return None
-        return {
-            "city": None,
-            "town": None,
-            "country": None,
-        }
-
-    # Throttle requests according to configured rate limit
-    if core_config.REVERSE_GEO_MIN_INTERVAL > 0:
-        with core_config.REVERSE_GEO_LOCK:
-            now = time.monotonic()
-            interval = core_config.REVERSE_GEO_MIN_INTERVAL - (
-                now - core_config.REVERSE_GEO_LAST_CALL
-            )
-            if interval > 0:
-                time.sleep(interval)
-            core_config.REVERSE_GEO_LAST_CALL = time.monotonic()
+    # Left to the importer, see geocode_parsed_activities
+    if core_config.REVERSE_GEO_DEFERRED:
+        return None
 
-    # Make the request and get the response
-    try:
-        headers = {
-            "User-Agent": f"Endurain/{core_config.API_VERSION} (ReverseGeocoding)"
-        }
-        # Make the request and get the response
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        if core_config.REVERSE_GEO_PROVIDER in ("geocode", "nominatim"):
-            # Get the data from the response
-            data = response.json().get("address", {})
-            # Return the location based on the coordinates
-            # Note: 'town' is used for district in Geocode API
-            return {
-                "city": data.get("city"),
-                "town": data.get("town"),
-                "country": data.get("country"),
-            }
-
-        # Get the data from the response
-        data_root = response.json().get("features", [])
-        data = data_root[0].get("properties", {}) if data_root else {}
-        # Return the location based on the coordinates
-        # Note: 'district' is used for city and 'city' is used for town in Photon API
-        return {
-            "city": data.get("district"),
-            "town": data.get("city"),
-            "country": data.get("country"),
-        }
-    except Exception as err:
-        # Log the error
-        core_logger.print_to_log_and_console(
-            f"Error in location_based_on_coordinates - {str(err)}", "error"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_424_FAILED_DEPENDENCY,
-            detail=f"Error in location_based_on_coordinates: {str(err)}",
-        ) from err
+    # Resolve the location through the geocode cache
+    return geocoding_utils.reverse_geocode(latitude, longitude)
 
 
-def append_if_not_none(waypoint_list, waypoint_time, value, key):
-    if value is not None:
-        waypoint_list.append({"time": waypoint_time, key: value})
+def geocode_parsed_activities(parsed_activities: list[dict]) -> None:
+    """
+    Resolve the locations of parsed activities in one batch.
 
+    Used by importers parsing with REVERSE_GEO_DEFERRED set. The location
+    of each activity without one is resolved from its first waypoint, the
+    coordinate the parsers geocode.
 
-def calculate_instant_speed(
-    prev_time, waypoint_time, latitude, longitude, prev_latitude, prev_longitude
-):
-    # Convert the time strings to datetime objects
-    time_calc = datetime.fromisoformat(waypoint_time.strftime("%Y-%m-%dT%H:%M:%S"))
+    Args:
+        parsed_activities: Parsed activities, as returned by parse_file or
+            fit_utils.create_activity_objects. Updated in place.
+    """
+    pending = [
+        parsed_info
+        for parsed_info in parsed_activities
+        if parsed_info.get("is_lat_lon_set")
+        and parsed_info.get("lat_lon_waypoints")
+        and parsed_info["activity"].city is None
+        and parsed_info["activity"].town is None
+        and parsed_info["activity"].country is None
+    ]
+    if not pending:
+        return
+
+    locations = asyncio.run(
+        geocoding_utils.reverse_geocode_batch(
+            [
+                (
+                    parsed_info["lat_lon_waypoints"][0]["lat"],
+                    parsed_info["lat_lon_waypoints"][0]["lon"],
+                )
+                for parsed_info in pending
+            ]
+        )
+    )
 
-    # If prev_time is None, return a default value
-    if prev_time is None:
-        return 0
+    for parsed_info, location in zip(pending, locations):
+        parsed_info["activity"].city = location["city"]
+        parsed_info["activity"].town = location["town"]
+        parsed_info["activity"].country = location["country"]
 
-    # Convert the time strings to datetime objects
-    prev_time_calc = datetime.fromisoformat(prev_time.strftime("%Y-%m-%dT%H:%M:%S"))
 
-    # Calculate the time difference in seconds
-    time_difference = (time_calc - prev_time_calc).total_seconds()
+def append_if_not_none(waypoint_list, waypoint_time, value, key):
+    if value is not None:
+        waypoint_list.append({"time": waypoint_time, key: value})
 
-    # If the time difference is positive, calculate the instant speed
-    if time_difference > 0:
-        # Calculate the distance in meters
-        distance = geodesic(
-            (prev_latitude, prev_longitude), (latitude, longitude)
-        ).meters
 
-        # Calculate the instant speed in m/s
-        instant_speed = distance / time_difference
-    else:
-        # If the time difference is not positive, return a default value
-        instant_speed = 0
+def calculate_instant_speeds(times, latitudes, longitudes) -> list[float | None]:
+    """
+    Calculate the instant speed of every point of a track.
 
-    # Return the instant speed
-    return instant_speed
+    Args:
+        times: Time of each point (ISO timestamps or datetimes).
+        latitudes: Latitude of each point, None if unknown.
+        longitudes: Longitude of each point, None if unknown.
+
+    Returns:
+        List with the speed in m/s at each point, computed from the previous
+        point. None for the first point and for points where either point
+        has no coordinates, 0 if no time elapsed.
+    """
+    if not times:
+        return []
+
+    latitudes = np.array(
+        [np.nan if value is None else value for value in latitudes], dtype=np.float64
+    )
+    longitudes = np.array(
+        [np.nan if value is None else value for value in longitudes], dtype=np.float64
+    )
+    speeds = activities_metrics.instant_speeds(
+        activities_metrics.to_seconds(times),
+        activities_metrics.vincenty_distances(latitudes, longitudes),
+    )
+    return [None if np.isnan(speed) else speed for speed in speeds.tolist()]
 
 
 def compute_elevation_gain_and_loss(
     elevations, median_window=6, avg_window=3, threshold=0.1
 ):
-    # 1) Median Filter
-    def median_filter(values, window_size):
-        if window_size < 2:
-            return values[:]
-        half = window_size // 2
-        filtered = []
-        for i in range(len(values)):
-            start = max(0, i - half)
-            end = min(len(values), i + half + 1)
-            window_vals = values[start:end]
-            m = statistics.median(window_vals)
-            filtered.append(m)
-        return filtered
-
-    # 2) Moving-Average Smoothing
-    def moving_average(values, window_size):
-        if window_size < 2:
-            return values[:]
-        half = window_size // 2
-        smoothed = []
-        n = len(values)
-        for i in range(n):
-            start = max(0, i - half)
-            end = min(n, i + half + 1)
-            window_vals = values[start:end]
-            smoothed.append(statistics.mean(window_vals))
-        return smoothed
-
     try:
         # Get the values from the elevations
         values = [float(waypoint["ele"]) for waypoint in elevations]
-    except (ValueError, KeyError):
+    except (ValueError, KeyError, TypeError):
         # If there are no valid values, return 0
         return 0, 0
 
-    # Apply median filter -> then average smoothing
-    filtered = median_filter(values, median_window)
-    filtered = moving_average(filtered, avg_window)
-
-    # 3) Compute gain/loss with threshold
-    total_gain = 0.0
-    total_loss = 0.0
-    for i in range(1, len(filtered)):
-        diff = filtered[i] - filtered[i - 1]
-        if diff > threshold:
-            total_gain += diff
-        elif diff < -threshold:
-            total_loss -= diff  # diff is negative, so subtracting it is adding positive
-    return total_gain, total_loss
+    # Rolling median -> rolling mean smoothing, then gain/loss with threshold
+    return activities_metrics.elevation_gain_and_loss(
+        values, median_window, avg_window, threshold
+    )
 
 
 def calculate_pace(distance, first_waypoint_time, last_waypoint_time):
@@ -1120,44 +1173,34 @@ def calculate_pace(distance, first_waypoint_time, last_waypoint_time):
 def calculate_avg_and_max(data, stream_type):
     try:
         # Get the values from the data
-        values = [
-            float(waypoint[stream_type])
-            for waypoint in data
-            if waypoint.get(stream_type) is not None
-        ]
-    except (ValueError, KeyError):
+        values = activities_metrics.waypoint_values(data, stream_type)
+    except (ValueError, KeyError, TypeError):
         # If there are no valid values, return 0
         return 0, 0
 
     # Calculate the average and max values
-    avg_value = mean(values)
-    max_value = max(values)
-
-    return avg_value, max_value
+    return activities_metrics.avg_and_max(values)
 
 
 def calculate_np(data):
     try:
-        # Get the power values from the data
-        values = [
-            float(waypoint["power"])
-            for waypoint in data
-            if waypoint["power"] is not None
-        ]
-    except:
+        # Get the power values and their times from the data
+        samples = [waypoint for waypoint in data if waypoint["power"] is not None]
+        values = np.array([waypoint["power"] for waypoint in samples], dtype=np.float64)
+    except (ValueError, KeyError, TypeError):
         # If there are no valid values, return 0
         return 0
 
-    # Calculate the fourth power of each power value
-    fourth_powers = [p**4 for p in values]
-
-    # Calculate the average of the fourth powers
-    avg_fourth_power = sum(fourth_powers) / len(fourth_powers)
-
-    # Take the fourth root of the average of the fourth powers to get Normalized Power
-    normalized_power = avg_fourth_power ** (1 / 4)
+    try:
+        seconds = activities_metrics.to_seconds(
+            [waypoint["time"] for waypoint in samples]
+        )
+    except (ValueError, KeyError, TypeError):
+        # Without valid times the samples are treated as 1 Hz
+        seconds = None
 
-    return normalized_power
+    # 30 s rolling normalized power
+    return activities_metrics.normalized_power(values, seconds)
 
 
 def define_activity_type(activity_type_name: str) -> int:
@@ -1190,42 +1233,3 @@ def set_activity_name_based_on_activity_type(activity_type_id: int) -> str:
 
     # If type is not 10 (Workout), return the mapping with " workout" suffix
     return mapping + " workout" if mapping != "Workout" else mapping
-
-
-def process_all_files_sync(
-    user_id: int,
-    file_paths: list[str],
-    websocket_manager: websocket_manager.WebSocketManager,
-):
-    """
-    Process all files sequentially in single thread.
-
-    Args:
-        user_id: User ID.
-        file_paths: List of file paths to process.
-        websocket_manager: WebSocket manager instance.
-    """
-    db = next(core_database.get_db())
-    try:
-        total_files = len(file_paths)
-        for idx, file_path in enumerate(file_paths, 1):
-            core_logger.print_to_log_and_console(
-                f"Processing file {idx}/{total_files}: " f"{file_path}"
-            )
-            asyncio.run(
-                parse_and_store_activity_from_file(
-                    user_id,
-                    file_path,
-                    websocket_manager,
-                    db,
-                )
-            )
-            # Small delay between files
-            time.sleep(0.1)
-
-        core_logger.print_to_log_and_console(
-            f"Bulk import completed: {total_files} files "
-            f"processed for user {user_id}"
-        )
-    finally:
-        db.close()
@@ -0,0 +1,19 @@
+# Constants for AI insight job statuses
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+# Statuses of the jobs that will not run again
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_SKIPPED, STATUS_FAILED)
+
+# Days finished jobs are kept before they are deleted
+FINISHED_JOB_RETENTION_DAYS = 30
+
+# Seconds after which a running job is considered abandoned (e.g. the
+# worker was restarted) and can be claimed again
+JOB_LEASE_SECONDS = 600
+
+# Upper bound for the exponential backoff between attempts
+MAX_RETRY_DELAY_SECONDS = 3600
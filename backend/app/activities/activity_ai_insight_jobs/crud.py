@@ -0,0 +1,263 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+import activities.activity_ai_insight_jobs.constants as jobs_constants
+import activities.activity_ai_insight_jobs.models as models
+
+import core.logger as core_logger
+
+
+def get_job_by_id(job_id: int, db: Session) -> models.ActivityAIInsightJobs | None:
+    """
+    Retrieve a single AI insight job by ID.
+
+    Args:
+        job_id: Job primary key.
+        db: Database session.
+
+    Returns:
+        ActivityAIInsightJobs instance or None.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        return (
+            db.query(models.ActivityAIInsightJobs)
+            .filter(models.ActivityAIInsightJobs.id == job_id)
+            .first()
+        )
+    except Exception as err:
+        core_logger.print_to_log(f"Error in get_job_by_id: {err}", "error", exc=err)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def create_job(
+    activity_id: int, user_id: int, db: Session, commit: bool = True
+) -> models.ActivityAIInsightJobs:
+    """
+    Enqueue the AI insight generation for an activity.
+
+    Args:
+        activity_id: Activity primary key.
+        user_id: ID of the user that owns the activity.
+        db: Database session.
+        commit: Whether to commit the transaction. When False the job is
+            only flushed so it is stored together with the activity.
+
+    Returns:
+        Created ActivityAIInsightJobs instance.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        db_job = models.ActivityAIInsightJobs(
+            activity_id=activity_id,
+            user_id=user_id,
+            status=jobs_constants.STATUS_PENDING,
+            attempts=0,
+            next_run_at=datetime.now(timezone.utc),
+        )
+
+        db.add(db_job)
+        if commit:
+            db.commit()
+            db.refresh(db_job)
+        else:
+            db.flush()
+
+        return db_job
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(f"Error in create_job: {err}", "error", exc=err)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def claim_due_job_ids(limit: int, db: Session) -> list[int]:
+    """
+    Claim up to limit jobs that are due and mark them as running.
+
+    Pending jobs whose next run time has passed are claimed, as well as
+    running jobs whose lease expired. Rows locked by another worker are
+    skipped so several workers never claim the same job.
+
+    Args:
+        limit: Maximum number of jobs to claim.
+        db: Database session.
+
+    Returns:
+        List with the IDs of the claimed jobs.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        lease_expired_at = now - timedelta(seconds=jobs_constants.JOB_LEASE_SECONDS)
+
+        db_jobs = (
+            db.query(models.ActivityAIInsightJobs)
+            .filter(
+                or_(
+                    and_(
+                        models.ActivityAIInsightJobs.status
+                        == jobs_constants.STATUS_PENDING,
+                        models.ActivityAIInsightJobs.next_run_at <= now,
+                    ),
+                    and_(
+                        models.ActivityAIInsightJobs.status
+                        == jobs_constants.STATUS_RUNNING,
+                        models.ActivityAIInsightJobs.locked_at <= lease_expired_at,
+                    ),
+                )
+            )
+            .order_by(models.ActivityAIInsightJobs.next_run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        for db_job in db_jobs:
+            db_job.status = jobs_constants.STATUS_RUNNING
+            db_job.locked_at = now
+            db_job.attempts += 1
+
+        job_ids = [db_job.id for db_job in db_jobs]
+        db.commit()
+
+        return job_ids
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in claim_due_job_ids: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def finish_job(
+    db_job: models.ActivityAIInsightJobs,
+    job_status: str,
+    db: Session,
+    error: str | None = None,
+    retry_at: datetime | None = None,
+) -> models.ActivityAIInsightJobs:
+    """
+    Release a claimed job with its outcome.
+
+    Args:
+        db_job: The claimed job.
+        job_status: New job status.
+        db: Database session.
+        error: Error of the attempt, if it failed.
+        retry_at: Next run time when the job is put back to pending.
+
+    Returns:
+        Updated ActivityAIInsightJobs instance.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        db_job.status = job_status
+        db_job.locked_at = None
+        db_job.last_error = error
+        if retry_at is not None:
+            db_job.next_run_at = retry_at
+
+        db.commit()
+
+        return db_job
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(f"Error in finish_job: {err}", "error", exc=err)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def set_job_delta_record_id(
+    db_job: models.ActivityAIInsightJobs, delta_record_id: int, db: Session
+) -> models.ActivityAIInsightJobs:
+    """
+    Store the delta record computed for a job so retries reuse it.
+
+    Args:
+        db_job: The claimed job.
+        delta_record_id: Delta record primary key.
+        db: Database session.
+
+    Returns:
+        Updated ActivityAIInsightJobs instance.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        db_job.delta_record_id = delta_record_id
+        db.commit()
+
+        return db_job
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in set_job_delta_record_id: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def delete_finished_jobs(retention_days: int, db: Session) -> int:
+    """
+    Delete the finished jobs older than a retention window.
+
+    Args:
+        retention_days: Jobs finished more than retention_days ago are
+            deleted.
+        db: Database session.
+
+    Returns:
+        Number of jobs deleted.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        num_deleted = (
+            db.query(models.ActivityAIInsightJobs)
+            .filter(
+                models.ActivityAIInsightJobs.status.in_(
+                    jobs_constants.FINISHED_STATUSES
+                ),
+                models.ActivityAIInsightJobs.updated_at < cutoff,
+            )
+            .delete(synchronize_session=False)
+        )
+
+        db.commit()
+        return num_deleted
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in delete_finished_jobs: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
@@ -0,0 +1,93 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+)
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class ActivityAIInsightJobs(Base):
+    __tablename__ = "activity_ai_insight_jobs"
+
+    id = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment="AI insight job ID",
+    )
+
+    activity_id = Column(
+        Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+        index=True,
+        comment="Activity ID the AI insight is generated for",
+    )
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="User ID that owns the activity",
+    )
+
+    status = Column(
+        String(length=20),
+        nullable=False,
+        index=True,
+        comment="Job status (pending, running, succeeded, skipped, failed)",
+    )
+
+    attempts = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Number of attempts made so far",
+    )
+
+    delta_record_id = Column(
+        Integer,
+        ForeignKey("activity_delta_records.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="Delta record computed for the activity, reused on retries",
+    )
+
+    next_run_at = Column(
+        DateTime,
+        nullable=False,
+        index=True,
+        comment="Earliest time the job can be attempted",
+    )
+
+    locked_at = Column(
+        DateTime,
+        nullable=True,
+        comment="Time the job was claimed by a worker",
+    )
+
+    last_error = Column(
+        Text,
+        nullable=True,
+        comment="Error of the last failed attempt",
+    )
+
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        comment="Job creation timestamp",
+    )
+
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="Job last update timestamp",
+    )
@@ -0,0 +1,274 @@
+"""Background queue for AI insight generation.
+
+Activities enqueue an AI insight job in the same transaction that stores
+them, so creating an activity never waits on the LLM provider. Jobs are
+drained by process_activity_ai_insight_jobs, which is run by the
+scheduler and woken up right after new activities are stored.
+
+- Concurrency: at most AI_INSIGHTS_MAX_CONCURRENCY jobs run at once, each
+  in a worker thread so the event loop is never blocked
+- Retries: failed attempts are rescheduled with exponential backoff
+  through the job next run time, up to AI_INSIGHTS_MAX_ATTEMPTS
+- Delivery: the user is notified over WebSocket when an insight is stored
+- Cleanup: finished jobs are deleted after FINISHED_JOB_RETENTION_DAYS by
+  delete_finished_activity_ai_insight_jobs, run by the scheduler
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import activities.activity.models as activities_models
+
+import activities.activity_ai_insight_jobs.constants as jobs_constants
+import activities.activity_ai_insight_jobs.crud as jobs_crud
+
+import activities.activity_ai_insights.utils as activity_ai_insights_utils
+
+import activities.activity_delta_records.crud as delta_crud
+
+import websocket.manager as websocket_manager
+import websocket.utils as websocket_utils
+
+import core.config as core_config
+import core.logger as core_logger
+
+from core.database import SessionLocal
+
+# Threads running the blocking classification and LLM requests
+_executor = ThreadPoolExecutor(
+    max_workers=core_config.AI_INSIGHTS_MAX_CONCURRENCY,
+    thread_name_prefix="ai_insights",
+)
+
+# Whether this process is already draining the queue
+_draining = False
+
+# Strong references to wake-up tasks so they are not garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """
+    Return the backoff delay before the next attempt of a job.
+
+    Args:
+        attempts: Number of attempts already made.
+
+    Returns:
+        The delay, doubling on every attempt and capped at
+        MAX_RETRY_DELAY_SECONDS.
+    """
+    delay = core_config.AI_INSIGHTS_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, jobs_constants.MAX_RETRY_DELAY_SECONDS))
+
+
+def run_activity_ai_insight_job(job_id: int) -> dict[str, Any] | None:
+    """
+    Run one attempt of a claimed AI insight job.
+
+    Blocking; meant to run in the AI insights thread pool.
+
+    Args:
+        job_id: ID of a job claimed by this worker.
+
+    Returns:
+        Dictionary with the user, activity and insight IDs when an insight
+        was stored, None otherwise.
+    """
+    with SessionLocal() as db:
+        db_job = jobs_crud.get_job_by_id(job_id, db)
+        if db_job is None:
+            return None
+
+        try:
+            activity = (
+                db.query(activities_models.Activity)
+                .filter(activities_models.Activity.id == db_job.activity_id)
+                .first()
+            )
+            if activity is None:
+                jobs_crud.finish_job(db_job, jobs_constants.STATUS_SKIPPED, db)
+                return None
+
+            delta_record = None
+            if db_job.delta_record_id is not None:
+                delta_record = delta_crud.get_delta_by_id(db_job.delta_record_id, db)
+
+            if delta_record is None:
+                delta_record = activity_ai_insights_utils.create_activity_delta_record(
+                    activity, db
+                )
+                if delta_record is None:
+                    # No category rules for this activity type
+                    jobs_crud.finish_job(db_job, jobs_constants.STATUS_SKIPPED, db)
+                    return None
+                jobs_crud.set_job_delta_record_id(db_job, delta_record.id, db)
+
+            if not core_config.OPENAI_API_KEY:
+                jobs_crud.finish_job(
+                    db_job,
+                    jobs_constants.STATUS_SKIPPED,
+                    db,
+                    error="OPENAI_API_KEY is not configured",
+                )
+                return None
+
+            insight = activity_ai_insights_utils.create_activity_ai_insight(
+                delta_record, db
+            )
+            jobs_crud.finish_job(db_job, jobs_constants.STATUS_SUCCEEDED, db)
+
+            return {
+                "user_id": db_job.user_id,
+                "activity_id": db_job.activity_id,
+                "insight_id": insight.id,
+            }
+        except Exception as err:
+            db.rollback()
+            _reschedule_failed_job(db_job, err, db)
+            return None
+
+
+async def process_activity_ai_insight_jobs() -> int:
+    """
+    Drain the due AI insight jobs.
+
+    Jobs are claimed as worker slots become free, so a slow request only
+    holds its own slot. Only one drain runs per process at a time; other
+    processes can drain concurrently as claimed rows are locked.
+
+    Returns:
+        Number of jobs attempted.
+    """
+    global _draining
+    if _draining:
+        return 0
+    _draining = True
+
+    loop = asyncio.get_running_loop()
+    manager = websocket_manager.get_websocket_manager()
+    running: set[asyncio.Future] = set()
+    processed = 0
+
+    try:
+        while True:
+            free_slots = core_config.AI_INSIGHTS_MAX_CONCURRENCY - len(running)
+            if free_slots > 0:
+                job_ids = await loop.run_in_executor(
+                    _executor, _claim_due_job_ids, free_slots
+                )
+                for job_id in job_ids:
+                    running.add(
+                        loop.run_in_executor(
+                            _executor, run_activity_ai_insight_job, job_id
+                        )
+                    )
+                processed += len(job_ids)
+
+            if not running:
+                break
+
+            done, running = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as err:
+                    core_logger.print_to_log(
+                        f"Error running AI insight job: {err}", "error", exc=err
+                    )
+                    continue
+                if result is not None:
+                    await _notify_insight_ready(result, manager)
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in process_activity_ai_insight_jobs: {err}", "error", exc=err
+        )
+    finally:
+        _draining = False
+
+    return processed
+
+
+def wake_activity_ai_insight_worker() -> None:
+    """
+    Start draining the AI insight queue without waiting for the scheduler.
+
+    Must be called from the event loop; does nothing if no loop is running.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    task = loop.create_task(process_activity_ai_insight_jobs())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def delete_finished_activity_ai_insight_jobs() -> None:
+    """
+    Delete the finished AI insight jobs past their retention window.
+
+    Designed to be run as a scheduled task, so the queue table only holds
+    pending, running and recently finished jobs.
+    """
+    with SessionLocal() as db:
+        num_deleted = jobs_crud.delete_finished_jobs(
+            jobs_constants.FINISHED_JOB_RETENTION_DAYS, db
+        )
+
+        if num_deleted > 0:
+            core_logger.print_to_log(f"Deleted {num_deleted} finished AI insight jobs")
+
+
+def _claim_due_job_ids(limit: int) -> list[int]:
+    with SessionLocal() as db:
+        return jobs_crud.claim_due_job_ids(limit, db)
+
+
+def _reschedule_failed_job(db_job, err: Exception, db) -> None:
+    error = str(err) or type(err).__name__
+    if db_job.attempts >= core_config.AI_INSIGHTS_MAX_ATTEMPTS:
+        core_logger.print_to_log(
+            f"AI insight job {db_job.id} for activity {db_job.activity_id} "
+            f"failed after {db_job.attempts} attempts: {error}",
+            "warning",
+            exc=err,
+        )
+        jobs_crud.finish_job(db_job, jobs_constants.STATUS_FAILED, db, error=error)
+        return
+
+    retry_at = datetime.now(timezone.utc) + get_retry_delay(db_job.attempts)
+    core_logger.print_to_log(
+        f"AI insight job {db_job.id} for activity {db_job.activity_id} "
+        f"failed (attempt {db_job.attempts}), retrying at {retry_at}: {error}",
+        "warning",
+    )
+    jobs_crud.finish_job(
+        db_job, jobs_constants.STATUS_PENDING, db, error=error, retry_at=retry_at
+    )
+
+
+async def _notify_insight_ready(
+    result: dict[str, Any], manager: websocket_manager.WebSocketManager
+) -> None:
+    try:
+        await websocket_utils.notify_frontend(
+            result["user_id"],
+            manager,
+            {
+                "message": "AI_INSIGHT_READY",
+                "activity_id": result["activity_id"],
+                "insight_id": result["insight_id"],
+            },
+        )
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Failed to notify user {result['user_id']} about AI insight "
+            f"{result['insight_id']}: {err}",
+            "warning",
+        )
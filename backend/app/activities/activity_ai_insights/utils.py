@@ -13,11 +13,14 @@ import users.user_category_rules.crud as user_category_rules_crud
 import users.user_activity_stats.crud as user_stats_crud
 
 from activities.activity_categories.utils import CANONICAL_ACTIVITY_CATEGORIES
-from activities.activity.utils import ACTIVITY_ID_TO_NAME
+import activities.activity.utils as activities_utils
 
 import activities.activity_delta_records.utils as delta_utils
 import core.config as core_config
+import core.metrics as core_metrics
 
+# Chat completions model used to generate the insights
+AI_INSIGHT_MODEL = "gpt-4.1-mini"
 
 
 def generate_ai_insight(record: ActivityDeltaRecords, api_key: str, retries: int = 3, timeout: int = 30) -> str:
@@ -28,7 +31,7 @@ def generate_ai_insight(record: ActivityDeltaRecords, api_key: str, retries: int
         ("unknown", "Unknown"),
     )
 
-    activity_type = ACTIVITY_ID_TO_NAME.get(record.activity_type_id, "Unknown")
+    activity_type = activities_utils.ACTIVITY_ID_TO_NAME.get(record.activity_type_id, "Unknown")
 
     SYSTEM_PROMPT = f"""
     You are an endurance sports analytics assistant.
@@ -244,7 +247,7 @@ def generate_ai_insight(record: ActivityDeltaRecords, api_key: str, retries: int
     # -------------------------------
 
     payload = {
-        "model": "gpt-4.1-mini",
+        "model": AI_INSIGHT_MODEL,
         "messages": (
             [{"role": "system", "content": SYSTEM_PROMPT}]
             + EXAMPLES
@@ -261,13 +264,14 @@ def generate_ai_insight(record: ActivityDeltaRecords, api_key: str, retries: int
 
     for attempt in range(1, retries + 1):
         try:
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=timeout,
-            )
-            response.raise_for_status()
+            with core_metrics.track_external_call("ai_provider"):
+                response = requests.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=timeout,
+                )
+                response.raise_for_status()
 
             return response.json()["choices"][0]["message"]["content"]
 
@@ -283,7 +287,20 @@ def generate_ai_insight(record: ActivityDeltaRecords, api_key: str, retries: int
     raise last_error
 
 
-def get_activity_ai_insights(activity: Activity, db: Session):
+def create_activity_delta_record(
+    activity: Activity, db: Session
+) -> ActivityDeltaRecords | None:
+    """
+    Classify an activity and store its delta against the user statistics.
+
+    Args:
+        activity: The activity to classify.
+        db: Database session.
+
+    Returns:
+        The created delta record, or None if the user has no category rules
+        for the activity type.
+    """
     rules = user_category_rules_crud.get_rules_by_user_activity_type(
         activity.user_id,
         activity.activity_type,
@@ -291,7 +308,7 @@ def get_activity_ai_insights(activity: Activity, db: Session):
     )
 
     if not rules:
-        return
+        return None
 
     category_id = delta_utils.classify_activity_by_rule_vectors(
         activity=activity,
@@ -311,20 +328,43 @@ def get_activity_ai_insights(activity: Activity, db: Session):
         stats=stats,
     )
 
-    delta_record = delta_crud.create_delta(
+    return delta_crud.create_delta(
         record_in=delta_record,
         db=db,
     )
 
+
+def create_activity_ai_insight(delta_record: ActivityDeltaRecords, db: Session):
+    """
+    Generate and store the AI insight for a delta record.
+
+    A single request is made; retries are scheduled by the AI insight job
+    queue instead of sleeping here.
+
+    Args:
+        delta_record: Delta record of the activity.
+        db: Database session.
+
+    Returns:
+        Created ActivityAIInsights instance.
+
+    Raises:
+        ValueError: If no OpenAI API key is configured.
+    """
+    if not core_config.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY is not configured")
+
     insight_text = generate_ai_insight(
         record=delta_record,
         api_key=core_config.OPENAI_API_KEY,
+        retries=1,
     )
 
-    ai_insights_crud.create_insight(
+    return ai_insights_crud.create_insight(
         insight=ActivityAIInsightCreate(
-            activity_id=activity.id,
+            activity_id=delta_record.activity_id,
             insight_text=insight_text,
+            model_used=AI_INSIGHT_MODEL,
         ),
         db=db,
     )
@@ -0,0 +1,39 @@
+"""Rebuild the daily activity rollups from the activities.
+
+Rollups are kept up to date when activities change and are backfilled
+once on startup by migration_satata 5. Run this to rebuild them after
+editing activities directly in the database.
+
+Usage (from the backend/app directory):
+    python -m activities.activity_daily_rollups.backfill [--user-id 1 ...]
+"""
+
+import argparse
+import sys
+
+import activities.activity_daily_rollups.utils as activity_daily_rollups_utils
+
+from core.database import SessionLocal
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--user-id",
+        type=int,
+        action="append",
+        dest="user_ids",
+        help="Only rebuild the rollups of this user (repeatable)",
+    )
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        failed_users = activity_daily_rollups_utils.rebuild_daily_rollups(
+            db, args.user_ids
+        )
+
+    return 1 if failed_users else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+from datetime import date, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import activities.activity.models as activities_models
+import activities.activity_daily_rollups.models as activity_daily_rollups_models
+
+import core.logger as core_logger
+
+ROLLUP_COLUMNS = (
+    "activity_count",
+    "total_distance",
+    "total_duration",
+    "total_elevation_gain",
+    "total_calories",
+    "max_distance",
+    "max_duration",
+    "max_elevation_gain",
+)
+
+
+def _rollup_aggregates() -> list:
+    """Return the aggregates of a rollup, in ROLLUP_COLUMNS order."""
+    Activity = activities_models.Activity
+    return [
+        func.count(Activity.id).label("activity_count"),
+        func.coalesce(func.sum(Activity.distance), 0).label("total_distance"),
+        func.coalesce(func.sum(Activity.total_timer_time), 0).label("total_duration"),
+        func.coalesce(func.sum(Activity.elevation_gain), 0).label(
+            "total_elevation_gain"
+        ),
+        func.coalesce(func.sum(Activity.calories), 0).label("total_calories"),
+        func.max(Activity.distance).label("max_distance"),
+        func.max(Activity.total_timer_time).label("max_duration"),
+        func.max(Activity.elevation_gain).label("max_elevation_gain"),
+    ]
+
+
+def refresh_daily_rollups(keys: set[tuple[int, date, int]], db: Session) -> None:
+    """
+    Recompute the rollups of several days from their activities.
+
+    Only the activities of each user, day and activity type are read, so
+    the cost doesn't depend on the size of the user's history. The session
+    is not committed, so the rollups are stored in the same transaction
+    as the activity changes that caused them.
+
+    Args:
+        keys: Tuples of user ID, day and activity type to recompute.
+        db: Database session.
+    """
+    Activity = activities_models.Activity
+    Rollup = activity_daily_rollups_models.ActivityDailyRollup
+
+    for user_id, day, activity_type in keys:
+        totals = (
+            db.query(*_rollup_aggregates())
+            .filter(
+                Activity.user_id == user_id,
+                Activity.activity_type == activity_type,
+                Activity.start_time >= day,
+                Activity.start_time < day + timedelta(days=1),
+            )
+            .one()
+        )
+
+        if not totals.activity_count:
+            # The last activity of the day was deleted or moved
+            db.query(Rollup).filter(
+                Rollup.user_id == user_id,
+                Rollup.day == day,
+                Rollup.activity_type == activity_type,
+            ).delete(synchronize_session=False)
+            continue
+
+        values = {column: getattr(totals, column) for column in ROLLUP_COLUMNS}
+        statement = insert(Rollup).values(
+            user_id=user_id, day=day, activity_type=activity_type, **values
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "day", "activity_type"],
+                set_={**values, "updated_at": func.now()},
+            )
+        )
+
+
+def rebuild_user_daily_rollups(user_id: int, db: Session) -> int:
+    """
+    Rebuild all rollups of a user from their activities.
+
+    Args:
+        user_id: The ID of the user.
+        db: Database session.
+
+    Returns:
+        Number of rollups stored.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    Activity = activities_models.Activity
+    Rollup = activity_daily_rollups_models.ActivityDailyRollup
+
+    try:
+        db.query(Rollup).filter(Rollup.user_id == user_id).delete(
+            synchronize_session=False
+        )
+
+        day = cast(Activity.start_time, Date)
+        totals = (
+            select(Activity.user_id, day, Activity.activity_type, *_rollup_aggregates())
+            .where(Activity.user_id == user_id)
+            .group_by(Activity.user_id, day, Activity.activity_type)
+        )
+        result = db.execute(
+            insert(Rollup).from_select(
+                ["user_id", "day", "activity_type", *ROLLUP_COLUMNS], totals
+            )
+        )
+
+        db.commit()
+        return result.rowcount
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in rebuild_user_daily_rollups: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
@@ -0,0 +1,113 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    DECIMAL,
+    Index,
+)
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class ActivityDailyRollup(Base):
+    __tablename__ = "activity_daily_rollups"
+
+    id = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment="Activity daily rollup ID",
+    )
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="User ID that the rollup belongs",
+    )
+
+    day = Column(
+        Date,
+        nullable=False,
+        comment="Day of the activities start time",
+    )
+
+    activity_type = Column(
+        Integer,
+        nullable=False,
+        comment="Activity type of the rolled up activities",
+    )
+
+    activity_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Number of activities",
+    )
+
+    total_distance = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Sum of the activities distance in meters",
+    )
+
+    total_duration = Column(
+        DECIMAL(precision=20, scale=10),
+        nullable=False,
+        default=0,
+        comment="Sum of the activities total timer time (s)",
+    )
+
+    total_elevation_gain = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Sum of the activities elevation gain in meters",
+    )
+
+    total_calories = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Sum of the activities kilocalories",
+    )
+
+    max_distance = Column(
+        Integer,
+        nullable=True,
+        comment="Longest activity distance in meters",
+    )
+
+    max_duration = Column(
+        DECIMAL(precision=20, scale=10),
+        nullable=True,
+        comment="Longest activity total timer time (s)",
+    )
+
+    max_elevation_gain = Column(
+        Integer,
+        nullable=True,
+        comment="Highest activity elevation gain in meters",
+    )
+
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="Last rollup update timestamp",
+    )
+
+    __table_args__ = (
+        Index(
+            "idx_activity_daily_rollups_user_day_type",
+            "user_id",
+            "day",
+            "activity_type",
+            unique=True,
+        ),
+    )
@@ -0,0 +1,75 @@
+"""Per user daily activity rollups.
+
+Summaries aggregate the rollup of each user, day and activity type
+instead of scanning the activities:
+
+- activities.activity.crud refreshes the rollups of the days an activity
+  is created on, moved from or to, or deleted from
+- rebuild_daily_rollups backfills the rollups from the activities
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+import activities.activity_daily_rollups.crud as activity_daily_rollups_crud
+
+import users.users.crud as users_crud
+
+import core.logger as core_logger
+
+
+def get_rollup_key(
+    user_id: int, start_time: datetime | str, activity_type: int
+) -> tuple[int, date, int]:
+    """
+    Return the rollup an activity belongs to.
+
+    Args:
+        user_id: The ID of the activity's user.
+        start_time: Activity start time, as a datetime or an ISO string.
+        activity_type: Activity type ID.
+
+    Returns:
+        Tuple of user ID, start day and activity type.
+    """
+    if isinstance(start_time, str):
+        start_time = datetime.fromisoformat(start_time)
+    return user_id, start_time.date(), int(activity_type)
+
+
+def rebuild_daily_rollups(db: Session, user_ids: list[int] | None = None) -> int:
+    """
+    Rebuild the rollups of several users from their activities.
+
+    Each user is rebuilt in its own transaction. Failures are logged and
+    the other users are still rebuilt.
+
+    Args:
+        db: Database session.
+        user_ids: Users to rebuild, defaults to every user.
+
+    Returns:
+        Number of users whose rollups could not be rebuilt.
+    """
+    if user_ids is None:
+        user_ids = [user.id for user in users_crud.get_all_users(db)]
+
+    failed_users = 0
+    for user_id in user_ids:
+        try:
+            num_rollups = activity_daily_rollups_crud.rebuild_user_daily_rollups(
+                user_id, db
+            )
+            core_logger.print_to_log(
+                f"User {user_id}: Rebuilt {num_rollups} daily activity rollups"
+            )
+        except Exception as err:
+            failed_users += 1
+            core_logger.print_to_log(
+                f"User {user_id}: Error rebuilding daily activity rollups: {err}",
+                "error",
+                exc=err,
+            )
+
+    return failed_users
@@ -17,7 +17,7 @@ import activities.activity_delta_records.utils as delta_utils
 import activities.activity_ai_insights.crud as ai_insights_crud
 import activities.activity_ai_insights.schema as ai_insights_schema
 from activities.activity_categories.utils import CANONICAL_ACTIVITY_CATEGORIES
-from activities.activity.utils import ACTIVITY_ID_TO_NAME
+import activities.activity.utils as activities_utils
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
@@ -208,7 +208,7 @@ def test(db: Session):
             ("unknown", "Unknown"),
         )
 
-        activity_type = ACTIVITY_ID_TO_NAME.get(record.activity_type_id, "Unknown")
+        activity_type = activities_utils.ACTIVITY_ID_TO_NAME.get(record.activity_type_id, "Unknown")
 
         SYSTEM_PROMPT = f"""
         You are an endurance sports analytics assistant.
@@ -0,0 +1,172 @@
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import activities.activity_fingerprints.models as activity_fingerprints_models
+
+import core.logger as core_logger
+
+
+def create_activity_fingerprint(
+    user_id: int,
+    activity_id: int,
+    signature: str,
+    content_hash: str | None,
+    db: Session,
+    commit: bool = True,
+) -> activity_fingerprints_models.ActivityFingerprint:
+    """
+    Store the fingerprint of an activity.
+
+    Args:
+        user_id: ID of the user that owns the activity.
+        activity_id: ID of the activity.
+        signature: Normalized signature of the activity.
+        content_hash: Hash of the file the activity was imported from,
+            None if it wasn't imported from a file.
+        db: Database session.
+        commit: Whether to commit the transaction. When False the
+            fingerprint is only added so it is stored together with the
+            activity.
+
+    Returns:
+        The created ActivityFingerprint instance.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        fingerprint = activity_fingerprints_models.ActivityFingerprint(
+            user_id=user_id,
+            activity_id=activity_id,
+            signature=signature,
+            content_hash=content_hash,
+        )
+        db.add(fingerprint)
+        if commit:
+            db.commit()
+        return fingerprint
+    except Exception as err:
+        if commit:
+            db.rollback()
+        core_logger.print_to_log(
+            f"Error in create_activity_fingerprint: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_known_content_hashes(
+    user_id: int, content_hashes: list[str], db: Session
+) -> set[str]:
+    """
+    Return the content hashes of files the user's activities came from.
+
+    Args:
+        user_id: ID of the user.
+        content_hashes: Content hashes to look up.
+        db: Database session.
+
+    Returns:
+        The content hashes already stored for the user.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    if not content_hashes:
+        return set()
+
+    ActivityFingerprint = activity_fingerprints_models.ActivityFingerprint
+    try:
+        return set(
+            db.execute(
+                select(ActivityFingerprint.content_hash)
+                .where(
+                    ActivityFingerprint.user_id == user_id,
+                    ActivityFingerprint.content_hash.in_(set(content_hashes)),
+                )
+                .distinct()
+            ).scalars()
+        )
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in get_known_content_hashes: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_known_signatures(
+    user_id: int,
+    signatures: list[str] | None,
+    db: Session,
+    max_id: int | None = None,
+) -> set[str]:
+    """
+    Return the signatures of the user's activities.
+
+    Args:
+        user_id: ID of the user.
+        signatures: Signatures to look up, all the user's signatures if
+            None.
+        db: Database session.
+        max_id: Only look up the fingerprints up to this ID, all if None.
+
+    Returns:
+        The signatures already stored for the user.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    if signatures is not None and not signatures:
+        return set()
+
+    ActivityFingerprint = activity_fingerprints_models.ActivityFingerprint
+    query = select(ActivityFingerprint.signature).where(
+        ActivityFingerprint.user_id == user_id
+    )
+    if signatures is not None:
+        query = query.where(ActivityFingerprint.signature.in_(set(signatures)))
+    if max_id is not None:
+        query = query.where(ActivityFingerprint.id <= max_id)
+
+    try:
+        return set(db.execute(query.distinct()).scalars())
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in get_known_signatures: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_max_fingerprint_id(db: Session) -> int:
+    """
+    Return the ID of the last fingerprint stored.
+
+    Args:
+        db: Database session.
+
+    Returns:
+        The highest fingerprint ID, 0 if there is none.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    ActivityFingerprint = activity_fingerprints_models.ActivityFingerprint
+    try:
+        return db.execute(select(func.max(ActivityFingerprint.id))).scalar() or 0
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in get_max_fingerprint_id: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
@@ -0,0 +1,64 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    Index,
+)
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class ActivityFingerprint(Base):
+    __tablename__ = "activity_fingerprints"
+    # Lookups of the importers, before parsing a file or fetching an activity
+    __table_args__ = (
+        Index(
+            "idx_activity_fingerprints_user_id_content_hash",
+            "user_id",
+            "content_hash",
+        ),
+        Index("idx_activity_fingerprints_user_id_signature", "user_id", "signature"),
+    )
+
+    id = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment="Activity fingerprint ID",
+    )
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="User ID that owns the activity",
+    )
+
+    activity_id = Column(
+        Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Activity ID the fingerprint belongs",
+    )
+
+    content_hash = Column(
+        String(length=64),
+        nullable=True,
+        comment="SHA-256 of the raw file the activity was imported from",
+    )
+
+    signature = Column(
+        String(length=32),
+        nullable=False,
+        comment="Normalized activity signature (UTC start time)",
+    )
+
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        comment="Fingerprint creation timestamp",
+    )
@@ -0,0 +1,60 @@
+"""Content fingerprints of the imported activities.
+
+Every stored activity gets a fingerprint, so the importers can tell an
+activity is already stored before doing the expensive work of parsing,
+geocoding and storing it again:
+
+- content_hash: SHA-256 of the raw file the activity came from, checked
+  before a file is parsed (bulk import, Garmin Connect downloads)
+- signature: the start time normalized to UTC seconds, the same key the
+  duplicate detection of add_activity uses, checked before an activity
+  is fetched (Strava, Garmin Connect) or restored (profile import)
+
+Fingerprints are deleted with their activity, so a deleted activity can
+be imported again.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+
+# Bytes read at a time when hashing a file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the content hash of a file without loading it in memory.
+
+    Args:
+        file_path: Path of the file.
+
+    Returns:
+        Hex SHA-256 of the file bytes.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def activity_signature(start_time: str | datetime) -> str:
+    """
+    Normalize an activity start time into its signature.
+
+    Aware times are converted to UTC, naive times are taken as UTC like
+    the start times stored by the importers. Fractions of a second are
+    dropped.
+
+    Args:
+        start_time: Start time, as a datetime or an ISO 8601 string
+            (e.g. "2024-05-01T06:30:00" or "2024-05-01 06:30:00").
+
+    Returns:
+        The start time formatted as "%Y-%m-%dT%H:%M:%S".
+    """
+    if isinstance(start_time, str):
+        start_time = datetime.fromisoformat(start_time)
+    if start_time.tzinfo is not None:
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return start_time.strftime("%Y-%m-%dT%H:%M:%S")
@@ -182,6 +182,7 @@ def create_activity_laps(
     activity_laps: list[activity_laps_schema.ActivityLaps],
     activity_id: int,
     db: Session,
+    commit: bool = True,
 ):
     try:
         # Create a list to store the ActivityLaps objects
@@ -240,13 +241,15 @@ def create_activity_laps(
 
         # Bulk insert the list of ActivityLaps objects
         db.bulk_save_objects(laps)
-        db.commit()
+        # Commit unless the caller batches several inserts in one transaction
+        if commit:
+            db.commit()
     except Exception as err:
         # Rollback the transaction
         db.rollback()
 
         # Log the exception
-        core_logger(f"Error in create_activity_laps: {err}", "error", exc=err)
+        core_logger.print_to_log(f"Error in create_activity_laps: {err}", "error", exc=err)
         # Raise an HTTPException with a 500 Internal Server Error status code
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
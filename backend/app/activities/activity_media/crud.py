@@ -176,6 +176,7 @@ def create_activity_medias(
     activity_media: list[activity_media_schema.ActivityMedia],
     activity_id: int,
     db: Session,
+    commit: bool = True,
 ):
     try:
         # Create a list to store the ActivityMedia objects
@@ -200,7 +201,9 @@ def create_activity_medias(
 
         # Bulk insert the list of ActivityMedia objects
         db.bulk_save_objects(media)
-        db.commit()
+        # Commit unless the caller batches several inserts in one transaction
+        if commit:
+            db.commit()
     except Exception as err:
         # Rollback the transaction
         db.rollback()
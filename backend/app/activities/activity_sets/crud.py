@@ -183,6 +183,7 @@ def create_activity_sets(
     activity_sets: list,
     activity_id: int,
     db: Session,
+    commit: bool = True,
 ):
     try:
         # Create a list to store the ActivitySets objects
@@ -251,7 +252,9 @@ def create_activity_sets(
 
         # Bulk insert the list of ActivitySets objects
         db.bulk_save_objects(sets)
-        db.commit()
+        # Commit unless the caller batches several inserts in one transaction
+        if commit:
+            db.commit()
     except Exception as err:
         # Rollback the transaction
         db.rollback()
@@ -5,4 +5,36 @@ STREAM_TYPE_CADENCE = 3
 STREAM_TYPE_ELEVATION = 4
 STREAM_TYPE_SPEED = 5
 STREAM_TYPE_PACE = 6
-STREAM_TYPE_MAP = 7
\ No newline at end of file
+STREAM_TYPE_MAP = 7
+
+# Levels of detail of the streams returned to charts and maps
+STREAM_DETAIL_LEVEL_LOW = "low"
+STREAM_DETAIL_LEVEL_MEDIUM = "medium"
+STREAM_DETAIL_LEVEL_HIGH = "high"
+
+# Points kept per chart stream by the Largest-Triangle-Three-Buckets algorithm
+STREAM_DETAIL_MAX_POINTS = {
+    STREAM_DETAIL_LEVEL_LOW: 500,
+    STREAM_DETAIL_LEVEL_MEDIUM: 1000,
+    STREAM_DETAIL_LEVEL_HIGH: 2000,
+}
+
+# Largest distance in meters a simplified map track deviates from the original
+STREAM_DETAIL_MAP_TOLERANCE_METERS = {
+    STREAM_DETAIL_LEVEL_LOW: 10.0,
+    STREAM_DETAIL_LEVEL_MEDIUM: 3.0,
+    STREAM_DETAIL_LEVEL_HIGH: 1.0,
+}
+
+# Waypoint key holding the values of each chart stream type
+STREAM_VALUE_KEYS = {
+    STREAM_TYPE_HR: "hr",
+    STREAM_TYPE_POWER: "power",
+    STREAM_TYPE_CADENCE: "cad",
+    STREAM_TYPE_ELEVATION: "ele",
+    STREAM_TYPE_SPEED: "vel",
+    STREAM_TYPE_PACE: "pace",
+}
+
+# Number of simplified streams kept in memory
+STREAM_DETAIL_CACHE_SIZE = 512
@@ -1,11 +1,14 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-import numpy as np
-import datetime
 
 import activities.activity_streams.constants as activity_streams_constants
 import activities.activity_streams.schema as activity_streams_schema
 import activities.activity_streams.models as activity_streams_models
+import activities.activity_streams.simplification as activity_streams_simplification
+import activities.activity_streams.utils as activity_streams_utils
+
+import activities.activity_zones.crud as activity_zones_crud
+import activities.activity_zones.utils as activity_zones_utils
 
 import activities.activity.crud as activity_crud
 import activities.activity.models as activity_models
@@ -13,13 +16,15 @@ import activities.activity.schema as activities_schema
 
 import server_settings.utils as server_settings_utils
 
-import users.users.crud as users_crud
-
 import core.logger as core_logger
 
 
 def get_activity_streams(
-    activity_id: int, token_user_id: int, db: Session
+    activity_id: int,
+    token_user_id: int,
+    db: Session,
+    detail_level: str | None = None,
+    encode_polyline: bool = False,
 ) -> list[activity_streams_schema.ActivityStreams] | None:
     try:
         activity = activity_crud.get_activity_by_id(activity_id, db)
@@ -88,9 +93,15 @@ def get_activity_streams(
                 )
             ]
 
+        activity_zones = get_activity_zones_for_streams(
+            activity_id, activity_streams, db
+        )
+
         # Return the activity streams
         return [
-            transform_activity_streams(stream, activity, db)
+            transform_activity_streams(
+                stream, activity_zones, detail_level, encode_polyline
+            )
             for stream in activity_streams
         ]
     except Exception as err:
@@ -125,9 +136,6 @@ def get_activities_streams(
         if not activities:
             return []
 
-        # Map: activity_id -> activity
-        activity_map = {activity.id: activity for activity in activities}
-
         # Filter out hidden sets for activities the user doesn't own
         allowed_ids = [
             activity.id for activity in activities if activity.user_id == token_user_id
@@ -148,9 +156,11 @@ def get_activities_streams(
         if not all_streams:
             return []
 
+        zones_map = activity_zones_crud.get_activities_zones(allowed_ids, db)
+
         # Transform all allowed streams
         return [
-            transform_activity_streams(stream, activity_map[stream.activity_id], db)
+            transform_activity_streams(stream, zones_map.get(stream.activity_id))
             for stream in all_streams
         ]
 
@@ -164,7 +174,12 @@ def get_activities_streams(
         ) from err
 
 
-def get_public_activity_streams(activity_id: int, db: Session):
+def get_public_activity_streams(
+    activity_id: int,
+    db: Session,
+    detail_level: str | None = None,
+    encode_polyline: bool = False,
+):
     try:
         # Check if public sharable links are enabled in server settings
         server_settings = server_settings_utils.get_server_settings_or_404(db)
@@ -239,9 +254,15 @@ def get_public_activity_streams(activity_id: int, db: Session):
             )
         ]
 
+        activity_zones = get_activity_zones_for_streams(
+            activity_id, activity_streams, db
+        )
+
         # Return the activity streams
         return [
-            transform_activity_streams(stream, activity, db)
+            transform_activity_streams(
+                stream, activity_zones, detail_level, encode_polyline
+            )
             for stream in activity_streams
         ]
     except Exception as err:
@@ -257,7 +278,12 @@ def get_public_activity_streams(activity_id: int, db: Session):
 
 
 def get_activity_stream_by_type(
-    activity_id: int, stream_type: int, token_user_id: int, db: Session
+    activity_id: int,
+    stream_type: int,
+    token_user_id: int,
+    db: Session,
+    detail_level: str | None = None,
+    encode_polyline: bool = False,
 ):
     try:
         activity = activity_crud.get_activity_by_id(activity_id, db)
@@ -328,8 +354,14 @@ def get_activity_stream_by_type(
             ):
                 return None
 
+        activity_zones = get_activity_zones_for_streams(
+            activity_id, [activity_stream], db
+        )
+
         # Return the activity stream
-        return transform_activity_streams(activity_stream, activity, db)
+        return transform_activity_streams(
+            activity_stream, activity_zones, detail_level, encode_polyline
+        )
     except Exception as err:
         # Log the exception
         core_logger.print_to_log(
@@ -342,147 +374,95 @@ def get_activity_stream_by_type(
         ) from err
 
 
-def transform_activity_streams(activity_stream, activity, db):
+def get_activity_zones_for_streams(activity_id: int, activity_streams: list, db):
     """
-    Transforms an activity stream based on its stream type.
-    If the stream type of the given activity_stream is heart rate (HR), this function delegates
-    the transformation to the `transform_activity_streams_hr` function. Otherwise, it returns
-    the activity_stream unchanged.
+    Get the stored zones of an activity if its streams show them.
+
     Args:
-        activity_stream: The activity stream object to be transformed.
-        activity: The activity object associated with the stream.
-        db: The database session or connection object.
+        activity_id: The ID of the activity.
+        activity_streams: The activity stream models being returned.
+        db: The database session.
+
     Returns:
-        The transformed activity stream if the stream type is HR, otherwise the original activity_stream.
+        The activity zones, or None if no HR or power stream is returned.
     """
-    if activity_stream.stream_type == activity_streams_constants.STREAM_TYPE_HR:
-        return transform_activity_streams_hr(activity_stream, activity, db)
-
-    return activity_stream
-
-
-def transform_activity_streams_hr(activity_stream, activity, db):
+    if any(
+        stream.stream_type in activity_zones_crud.ZONE_STREAM_TYPES
+        for stream in activity_streams
+    ):
+        return activity_zones_crud.get_activity_zones(activity_id, db)
+    return None
+
+
+def transform_activity_streams(
+    activity_stream,
+    activity_zones=None,
+    detail_level: str | None = None,
+    encode_polyline: bool = False,
+):
     """
-    Transforms an activity stream by calculating the percentage of time spent
-    in each heart rate zone based on user details.
+    Transforms an activity stream based on its stream type.
+    The stored stream is first decoded from its compressed columnar format into
+    an ActivityStreams schema with the waypoints as a list of dicts. Heart rate
+    (HR) and power streams get the zone distributions stored for the activity
+    when it was imported.
+    With a level of detail, the waypoints are then reduced to the points a
+    chart or map needs.
     Args:
-        activity_stream: The activity stream object containing waypoints with
-        heart rate data.
-        activity: The activity object associated with the stream, used to
-        retrieve the user ID.
-        db: The database session or connection used to fetch user details.
+        activity_stream: The activity stream model to be transformed.
+        activity_zones: The stored zones of the activity, if any.
+        detail_level: Level of detail of the waypoints, None for every waypoint.
+        encode_polyline: Whether to return a map stream as an encoded polyline
+            instead of waypoints.
     Returns:
-        The activity stream object with an added 'hr_zone_percentages'
-        attribute, which contains the percentage of time spent in each heart
-        rate zone and their respective HR boundaries.
-        If waypoints or user details are missing, returns the original activity
-        stream unchanged.
-    Notes:
-        - Heart rate zones are calculated using the formula: max_heart_rate = 220 - age.
-        - The function expects waypoints to be a list of dicts with an "hr" key.
-        - If no valid heart rate data is present, the activity stream is returned as is.
+        The decoded activity stream, with zones added if the stream type is HR
+        or power.
     """
-    # Check if the activity stream has waypoints
-    waypoints = activity_stream.stream_waypoints
-    if not waypoints or not isinstance(waypoints, list):
-        # If there are no waypoints, return the activity stream as is
-        return activity_stream
-
-    # Get the user details to calculate heart rate zones
-    detail_user = users_crud.get_user_by_id(activity.user_id, db)
-    if not detail_user:
-        # If user details are not available, return the activity stream as is
-        return activity_stream
-
-    # Use user's max_heart_rate if set, otherwise calculate based on age formula
-    if detail_user.max_heart_rate:
-        max_heart_rate = detail_user.max_heart_rate
-    elif detail_user.birthdate:
-        # Calculate the maximum heart rate based on the user's birthdate
-        year = int(detail_user.birthdate.split("-")[0])
-        current_year = datetime.datetime.now().year
-        max_heart_rate = 220 - (current_year - year)
+    if detail_level is not None:
+        # Simplified waypoints are cached, skip decoding the full stream
+        waypoints = activity_streams_simplification.get_detail_waypoints(
+            activity_stream, detail_level
+        )
     else:
-        # If neither max_heart_rate nor birthdate is available, return the activity stream as is
-        return activity_stream
-
-    # Calculate heart rate zones based on the maximum heart rate
-    zone_1 = max_heart_rate * 0.6
-    zone_2 = max_heart_rate * 0.7
-    zone_3 = max_heart_rate * 0.8
-    zone_4 = max_heart_rate * 0.9
-
-    # Extract heart rate values from waypoints
-    hr_values = np.array(
-        [float(wp.get("hr")) for wp in waypoints if wp.get("hr") is not None]
+        waypoints = activity_streams_utils.get_stream_waypoints(activity_stream)
+
+    stream = activity_streams_schema.ActivityStreams(
+        id=activity_stream.id,
+        activity_id=activity_stream.activity_id,
+        stream_type=activity_stream.stream_type,
+        stream_waypoints=waypoints,
+        strava_activity_stream_id=activity_stream.strava_activity_stream_id,
     )
 
-    # If there are no valid heart rate values, return the activity stream as is
-    total = len(hr_values)
-    if total == 0:
-        return activity_stream
-
-    # Calculate the percentage of time spent in each heart rate zone
-    zone_counts = [
-        np.sum(hr_values < zone_1),
-        np.sum((hr_values >= zone_1) & (hr_values < zone_2)),
-        np.sum((hr_values >= zone_2) & (hr_values < zone_3)),
-        np.sum((hr_values >= zone_3) & (hr_values < zone_4)),
-        np.sum(hr_values >= zone_4),
-    ]
-    zone_percentages = [round((count / total) * 100, 2) for count in zone_counts]
-
-    # Calculate time in seconds for each zone using the percentage of total_timer_time
-    has_timer_time = hasattr(activity, "total_timer_time") and activity.total_timer_time
-    if has_timer_time:
-        zone_time_seconds = [
-            int((percent / 100) * float(activity.total_timer_time))
-            for percent in zone_percentages
-        ]
-    else:
-        # Fallback: no time calculation possible
-        zone_time_seconds = [0, 0, 0, 0, 0]
-
-    # Calculate zone HR boundaries for display
-    zone_hr = {
-        "zone_1": f"< {int(zone_1)}",
-        "zone_2": f"{int(zone_1)} - {int(zone_2) - 1}",
-        "zone_3": f"{int(zone_2)} - {int(zone_3) - 1}",
-        "zone_4": f"{int(zone_3)} - {int(zone_4) - 1}",
-        "zone_5": f">= {int(zone_4)}",
-    }
-    activity_stream.hr_zone_percentages = {
-        "zone_1": {
-            "percent": zone_percentages[0],
-            "hr": zone_hr["zone_1"],
-            "time_seconds": zone_time_seconds[0],
-        },
-        "zone_2": {
-            "percent": zone_percentages[1],
-            "hr": zone_hr["zone_2"],
-            "time_seconds": zone_time_seconds[1],
-        },
-        "zone_3": {
-            "percent": zone_percentages[2],
-            "hr": zone_hr["zone_3"],
-            "time_seconds": zone_time_seconds[2],
-        },
-        "zone_4": {
-            "percent": zone_percentages[3],
-            "hr": zone_hr["zone_4"],
-            "time_seconds": zone_time_seconds[3],
-        },
-        "zone_5": {
-            "percent": zone_percentages[4],
-            "hr": zone_hr["zone_5"],
-            "time_seconds": zone_time_seconds[4],
-        },
-    }
-
-    return activity_stream
-
-
-def get_public_activity_stream_by_type(activity_id: int, stream_type: int, db: Session):
+    if activity_zones is not None:
+        if stream.stream_type == activity_streams_constants.STREAM_TYPE_HR:
+            stream.hr_zone_percentages = activity_zones.hr_zones
+        elif stream.stream_type == activity_streams_constants.STREAM_TYPE_POWER:
+            stream.power_zone_percentages = activity_zones.power_zones
+
+    if (
+        encode_polyline
+        and stream.stream_type == activity_streams_constants.STREAM_TYPE_MAP
+    ):
+        stream.encoded_polyline = activity_streams_simplification.encode_polyline(
+            [
+                (waypoint["lat"], waypoint["lon"])
+                for waypoint in stream.stream_waypoints
+                if waypoint.get("lat") is not None and waypoint.get("lon") is not None
+            ]
+        )
+        stream.stream_waypoints = []
+
+    return stream
+
+
+def get_public_activity_stream_by_type(
+    activity_id: int,
+    stream_type: int,
+    db: Session,
+    detail_level: str | None = None,
+    encode_polyline: bool = False,
+):
     try:
         # Check if public sharable links are enabled in server settings
         server_settings = server_settings_utils.get_server_settings_or_404(db)
@@ -560,8 +540,14 @@ def get_public_activity_stream_by_type(activity_id: int, stream_type: int, db: S
         ):
             return None
 
+        activity_zones = get_activity_zones_for_streams(
+            activity_id, [activity_stream], db
+        )
+
         # Return the activity stream
-        return transform_activity_streams(activity_stream, activity, db)
+        return transform_activity_streams(
+            activity_stream, activity_zones, detail_level, encode_polyline
+        )
     except Exception as err:
         # Log the exception
         core_logger.print_to_log(
@@ -575,7 +561,9 @@ def get_public_activity_stream_by_type(activity_id: int, stream_type: int, db: S
 
 
 def create_activity_streams(
-    activity_streams: list[activity_streams_schema.ActivityStreams], db: Session
+    activity_streams: list[activity_streams_schema.ActivityStreams],
+    db: Session,
+    commit: bool = True,
 ):
     try:
         # Create a list to store the ActivityStreams objects
@@ -583,11 +571,13 @@ def create_activity_streams(
 
         # Iterate over the list of ActivityStreams objects
         for stream in activity_streams:
-            # Create an ActivityStreams object
+            # Create an ActivityStreams object with the waypoints encoded
             db_stream = activity_streams_models.ActivityStreams(
                 activity_id=stream.activity_id,
                 stream_type=stream.stream_type,
-                stream_waypoints=stream.stream_waypoints,
+                stream_data=activity_streams_utils.encode_stream_waypoints(
+                    stream.stream_waypoints
+                ),
                 strava_activity_stream_id=stream.strava_activity_stream_id,
             )
 
@@ -596,7 +586,11 @@ def create_activity_streams(
 
         # Bulk insert the list of ActivityStreams objects
         db.bulk_save_objects(streams)
-        db.commit()
+        # Store the zone distributions so stream reads don't compute them
+        activity_zones_utils.store_activity_zones(activity_streams, db)
+        # Commit unless the caller batches several inserts in one transaction
+        if commit:
+            db.commit()
     except Exception as err:
         # Rollback the transaction
         db.rollback()
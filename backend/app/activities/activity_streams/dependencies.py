@@ -1,5 +1,25 @@
+from fastapi import HTTPException, Query, status
+
+import activities.activity_streams.constants as activity_streams_constants
+
 import core.dependencies as core_dependencies
 
 def validate_activity_stream_type(stream_type: int):
     # Check if gear type is between 1 and 7
-    core_dependencies.validate_type(type=stream_type, min=1, max=7, message="Invalid activity stream type")
\ No newline at end of file
+    core_dependencies.validate_type(type=stream_type, min=1, max=7, message="Invalid activity stream type")
+
+
+def validate_activity_stream_detail_level(
+    detail_level: str | None = Query(
+        None, description="Level of detail of the waypoints: low, medium or high."
+    ),
+):
+    # Check if detail level is one of the known levels, None returns every waypoint
+    if (
+        detail_level is not None
+        and detail_level not in activity_streams_constants.STREAM_DETAIL_MAX_POINTS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid activity stream detail level",
+        )
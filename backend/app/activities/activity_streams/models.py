@@ -4,7 +4,9 @@ from sqlalchemy import (
     ForeignKey,
     BigInteger,
     JSON,
+    LargeBinary,
 )
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from core.database import Base
 
@@ -25,7 +27,16 @@ class ActivityStreams(Base):
         nullable=False,
         comment="Stream type (1 - HR, 2 - Power, 3 - Cadence, 4 - Elevation, 5 - Velocity, 6 - Pace, 7 - lat/lon)",
     )
-    stream_waypoints = Column(JSON, nullable=False, comment="Store waypoints data")
+    stream_waypoints = Column(
+        JSON,
+        nullable=True,
+        comment="Legacy JSON waypoints data (replaced by stream_data)",
+    )
+    stream_data = Column(
+        LargeBinary().with_variant(mysql.LONGBLOB(), "mysql"),
+        nullable=True,
+        comment="Compressed columnar waypoints data",
+    )
     strava_activity_stream_id = Column(
         BigInteger, nullable=True, comment="Strava activity stream ID"
     )
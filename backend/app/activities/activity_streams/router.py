@@ -1,6 +1,6 @@
 from typing import Annotated, Callable
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
 from sqlalchemy.orm import Session
 
 import activities.activity_streams.schema as activity_streams_schema
@@ -33,13 +33,24 @@ async def read_activities_streams_for_activity_all(
         int,
         Depends(auth_security.get_sub_from_access_token),
     ],
+    validate_detail_level: Annotated[
+        Callable,
+        Depends(activity_streams_dependencies.validate_activity_stream_detail_level),
+    ],
     db: Annotated[
         Session,
         Depends(core_database.get_db),
     ],
+    detail_level: Annotated[str | None, Query()] = None,
+    encode_polyline: Annotated[
+        bool,
+        Query(description="Return the map stream as an encoded polyline."),
+    ] = False,
 ):
     # Get the activity streams from the database and return them
-    return activity_streams_crud.get_activity_streams(activity_id, token_user_id, db)
+    return activity_streams_crud.get_activity_streams(
+        activity_id, token_user_id, db, detail_level, encode_polyline
+    )
 
 
 @router.get(
@@ -62,12 +73,21 @@ async def read_activities_streams_for_activity_stream_type(
         int,
         Depends(auth_security.get_sub_from_access_token),
     ],
+    validate_detail_level: Annotated[
+        Callable,
+        Depends(activity_streams_dependencies.validate_activity_stream_detail_level),
+    ],
     db: Annotated[
         Session,
         Depends(core_database.get_db),
     ],
+    detail_level: Annotated[str | None, Query()] = None,
+    encode_polyline: Annotated[
+        bool,
+        Query(description="Return the map stream as an encoded polyline."),
+    ] = False,
 ):
     # Get the activity stream from the database and return them
     return activity_streams_crud.get_activity_stream_by_type(
-        activity_id, stream_type, token_user_id, db
+        activity_id, stream_type, token_user_id, db, detail_level, encode_polyline
     )
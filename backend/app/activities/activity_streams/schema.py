@@ -13,6 +13,8 @@ class ActivityStreams(BaseModel):
         stream_waypoints (List[dict]): List of waypoints or data points in the stream.
         strava_activity_stream_id (int | None): Identifier for the corresponding Strava activity stream (optional).
         hr_zone_percentages (dict | None): Heart rate zone percentages for the activity (optional).
+        power_zone_percentages (dict | None): Power zone percentages for the activity (optional).
+        encoded_polyline (str | None): Map track as a Google encoded polyline, replacing the waypoints when requested (optional).
     """
 
     id: int | None = None
@@ -21,5 +23,7 @@ class ActivityStreams(BaseModel):
     stream_waypoints: List[dict]
     strava_activity_stream_id: int | None = None
     hr_zone_percentages: dict | None = None
+    power_zone_percentages: dict | None = None
+    encoded_polyline: str | None = None
 
     model_config = {"from_attributes": True}
@@ -0,0 +1,255 @@
+"""Level of detail of activity streams.
+
+Streams hold one waypoint per recorded second, far more than a chart is
+wide or a map can draw. Streams requested with a level of detail are
+reduced before they are returned, and the result is kept in memory:
+
+- lttb_indices picks the chart points with the Largest-Triangle-Three-
+  Buckets algorithm, which keeps peaks and drops
+- douglas_peucker_indices simplifies map tracks within a distance
+  tolerance in meters
+- encode_polyline encodes a track with the Google encoded polyline format
+- get_detail_waypoints returns the waypoints of a stream for a level of
+  detail, computing them once per stream and level
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import activities.activity_streams.constants as activity_streams_constants
+import activities.activity_streams.utils as activity_streams_utils
+
+# Meters per degree of latitude
+_METERS_PER_DEGREE = 2 * math.pi * 6371008.8 / 360
+
+_detail_cache: OrderedDict[tuple[int, str], list[dict]] = OrderedDict()
+_detail_cache_lock = threading.Lock()
+
+
+def lttb_indices(values: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select the points of a series to draw with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept. The points in between are split in
+    threshold - 2 buckets and, in each bucket, the point forming the largest
+    triangle with the previous selected point and the average of the next
+    bucket is kept. Missing values count as 0 when comparing areas.
+
+    Args:
+        values: Values of the series, evenly spaced.
+        threshold: Number of points to keep.
+
+    Returns:
+        Sorted indices of the points kept.
+    """
+    count = len(values)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    y = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    x = np.arange(count, dtype=np.float64)
+    bucket_size = (count - 2) / (threshold - 2)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = count - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[selected] - average_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (average_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def douglas_peucker_indices(
+    latitudes: np.ndarray, longitudes: np.ndarray, tolerance: float
+) -> np.ndarray:
+    """
+    Simplify a track with the Douglas-Peucker algorithm.
+
+    Coordinates are projected to meters around the first point, which is
+    accurate enough for the extent of an activity.
+
+    Args:
+        latitudes: Latitudes of the track in degrees.
+        longitudes: Longitudes of the track in degrees.
+        tolerance: Largest distance in meters between the simplified and the
+            original track.
+
+    Returns:
+        Sorted indices of the points kept.
+    """
+    count = len(latitudes)
+    if count < 3:
+        return np.arange(count)
+
+    scale_x = _METERS_PER_DEGREE * math.cos(math.radians(float(latitudes[0])))
+    points = np.column_stack(
+        (
+            (np.asarray(longitudes, dtype=np.float64) - longitudes[0]) * scale_x,
+            (np.asarray(latitudes, dtype=np.float64) - latitudes[0])
+            * _METERS_PER_DEGREE,
+        )
+    )
+
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    segments = [(0, count - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+
+        segment = points[end] - points[start]
+        offsets = points[start + 1 : end] - points[start]
+        length = math.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = (
+                np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0])
+                / length
+            )
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            segments.append((start, split))
+            segments.append((split, end))
+
+    return np.flatnonzero(keep)
+
+
+def encode_polyline(coordinates: list[tuple[float, float]], precision: int = 5) -> str:
+    """
+    Encode coordinates with the Google encoded polyline algorithm.
+
+    Args:
+        coordinates: Latitude and longitude pairs in degrees.
+        precision: Number of decimals kept, 5 is the format used by most
+            map libraries.
+
+    Returns:
+        The encoded polyline.
+    """
+    factor = 10**precision
+    encoded = []
+    previous_lat = previous_lon = 0
+    for lat, lon in coordinates:
+        lat_value = round(lat * factor)
+        lon_value = round(lon * factor)
+        for delta in (lat_value - previous_lat, lon_value - previous_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+        previous_lat, previous_lon = lat_value, lon_value
+    return "".join(encoded)
+
+
+def simplify_stream_waypoints(
+    stream_type: int, waypoints: list[dict], detail_level: str
+) -> list[dict]:
+    """
+    Reduce the waypoints of a stream to a level of detail.
+
+    Map waypoints without coordinates are dropped, as the map doesn't draw
+    them. Stream types without a known value key are returned unchanged.
+
+    Args:
+        stream_type: Type of the stream.
+        waypoints: Waypoints of the stream.
+        detail_level: One of the STREAM_DETAIL_LEVEL_* constants.
+
+    Returns:
+        The waypoints kept.
+    """
+    if stream_type == activity_streams_constants.STREAM_TYPE_MAP:
+        track = [
+            waypoint
+            for waypoint in waypoints
+            if waypoint.get("lat") is not None and waypoint.get("lon") is not None
+        ]
+        if not track:
+            return []
+        indices = douglas_peucker_indices(
+            np.array([waypoint["lat"] for waypoint in track], dtype=np.float64),
+            np.array([waypoint["lon"] for waypoint in track], dtype=np.float64),
+            activity_streams_constants.STREAM_DETAIL_MAP_TOLERANCE_METERS[
+                detail_level
+            ],
+        )
+        return [track[index] for index in indices.tolist()]
+
+    key = activity_streams_constants.STREAM_VALUE_KEYS.get(stream_type)
+    if key is None:
+        return waypoints
+
+    values = np.array(
+        [_to_float(waypoint.get(key)) for waypoint in waypoints], dtype=np.float64
+    )
+    indices = lttb_indices(
+        values, activity_streams_constants.STREAM_DETAIL_MAX_POINTS[detail_level]
+    )
+    return [waypoints[index] for index in indices.tolist()]
+
+
+def get_detail_waypoints(
+    activity_stream, detail_level: str, waypoints: list[dict] | None = None
+) -> list[dict]:
+    """
+    Return the waypoints of a stored stream for a level of detail.
+
+    Streams are not modified once stored, so the simplified waypoints are
+    cached by stream ID and level of detail.
+
+    Args:
+        activity_stream: ActivityStreams model instance.
+        detail_level: One of the STREAM_DETAIL_LEVEL_* constants.
+        waypoints: Decoded waypoints of the stream, decoded from the stream
+            when not given.
+
+    Returns:
+        The simplified waypoints.
+    """
+    key = (activity_stream.id, detail_level)
+    with _detail_cache_lock:
+        cached = _detail_cache.get(key)
+        if cached is not None:
+            _detail_cache.move_to_end(key)
+            return cached
+
+    if waypoints is None:
+        waypoints = activity_streams_utils.get_stream_waypoints(activity_stream)
+    simplified = simplify_stream_waypoints(
+        activity_stream.stream_type, waypoints, detail_level
+    )
+
+    with _detail_cache_lock:
+        _detail_cache[key] = simplified
+        _detail_cache.move_to_end(key)
+        while len(_detail_cache) > activity_streams_constants.STREAM_DETAIL_CACHE_SIZE:
+            _detail_cache.popitem(last=False)
+    return simplified
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
@@ -0,0 +1,322 @@
+import json
+import struct
+import warnings
+import zlib
+
+import numpy as np
+
+# Version of the binary stream layout written by encode_stream_waypoints
+STREAM_ENCODING_VERSION = 1
+
+# Timestamp format used by the parsers for waypoint "time" values
+STREAM_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# Largest decimal scale tried when storing floats as scaled integers
+MAX_FLOAT_DECIMALS = 9
+
+# zlib compression level used for the stream blob
+COMPRESSION_LEVEL = 6
+
+# Channel kinds
+CHANNEL_EPOCH = "epoch"
+CHANNEL_INT = "int"
+CHANNEL_SCALED = "scaled"
+CHANNEL_FLOAT = "float"
+CHANNEL_JSON = "json"
+
+_HEADER_LENGTH = struct.Struct("<BI")
+
+
+def encode_stream_waypoints(waypoints: list[dict] | None) -> bytes:
+    """
+    Encode a list of waypoint dicts into a compressed columnar blob.
+
+    Every key of the waypoints becomes its own channel. ISO timestamps are
+    stored as a start epoch plus integer deltas, integer channels are delta
+    encoded and floats are stored as delta encoded scaled integers when that
+    is lossless (raw float64 otherwise). Deltas are downcast to the smallest
+    integer dtype that fits before the whole payload is deflated.
+
+    Args:
+        waypoints: List of waypoint dicts, e.g. [{"time": "...", "hr": 142}].
+
+    Returns:
+        The compressed binary representation of the waypoints.
+    """
+    waypoints = waypoints or []
+    count = len(waypoints)
+
+    # Keep key order of first appearance so decoded dicts match the input
+    keys: list[str] = []
+    for waypoint in waypoints:
+        for key in waypoint:
+            if key not in keys:
+                keys.append(key)
+
+    channels = []
+    buffers = []
+    for key in keys:
+        values = [waypoint.get(key) for waypoint in waypoints]
+        missing = [key not in waypoint for waypoint in waypoints]
+        channel, channel_buffers = _encode_channel(key, values, missing)
+        channels.append(channel)
+        buffers.extend(channel_buffers)
+
+    header = json.dumps(
+        {"count": count, "channels": channels}, separators=(",", ":")
+    ).encode("utf-8")
+
+    payload = b"".join(
+        [_HEADER_LENGTH.pack(STREAM_ENCODING_VERSION, len(header)), header, *buffers]
+    )
+    return zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def decode_stream_channels(data: bytes) -> tuple[int, dict[str, dict]]:
+    """
+    Decode a compressed stream blob into per channel arrays.
+
+    This avoids building per-waypoint dicts and is the cheapest way to read
+    a single channel (e.g. only the "hr" values of a heart rate stream).
+
+    Args:
+        data: Blob produced by encode_stream_waypoints.
+
+    Returns:
+        Tuple with the number of waypoints and a dict keyed by channel name.
+        Each channel dict has "values" (NumPy array or list), "nulls" and
+        "missing" (boolean NumPy arrays or None) and "kind".
+
+    Raises:
+        ValueError: If the blob uses an unsupported encoding version.
+    """
+    payload = zlib.decompress(data)
+    version, header_length = _HEADER_LENGTH.unpack_from(payload)
+    if version != STREAM_ENCODING_VERSION:
+        raise ValueError(f"Unsupported stream encoding version: {version}")
+
+    offset = _HEADER_LENGTH.size
+    header = json.loads(payload[offset : offset + header_length])
+    offset += header_length
+    count = header["count"]
+
+    decoded = {}
+    for channel in header["channels"]:
+        missing = None
+        if channel.get("missing"):
+            missing, offset = _read_mask(payload, offset, count)
+
+        nulls = None
+        if channel.get("nulls"):
+            nulls, offset = _read_mask(payload, offset, count)
+
+        kind = channel["kind"]
+        if kind == CHANNEL_JSON:
+            values = channel["values"]
+        else:
+            dtype = np.dtype(channel["dtype"])
+            nbytes = dtype.itemsize * count
+            raw = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+            offset += nbytes
+
+            if kind == CHANNEL_FLOAT:
+                values = raw.astype(np.float64)
+            else:
+                values = np.cumsum(raw, dtype=np.int64) + channel["start"]
+                if kind == CHANNEL_SCALED:
+                    values = values / channel["scale"]
+                elif kind == CHANNEL_EPOCH:
+                    values = values.astype("datetime64[s]")
+
+        decoded[channel["key"]] = {
+            "kind": kind,
+            "values": values,
+            "nulls": nulls,
+            "missing": missing,
+        }
+
+    return count, decoded
+
+
+def decode_stream_waypoints(data: bytes) -> list[dict]:
+    """
+    Decode a compressed stream blob back into a list of waypoint dicts.
+
+    Args:
+        data: Blob produced by encode_stream_waypoints.
+
+    Returns:
+        The list of waypoint dicts, identical to the encoded input except that
+        integers in a channel that also holds floats are returned as floats.
+    """
+    count, channels = decode_stream_channels(data)
+    if count == 0:
+        return []
+
+    columns = []
+    for key, channel in channels.items():
+        values = channel["values"]
+        if channel["kind"] == CHANNEL_EPOCH:
+            values = np.datetime_as_string(values, unit="s").tolist()
+        elif isinstance(values, np.ndarray):
+            values = values.tolist()
+
+        if channel["nulls"] is not None:
+            values = [
+                None if is_null else value
+                for value, is_null in zip(values, channel["nulls"].tolist())
+            ]
+
+        missing = (
+            channel["missing"].tolist() if channel["missing"] is not None else None
+        )
+        columns.append((key, values, missing))
+
+    if all(missing is None for _, _, missing in columns):
+        keys = [key for key, _, _ in columns]
+        return [
+            dict(zip(keys, row)) for row in zip(*(values for _, values, _ in columns))
+        ]
+
+    waypoints = [{} for _ in range(count)]
+    for key, values, missing in columns:
+        for index, value in enumerate(values):
+            if missing is None or not missing[index]:
+                waypoints[index][key] = value
+    return waypoints
+
+
+def get_stream_waypoints(activity_stream) -> list[dict]:
+    """
+    Return the waypoints of a stored activity stream regardless of format.
+
+    Rows written before the columnar format still carry their waypoints in
+    the legacy JSON column until migration s4 converts them.
+
+    Args:
+        activity_stream: ActivityStreams model instance.
+
+    Returns:
+        The list of waypoint dicts of the stream.
+    """
+    if activity_stream.stream_data is not None:
+        return decode_stream_waypoints(activity_stream.stream_data)
+    return activity_stream.stream_waypoints or []
+
+
+def _encode_channel(
+    key: str, values: list, missing: list[bool]
+) -> tuple[dict, list[bytes]]:
+    count = len(values)
+    channel: dict = {"key": key}
+    buffers: list[bytes] = []
+
+    if any(missing):
+        channel["missing"] = True
+        buffers.append(np.packbits(np.array(missing, dtype=bool)).tobytes())
+
+    nulls = [value is None for value in values]
+    present = [value for value in values if value is not None]
+    if any(nulls) and present:
+        channel["nulls"] = True
+        buffers.append(np.packbits(np.array(nulls, dtype=bool)).tobytes())
+
+    if present and all(isinstance(value, str) for value in present):
+        ints = _epoch_seconds(values, nulls)
+        if ints is not None:
+            channel["kind"] = CHANNEL_EPOCH
+            buffers.append(_delta_encode(channel, ints))
+            return channel, buffers
+    elif present and all(
+        isinstance(value, int) and not isinstance(value, bool) for value in present
+    ):
+        ints = np.array([0 if value is None else value for value in values])
+        if ints.dtype == np.int64:
+            channel["kind"] = CHANNEL_INT
+            buffers.append(_delta_encode(channel, ints))
+            return channel, buffers
+    elif present and all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in present
+    ):
+        floats = np.array(
+            [0.0 if value is None else float(value) for value in values],
+            dtype=np.float64,
+        )
+        scaled = _scaled_integers(floats)
+        if scaled is not None:
+            scale, ints = scaled
+            channel["kind"] = CHANNEL_SCALED
+            channel["scale"] = scale
+            buffers.append(_delta_encode(channel, ints))
+        else:
+            channel["kind"] = CHANNEL_FLOAT
+            channel["dtype"] = "<f8"
+            buffers.append(floats.astype("<f8").tobytes())
+        return channel, buffers
+
+    # Anything else (mixed types, nested values, all None) is stored verbatim
+    channel.pop("nulls", None)
+    if channel.get("missing"):
+        buffers = buffers[:1]
+    else:
+        buffers = []
+    channel["kind"] = CHANNEL_JSON
+    channel["values"] = values if count else []
+    return channel, buffers
+
+
+def _epoch_seconds(values: list, nulls: list[bool]) -> np.ndarray | None:
+    filled = [
+        "1970-01-01T00:00:00" if is_null else value
+        for value, is_null in zip(values, nulls)
+    ]
+    try:
+        with warnings.catch_warnings():
+            # Timezone aware strings warn and are rejected by the check below
+            warnings.simplefilter("ignore")
+            times = np.array(filled, dtype="datetime64[s]")
+    except (ValueError, TypeError):
+        return None
+
+    # Only accept the encoding if formatting back yields the exact input
+    if np.datetime_as_string(times, unit="s").tolist() != filled:
+        return None
+    return times.astype(np.int64)
+
+
+def _scaled_integers(floats: np.ndarray) -> tuple[int, np.ndarray] | None:
+    if not np.all(np.isfinite(floats)):
+        return None
+
+    for decimals in range(MAX_FLOAT_DECIMALS + 1):
+        scale = 10**decimals
+        scaled = floats * scale
+        if np.any(np.abs(scaled) >= 2**53):
+            return None
+        ints = np.rint(scaled)
+        if np.array_equal(ints / scale, floats):
+            return scale, ints.astype(np.int64)
+    return None
+
+
+def _delta_encode(channel: dict, ints: np.ndarray) -> bytes:
+    start = int(ints[0]) if len(ints) else 0
+    deltas = np.diff(ints, prepend=start)
+    dtype = np.dtype("<i8")
+    for candidate in ("<i1", "<i2", "<i4"):
+        info = np.iinfo(candidate)
+        if len(deltas) == 0 or (
+            deltas.min() >= info.min and deltas.max() <= info.max
+        ):
+            dtype = np.dtype(candidate)
+            break
+    channel["start"] = start
+    channel["dtype"] = dtype.str
+    return deltas.astype(dtype).tobytes()
+
+
+def _read_mask(payload: bytes, offset: int, count: int) -> tuple[np.ndarray, int]:
+    nbytes = (count + 7) // 8
+    packed = np.frombuffer(payload, dtype=np.uint8, count=nbytes, offset=offset)
+    return np.unpackbits(packed, count=count).astype(bool), offset + nbytes
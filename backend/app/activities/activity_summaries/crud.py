@@ -3,7 +3,7 @@ from sqlalchemy import func, extract, case
 from datetime import timedelta, date
 
 from typing import List
-from activities.activity.models import Activity
+from activities.activity_daily_rollups.models import ActivityDailyRollup as Rollup
 from activities.activity.utils import (
     set_activity_name_based_on_activity_type,
     ACTIVITY_NAME_TO_ID,
@@ -31,30 +31,28 @@ def _get_type_breakdown(
 ) -> List[TypeBreakdownItem]:
     """Helper function to get summary breakdown by activity type, optionally filtered by a specific type."""
     query = db.query(
-        Activity.activity_type.label("activity_type"),
-        func.coalesce(func.sum(Activity.distance), 0).label("total_distance"),
-        func.coalesce(func.sum(Activity.total_timer_time), 0.0).label("total_duration"),
-        func.coalesce(func.sum(Activity.elevation_gain), 0).label(
+        Rollup.activity_type.label("activity_type"),
+        func.coalesce(func.sum(Rollup.total_distance), 0).label("total_distance"),
+        func.coalesce(func.sum(Rollup.total_duration), 0.0).label("total_duration"),
+        func.coalesce(func.sum(Rollup.total_elevation_gain), 0).label(
             "total_elevation_gain"
         ),
-        func.coalesce(func.sum(Activity.calories), 0).label("total_calories"),
-        func.count(Activity.id).label("activity_count"),
-    ).filter(Activity.user_id == user_id)
+        func.coalesce(func.sum(Rollup.total_calories), 0).label("total_calories"),
+        func.coalesce(func.sum(Rollup.activity_count), 0).label("activity_count"),
+    ).filter(Rollup.user_id == user_id)
 
     if not (start_date == date.min and end_date == date.max):
-        query = query.filter(
-            Activity.start_time >= start_date, Activity.start_time < end_date
-        )
+        query = query.filter(Rollup.day >= start_date, Rollup.day < end_date)
 
     if activity_type:
         activity_type_id = ACTIVITY_NAME_TO_ID.get(activity_type.lower())
         if activity_type_id is not None:
-            query = query.filter(Activity.activity_type == activity_type_id)
+            query = query.filter(Rollup.activity_type == activity_type_id)
         else:
             return []
 
-    query = query.group_by(Activity.activity_type).order_by(
-        func.count(Activity.id).desc(), Activity.activity_type.asc()
+    query = query.group_by(Rollup.activity_type).order_by(
+        func.sum(Rollup.activity_count).desc(), Rollup.activity_type.asc()
     )
 
     type_results = query.all()
@@ -86,35 +84,35 @@ def get_weekly_summary(
     # For MySQL: convert DAYOFWEEK (1=Sunday, 7=Saturday) to ISO format
     engine_name = db.bind.dialect.name
     if engine_name == 'postgresql':
-        iso_day_of_week = extract("isodow", Activity.start_time)
+        iso_day_of_week = extract("isodow", Rollup.day)
     else:  # MySQL/MariaDB and others
         iso_day_of_week = case(
-            (func.dayofweek(Activity.start_time) == 1, 7),  # Sunday -> 7
-            else_=func.dayofweek(Activity.start_time) - 1   # Mon-Sat -> 1-6
+            (func.dayofweek(Rollup.day) == 1, 7),  # Sunday -> 7
+            else_=func.dayofweek(Rollup.day) - 1   # Mon-Sat -> 1-6
         )
 
     query = db.query(
         iso_day_of_week.label("day_of_week"),
-        func.coalesce(func.sum(Activity.distance), 0).label("total_distance"),
-        func.coalesce(func.sum(Activity.total_timer_time), 0.0).label("total_duration"),
-        func.coalesce(func.sum(Activity.elevation_gain), 0).label(
+        func.coalesce(func.sum(Rollup.total_distance), 0).label("total_distance"),
+        func.coalesce(func.sum(Rollup.total_duration), 0.0).label("total_duration"),
+        func.coalesce(func.sum(Rollup.total_elevation_gain), 0).label(
             "total_elevation_gain"
         ),
-        func.coalesce(func.sum(Activity.calories), 0).label("total_calories"),
-        func.count(Activity.id).label("activity_count"),
+        func.coalesce(func.sum(Rollup.total_calories), 0).label("total_calories"),
+        func.coalesce(func.sum(Rollup.activity_count), 0).label("activity_count"),
     ).filter(
-        Activity.user_id == user_id,
-        Activity.start_time >= start_of_week,
-        Activity.start_time < end_of_week,
+        Rollup.user_id == user_id,
+        Rollup.day >= start_of_week,
+        Rollup.day < end_of_week,
     )
 
     activity_type_id = None
     if activity_type:
         activity_type_id = ACTIVITY_NAME_TO_ID.get(activity_type.lower())
         if activity_type_id is not None:
-            query = query.filter(Activity.activity_type == activity_type_id)
+            query = query.filter(Rollup.activity_type == activity_type_id)
         else:
-            query = query.filter(Activity.id == -1)  # Force no results
+            query = query.filter(Rollup.id == -1)  # Force no results
 
     query = query.group_by(iso_day_of_week).order_by(iso_day_of_week)
 
@@ -165,30 +163,30 @@ def get_monthly_summary(
     end_of_month = next_month
 
     query = db.query(
-        extract("week", Activity.start_time).label("week_number"),
-        func.coalesce(func.sum(Activity.distance), 0).label("total_distance"),
-        func.coalesce(func.sum(Activity.total_timer_time), 0.0).label("total_duration"),
-        func.coalesce(func.sum(Activity.elevation_gain), 0).label(
+        extract("week", Rollup.day).label("week_number"),
+        func.coalesce(func.sum(Rollup.total_distance), 0).label("total_distance"),
+        func.coalesce(func.sum(Rollup.total_duration), 0.0).label("total_duration"),
+        func.coalesce(func.sum(Rollup.total_elevation_gain), 0).label(
             "total_elevation_gain"
         ),
-        func.coalesce(func.sum(Activity.calories), 0).label("total_calories"),
-        func.count(Activity.id).label("activity_count"),
+        func.coalesce(func.sum(Rollup.total_calories), 0).label("total_calories"),
+        func.coalesce(func.sum(Rollup.activity_count), 0).label("activity_count"),
     ).filter(
-        Activity.user_id == user_id,
-        Activity.start_time >= start_of_month,
-        Activity.start_time < end_of_month,
+        Rollup.user_id == user_id,
+        Rollup.day >= start_of_month,
+        Rollup.day < end_of_month,
     )
 
     activity_type_id = None
     if activity_type:
         activity_type_id = ACTIVITY_NAME_TO_ID.get(activity_type.lower())
         if activity_type_id is not None:
-            query = query.filter(Activity.activity_type == activity_type_id)
+            query = query.filter(Rollup.activity_type == activity_type_id)
         else:
-            query = query.filter(Activity.id == -1)  # Force no results
+            query = query.filter(Rollup.id == -1)  # Force no results
 
-    query = query.group_by(extract("week", Activity.start_time)).order_by(
-        extract("week", Activity.start_time)
+    query = query.group_by(extract("week", Rollup.day)).order_by(
+        extract("week", Rollup.day)
     )
 
     weekly_results = query.all()
@@ -231,30 +229,30 @@ def get_yearly_summary(
     end_of_year = date(year + 1, 1, 1)
 
     query = db.query(
-        extract("month", Activity.start_time).label("month_number"),
-        func.coalesce(func.sum(Activity.distance), 0).label("total_distance"),
-        func.coalesce(func.sum(Activity.total_timer_time), 0.0).label("total_duration"),
-        func.coalesce(func.sum(Activity.elevation_gain), 0).label(
+        extract("month", Rollup.day).label("month_number"),
+        func.coalesce(func.sum(Rollup.total_distance), 0).label("total_distance"),
+        func.coalesce(func.sum(Rollup.total_duration), 0.0).label("total_duration"),
+        func.coalesce(func.sum(Rollup.total_elevation_gain), 0).label(
             "total_elevation_gain"
         ),
-        func.coalesce(func.sum(Activity.calories), 0).label("total_calories"),
-        func.count(Activity.id).label("activity_count"),
+        func.coalesce(func.sum(Rollup.total_calories), 0).label("total_calories"),
+        func.coalesce(func.sum(Rollup.activity_count), 0).label("activity_count"),
     ).filter(
-        Activity.user_id == user_id,
-        Activity.start_time >= start_of_year,
-        Activity.start_time < end_of_year,
+        Rollup.user_id == user_id,
+        Rollup.day >= start_of_year,
+        Rollup.day < end_of_year,
     )
 
     activity_type_id = None
     if activity_type:
         activity_type_id = ACTIVITY_NAME_TO_ID.get(activity_type.lower())
         if activity_type_id is not None:
-            query = query.filter(Activity.activity_type == activity_type_id)
+            query = query.filter(Rollup.activity_type == activity_type_id)
         else:
-            query = query.filter(Activity.id == -1)  # Force no results
+            query = query.filter(Rollup.id == -1)  # Force no results
 
-    query = query.group_by(extract("month", Activity.start_time)).order_by(
-        extract("month", Activity.start_time)
+    query = query.group_by(extract("month", Rollup.day)).order_by(
+        extract("month", Rollup.day)
     )
 
     monthly_results = query.all()
@@ -300,14 +298,14 @@ def get_lifetime_summary(
 ) -> LifetimeSummaryResponse:
     # Base query for overall metrics and yearly breakdown
     base_metrics_query = db.query(
-        func.coalesce(func.sum(Activity.distance), 0.0).label("total_distance"),
-        func.coalesce(func.sum(Activity.total_timer_time), 0.0).label("total_duration"),
-        func.coalesce(func.sum(Activity.elevation_gain), 0.0).label(
+        func.coalesce(func.sum(Rollup.total_distance), 0.0).label("total_distance"),
+        func.coalesce(func.sum(Rollup.total_duration), 0.0).label("total_duration"),
+        func.coalesce(func.sum(Rollup.total_elevation_gain), 0.0).label(
             "total_elevation_gain"
         ),
-        func.coalesce(func.sum(Activity.calories), 0.0).label("total_calories"),
-        func.count(Activity.id).label("activity_count"),
-    ).filter(Activity.user_id == user_id)
+        func.coalesce(func.sum(Rollup.total_calories), 0.0).label("total_calories"),
+        func.coalesce(func.sum(Rollup.activity_count), 0).label("activity_count"),
+    ).filter(Rollup.user_id == user_id)
 
     # Apply activity type filter if provided
     activity_type_id_filter = None
@@ -315,40 +313,40 @@ def get_lifetime_summary(
         activity_type_id_filter = ACTIVITY_NAME_TO_ID.get(activity_type.lower())
         if activity_type_id_filter is not None:
             base_metrics_query = base_metrics_query.filter(
-                Activity.activity_type == activity_type_id_filter
+                Rollup.activity_type == activity_type_id_filter
             )
         else:
             # Invalid activity type, force no results for metrics
-            base_metrics_query = base_metrics_query.filter(Activity.id == -1)
+            base_metrics_query = base_metrics_query.filter(Rollup.id == -1)
 
     overall_totals = base_metrics_query.one_or_none()
 
     # Yearly breakdown query
     yearly_breakdown_query = db.query(
-        extract("year", Activity.start_time).label("year_number"),
-        func.coalesce(func.sum(Activity.distance), 0.0).label("total_distance"),
-        func.coalesce(func.sum(Activity.total_timer_time), 0.0).label("total_duration"),
-        func.coalesce(func.sum(Activity.elevation_gain), 0.0).label(
+        extract("year", Rollup.day).label("year_number"),
+        func.coalesce(func.sum(Rollup.total_distance), 0.0).label("total_distance"),
+        func.coalesce(func.sum(Rollup.total_duration), 0.0).label("total_duration"),
+        func.coalesce(func.sum(Rollup.total_elevation_gain), 0.0).label(
             "total_elevation_gain"
         ),
-        func.coalesce(func.sum(Activity.calories), 0.0).label("total_calories"),
-        func.count(Activity.id).label("activity_count"),
-    ).filter(Activity.user_id == user_id)
+        func.coalesce(func.sum(Rollup.total_calories), 0.0).label("total_calories"),
+        func.coalesce(func.sum(Rollup.activity_count), 0).label("activity_count"),
+    ).filter(Rollup.user_id == user_id)
 
     if activity_type:  # Apply same activity type filter to breakdown
         if activity_type_id_filter is not None:
             yearly_breakdown_query = yearly_breakdown_query.filter(
-                Activity.activity_type == activity_type_id_filter
+                Rollup.activity_type == activity_type_id_filter
             )
         else:
             yearly_breakdown_query = yearly_breakdown_query.filter(
-                Activity.id == -1
+                Rollup.id == -1
             )  # Force no results
 
     yearly_breakdown_query = yearly_breakdown_query.group_by(
-        extract("year", Activity.start_time)
+        extract("year", Rollup.day)
     ).order_by(
-        extract("year", Activity.start_time).desc()  # Show recent years first
+        extract("year", Rollup.day).desc()  # Show recent years first
     )
 
     yearly_results = yearly_breakdown_query.all()
@@ -174,6 +174,7 @@ def create_activity_workout_steps(
     activity_workout_steps: list[activity_workout_steps_schema.ActivityWorkoutSteps],
     activity_id: int,
     db: Session,
+    commit: bool = True,
 ):
     try:
         # Create a list to store the ActivityWorkoutSteps objects
@@ -203,13 +204,15 @@ def create_activity_workout_steps(
 
         # Bulk insert the list of ActivityWorkoutSteps objects
         db.bulk_save_objects(workout_steps)
-        db.commit()
+        # Commit unless the caller batches several inserts in one transaction
+        if commit:
+            db.commit()
     except Exception as err:
         # Rollback the transaction
         db.rollback()
 
         # Log the exception
-        core_logger(f"Error in create_activity_workout_steps: {err}", "error", exc=err)
+        core_logger.print_to_log(f"Error in create_activity_workout_steps: {err}", "error", exc=err)
         # Raise an HTTPException with a 500 Internal Server Error status code
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,181 @@
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import activities.activity.models as activities_models
+import activities.activity_streams.constants as activity_streams_constants
+import activities.activity_streams.models as activity_streams_models
+import activities.activity_zones.models as activity_zones_models
+
+import core.logger as core_logger
+
+ZONE_STREAM_TYPES = (
+    activity_streams_constants.STREAM_TYPE_HR,
+    activity_streams_constants.STREAM_TYPE_POWER,
+)
+
+ZONE_COLUMNS = ("max_heart_rate", "ftp", "hr_zones", "power_zones")
+
+
+def get_activity_zones(
+    activity_id: int, db: Session
+) -> activity_zones_models.ActivityZones | None:
+    """
+    Get the stored zone distributions of an activity.
+
+    Args:
+        activity_id: The ID of the activity.
+        db: Database session.
+
+    Returns:
+        The activity zones, or None if the activity has no HR or power stream.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        return db.get(activity_zones_models.ActivityZones, activity_id)
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in get_activity_zones: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_activities_zones(
+    activity_ids: list[int], db: Session
+) -> dict[int, activity_zones_models.ActivityZones]:
+    """
+    Get the stored zone distributions of several activities.
+
+    Args:
+        activity_ids: The IDs of the activities.
+        db: Database session.
+
+    Returns:
+        Dictionary of activity ID to activity zones.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        if not activity_ids:
+            return {}
+
+        zones = (
+            db.query(activity_zones_models.ActivityZones)
+            .filter(activity_zones_models.ActivityZones.activity_id.in_(activity_ids))
+            .all()
+        )
+        return {activity_zones.activity_id: activity_zones for activity_zones in zones}
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in get_activities_zones: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def get_activities_zone_streams(
+    activity_ids: list[int], db: Session
+) -> list[activity_streams_models.ActivityStreams]:
+    """
+    Get the HR and power streams of several activities.
+
+    Args:
+        activity_ids: The IDs of the activities.
+        db: Database session.
+
+    Returns:
+        List of HR and power activity streams.
+    """
+    ActivityStreams = activity_streams_models.ActivityStreams
+    return (
+        db.query(ActivityStreams)
+        .filter(
+            ActivityStreams.activity_id.in_(activity_ids),
+            ActivityStreams.stream_type.in_(ZONE_STREAM_TYPES),
+        )
+        .all()
+    )
+
+
+def get_user_zone_activity_ids(
+    user_id: int,
+    max_heart_rate: int | None,
+    ftp: int | None,
+    only_stale: bool,
+    db: Session,
+) -> list[int]:
+    """
+    Get the activities of a user whose zone distributions need computing.
+
+    Args:
+        user_id: The ID of the user.
+        max_heart_rate: Current maximum heart rate of the user.
+        ftp: Current functional threshold power of the user.
+        only_stale: Whether to return only the activities whose zones were
+            computed with other thresholds, instead of every activity with
+            an HR or power stream.
+        db: Database session.
+
+    Returns:
+        Sorted list of activity IDs.
+    """
+    ActivityZones = activity_zones_models.ActivityZones
+
+    if only_stale:
+        statement = select(ActivityZones.activity_id).where(
+            ActivityZones.user_id == user_id,
+            or_(
+                ActivityZones.max_heart_rate.is_distinct_from(max_heart_rate),
+                ActivityZones.ftp.is_distinct_from(ftp),
+            ),
+        )
+    else:
+        Activity = activities_models.Activity
+        ActivityStreams = activity_streams_models.ActivityStreams
+        statement = (
+            select(Activity.id)
+            .join(ActivityStreams, ActivityStreams.activity_id == Activity.id)
+            .where(
+                Activity.user_id == user_id,
+                ActivityStreams.stream_type.in_(ZONE_STREAM_TYPES),
+            )
+            .distinct()
+        )
+
+    return sorted(db.execute(statement).scalars().all())
+
+
+def upsert_activity_zones(rows: list[dict], db: Session) -> None:
+    """
+    Insert or replace the zone distributions of several activities.
+
+    The session is not committed, so the zones are stored in the same
+    transaction as the streams they were computed from.
+
+    Args:
+        rows: Dictionaries with the activity_id, user_id and ZONE_COLUMNS
+            values of each activity.
+        db: Database session.
+    """
+    if not rows:
+        return
+
+    statement = insert(activity_zones_models.ActivityZones).values(rows)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["activity_id"],
+            set_={
+                **{column: statement.excluded[column] for column in ZONE_COLUMNS},
+                "updated_at": func.now(),
+            },
+        )
+    )
@@ -0,0 +1,60 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    DateTime,
+    ForeignKey,
+    JSON,
+)
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class ActivityZones(Base):
+    __tablename__ = "activity_zones"
+
+    activity_id = Column(
+        Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="Activity ID that the zones belong",
+    )
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="User ID that the activity belongs",
+    )
+
+    max_heart_rate = Column(
+        Integer,
+        nullable=True,
+        comment="Maximum heart rate the HR zones were computed with (bpm)",
+    )
+
+    ftp = Column(
+        Integer,
+        nullable=True,
+        comment="Functional threshold power the power zones were computed with (W)",
+    )
+
+    hr_zones = Column(
+        JSON,
+        nullable=True,
+        comment="Percentage and time spent in each heart rate zone",
+    )
+
+    power_zones = Column(
+        JSON,
+        nullable=True,
+        comment="Percentage and time spent in each power zone",
+    )
+
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="Last zones update timestamp",
+    )
@@ -0,0 +1,356 @@
+"""Heart rate and power zone distributions of activities.
+
+Zones are computed once and stored in activity_zones instead of on every
+stream read:
+
+- store_activity_zones computes the zones of new streams, in the same
+  transaction the streams are stored in
+- refresh_user_activity_zones recomputes the zones of a user's activities
+  that were computed with another max heart rate or FTP, and runs in the
+  background after the user settings are edited
+- rebuild_activity_zones backfills the zones of every activity
+"""
+
+import datetime
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import activities.activity.metrics as activities_metrics
+import activities.activity.models as activities_models
+import activities.activity_streams.constants as activity_streams_constants
+import activities.activity_streams.utils as activity_streams_utils
+import activities.activity_zones.crud as activity_zones_crud
+
+import users.users.crud as users_crud
+import users.users.models as users_models
+
+import core.logger as core_logger
+from core.database import SessionLocal
+
+# Zone boundaries as fractions of the max heart rate
+HR_ZONE_BOUNDS = (0.6, 0.7, 0.8, 0.9)
+
+# Zone boundaries as fractions of the FTP (Coggan power levels)
+POWER_ZONE_BOUNDS = (0.55, 0.75, 0.9, 1.05, 1.2, 1.5)
+
+# Number of activities recomputed per transaction
+REFRESH_BATCH_SIZE = 100
+
+
+def get_max_heart_rate(user) -> int | None:
+    """
+    Return the max heart rate the HR zones of a user are computed with.
+
+    Args:
+        user: Users model instance.
+
+    Returns:
+        The user's max heart rate if set, otherwise 220 minus the user's
+        age, or None if neither the max heart rate nor the birthdate is set.
+    """
+    if user.max_heart_rate:
+        return user.max_heart_rate
+    if user.birthdate:
+        birthdate = user.birthdate
+        year = (
+            int(birthdate.split("-")[0]) if isinstance(birthdate, str) else birthdate.year
+        )
+        return 220 - (datetime.datetime.now().year - year)
+    return None
+
+
+def zone_distribution(
+    values: list[float], bounds: list[float], total_timer_time, label_key: str
+) -> dict | None:
+    """
+    Compute the percentage and time spent in each zone.
+
+    Args:
+        values: Samples of the stream, one per waypoint.
+        bounds: Increasing zone boundaries, in the unit of the values.
+        total_timer_time: Activity timer time in seconds, used to convert
+            percentages into times.
+        label_key: Key of the zone boundaries label, e.g. "hr" or "power".
+
+    Returns:
+        Dictionary of zone_1 to zone_N with the percent, boundaries label
+        and time_seconds of each zone, or None if there are no values.
+    """
+    total = len(values)
+    if total == 0:
+        return None
+
+    zone_counts = activities_metrics.zone_histogram(
+        np.asarray(values, dtype=np.float64), bounds
+    ).tolist()
+    zone_percentages = [round((count / total) * 100, 2) for count in zone_counts]
+
+    if total_timer_time:
+        zone_time_seconds = [
+            int((percent / 100) * float(total_timer_time))
+            for percent in zone_percentages
+        ]
+    else:
+        # No time calculation possible
+        zone_time_seconds = [0] * len(zone_percentages)
+
+    labels = [f"< {int(bounds[0])}"]
+    labels += [
+        f"{int(lower)} - {int(upper) - 1}" for lower, upper in zip(bounds, bounds[1:])
+    ]
+    labels.append(f">= {int(bounds[-1])}")
+
+    return {
+        f"zone_{index + 1}": {
+            "percent": percent,
+            label_key: label,
+            "time_seconds": time_seconds,
+        }
+        for index, (percent, label, time_seconds) in enumerate(
+            zip(zone_percentages, labels, zone_time_seconds)
+        )
+    }
+
+
+def _stream_values(waypoints: list[dict] | None, key: str) -> list[float]:
+    return [
+        float(waypoint[key])
+        for waypoint in waypoints or []
+        if waypoint.get(key) is not None
+    ]
+
+
+def compute_activity_zones(
+    activity,
+    user,
+    hr_waypoints: list[dict] | None,
+    power_waypoints: list[dict] | None,
+) -> dict:
+    """
+    Compute the zone distributions of an activity.
+
+    Args:
+        activity: Activity model instance.
+        user: Users model instance of the activity's user, or None.
+        hr_waypoints: Waypoints of the HR stream, if any.
+        power_waypoints: Waypoints of the power stream, if any.
+
+    Returns:
+        Row of the activity_zones table.
+    """
+    max_heart_rate = get_max_heart_rate(user) if user else None
+    ftp = user.ftp if user else None
+    total_timer_time = getattr(activity, "total_timer_time", None)
+
+    hr_zones = None
+    if max_heart_rate:
+        hr_zones = zone_distribution(
+            _stream_values(
+                hr_waypoints,
+                activity_streams_constants.STREAM_VALUE_KEYS[
+                    activity_streams_constants.STREAM_TYPE_HR
+                ],
+            ),
+            [max_heart_rate * bound for bound in HR_ZONE_BOUNDS],
+            total_timer_time,
+            "hr",
+        )
+
+    power_zones = None
+    if ftp:
+        power_zones = zone_distribution(
+            _stream_values(
+                power_waypoints,
+                activity_streams_constants.STREAM_VALUE_KEYS[
+                    activity_streams_constants.STREAM_TYPE_POWER
+                ],
+            ),
+            [ftp * bound for bound in POWER_ZONE_BOUNDS],
+            total_timer_time,
+            "power",
+        )
+
+    return {
+        "activity_id": activity.id,
+        "user_id": activity.user_id,
+        "max_heart_rate": max_heart_rate,
+        "ftp": ftp,
+        "hr_zones": hr_zones,
+        "power_zones": power_zones,
+    }
+
+
+def store_activity_zones(activity_streams: list, db: Session) -> None:
+    """
+    Compute and store the zone distributions of new activity streams.
+
+    Only activities with an HR or power stream get zones. The session is
+    not committed.
+
+    Args:
+        activity_streams: ActivityStreams schemas being stored.
+        db: Database session.
+    """
+    waypoints = defaultdict(dict)
+    for stream in activity_streams:
+        if stream.stream_type in activity_zones_crud.ZONE_STREAM_TYPES:
+            waypoints[stream.activity_id][stream.stream_type] = stream.stream_waypoints
+
+    if not waypoints:
+        return
+
+    activities = (
+        db.query(activities_models.Activity)
+        .filter(activities_models.Activity.id.in_(list(waypoints)))
+        .all()
+    )
+    user_ids = {activity.user_id for activity in activities}
+    users = {
+        user.id: user
+        for user in db.query(users_models.Users)
+        .filter(users_models.Users.id.in_(user_ids))
+        .all()
+    }
+
+    activity_zones_crud.upsert_activity_zones(
+        [
+            compute_activity_zones(
+                activity,
+                users.get(activity.user_id),
+                waypoints[activity.id].get(activity_streams_constants.STREAM_TYPE_HR),
+                waypoints[activity.id].get(
+                    activity_streams_constants.STREAM_TYPE_POWER
+                ),
+            )
+            for activity in activities
+        ],
+        db,
+    )
+
+
+def refresh_user_activity_zones(
+    user_id: int, db: Session, only_stale: bool = True
+) -> int:
+    """
+    Recompute the zone distributions of a user's activities.
+
+    Activities are recomputed in batches, each in its own transaction.
+
+    Args:
+        user_id: The ID of the user.
+        db: Database session.
+        only_stale: Whether to recompute only the zones computed with
+            another max heart rate or FTP than the user's current ones.
+
+    Returns:
+        Number of activities recomputed.
+    """
+    user = users_crud.get_user_by_id(user_id, db)
+    if user is None:
+        return 0
+
+    activity_ids = activity_zones_crud.get_user_zone_activity_ids(
+        user_id, get_max_heart_rate(user), user.ftp, only_stale, db
+    )
+
+    try:
+        for start in range(0, len(activity_ids), REFRESH_BATCH_SIZE):
+            batch = activity_ids[start : start + REFRESH_BATCH_SIZE]
+            activities = (
+                db.query(activities_models.Activity)
+                .filter(activities_models.Activity.id.in_(batch))
+                .all()
+            )
+
+            waypoints = defaultdict(dict)
+            for stream in activity_zones_crud.get_activities_zone_streams(batch, db):
+                waypoints[stream.activity_id][stream.stream_type] = (
+                    activity_streams_utils.get_stream_waypoints(stream)
+                )
+
+            activity_zones_crud.upsert_activity_zones(
+                [
+                    compute_activity_zones(
+                        activity,
+                        user,
+                        waypoints[activity.id].get(
+                            activity_streams_constants.STREAM_TYPE_HR
+                        ),
+                        waypoints[activity.id].get(
+                            activity_streams_constants.STREAM_TYPE_POWER
+                        ),
+                    )
+                    for activity in activities
+                ],
+                db,
+            )
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return len(activity_ids)
+
+
+def refresh_user_activity_zones_in_background(user_id: int) -> None:
+    """
+    Recompute the stale zone distributions of a user in a new session.
+
+    Meant to run as a background task after the user settings are edited.
+    Does nothing when the max heart rate and FTP didn't change.
+
+    Args:
+        user_id: The ID of the user.
+    """
+    with SessionLocal() as db:
+        try:
+            num_activities = refresh_user_activity_zones(user_id, db)
+            if num_activities:
+                core_logger.print_to_log(
+                    f"User {user_id}: Recomputed the zones of {num_activities} activities"
+                )
+        except Exception as err:
+            core_logger.print_to_log(
+                f"User {user_id}: Error recomputing activity zones: {err}",
+                "error",
+                exc=err,
+            )
+
+
+def rebuild_activity_zones(db: Session, user_ids: list[int] | None = None) -> int:
+    """
+    Compute the zone distributions of every activity of several users.
+
+    Each user is rebuilt in its own transactions. Failures are logged and
+    the other users are still rebuilt.
+
+    Args:
+        db: Database session.
+        user_ids: Users to rebuild, defaults to every user.
+
+    Returns:
+        Number of users whose zones could not be rebuilt.
+    """
+    if user_ids is None:
+        user_ids = [user.id for user in users_crud.get_all_users(db)]
+
+    failed_users = 0
+    for user_id in user_ids:
+        try:
+            num_activities = refresh_user_activity_zones(
+                user_id, db, only_stale=False
+            )
+            core_logger.print_to_log(
+                f"User {user_id}: Computed the zones of {num_activities} activities"
+            )
+        except Exception as err:
+            failed_users += 1
+            core_logger.print_to_log(
+                f"User {user_id}: Error computing activity zones: {err}",
+                "error",
+                exc=err,
+            )
+
+    return failed_users
@@ -18,12 +18,19 @@ import activities.activity_sets.models
 import activities.activity_streams.models
 import activities.activity_workout_steps.models
 import activities.activity_ai_insights.models
+import activities.activity_ai_insight_jobs.models
+import activities.activity_daily_rollups.models
+import activities.activity_fingerprints.models
+import activities.activity_zones.models
 import activities.activity_delta_records.models
 import activities.activity_categories.models
 import activities.activity_types.models
+import core.rate_limit_models
+import core.scheduler_models
 import followers.models
 import gears.gear.models
 import gears.gear_components.models
+import geocoding.models
 import health.health_sleep.models
 import health.health_steps.models
 import health.health_targets.models
@@ -0,0 +1,44 @@
+"""activity search indexes
+
+Revision ID: 6c2f8e1b4d37
+Revises: 4b7e1d9a2c65
+Create Date: 2026-10-17 16:02:11.482930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2f8e1b4d37'
+down_revision: Union[str, None] = '4b7e1d9a2c65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Expression of the searched text, as activities.models.SEARCH_DOCUMENT
+SEARCH_DOCUMENT = (
+    "(coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || "
+    "coalesce(town, '') || ' ' || coalesce(city, '') || ' ' || "
+    "coalesce(country, ''))"
+)
+
+
+def upgrade() -> None:
+    # Trigram operator classes of the substring search
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX idx_activities_search_trgm ON activities "
+        f"USING gin ({SEARCH_DOCUMENT} gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX idx_activities_search_tsvector ON activities "
+        f"USING gin (to_tsvector('simple'::regconfig, {SEARCH_DOCUMENT}))"
+    )
+
+
+def downgrade() -> None:
+    # The extension is kept, other objects of the database may use it
+    op.drop_index('idx_activities_search_tsvector', table_name='activities')
+    op.drop_index('idx_activities_search_trgm', table_name='activities')
@@ -12,6 +12,9 @@ JWT_REFRESH_TOKEN_EXPIRE_DAYS: Final[int] = int(
     os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 7)
 )
 JWT_SECRET_KEY: Final[str | None] = core_config.read_secret("SECRET_KEY")
+JWT_VERIFIED_TOKEN_CACHE_SIZE: Final[int] = int(
+    os.environ.get("JWT_VERIFIED_TOKEN_CACHE_SIZE", 1024)
+)
 SESSION_IDLE_TIMEOUT_ENABLED: Final[bool] = (
     os.getenv("SESSION_IDLE_TIMEOUT_ENABLED", "false").lower() == "true"
 )
@@ -26,6 +29,8 @@ if JWT_ACCESS_TOKEN_EXPIRE_MINUTES <= 0:
     raise ValueError("ACCESS_TOKEN_EXPIRE_MINUTES must be positive")
 if JWT_REFRESH_TOKEN_EXPIRE_DAYS <= 0:
     raise ValueError("REFRESH_TOKEN_EXPIRE_DAYS must be positive")
+if JWT_VERIFIED_TOKEN_CACHE_SIZE <= 0:
+    raise ValueError("JWT_VERIFIED_TOKEN_CACHE_SIZE must be positive")
 if not JWT_SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is required")
 
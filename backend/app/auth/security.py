@@ -1,5 +1,13 @@
 from typing import Annotated, Union
-from fastapi import Depends, HTTPException, Query, status, WebSocket, WebSocketException
+from fastapi import (
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+    WebSocket,
+    WebSocketException,
+)
 from fastapi.security import (
     OAuth2PasswordBearer,
     SecurityScopes,
@@ -148,31 +156,37 @@ def get_access_token_for_browser_redirect(
     )
 
 
-def validate_access_token(
-    # access_token: Annotated[str, Depends(get_access_token_from_cookies)]
-    access_token: Annotated[str, Depends(get_access_token)],
-    token_manager: Annotated[
-        auth_token_manager.TokenManager,
-        Depends(auth_token_manager.get_token_manager),
-    ],
-) -> None:
+def _validate_access_token_claims(
+    access_token: str,
+    token_manager: auth_token_manager.TokenManager,
+    request: Request | None,
+) -> dict:
     """
-    Validates the provided access token for expiration.
+    Validates an access token once per request and returns its claims.
 
-    This function checks whether the given access token is still valid by verifying its expiration.
-    If the token is expired or invalid, an HTTPException is raised and the error is logged.
-    Any unexpected errors during validation are also logged and result in a 500 Internal Server Error.
+    The claims are stored on the request state, so security dependencies
+    resolved under other security scopes (which FastAPI doesn't share
+    between scopes) reuse them instead of validating the token again.
 
     Args:
         access_token (str): The access token to be validated.
         token_manager (auth_token_manager.TokenManager): The token manager instance used for validation.
+        request (Request | None): The current request, None outside of a request.
+
+    Returns:
+        dict: The validated claims of the access token.
 
     Raises:
         HTTPException: If the token is expired, invalid, or an unexpected error occurs during validation.
     """
+    if request is not None:
+        claims = getattr(request.state, "access_token_claims", None)
+        if claims is not None:
+            return claims
+
     try:
         # Validate the token expiration
-        token_manager.validate_token_expiration(access_token)
+        claims = token_manager.validate_token_expiration(access_token)
     except HTTPException as http_err:
         log_level = "debug" if "expired" in http_err.detail.lower() else "error"
         core_logger.print_to_log(
@@ -194,76 +208,90 @@ def validate_access_token(
             detail="An unexpected error occurred during access token validation.",
         ) from err
 
+    if request is not None:
+        request.state.access_token_claims = claims
+    return claims
 
-def validate_access_token_for_browser_redirect(
+
+def validate_access_token(
     # access_token: Annotated[str, Depends(get_access_token_from_cookies)]
-    access_token: Annotated[str, Depends(get_access_token_for_browser_redirect)],
+    access_token: Annotated[str, Depends(get_access_token)],
     token_manager: Annotated[
         auth_token_manager.TokenManager,
         Depends(auth_token_manager.get_token_manager),
     ],
-) -> None:
+    request: Request = None,
+) -> dict:
     """
-    Validates the provided access token for expiration for browser redirects.
+    Validates the provided access token for expiration.
 
     This function checks whether the given access token is still valid by verifying its expiration.
     If the token is expired or invalid, an HTTPException is raised and the error is logged.
     Any unexpected errors during validation are also logged and result in a 500 Internal Server Error.
+    The token is validated once per request, the other access token dependencies read the
+    claims returned here.
 
     Args:
         access_token (str): The access token to be validated.
         token_manager (auth_token_manager.TokenManager): The token manager instance used for validation.
+        request (Request): The current request, injected by FastAPI.
+
+    Returns:
+        dict: The validated claims of the access token.
 
     Raises:
         HTTPException: If the token is expired, invalid, or an unexpected error occurs during validation.
     """
-    try:
-        # Validate the token expiration
-        token_manager.validate_token_expiration(access_token)
-    except HTTPException as http_err:
-        log_level = "debug" if "expired" in http_err.detail.lower() else "error"
-        core_logger.print_to_log(
-            f"Access token validation failed: {http_err.detail}",
-            log_level,
-            exc=http_err,
-            context={"access_token": "[REDACTED]"},
-        )
-        raise
-    except Exception as err:
-        core_logger.print_to_log(
-            f"Unexpected error during access token validation: {err}",
-            "error",
-            exc=err,
-            context={"access_token": "[REDACTED]"},
-        )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred during access token validation.",
-        ) from err
+    return _validate_access_token_claims(access_token, token_manager, request)
 
 
-def get_sub_from_access_token(
-    access_token: Annotated[str, Depends(get_access_token)],
+def validate_access_token_for_browser_redirect(
+    # access_token: Annotated[str, Depends(get_access_token_from_cookies)]
+    access_token: Annotated[str, Depends(get_access_token_for_browser_redirect)],
     token_manager: Annotated[
         auth_token_manager.TokenManager,
         Depends(auth_token_manager.get_token_manager),
     ],
+    request: Request = None,
+) -> dict:
+    """
+    Validates the provided access token for expiration for browser redirects.
+
+    This function checks whether the given access token is still valid by verifying its expiration.
+    If the token is expired or invalid, an HTTPException is raised and the error is logged.
+    Any unexpected errors during validation are also logged and result in a 500 Internal Server Error.
+
+    Args:
+        access_token (str): The access token to be validated.
+        token_manager (auth_token_manager.TokenManager): The token manager instance used for validation.
+        request (Request): The current request, injected by FastAPI.
+
+    Returns:
+        dict: The validated claims of the access token.
+
+    Raises:
+        HTTPException: If the token is expired, invalid, or an unexpected error occurs during validation.
+    """
+    return _validate_access_token_claims(access_token, token_manager, request)
+
+
+def get_sub_from_access_token(
+    access_token_claims: Annotated[dict, Depends(validate_access_token)],
 ) -> int:
     """
-    Retrieves the user ID ('sub' claim) from the provided access token.
+    Retrieves the user ID ('sub' claim) from the validated access token claims.
 
     Args:
-        access_token (str): The access token from which to extract the claim.
-        token_manager (auth_token_manager.TokenManager): The token manager instance used to decode and validate the token.
+        access_token_claims (dict): The claims of the access token, validated once per request.
 
     Returns:
         int: The user ID associated with the access token.
 
     Raises:
-        Exception: If the token is invalid or the 'sub' claim is missing.
+        HTTPException: If the 'sub' claim is not an integer.
     """
     # Return the user ID associated with the token
-    sub = token_manager.get_token_claim(access_token, "sub")
+    sub = access_token_claims.get("sub")
     if not isinstance(sub, int):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -273,26 +301,23 @@ def get_sub_from_access_token(
 
 
 def get_sub_from_access_token_for_browser_redirect(
-    access_token: Annotated[str, Depends(get_access_token_for_browser_redirect)],
-    token_manager: Annotated[
-        auth_token_manager.TokenManager,
-        Depends(auth_token_manager.get_token_manager),
+    access_token_claims: Annotated[
+        dict, Depends(validate_access_token_for_browser_redirect)
     ],
 ) -> int:
     """
-    Retrieves the user ID ('sub' claim) from the provided access token for browser redirects.
+    Retrieves the user ID ('sub' claim) from the validated access token claims for browser redirects.
 
     Args:
-        access_token (str): The access token from which to extract the claim.
-        token_manager (auth_token_manager.TokenManager): The token manager instance used to decode and validate the token.
+        access_token_claims (dict): The claims of the access token, validated once per request.
 
     Returns:
         int: The user ID associated with the access token.
 
     Raises:
-        Exception: If the token is invalid or the 'sub' claim is missing.
+        HTTPException: If the 'sub' claim is not an integer.
     """
-    sub = token_manager.get_token_claim(access_token, "sub")
+    sub = access_token_claims.get("sub")
     if not isinstance(sub, int):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -302,27 +327,22 @@ def get_sub_from_access_token_for_browser_redirect(
 
 
 def get_sid_from_access_token(
-    access_token: Annotated[str, Depends(get_access_token)],
-    token_manager: Annotated[
-        auth_token_manager.TokenManager,
-        Depends(auth_token_manager.get_token_manager),
-    ],
+    access_token_claims: Annotated[dict, Depends(validate_access_token)],
 ) -> str:
     """
-    Retrieves the session ID ('sid') from the provided access token.
+    Retrieves the session ID ('sid') from the validated access token claims.
 
     Args:
-        access_token (str): The access token from which to extract the session ID.
-        token_manager (auth_token_manager.TokenManager): The token manager used to validate and extract claims from the token.
+        access_token_claims (dict): The claims of the access token, validated once per request.
 
     Returns:
-        int: The session ID ('sid') associated with the access token.
+        str: The session ID ('sid') associated with the access token.
 
     Raises:
-        Exception: If the token is invalid or the 'sid' claim is not present.
+        HTTPException: If the 'sid' claim is not a string.
     """
     # Return the session ID associated with the token
-    sid = token_manager.get_token_claim(access_token, "sid")
+    sid = access_token_claims.get("sid")
     if not isinstance(sid, str):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -494,19 +514,14 @@ def get_and_return_refresh_token(
 
 
 def check_scopes(
-    access_token: Annotated[str, Depends(get_access_token)],
-    token_manager: Annotated[
-        auth_token_manager.TokenManager,
-        Depends(auth_token_manager.get_token_manager),
-    ],
+    access_token_claims: Annotated[dict, Depends(validate_access_token)],
     security_scopes: SecurityScopes,
 ) -> None:
     """
     Validates that the access token contains all required security scopes.
 
     Args:
-        access_token (str): The access token extracted from the request.
-        token_manager (auth_token_manager.TokenManager): Instance responsible for managing and validating tokens.
+        access_token_claims (dict): The claims of the access token, validated once per request.
         security_scopes (SecurityScopes): Required scopes for the endpoint.
 
     Raises:
@@ -517,7 +532,7 @@ def check_scopes(
         Errors and exceptions are logged using core_logger for debugging and auditing purposes.
     """
     # Get the scope from the token
-    scope = token_manager.get_token_claim(access_token, "scope")
+    scope = access_token_claims.get("scope")
 
     # Ensure the scope is a list
     if not isinstance(scope, list):
@@ -559,10 +574,8 @@ def check_scopes(
 
 
 def check_scopes_for_browser_redirect(
-    access_token: Annotated[str, Depends(get_access_token_for_browser_redirect)],
-    token_manager: Annotated[
-        auth_token_manager.TokenManager,
-        Depends(auth_token_manager.get_token_manager),
+    access_token_claims: Annotated[
+        dict, Depends(validate_access_token_for_browser_redirect)
     ],
     security_scopes: SecurityScopes,
 ) -> None:
@@ -570,8 +583,7 @@ def check_scopes_for_browser_redirect(
     Validates that the access token contains all required security scopes for browser redirection.
 
     Args:
-        access_token (str): The access token extracted from the request.
-        token_manager (auth_token_manager.TokenManager): Instance responsible for managing and validating tokens.
+        access_token_claims (dict): The claims of the access token, validated once per request.
         security_scopes (SecurityScopes): Required scopes for the endpoint.
 
     Raises:
@@ -582,7 +594,7 @@ def check_scopes_for_browser_redirect(
         Errors and exceptions are logged using core_logger for debugging and auditing purposes.
     """
     # Get the scope from the token
-    scope = token_manager.get_token_claim(access_token, "scope")
+    scope = access_token_claims.get("scope")
 
     # Ensure the scope is a list
     if not isinstance(scope, list):
@@ -1,6 +1,10 @@
+import hashlib
 import secrets
+import threading
+import time
 import uuid
 
+from collections import OrderedDict
 from enum import Enum
 
 from datetime import datetime, timedelta, timezone
@@ -30,6 +34,80 @@ class TokenType(Enum):
     REFRESH = "refresh"
 
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of tokens whose signature was verified.
+
+    Tokens are keyed by their SHA-256 hash, so the cache never holds the
+    token strings, and entries are dropped once the token expires.
+
+    Attributes:
+        max_size (int): Maximum number of tokens kept.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): Maximum number of tokens kept.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[float, jwt.Token]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> jwt.Token | None:
+        """
+        Returns the decoded token if it was verified and has not expired.
+
+        Args:
+            token (str): The JWT token string.
+
+        Returns:
+            jwt.Token | None: The decoded token, or None on a cache miss.
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, token: str, decoded: jwt.Token) -> None:
+        """
+        Stores a verified token until its expiration.
+
+        Tokens without a numeric expiration or already expired are not
+        stored.
+
+        Args:
+            token (str): The JWT token string.
+            decoded (jwt.Token): The token decoded by jwt.decode.
+        """
+        expires_at = decoded.claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, decoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all tokens from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
 class TokenManager:
     """
     TokenManager is a utility class for managing JSON Web Tokens (JWT) in user sessions.
@@ -49,7 +127,7 @@ class TokenManager:
 
         decode_token(token: str) -> dict:
 
-        validate_token_expiration(token: str) -> None:
+        validate_token_expiration(token: str) -> dict:
 
         create_token(session_id: str, user: users_schema.UsersRead, token_type: TokenType) -> tuple[datetime, str]:
 
@@ -72,6 +150,9 @@ class TokenManager:
         self.secret_key = secret_key
         self.algorithm = algorithm
         self._key = OctKey.import_key(secret_key)
+        self._verified_tokens = VerifiedTokenCache(
+            auth_constants.JWT_VERIFIED_TOKEN_CACHE_SIZE
+        )
 
     def get_token_claim(self, token: str, claim: str) -> str | list[str] | int:
         """
@@ -122,6 +203,9 @@ class TokenManager:
         """
         Decodes a JWT token and returns its payload as a dictionary.
 
+        The signature of a token is verified once, then the decoded token
+        is served from a bounded LRU cache until it expires.
+
         Args:
             token (str): The JWT token to decode.
 
@@ -132,8 +216,15 @@ class TokenManager:
             HTTPException: If the token cannot be decoded, raises an HTTP 401 Unauthorized exception.
         """
         try:
+            # Return the payload of a token already verified
+            decoded = self._verified_tokens.get(token)
+            if decoded is not None:
+                return decoded
+
             # Decode the token and return the payload
-            return jwt.decode(token, OctKey.import_key(self.secret_key))
+            decoded = jwt.decode(token, self._key)
+            self._verified_tokens.put(token, decoded)
+            return decoded
         except InvalidPayloadError as payload_err:
             core_logger.print_to_log(
                 f"Invalid token payload: {payload_err}",
@@ -159,7 +250,7 @@ class TokenManager:
                 headers={"WWW-Authenticate": "Bearer"},
             ) from err
 
-    def validate_token_expiration(self, token: str) -> None:
+    def validate_token_expiration(self, token: str) -> dict:
         """
         Validates the expiration and required claims of a JWT token.
 
@@ -171,6 +262,9 @@ class TokenManager:
         Args:
             token (str): The JWT token to validate.
 
+        Returns:
+            dict: The validated claims of the token.
+
         Raises:
             HTTPException: If the token is missing required claims, expired, not yet valid,
                            or contains invalid claims.
@@ -194,6 +288,7 @@ class TokenManager:
 
             # Validate token expiration
             claims_requests.validate(payload.claims)
+            return payload.claims
         except MissingClaimError as missing_err:
             core_logger.print_to_log(
                 f"JWT missing claim error: {missing_err}",
@@ -313,7 +408,7 @@ class TokenManager:
         encoded_token = jwt.encode(
             {"alg": self.algorithm},
             scope_dict.copy(),
-            OctKey.import_key(self.secret_key),
+            self._key,
         )
 
         # Return the expiration and the encoded token
@@ -27,6 +27,7 @@ ACTIVITY_MEDIA_DIR = os.getenv("ACTIVITY_MEDIA_DIR", f"{DATA_DIR}/activity_media
 FILES_PROCESSED_DIR = f"{FILES_DIR}/processed"
 FILES_BULK_IMPORT_DIR = f"{FILES_DIR}/bulk_import"
 FILES_BULK_IMPORT_IMPORT_ERRORS_DIR = f"{FILES_BULK_IMPORT_DIR}/import_errors"
+PROFILE_IMPORT_DIR = f"{DATA_DIR}/profile_import"
 STRAVA_BULK_IMPORT_BIKES_FILE = "bikes.csv"
 STRAVA_BULK_IMPORT_SHOES_FILE = "shoes.csv"
 STRAVA_BULK_IMPORT_SHOES_UNNAMED_SHOE = "Unnamed Shoe "
@@ -53,6 +54,107 @@ REVERSE_GEO_MIN_INTERVAL = (
 )
 REVERSE_GEO_LOCK = threading.Lock()
 REVERSE_GEO_LAST_CALL = 0.0
+# Set in processes parsing files whose locations are resolved by the importer
+REVERSE_GEO_DEFERRED = False
+try:
+    REVERSE_GEO_CACHE_PRECISION = min(
+        12, max(1, int(os.getenv("REVERSE_GEO_CACHE_PRECISION", "6")))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid REVERSE_GEO_CACHE_PRECISION value, expected an int; defaulting to 6",
+        "warning",
+    )
+    REVERSE_GEO_CACHE_PRECISION = 6
+try:
+    REVERSE_GEO_CACHE_TTL_DAYS = max(
+        1, int(os.getenv("REVERSE_GEO_CACHE_TTL_DAYS", "180"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid REVERSE_GEO_CACHE_TTL_DAYS value, expected an int; defaulting to 180",
+        "warning",
+    )
+    REVERSE_GEO_CACHE_TTL_DAYS = 180
+try:
+    REVERSE_GEO_CACHE_MAX_ENTRIES = max(
+        1, int(os.getenv("REVERSE_GEO_CACHE_MAX_ENTRIES", "100000"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid REVERSE_GEO_CACHE_MAX_ENTRIES value, expected an int; defaulting to 100000",
+        "warning",
+    )
+    REVERSE_GEO_CACHE_MAX_ENTRIES = 100000
+REVERSE_GEO_GAZETTEER_FILE = os.getenv(
+    "REVERSE_GEO_GAZETTEER_FILE", f"{DATA_DIR}/gazetteer.csv"
+)
+try:
+    GARMINCONNECT_SYNC_MAX_WORKERS = max(
+        1, int(os.getenv("GARMINCONNECT_SYNC_MAX_WORKERS", "8"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid GARMINCONNECT_SYNC_MAX_WORKERS value, expected an int; defaulting to 8",
+        "warning",
+    )
+    GARMINCONNECT_SYNC_MAX_WORKERS = 8
+try:
+    GARMINCONNECT_SYNC_MAX_USERS = max(
+        1, int(os.getenv("GARMINCONNECT_SYNC_MAX_USERS", "4"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid GARMINCONNECT_SYNC_MAX_USERS value, expected an int; defaulting to 4",
+        "warning",
+    )
+    GARMINCONNECT_SYNC_MAX_USERS = 4
+try:
+    GARMINCONNECT_SYNC_MAX_DOWNLOADS_PER_USER = max(
+        1, int(os.getenv("GARMINCONNECT_SYNC_MAX_DOWNLOADS_PER_USER", "2"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid GARMINCONNECT_SYNC_MAX_DOWNLOADS_PER_USER value, expected an int; defaulting to 2",
+        "warning",
+    )
+    GARMINCONNECT_SYNC_MAX_DOWNLOADS_PER_USER = 2
+try:
+    STRAVA_SYNC_MAX_USERS = max(1, int(os.getenv("STRAVA_SYNC_MAX_USERS", "8")))
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid STRAVA_SYNC_MAX_USERS value, expected an int; defaulting to 8",
+        "warning",
+    )
+    STRAVA_SYNC_MAX_USERS = 8
+try:
+    STRAVA_SYNC_MAX_FETCHES_PER_USER = max(
+        1, int(os.getenv("STRAVA_SYNC_MAX_FETCHES_PER_USER", "4"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid STRAVA_SYNC_MAX_FETCHES_PER_USER value, expected an int; defaulting to 4",
+        "warning",
+    )
+    STRAVA_SYNC_MAX_FETCHES_PER_USER = 4
+try:
+    BULK_IMPORT_MAX_WORKERS = max(
+        1, int(os.getenv("BULK_IMPORT_MAX_WORKERS", str(os.cpu_count() or 1)))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid BULK_IMPORT_MAX_WORKERS value, expected an int; defaulting to CPU count",
+        "warning",
+    )
+    BULK_IMPORT_MAX_WORKERS = os.cpu_count() or 1
+try:
+    BULK_IMPORT_BATCH_SIZE = max(1, int(os.getenv("BULK_IMPORT_BATCH_SIZE", "20")))
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid BULK_IMPORT_BATCH_SIZE value, expected an int; defaulting to 20",
+        "warning",
+    )
+    BULK_IMPORT_BATCH_SIZE = 20
 SUPPORTED_FILE_FORMATS = [
     ".fit",
     ".gpx",
@@ -60,6 +162,46 @@ SUPPORTED_FILE_FORMATS = [
     ".gz",
 ]  # used to screen bulk import files
 OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
+try:
+    AI_INSIGHTS_MAX_CONCURRENCY = max(
+        1, int(os.getenv("AI_INSIGHTS_MAX_CONCURRENCY", "2"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid AI_INSIGHTS_MAX_CONCURRENCY value, expected an int; defaulting to 2",
+        "warning",
+    )
+    AI_INSIGHTS_MAX_CONCURRENCY = 2
+try:
+    AI_INSIGHTS_MAX_ATTEMPTS = max(1, int(os.getenv("AI_INSIGHTS_MAX_ATTEMPTS", "5")))
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid AI_INSIGHTS_MAX_ATTEMPTS value, expected an int; defaulting to 5",
+        "warning",
+    )
+    AI_INSIGHTS_MAX_ATTEMPTS = 5
+try:
+    AI_INSIGHTS_RETRY_BASE_SECONDS = max(
+        1, int(os.getenv("AI_INSIGHTS_RETRY_BASE_SECONDS", "30"))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid AI_INSIGHTS_RETRY_BASE_SECONDS value, expected an int; defaulting to 30",
+        "warning",
+    )
+    AI_INSIGHTS_RETRY_BASE_SECONDS = 30
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "endurain+postgresql://")
+try:
+    RATE_LIMIT_LEASE_FRACTION = min(
+        1.0, max(0.0, float(os.getenv("RATE_LIMIT_LEASE_FRACTION", "0.1")))
+    )
+except ValueError:
+    core_logger.print_to_log_and_console(
+        "Invalid RATE_LIMIT_LEASE_FRACTION value, expected a float; defaulting to 0.1",
+        "warning",
+    )
+    RATE_LIMIT_LEASE_FRACTION = 0.1
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
 
 
 def read_secret(env_var_name: str, default_value: str | None = None) -> str | None:
@@ -328,6 +470,7 @@ def check_required_dirs():
         FILES_PROCESSED_DIR,
         FILES_BULK_IMPORT_DIR,
         FILES_BULK_IMPORT_IMPORT_ERRORS_DIR,
+        PROFILE_IMPORT_DIR,
         LOGS_DIR,
     ]
 
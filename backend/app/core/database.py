@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.engine.url import URL
 
 import core.config as core_config
+import core.metrics as core_metrics
 
 # Define the database connection URL using environment variables
 db_url = URL.create(
@@ -18,6 +19,7 @@ db_url = URL.create(
 # Create the SQLAlchemy engine
 engine = create_engine(
     db_url,
+    poolclass=core_metrics.InstrumentedQueuePool,
     pool_size=20,
     max_overflow=40,
     pool_timeout=180,
@@ -32,6 +34,20 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def get_conninfo() -> str:
+    """
+    Return the libpq connection string of the database.
+
+    Used by the code that needs a plain psycopg connection outside of
+    the engine pool, such as a LISTEN loop or a session holding
+    advisory locks.
+
+    Returns:
+        The connection string, password included.
+    """
+    return db_url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
 def get_db():
     """
     Yields a new SQLAlchemy database session.
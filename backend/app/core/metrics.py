@@ -0,0 +1,346 @@
+"""Prometheus metrics of the backend.
+
+The metrics are served by the /metrics endpoint when METRICS_ENABLED is
+true:
+
+- Latency of each request per route, with the number and time of the
+  database queries it ran, counted by SQLAlchemy cursor events
+- Wait for a connection of the pool and connections checked out
+- Parse time of activity files per file type
+- Files and activities the importers skipped as already stored
+- Latency of the calls to the geocoder, Garmin Connect, Strava and the
+  AI provider
+- Duration of the scheduler jobs and open WebSocket connections
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory: every process, bulk import workers included, writes its
+values there and /metrics adds them up.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+import core.config as core_config
+
+# Buckets of the latencies, in seconds
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+# Buckets of the scheduler job durations, in seconds
+JOB_DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+# Buckets of the number of queries of a request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# Route label of the requests not matching any route, such as static files
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "endurain_http_request_duration_seconds",
+    "Latency of the HTTP requests",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "endurain_http_request_db_queries",
+    "Number of database queries of each HTTP request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    "endurain_http_request_db_duration_seconds",
+    "Time spent in database queries by each HTTP request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "endurain_db_pool_checkout_wait_seconds",
+    "Wait for a connection of the database pool",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "endurain_db_pool_checked_out_connections",
+    "Connections of the database pool in use",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CAPACITY = Gauge(
+    "endurain_db_pool_capacity_connections",
+    "Connections the database pool can open, overflow included",
+    multiprocess_mode="livesum",
+)
+ACTIVITY_PARSE_DURATION = Histogram(
+    "endurain_activity_parse_duration_seconds",
+    "Parse time of the activity files",
+    ["file_type"],
+    buckets=LATENCY_BUCKETS,
+)
+ACTIVITY_IMPORTS_SKIPPED = Counter(
+    "endurain_activity_imports_skipped_total",
+    "Files and activities skipped by the importers as already stored",
+    ["source"],
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "endurain_external_call_duration_seconds",
+    "Latency of the calls to external services",
+    ["service", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+SCHEDULER_JOB_DURATION = Histogram(
+    "endurain_scheduler_job_duration_seconds",
+    "Duration of the scheduler jobs",
+    ["job", "outcome"],
+    buckets=JOB_DURATION_BUCKETS,
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "endurain_websocket_connections",
+    "Open WebSocket connections",
+    multiprocess_mode="livesum",
+)
+
+
+class _QueryStats:
+    """Database queries run by a request."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_request_queries: ContextVar[_QueryStats | None] = ContextVar(
+    "request_queries", default=None
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool timing the wait for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing the requests and counting their queries."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = _QueryStats()
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            _request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], route, str(status_code)
+            ).observe(duration)
+            HTTP_REQUEST_DB_QUERIES.labels(route).observe(queries.count)
+            HTTP_REQUEST_DB_DURATION.labels(route).observe(queries.seconds)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if _request_queries.get() is not None:
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    queries = _request_queries.get()
+    started = conn.info.get("metrics_query_started")
+    if queries is None or not started:
+        return
+    queries.count += 1
+    queries.seconds += time.perf_counter() - started.pop()
+
+
+def _instrument_pool(pool: QueuePool) -> None:
+    DB_POOL_CAPACITY.set(pool.size() + pool._max_overflow)
+
+    event.listen(pool, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(pool, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec())
+
+
+def setup_metrics(app, engine: Engine) -> None:
+    """
+    Instrument the app and the database engine if metrics are enabled.
+
+    Args:
+        app: FastAPI application.
+        engine: Engine whose queries and pool are measured.
+    """
+    if not core_config.METRICS_ENABLED:
+        return
+
+    app.add_middleware(MetricsMiddleware)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if isinstance(engine.pool, QueuePool):
+        _instrument_pool(engine.pool)
+
+
+def observe_parse(file_type: str, seconds: float) -> None:
+    """
+    Record the parse time of an activity file.
+
+    Args:
+        file_type: Extension of the file, without the dot.
+        seconds: Parse time.
+    """
+    ACTIVITY_PARSE_DURATION.labels(file_type).observe(seconds)
+
+
+def count_skipped_imports(source: str, count: int = 1) -> None:
+    """
+    Count files or activities an importer skipped as already stored.
+
+    Args:
+        source: Importer that skipped them (e.g. "bulk_import", "strava").
+        count: Number skipped.
+    """
+    if count:
+        ACTIVITY_IMPORTS_SKIPPED.labels(source).inc(count)
+
+
+def observe_job(job_id: str, outcome: str, seconds: float) -> None:
+    """
+    Record the duration of a scheduler job run.
+
+    Args:
+        job_id: ID of the job.
+        outcome: Outcome of the run.
+        seconds: Duration of the run.
+    """
+    SCHEDULER_JOB_DURATION.labels(job_id, outcome).observe(seconds)
+
+
+@contextmanager
+def track_external_call(service: str) -> Iterator[None]:
+    """
+    Time a call to an external service.
+
+    The status is "error" if the block raises, "ok" otherwise.
+
+    Args:
+        service: Name of the service.
+    """
+    started = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        EXTERNAL_CALL_DURATION.labels(service, status).observe(
+            time.perf_counter() - started
+        )
+
+
+def instrument_session(session, service: str):
+    """
+    Time the responses of a requests session.
+
+    Used for the sessions of the Strava and Garmin Connect clients, whose
+    calls happen inside the client libraries. The status is "error" for
+    4xx and 5xx responses, "ok" otherwise.
+
+    Args:
+        session: requests.Session of the client.
+        service: Name of the service.
+
+    Returns:
+        The session.
+    """
+
+    def hook(response, *args, **kwargs):
+        EXTERNAL_CALL_DURATION.labels(
+            service, "ok" if response.ok else "error"
+        ).observe(response.elapsed.total_seconds())
+
+    hooks = session.hooks.setdefault("response", [])
+    if not any(getattr(existing, "metrics_service", None) for existing in hooks):
+        hook.metrics_service = service
+        hooks.append(hook)
+    return session
+
+
+def websocket_connected() -> None:
+    """Count an opened WebSocket connection."""
+    WEBSOCKET_CONNECTIONS.inc()
+
+
+def websocket_disconnected() -> None:
+    """Count a closed WebSocket connection."""
+    WEBSOCKET_CONNECTIONS.dec()
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """
+    Return the metrics in the Prometheus text format.
+
+    In multiprocess mode, the values written by all processes are added
+    up, otherwise the values of this process are returned.
+
+    Returns:
+        The metrics and their content type.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop the live gauges of this process in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,7 +1,38 @@
 from fastapi import Request, HTTPException
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 
+import core.logger as core_logger
+
 import server_settings.schema as server_settings_schema
+import server_settings.snapshot as server_settings_snapshot
+
+
+async def get_allowed_tile_domains() -> tuple[str, ...]:
+    """
+    Get the tile domains allowed by the CSP img-src directive.
+
+    Read from the server settings snapshot, loaded in a worker thread if
+    it was invalidated. Falls back to the built-in tile providers if the
+    settings can't be read.
+
+    Returns:
+        Allowed tile domain patterns.
+    """
+    snapshot = server_settings_snapshot.get_server_settings_cache().snapshot
+    if snapshot is None:
+        try:
+            snapshot = await run_in_threadpool(
+                server_settings_snapshot.get_server_settings_snapshot
+            )
+        except Exception as err:
+            core_logger.print_to_log(
+                f"Error loading server settings for allowed tile domains, using defaults: {err}",
+                "warning",
+                exc=err,
+            )
+            return tuple(server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS)
+    return snapshot.allowed_tile_domains
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -39,7 +70,7 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         Content-Security-Policy: default-src 'self'; img-src 'self' data: <dynamic-tile-domains>; style-src 'self' 'unsafe-inline'; script-src 'self' 'unsafe-inline'
             Restricts resources to same origin by default (API responses).
             Allows inline base64 images (data: URIs) and map tiles from configured tile servers.
-            Tile domains are dynamically loaded from app.state.allowed_tile_domains (updated on startup and settings changes).
+            Tile domains are read from the server settings snapshot (reloaded on every worker when the settings change).
             Allows inline styles and scripts required by frontend libraries.
             For frontend serving, this would need customization.
 
@@ -82,12 +113,8 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         # Note: Only add CSP for HTML responses to avoid affecting JSON API responses
         content_type = response.headers.get("content-type", "")
         if "text/html" in content_type:
-            # Get allowed tile domains from app state (initialized on startup, updated on settings change)
-            allowed_tile_domains = getattr(
-                request.app.state,
-                "allowed_tile_domains",
-                server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS,
-            )
+            # Get allowed tile domains from the server settings snapshot
+            allowed_tile_domains = await get_allowed_tile_domains()
             tile_domains_str = " ".join(allowed_tile_domains)
 
             response.headers["Content-Security-Policy"] = (
@@ -0,0 +1,169 @@
+"""Keyset (cursor) pagination helpers.
+
+Offset pagination reads and discards every row before the requested page,
+so deep pages get slower, and pages shift when rows are inserted while a
+client scrolls. Keyset pagination resumes after the sort key of the last
+row returned instead:
+
+- encode_cursor turns the sort key of a row into an opaque, URL safe
+  token bound to the listing and sort order it was created for
+- decode_cursor validates a token and restores the sort key values
+- paginate_by_keyset orders a query by its sort key and resumes after a
+  cursor; the sort key must end with a unique column
+- split_page separates the rows of a page from the next page cursor
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def _dump_value(value: Any) -> Any:
+    """Return a JSON value, tagging the types JSON doesn't preserve."""
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    """Restore a value dumped by _dump_value."""
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError(f"Unknown cursor value {value}")
+    return value
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Invalid cursor",
+    )
+
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of a row as an opaque cursor.
+
+    Args:
+        scope: Listing and sort order the cursor belongs to, e.g.
+            "activities:distance:desc".
+        values: Sort key values of the row.
+
+    Returns:
+        URL safe cursor string.
+    """
+    payload = json.dumps(
+        {"s": scope, "k": [_dump_value(value) for value in values]},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, scope: str) -> list[Any]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string.
+        scope: Listing and sort order the cursor must belong to.
+
+    Returns:
+        Sort key values of the row the cursor points after.
+
+    Raises:
+        HTTPException: 422 if the cursor is malformed or was created for
+            another listing or sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != scope:
+            raise ValueError("Cursor scope mismatch")
+        return [_load_value(value) for value in payload["k"]]
+    except (
+        binascii.Error,
+        UnicodeDecodeError,
+        KeyError,
+        TypeError,
+        ValueError,
+    ) as err:
+        raise _invalid_cursor() from err
+
+
+def paginate_by_keyset(
+    query: Query,
+    sort_columns: Sequence,
+    descending: bool,
+    cursor_values: Sequence[Any] | None,
+    num_records: int,
+) -> Query:
+    """
+    Order a query by a sort key and return the page after a cursor.
+
+    One row more than num_records is fetched so split_page can tell if
+    there is a next page.
+
+    Args:
+        query: Query selecting the rows followed by the sort_columns.
+        sort_columns: Non null column expressions of the sort key, ending
+            with a unique column.
+        descending: Whether the rows are sorted in descending order.
+        cursor_values: Sort key values of the last row of the previous
+            page, or None for the first page.
+        num_records: Number of rows per page.
+
+    Returns:
+        The query of the page.
+
+    Raises:
+        HTTPException: 422 if the cursor doesn't match the sort key.
+    """
+    if cursor_values is not None:
+        if len(cursor_values) != len(sort_columns):
+            raise _invalid_cursor()
+        sort_key = tuple_(*sort_columns)
+        cursor_key = tuple_(*cursor_values)
+        query = query.filter(
+            sort_key < cursor_key if descending else sort_key > cursor_key
+        )
+
+    return query.order_by(
+        *(column.desc() if descending else column.asc() for column in sort_columns)
+    ).limit(num_records + 1)
+
+
+def split_page(rows: list, num_records: int, scope: str) -> tuple[list, str | None]:
+    """
+    Split the rows of a keyset query into a page and the next cursor.
+
+    Args:
+        rows: Rows of a paginate_by_keyset query, each holding the item
+            followed by its sort key values.
+        num_records: Number of rows per page.
+        scope: Listing and sort order of the cursor.
+
+    Returns:
+        Tuple of the page items and the cursor of the next page, or None
+        on the last page.
+    """
+    page = rows[:num_records]
+    next_cursor = None
+    if len(rows) > num_records and page:
+        next_cursor = encode_cursor(scope, list(page[-1][1:]))
+    return [row[0] for row in page], next_cursor
@@ -3,7 +3,9 @@ Rate limiting middleware for Endurain API.
 
 This module provides rate limiting functionality to protect API endpoints from abuse,
 particularly focusing on OAuth2/OIDC authentication flows. It uses slowapi (built on
-python-limits) to implement per-IP rate limiting with in-memory storage.
+python-limits) to implement per-IP rate limiting. Counters are kept in the storage
+selected by RATE_LIMIT_STORAGE_URI, by default core.rate_limit_storage so that the
+limits hold across all workers and replicas.
 
 Protects endpoints from:
 - Brute-force attacks on authorization endpoints
@@ -32,8 +34,12 @@ from fastapi.responses import JSONResponse
 
 import users.users_sessions.utils as users_session_utils
 
+import core.config as core_config
 import core.logger as core_logger
 
+# Registers the endurain+postgresql:// storage scheme
+import core.rate_limit_storage as core_rate_limit_storage
+
 
 # Predefined rate limit decorators for common use cases
 # These can be imported and used directly on routes
@@ -66,15 +72,22 @@ API_WRITE_LIMIT = "30/minute"  # POST/PUT/DELETE (write operations)
 ADMIN_LIMIT = "10/minute"  # Administrative operations
 
 
-# Initialize the rate limiter with in-memory storage
-# For production with multiple backend instances, consider using Redis storage:
-# from slowapi.middleware import SlowAPIMiddleware
-# from slowapi import _rate_limit_exceeded_handler
-# limiter = Limiter(key_func=users_session_utils.get_ip_address, storage_uri="redis://localhost:6379")
+# Initialize the rate limiter with the shared storage
+# The sliding window counter smooths the window boundaries, and the in-memory
+# fallback keeps the limits enforced per worker while the storage is unreachable
 limiter = Limiter(
     key_func=users_session_utils.get_ip_address,
     default_limits=["100/minute"],  # Global default: 100 requests per minute per IP
-    storage_uri="memory://",  # In-memory storage (single instance only)
+    strategy="sliding-window-counter",
+    storage_uri=core_config.RATE_LIMIT_STORAGE_URI,
+    storage_options=(
+        {"lease_fraction": core_config.RATE_LIMIT_LEASE_FRACTION}
+        if core_config.RATE_LIMIT_STORAGE_URI.startswith(
+            core_rate_limit_storage.STORAGE_SCHEME
+        )
+        else {}
+    ),
+    in_memory_fallback_enabled=True,
     headers_enabled=True,  # Include rate limit headers in responses
 )
 
@@ -0,0 +1,38 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+)
+from core.database import Base
+
+
+class RateLimitCounter(Base):
+    __tablename__ = "rate_limit_counters"
+    # Counters are cheap to lose, skip the WAL on every hit
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key = Column(
+        String(length=500),
+        primary_key=True,
+        comment="Rate limit key suffixed with the window number",
+    )
+
+    hits = Column(
+        Integer,
+        nullable=False,
+        comment="Hits reserved in the window by all workers",
+    )
+
+    granted = Column(
+        Integer,
+        nullable=False,
+        comment="Hits reserved by the last acquisition",
+    )
+
+    expires_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+        comment="Time after which the counter can be deleted",
+    )
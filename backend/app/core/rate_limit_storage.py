@@ -0,0 +1,424 @@
+"""Postgres storage for the API rate limits.
+
+With the in-memory storage every uvicorn worker and replica keeps its own
+counters, so N workers allow N times each limit. This storage shares the
+counters through Postgres instead:
+
+- Counters live in the unlogged rate_limit_counters table, one row per key
+  and window, and back the sliding window counter strategy
+- A worker leases a share of a limit with a single upsert and serves the
+  next hits of the window from the lease without a round trip
+- A refused hit is remembered until enough of the previous window slid out
+  for the next one to fit
+- Leased hits unused at the end of a window are lost, a limit can be
+  undershot by up to one lease per worker but is never exceeded
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+import core.database as core_database
+import core.logger as core_logger
+
+# URI scheme selecting this storage in storage_from_string
+STORAGE_SCHEME = "endurain+postgresql"
+
+# Share of a limit reserved by each round trip
+LEASE_FRACTION = 0.1
+
+# Interval between the removal of the leases of past windows
+LEASE_PRUNE_SECONDS = 60
+
+_ACQUIRE = text(
+    """
+    WITH previous_window AS (
+        SELECT COALESCE(MAX(hits), 0) AS hits
+        FROM rate_limit_counters
+        WHERE key = :previous_key
+    ),
+    current_window AS (
+        SELECT MAX(hits) AS hits
+        FROM rate_limit_counters
+        WHERE key = :current_key
+    ),
+    acquired AS (
+        INSERT INTO rate_limit_counters AS counters (key, hits, granted, expires_at)
+        SELECT :current_key, allowance, allowance, to_timestamp(:expires_at)
+        FROM (
+            SELECT LEAST(:lease, :limit - FLOOR(hits * :previous_weight))::integer
+                AS allowance
+            FROM previous_window
+        ) AS initial
+        WHERE allowance >= :amount
+        ON CONFLICT (key) DO UPDATE SET
+            hits = counters.hits + LEAST(
+                :lease,
+                :limit - FLOOR(
+                    (SELECT hits FROM previous_window) * :previous_weight
+                    + counters.hits
+                )
+            )::integer,
+            granted = LEAST(
+                :lease,
+                :limit - FLOOR(
+                    (SELECT hits FROM previous_window) * :previous_weight
+                    + counters.hits
+                )
+            )::integer
+        WHERE :limit - FLOOR(
+            (SELECT hits FROM previous_window) * :previous_weight + counters.hits
+        ) >= :amount
+        RETURNING counters.hits, counters.granted
+    )
+    SELECT
+        previous_window.hits AS previous_hits,
+        COALESCE(
+            (SELECT hits FROM acquired), (SELECT hits FROM current_window), 0
+        ) AS current_hits,
+        COALESCE((SELECT granted FROM acquired), 0) AS granted
+    FROM previous_window
+    """
+)
+
+_INCR = text(
+    """
+    INSERT INTO rate_limit_counters AS counters (key, hits, granted, expires_at)
+    VALUES (:key, :amount, :amount, now() + make_interval(secs => :expiry))
+    ON CONFLICT (key) DO UPDATE SET
+        hits = CASE WHEN counters.expires_at <= now()
+            THEN excluded.hits ELSE counters.hits + excluded.hits END,
+        granted = excluded.granted,
+        expires_at = CASE WHEN counters.expires_at <= now()
+            THEN excluded.expires_at ELSE counters.expires_at END
+    RETURNING hits
+    """
+)
+
+_GET = text(
+    """
+    SELECT hits, EXTRACT(EPOCH FROM expires_at) AS expires_at
+    FROM rate_limit_counters
+    WHERE key = :key AND expires_at > now()
+    """
+)
+
+_GET_WINDOWS = text(
+    """
+    SELECT key, hits
+    FROM rate_limit_counters
+    WHERE key IN (:previous_key, :current_key) AND expires_at > now()
+    """
+)
+
+_CLEAR = text("DELETE FROM rate_limit_counters WHERE key = ANY(:keys)")
+
+_RESET = text("DELETE FROM rate_limit_counters")
+
+_DELETE_EXPIRED = text("DELETE FROM rate_limit_counters WHERE expires_at <= now()")
+
+
+@dataclass
+class _Lease:
+    """
+    Hits of a window reserved by this worker.
+
+    Attributes:
+        window: Number of the window the lease belongs to.
+        expiry: Length of the window in seconds.
+        tokens: Reserved hits not used yet.
+        previous_hits: Hits of the previous window, for all workers.
+        current_hits: Hits reserved in the window, for all workers.
+        retry_at: Time before which a refused hit is refused again.
+    """
+
+    window: int
+    expiry: int
+    tokens: int
+    previous_hits: int
+    current_hits: int
+    retry_at: float = 0.0
+
+
+class PostgresRateLimitStorage(
+    Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow
+):
+    """
+    Rate limit storage shared by all workers through Postgres.
+
+    Attributes:
+        lease_fraction: Share of a limit reserved by each round trip.
+        round_trips: Number of queries sent to the database.
+    """
+
+    STORAGE_SCHEME = [STORAGE_SCHEME]
+
+    def __init__(
+        self,
+        uri: str | None = None,
+        wrap_exceptions: bool = False,
+        lease_fraction: float = LEASE_FRACTION,
+        **options: float | str | bool,
+    ) -> None:
+        """
+        Initialize the storage.
+
+        Args:
+            uri: Storage URI, the database of core.database is used.
+            wrap_exceptions: Whether to wrap database errors in
+                limits.errors.StorageError.
+            lease_fraction: Share of a limit reserved by each round trip.
+            **options: Unused storage options.
+        """
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.lease_fraction = float(lease_fraction)
+        self.round_trips = 0
+        self._leases: dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self._pruned_at = time.time()
+
+    @property
+    def base_exceptions(self) -> type[Exception] | tuple[type[Exception], ...]:
+        return SQLAlchemyError
+
+    def _execute(self, statement, params: dict | None = None) -> list[dict]:
+        """
+        Run a statement in its own transaction.
+
+        Args:
+            statement: SQL statement to run.
+            params: Bind parameters of the statement.
+
+        Returns:
+            The returned rows as dictionaries.
+        """
+        self.round_trips += 1
+        with core_database.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            result = connection.execute(statement, params or {})
+            return [dict(row) for row in result.mappings()] if result.returns_rows else []
+
+    def acquire_sliding_window_entry(
+        self, key: str, limit: int, expiry: int, amount: int = 1
+    ) -> bool:
+        if amount > limit:
+            return False
+
+        now = time.time()
+        window = int(now / expiry)
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.window == window:
+                if lease.tokens >= amount:
+                    lease.tokens -= amount
+                    return True
+                if now < lease.retry_at:
+                    return False
+
+        lease_size = max(amount, math.floor(limit * self.lease_fraction))
+        previous_hits, current_hits, granted = self._reserve(
+            key, limit, expiry, amount, lease_size, now
+        )
+        acquired = granted >= amount
+        new_lease = _Lease(
+            window=window,
+            expiry=expiry,
+            tokens=granted - amount if acquired else 0,
+            previous_hits=previous_hits,
+            current_hits=current_hits,
+        )
+        if not acquired:
+            new_lease.retry_at = _retry_at(
+                now, limit, expiry, amount, previous_hits, current_hits
+            )
+
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.window == window:
+                # Keep the hits reserved by a concurrent request
+                new_lease.tokens += lease.tokens
+            self._leases[key] = new_lease
+            self._prune_leases(now)
+        return acquired
+
+    def _reserve(
+        self,
+        key: str,
+        limit: int,
+        expiry: int,
+        amount: int,
+        lease_size: int,
+        now: float,
+    ) -> tuple[int, int, int]:
+        """
+        Reserve hits in the current window of a key.
+
+        Reserves up to lease_size hits, as many as fit in the limit, or
+        none if fewer than amount fit.
+
+        Args:
+            key: Rate limit key.
+            limit: Maximum hits per window.
+            expiry: Length of the window in seconds.
+            amount: Hits needed by the request.
+            lease_size: Hits to reserve if they fit.
+            now: Current time.
+
+        Returns:
+            The hits of the previous window, the hits reserved in the
+            current window and the hits reserved by this call.
+        """
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        row = self._execute(
+            _ACQUIRE,
+            {
+                "previous_key": previous_key,
+                "current_key": current_key,
+                "previous_weight": _previous_weight(now, expiry),
+                "limit": limit,
+                "lease": lease_size,
+                "amount": amount,
+                # The counter is the previous window during the next one
+                "expires_at": float((int(now / expiry) + 2) * expiry),
+            },
+        )[0]
+        return int(row["previous_hits"]), int(row["current_hits"]), int(row["granted"])
+
+    def _prune_leases(self, now: float) -> None:
+        """Drop the leases of past windows, with the lock held."""
+        if now - self._pruned_at < LEASE_PRUNE_SECONDS:
+            return
+        self._pruned_at = now
+        self._leases = {
+            key: lease
+            for key, lease in self._leases.items()
+            if lease.window == int(now / lease.expiry)
+        }
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.window == int(now / expiry):
+                previous_hits = lease.previous_hits
+                current_hits = lease.current_hits - lease.tokens
+            else:
+                lease = None
+
+        if lease is None:
+            previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+            hits = {
+                row["key"]: row["hits"]
+                for row in self._execute(
+                    _GET_WINDOWS,
+                    {"previous_key": previous_key, "current_key": current_key},
+                )
+            }
+            previous_hits = hits.get(previous_key, 0)
+            current_hits = hits.get(current_key, 0)
+
+        previous_ttl = _previous_weight(now, expiry) * expiry if previous_hits else 0.0
+        current_ttl = (1 - (now / expiry) % 1) * expiry + expiry
+        return previous_hits, previous_ttl, current_hits, current_ttl
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        with self._lock:
+            self._leases.pop(key, None)
+        self._execute(
+            _CLEAR, {"keys": list(self.sliding_window_keys(key, expiry, time.time()))}
+        )
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return int(
+            self._execute(_INCR, {"key": key, "amount": amount, "expiry": expiry})[0][
+                "hits"
+            ]
+        )
+
+    def get(self, key: str) -> int:
+        rows = self._execute(_GET, {"key": key})
+        return int(rows[0]["hits"]) if rows else 0
+
+    def get_expiry(self, key: str) -> float:
+        rows = self._execute(_GET, {"key": key})
+        return float(rows[0]["expires_at"]) if rows else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._execute(text("SELECT 1"))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self) -> int | None:
+        with self._lock:
+            self._leases.clear()
+        with core_database.engine.begin() as connection:
+            return connection.execute(_RESET).rowcount
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._leases.pop(key, None)
+        self._execute(_CLEAR, {"keys": [key]})
+
+
+def _previous_weight(now: float, expiry: int) -> float:
+    """Return the share of the previous window still in the sliding window."""
+    return 1 - (now / expiry) % 1
+
+
+def _retry_at(
+    now: float,
+    limit: int,
+    expiry: int,
+    amount: int,
+    previous_hits: int,
+    current_hits: int,
+) -> float:
+    """
+    Return when a refused hit could fit in the sliding window.
+
+    The previous window weighs less as time passes, a hit fits once
+    floor(previous_hits * weight + current_hits) + amount <= limit.
+
+    Args:
+        now: Current time.
+        limit: Maximum hits per window.
+        expiry: Length of the window in seconds.
+        amount: Hits needed by the request.
+        previous_hits: Hits of the previous window.
+        current_hits: Hits reserved in the current window.
+
+    Returns:
+        The time of the next attempt, the end of the window at the latest.
+    """
+    window_end = (int(now / expiry) + 1) * expiry
+    room = limit - amount - current_hits + 1
+    if room <= 0 or previous_hits == 0:
+        return window_end
+    wait = (_previous_weight(now, expiry) - room / previous_hits) * expiry
+    return min(window_end, now + max(0.0, wait))
+
+
+def delete_expired_counters() -> None:
+    """Delete the rate limit counters of windows that slid out."""
+    try:
+        with core_database.engine.begin() as connection:
+            num_deleted = connection.execute(_DELETE_EXPIRED).rowcount
+    except SQLAlchemyError as err:
+        core_logger.print_to_log(
+            f"Error deleting expired rate limit counters: {err}", "error", exc=err
+        )
+        return
+
+    if num_deleted > 0:
+        core_logger.print_to_log(
+            f"Deleted {num_deleted} expired rate limit counters", "info"
+        )
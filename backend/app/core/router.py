@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
 
 import core.config as core_config
+import core.metrics as core_metrics
+import core.startup as core_startup
 import core.utils as core_utils
 
 # Define the API router
@@ -28,6 +30,67 @@ async def about():
     }
 
 
+@router.get(
+    core_config.ROOT_PATH + "/status/live",
+)
+async def live():
+    """
+    Liveness probe, answers as long as the event loop is responsive.
+
+    Returns:
+        dict: The status of the backend process.
+    """
+    return {"status": "alive"}
+
+
+@router.get(
+    core_config.ROOT_PATH + "/status/ready",
+)
+def ready(response: Response):
+    """
+    Readiness probe, answers 200 once the database can be queried.
+
+    The backend only listens once the schema is up to date, the
+    integration syncs and cleanups of the warm-up don't delay readiness
+    and their progress is returned for monitoring.
+
+    Args:
+        response (Response): Response whose status code is set to 503 when
+            the database can't be queried.
+
+    Returns:
+        dict: The readiness status, database status and warm-up progress.
+    """
+    database_ready = core_startup.check_database()
+    if not database_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if database_ready else "not_ready",
+        "database": "ok" if database_ready else "unavailable",
+        "warm_up": core_startup.get_warm_up_progress(),
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Serves the Prometheus metrics of the backend.
+
+    Returns:
+        Response: The metrics in the Prometheus text format.
+
+    Raises:
+        HTTPException: If metrics are disabled.
+    """
+    if not core_config.METRICS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Metrics are disabled",
+        )
+    content, media_type = core_metrics.generate_metrics()
+    return Response(content=content, media_type=media_type)
+
+
 @router.get("/user_images/{user_img}")
 def user_img_return(
     user_img: str,
@@ -1,5 +1,37 @@
-# from apscheduler.schedulers.background import BackgroundScheduler
+"""Background jobs of the backend.
+
+Every worker and replica runs the same AsyncIOScheduler, runs are
+coordinated through Postgres:
+
+- Each run holds a Postgres advisory lock named after the job, a run
+  already in progress on another worker or replica is skipped
+- Once it holds the lock, a run is also skipped when any worker or
+  replica started the job within its interval, so staggered replicas run
+  each interval job once per interval between them
+- Sync jobs run in a thread so they don't block the event loop
+- Intervals are jittered and a job never overlaps itself, a run that is
+  still going when the next one is due makes the next one skip
+- Runs, skips, failures, duration and start lag are recorded per job
+- The last start, success and failure of each job are stored in
+  scheduler_job_runs, shared by all workers and kept across restarts
+"""
+
+import asyncio
+import hashlib
+import inspect
+import time
+from dataclasses import dataclass
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_SUBMITTED,
+    JobSubmissionEvent,
+)
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
 
 import strava.activity_utils as strava_activity_utils
 import strava.utils as strava_utils
@@ -17,12 +49,125 @@ import users.users_sessions.rotated_refresh_tokens.utils as users_session_rotate
 
 import auth.oauth_state.utils as oauth_state_utils
 
+import activities.activity_ai_insight_jobs.utils as activity_ai_insight_jobs_utils
+
+import geocoding.utils as geocoding_utils
+
+import core.database as core_database
 import core.logger as core_logger
+import core.metrics as core_metrics
+import core.rate_limit_storage as core_rate_limit_storage
+
+# Share of the interval the runs of a job are randomly shifted by
+JOB_JITTER_FRACTION = 0.1
+
+# Upper bound of the jitter of long intervals
+JOB_MAX_JITTER_SECONDS = 300
+
+# Time a run can start late before it is skipped
+JOB_MISFIRE_GRACE_SECONDS = 60
+
+# Start lag above which a run is logged as late
+JOB_LAG_WARNING_SECONDS = 30
+
+# Outcomes of run_job
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_SKIPPED = "skipped"
+
+_RECORD_JOB_RUN = text(
+    """
+    INSERT INTO scheduler_job_runs
+        (job_id, last_started_at, last_succeeded_at, last_failed_at)
+    VALUES (
+        :job_id,
+        to_timestamp(:started_at),
+        CASE WHEN :succeeded THEN to_timestamp(:started_at) END,
+        CASE WHEN :succeeded THEN NULL ELSE now() END
+    )
+    ON CONFLICT (job_id) DO UPDATE SET
+        last_started_at = excluded.last_started_at,
+        last_succeeded_at = COALESCE(
+            excluded.last_succeeded_at, scheduler_job_runs.last_succeeded_at
+        ),
+        last_failed_at = COALESCE(
+            excluded.last_failed_at, scheduler_job_runs.last_failed_at
+        )
+    """
+)
+
+_STARTED_RECENTLY = text(
+    """
+    SELECT last_started_at > now() - make_interval(secs => :seconds)
+    FROM scheduler_job_runs
+    WHERE job_id = :job_id
+    """
+)
+
+_RAN_RECENTLY = text(
+    """
+    SELECT last_succeeded_at > now() - make_interval(mins => :minutes)
+    FROM scheduler_job_runs
+    WHERE job_id = :job_id
+    """
+)
 
-# scheduler = BackgroundScheduler()
 scheduler = AsyncIOScheduler()
 
 
+@dataclass
+class JobStats:
+    """
+    Statistics of the runs of a job on this worker.
+
+    Attributes:
+        description: What the job does.
+        runs: Runs completed, failed ones included.
+        failures: Runs that raised an exception.
+        skipped: Runs skipped because another worker held the job lock
+            or ran the job within its interval.
+        overlaps: Runs skipped because the previous one was still going.
+        last_run_at: Start time of the last run, as a Unix timestamp.
+        last_duration_seconds: Duration of the last run.
+        max_duration_seconds: Longest run.
+        total_duration_seconds: Time spent in all runs.
+        last_lag_seconds: Delay between the scheduled and actual start
+            of the last run.
+        max_lag_seconds: Longest start delay.
+        last_error: Error of the last failed run.
+    """
+
+    description: str
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    overlaps: int = 0
+    last_run_at: float | None = None
+    last_duration_seconds: float = 0.0
+    max_duration_seconds: float = 0.0
+    total_duration_seconds: float = 0.0
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
+    last_error: str | None = None
+
+
+# Statistics of each job, by job ID
+job_stats: dict[str, JobStats] = {}
+
+# Scheduled start of the run being submitted, by job ID
+_scheduled_run_times: dict[str, float] = {}
+
+
+def get_job_stats() -> dict[str, JobStats]:
+    """
+    Return the statistics of the scheduled jobs on this worker.
+
+    Returns:
+        The statistics of each job, by job ID.
+    """
+    return dict(job_stats)
+
+
 def start_scheduler():
     if not scheduler.running:
         # Start the scheduler
@@ -84,6 +229,30 @@ def start_scheduler():
         "delete expired OAuth states from the database",
     )
 
+    add_scheduler_job(
+        activity_ai_insight_jobs_utils.process_activity_ai_insight_jobs,
+        "interval",
+        1,
+        [],
+        "process due AI insight jobs",
+    )
+
+    add_scheduler_job(
+        activity_ai_insight_jobs_utils.delete_finished_activity_ai_insight_jobs,
+        "interval",
+        1440,
+        [],
+        "delete finished AI insight jobs from the database",
+    )
+
+    add_scheduler_job(
+        geocoding_utils.delete_stale_geocode_cache_entries,
+        "interval",
+        1440,
+        [],
+        "delete stale reverse geocoding cache entries from the database",
+    )
+
     add_scheduler_job(
         users_session_utils.cleanup_idle_sessions,
         "interval",
@@ -100,18 +269,336 @@ def start_scheduler():
         "delete expired rotated tokens from the database",
     )
 
+    add_scheduler_job(
+        core_rate_limit_storage.delete_expired_counters,
+        "interval",
+        5,
+        [],
+        "delete expired rate limit counters from the database",
+    )
+
 
 def add_scheduler_job(func, interval, minutes, args, description):
+    job_id = get_job_id(func)
     try:
+        trigger = (
+            IntervalTrigger(minutes=minutes, jitter=get_jitter_seconds(minutes))
+            if interval == "interval"
+            else interval
+        )
+        job_stats.setdefault(job_id, JobStats(description=description))
+        scheduler.add_job(
+            run_job,
+            trigger,
+            args=(
+                [job_id, func, args, minutes]
+                if interval == "interval"
+                else [job_id, func, args]
+            ),
+            id=job_id,
+            name=description,
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=JOB_MISFIRE_GRACE_SECONDS,
+        )
         core_logger.print_to_log(
             f"Added scheduler job to {description} every {minutes} minutes"
         )
-        scheduler.add_job(func, interval, minutes=minutes, args=args)
     except Exception as e:
         core_logger.print_to_log(
             f"Failed to add scheduler job to {description}: {str(e)}", "error"
         )
 
 
+def get_jitter_seconds(minutes: int) -> int:
+    """
+    Return the jitter of a job interval.
+
+    Args:
+        minutes: Interval of the job in minutes.
+
+    Returns:
+        Maximum number of seconds a run is randomly shifted by.
+    """
+    return min(JOB_MAX_JITTER_SECONDS, int(minutes * 60 * JOB_JITTER_FRACTION))
+
+
+def get_run_window_seconds(minutes: int) -> int:
+    """
+    Return the period after a start of a job in which it isn't run again.
+
+    Jitter shifts each run by up to its amount both ways, so two runs of
+    the same worker can be the interval less twice the jitter apart. One
+    more jitter is left for runs that started late.
+
+    Args:
+        minutes: Interval of the job in minutes.
+
+    Returns:
+        Length of the period in seconds.
+    """
+    return minutes * 60 - 3 * get_jitter_seconds(minutes)
+
+
+async def run_job(
+    job_id: str, func, args: list, interval_minutes: int | None = None
+) -> str:
+    """
+    Run a job if no other worker or replica is running it or just ran it.
+
+    Coroutine functions run on the event loop, other functions in a
+    thread. Failures are logged and counted, never raised. The outcome
+    is recorded in scheduler_job_runs.
+
+    Args:
+        job_id: ID of the job.
+        func: Function of the job.
+        args: Arguments of the function.
+        interval_minutes: Interval of the job, the run is skipped if any
+            worker started the job within it. None to always run.
+
+    Returns:
+        JOB_SUCCEEDED, JOB_FAILED, or JOB_SKIPPED if another worker
+        was running the job or ran it within its interval.
+    """
+    stats = job_stats.setdefault(job_id, JobStats(description=job_id))
+    started_at = time.time()
+    scheduled_at = _scheduled_run_times.pop(job_id, started_at)
+    stats.last_lag_seconds = max(0.0, started_at - scheduled_at)
+    stats.max_lag_seconds = max(stats.max_lag_seconds, stats.last_lag_seconds)
+    if stats.last_lag_seconds > JOB_LAG_WARNING_SECONDS:
+        core_logger.print_to_log(
+            f"Scheduler job to {stats.description} started "
+            f"{stats.last_lag_seconds:.0f} seconds late",
+            "warning",
+        )
+
+    try:
+        lock_connection = await asyncio.to_thread(_acquire_job_lock, job_id)
+    except psycopg.Error as err:
+        stats.failures += 1
+        stats.last_error = str(err)
+        core_logger.print_to_log(
+            f"Error locking scheduler job to {stats.description}: {err}",
+            "error",
+            exc=err,
+        )
+        return JOB_FAILED
+
+    if lock_connection is None:
+        stats.skipped += 1
+        core_logger.print_to_log(
+            f"Skipping scheduler job to {stats.description}, "
+            "already running on another worker",
+            "debug",
+        )
+        return JOB_SKIPPED
+
+    if interval_minutes is not None and await asyncio.to_thread(
+        started_recently, job_id, get_run_window_seconds(interval_minutes)
+    ):
+        stats.skipped += 1
+        core_logger.print_to_log(
+            f"Skipping scheduler job to {stats.description}, "
+            "already run this interval by another worker",
+            "debug",
+        )
+        await asyncio.to_thread(lock_connection.close)
+        return JOB_SKIPPED
+
+    outcome = JOB_FAILED
+    run_started = time.perf_counter()
+    try:
+        if inspect.iscoroutinefunction(func):
+            await func(*args)
+        else:
+            await asyncio.to_thread(func, *args)
+        outcome = JOB_SUCCEEDED
+    except Exception as err:
+        stats.failures += 1
+        stats.last_error = str(err)
+        core_logger.print_to_log(
+            f"Error in scheduler job to {stats.description}: {err}",
+            "error",
+            exc=err,
+        )
+    finally:
+        duration = time.perf_counter() - run_started
+        stats.runs += 1
+        stats.last_run_at = started_at
+        stats.last_duration_seconds = duration
+        stats.max_duration_seconds = max(stats.max_duration_seconds, duration)
+        stats.total_duration_seconds += duration
+        core_metrics.observe_job(job_id, outcome, duration)
+        try:
+            await asyncio.to_thread(
+                _record_job_run, job_id, started_at, outcome == JOB_SUCCEEDED
+            )
+        finally:
+            await asyncio.to_thread(lock_connection.close)
+    return outcome
+
+
+def get_job_id(func) -> str:
+    """
+    Return the ID of the job running a function.
+
+    Args:
+        func: Function of the job.
+
+    Returns:
+        The module and name of the function.
+    """
+    return f"{func.__module__}.{func.__name__}"
+
+
+def _record_job_run(job_id: str, started_at: float, succeeded: bool) -> None:
+    """
+    Save the outcome of a run in scheduler_job_runs.
+
+    Args:
+        job_id: ID of the job.
+        started_at: Start time of the run, as a Unix timestamp.
+        succeeded: Whether the run succeeded.
+    """
+    try:
+        with core_database.engine.begin() as connection:
+            connection.execute(
+                _RECORD_JOB_RUN,
+                {
+                    "job_id": job_id,
+                    "started_at": started_at,
+                    "succeeded": succeeded,
+                },
+            )
+    except SQLAlchemyError as err:
+        core_logger.print_to_log(
+            f"Error recording the run of scheduler job {job_id}: {err}",
+            "warning",
+            exc=err,
+        )
+
+
+def started_recently(job_id: str, seconds: int) -> bool:
+    """
+    Return whether a job started on any worker in the last seconds.
+
+    Args:
+        job_id: ID of the job.
+        seconds: Length of the period.
+
+    Returns:
+        True if a run started in the period, False otherwise or if the
+        runs can't be read.
+    """
+    try:
+        with core_database.engine.connect() as connection:
+            return bool(
+                connection.execute(
+                    _STARTED_RECENTLY, {"job_id": job_id, "seconds": seconds}
+                ).scalar()
+            )
+    except SQLAlchemyError as err:
+        core_logger.print_to_log(
+            f"Error reading the runs of scheduler job {job_id}: {err}",
+            "warning",
+            exc=err,
+        )
+        return False
+
+
+def ran_recently(job_id: str, minutes: int) -> bool:
+    """
+    Return whether a job succeeded on any worker in the last minutes.
+
+    Args:
+        job_id: ID of the job.
+        minutes: Length of the period.
+
+    Returns:
+        True if a run that started in the period succeeded, False
+        otherwise or if the runs can't be read.
+    """
+    try:
+        with core_database.engine.connect() as connection:
+            return bool(
+                connection.execute(
+                    _RAN_RECENTLY, {"job_id": job_id, "minutes": minutes}
+                ).scalar()
+            )
+    except SQLAlchemyError as err:
+        core_logger.print_to_log(
+            f"Error reading the runs of scheduler job {job_id}: {err}",
+            "warning",
+            exc=err,
+        )
+        return False
+
+
+def get_job_lock_key(job_id: str) -> int:
+    """
+    Return the advisory lock key of a job.
+
+    Args:
+        job_id: ID of the job.
+
+    Returns:
+        Signed 64-bit key derived from the job ID.
+    """
+    digest = hashlib.sha256(f"scheduler:{job_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def _acquire_job_lock(job_id: str) -> psycopg.Connection | None:
+    """
+    Take the advisory lock of a job on a dedicated connection.
+
+    The lock is held by the session, closing the connection releases it,
+    even if the worker dies during the run.
+
+    Args:
+        job_id: ID of the job.
+
+    Returns:
+        The connection holding the lock, or None if another session
+        holds it.
+    """
+    connection = psycopg.connect(core_database.get_conninfo(), autocommit=True)
+    try:
+        locked = connection.execute(
+            "SELECT pg_try_advisory_lock(%s)", (get_job_lock_key(job_id),)
+        ).fetchone()[0]
+    except BaseException:
+        connection.close()
+        raise
+    if not locked:
+        connection.close()
+        return None
+    return connection
+
+
+def _on_job_event(event: JobSubmissionEvent) -> None:
+    """
+    Record the scheduler events used by the job statistics.
+
+    Args:
+        event: Submission or skipped overlapping run of a job.
+    """
+    if event.code == EVENT_JOB_SUBMITTED:
+        if event.scheduled_run_times:
+            _scheduled_run_times[event.job_id] = event.scheduled_run_times[
+                -1
+            ].timestamp()
+        return
+
+    stats = job_stats.get(event.job_id)
+    if stats is not None:
+        stats.overlaps += 1
+
+
+scheduler.add_listener(_on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES)
+
+
 def stop_scheduler():
     scheduler.shutdown()
@@ -0,0 +1,34 @@
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+)
+from core.database import Base
+
+
+class SchedulerJobRun(Base):
+    __tablename__ = "scheduler_job_runs"
+
+    job_id = Column(
+        String(length=250),
+        primary_key=True,
+        comment="Module and function name of the job",
+    )
+
+    last_started_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Start of the last run on any worker",
+    )
+
+    last_succeeded_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Start of the last successful run",
+    )
+
+    last_failed_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="End of the last failed run",
+    )
@@ -0,0 +1,235 @@
+"""Warm-up of the backend once it serves requests.
+
+Only the work the API can't run without, such as the schema migrations,
+happens before the backend starts listening. The rest runs afterwards in
+a background task:
+
+- Integration syncs and token cleanups run one after the other through
+  core.scheduler.run_job, with its job locks and statistics
+- A sync is skipped if it succeeded recently on any worker or replica,
+  as recorded in scheduler_job_runs
+- Each step is logged and its status is served by the readiness endpoint
+- A failed step is logged and the warm-up goes on with the next one
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+import strava.activity_utils as strava_activity_utils
+import strava.utils as strava_utils
+
+import garmin.activity_utils as garmin_activity_utils
+import garmin.health_utils as garmin_health_utils
+
+import password_reset_tokens.utils as password_reset_tokens_utils
+
+import sign_up_tokens.utils as sign_up_tokens_utils
+
+import auth.oauth_state.utils as oauth_state_utils
+import auth.idp_link_tokens.utils as idp_link_token_utils
+
+import core.database as core_database
+import core.logger as core_logger
+import core.scheduler as core_scheduler
+
+# Statuses of the warm-up and of its steps
+WARM_UP_PENDING = "pending"
+WARM_UP_RUNNING = "running"
+WARM_UP_COMPLETED = "completed"
+WARM_UP_SKIPPED = "skipped"
+WARM_UP_FAILED = "failed"
+
+
+@dataclass
+class WarmUpStep:
+    """
+    A job run by the warm-up.
+
+    Attributes:
+        func: Function of the job.
+        args: Arguments of the function.
+        description: What the job does.
+        skip_if_ran_within_minutes: Skip the job if it succeeded in this
+            many minutes, never skipped if None.
+    """
+
+    func: Callable[..., Any]
+    args: list
+    description: str
+    skip_if_ran_within_minutes: int | None = None
+
+
+WARM_UP_STEPS = [
+    WarmUpStep(
+        strava_utils.refresh_strava_tokens,
+        [True],
+        "refresh Strava user tokens",
+        60,
+    ),
+    WarmUpStep(
+        garmin_activity_utils.retrieve_garminconnect_users_activities_for_days,
+        [1],
+        "retrieve last day Garmin Connect users activities",
+        60,
+    ),
+    WarmUpStep(
+        strava_activity_utils.retrieve_strava_users_activities_for_days,
+        [1, True],
+        "retrieve last day Strava users activities",
+        60,
+    ),
+    WarmUpStep(
+        garmin_health_utils.retrieve_garminconnect_users_health_for_days,
+        [1],
+        "retrieve last day Garmin Connect users health data",
+        240,
+    ),
+    WarmUpStep(
+        password_reset_tokens_utils.delete_invalid_tokens_from_db,
+        [],
+        "delete invalid password reset tokens from the database",
+    ),
+    WarmUpStep(
+        sign_up_tokens_utils.delete_invalid_tokens_from_db,
+        [],
+        "delete invalid sign-up tokens from the database",
+    ),
+    WarmUpStep(
+        oauth_state_utils.delete_expired_oauth_states_from_db,
+        [],
+        "delete expired OAuth states from the database",
+    ),
+    WarmUpStep(
+        idp_link_token_utils.delete_idp_link_expired_tokens_from_db,
+        [],
+        "delete expired IdP link tokens from the database",
+    ),
+]
+
+
+@dataclass
+class WarmUpProgress:
+    """
+    Progress of the warm-up of this worker.
+
+    Attributes:
+        status: Status of the warm-up.
+        started_at: Start time, as a Unix timestamp.
+        finished_at: End time, as a Unix timestamp.
+        steps: Status of each step, by description.
+    """
+
+    status: str = WARM_UP_PENDING
+    started_at: float | None = None
+    finished_at: float | None = None
+    steps: dict[str, str] = field(default_factory=dict)
+
+
+warm_up_progress = WarmUpProgress()
+
+_warm_up_task: asyncio.Task | None = None
+
+
+async def run_warm_up(steps: list[WarmUpStep] | None = None) -> WarmUpProgress:
+    """
+    Run the warm-up steps one after the other.
+
+    Args:
+        steps: Steps to run, WARM_UP_STEPS if None.
+
+    Returns:
+        The progress of the warm-up.
+    """
+    steps = WARM_UP_STEPS if steps is None else steps
+    progress = warm_up_progress
+    progress.status = WARM_UP_RUNNING
+    progress.started_at = time.time()
+    progress.finished_at = None
+    progress.steps = {step.description: WARM_UP_PENDING for step in steps}
+
+    for number, step in enumerate(steps, start=1):
+        job_id = core_scheduler.get_job_id(step.func)
+        if step.skip_if_ran_within_minutes is not None and await asyncio.to_thread(
+            core_scheduler.ran_recently, job_id, step.skip_if_ran_within_minutes
+        ):
+            progress.steps[step.description] = WARM_UP_SKIPPED
+            core_logger.print_to_log_and_console(
+                f"Warm-up {number}/{len(steps)}: skipping job to {step.description}, "
+                f"it ran in the last {step.skip_if_ran_within_minutes} minutes"
+            )
+            continue
+
+        progress.steps[step.description] = WARM_UP_RUNNING
+        core_logger.print_to_log_and_console(
+            f"Warm-up {number}/{len(steps)}: running job to {step.description}"
+        )
+        outcome = await core_scheduler.run_job(job_id, step.func, step.args)
+        progress.steps[step.description] = {
+            core_scheduler.JOB_SUCCEEDED: WARM_UP_COMPLETED,
+            core_scheduler.JOB_SKIPPED: WARM_UP_SKIPPED,
+        }.get(outcome, WARM_UP_FAILED)
+
+    progress.status = WARM_UP_COMPLETED
+    progress.finished_at = time.time()
+    failed = sum(status == WARM_UP_FAILED for status in progress.steps.values())
+    core_logger.print_to_log_and_console(
+        f"Warm-up completed in {progress.finished_at - progress.started_at:.1f} "
+        f"seconds with {failed} failed steps",
+        "warning" if failed else "info",
+    )
+    return progress
+
+
+def start_warm_up() -> None:
+    """Start the warm-up in the background."""
+    global _warm_up_task
+    if _warm_up_task is None or _warm_up_task.done():
+        _warm_up_task = asyncio.create_task(run_warm_up())
+
+
+def stop_warm_up() -> None:
+    """Cancel the warm-up if it is still running."""
+    global _warm_up_task
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+        _warm_up_task = None
+
+
+def get_warm_up_progress() -> dict:
+    """
+    Return the progress of the warm-up.
+
+    Returns:
+        The status of the warm-up, its duration so far and the status of
+        each step.
+    """
+    progress = warm_up_progress
+    duration = None
+    if progress.started_at is not None:
+        duration = round((progress.finished_at or time.time()) - progress.started_at, 1)
+    return {
+        "status": progress.status,
+        "duration_seconds": duration,
+        "steps": dict(progress.steps),
+    }
+
+
+def check_database() -> bool:
+    """
+    Return whether the database answers queries.
+
+    Returns:
+        True if a query succeeded.
+    """
+    try:
+        with core_database.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except SQLAlchemyError as err:
+        core_logger.print_to_log(f"Database readiness check failed: {err}", "warning")
+        return False
@@ -0,0 +1,285 @@
+"""Single pass routing of FIT records into the session holding them.
+
+Records are decoded once into compact float columns instead of one
+waypoint dict per channel and record:
+
+- Each record is appended to the columns of the pending records, with
+  NaN for the values it doesn't have
+- When a session message is decoded, the pending records inside the
+  session are moved into its bucket by binary search on the timestamps,
+  so the records are never scanned again once routed
+- Sessions written before their records get them when the file ends,
+  records outside every session are dropped
+- Waypoint dicts are only built per session, from its bucket, with the
+  instant speed computed over the session records
+"""
+
+import calendar
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+import numpy as np
+
+import activities.activity.metrics as activities_metrics
+
+NAN = math.nan
+
+
+def to_seconds(value: datetime) -> float:
+    """
+    Convert a FIT time to seconds, ignoring its timezone.
+
+    FIT times are UTC, whether they are timezone aware or not.
+
+    Args:
+        value: Time of a record or session.
+
+    Returns:
+        Seconds since the epoch.
+    """
+    return float(calendar.timegm(value.timetuple()))
+
+
+def _value(value) -> float:
+    return NAN if value is None else float(value)
+
+
+class RecordColumns:
+    """
+    Compact columns of FIT record messages, NaN for missing values.
+
+    Attributes:
+        timestamps: Seconds since the epoch.
+        latitudes: Latitudes in degrees.
+        longitudes: Longitudes in degrees.
+        elevations: Elevations in meters.
+        heart_rates: Heart rates in bpm.
+        cadences: Cadences in rpm.
+        powers: Powers in watts.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "latitudes",
+        "longitudes",
+        "elevations",
+        "heart_rates",
+        "cadences",
+        "powers",
+    )
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, array("d"))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def columns(self) -> list[array]:
+        """Return the columns, in __slots__ order."""
+        return [getattr(self, name) for name in self.__slots__]
+
+    def append(
+        self,
+        timestamp: float,
+        latitude: float | None,
+        longitude: float | None,
+        elevation: float | None,
+        heart_rate: int | None,
+        cadence: int | None,
+        power: int | None,
+    ) -> None:
+        """Append a record."""
+        if latitude is None or longitude is None:
+            latitude = longitude = None
+        self.timestamps.append(timestamp)
+        self.latitudes.append(_value(latitude))
+        self.longitudes.append(_value(longitude))
+        self.elevations.append(_value(elevation))
+        self.heart_rates.append(_value(heart_rate))
+        self.cadences.append(_value(cadence))
+        self.powers.append(_value(power))
+
+
+class SessionRouter:
+    """
+    Route the records of a FIT file into the buckets of its sessions.
+
+    Attributes:
+        buckets: Records of each session, in session order.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: list[RecordColumns] = []
+        self._pending = RecordColumns()
+        self._bounds: list[tuple[float, float]] = []
+        self._ordered = True
+
+    def add_record(
+        self,
+        time: datetime,
+        latitude: float | None,
+        longitude: float | None,
+        elevation: float | None,
+        heart_rate: int | None,
+        cadence: int | None,
+        power: int | None,
+    ) -> None:
+        """
+        Add a record to the pending records.
+
+        Args:
+            time: Time of the record.
+            latitude: Latitude in degrees.
+            longitude: Longitude in degrees.
+            elevation: Elevation in meters.
+            heart_rate: Heart rate in bpm.
+            cadence: Cadence in rpm.
+            power: Power in watts.
+        """
+        timestamp = to_seconds(time)
+        timestamps = self._pending.timestamps
+        if timestamps and timestamp < timestamps[-1]:
+            # Binary search needs the records in time order
+            self._ordered = False
+        self._pending.append(
+            timestamp, latitude, longitude, elevation, heart_rate, cadence, power
+        )
+
+    def add_session(self, start: datetime, end: datetime) -> None:
+        """
+        Add a session and move the pending records inside it to its bucket.
+
+        Args:
+            start: Start time of the session.
+            end: End time of the session, included.
+        """
+        bounds = (to_seconds(start), to_seconds(end))
+        bucket = RecordColumns()
+        self._bounds.append(bounds)
+        self.buckets.append(bucket)
+        self._route(bucket, *bounds)
+
+    def finish(self) -> list[RecordColumns]:
+        """
+        Route the records left and return the buckets of the sessions.
+
+        Returns:
+            Records of each session, in session order.
+        """
+        for bucket, bounds in zip(self.buckets, self._bounds):
+            if not self._pending:
+                break
+            self._route(bucket, *bounds)
+        self._pending = RecordColumns()
+        return self.buckets
+
+    def _route(self, bucket: RecordColumns, start: float, end: float) -> None:
+        pending = self._pending
+        if self._ordered:
+            low = bisect_left(pending.timestamps, start)
+            high = bisect_right(pending.timestamps, end, lo=low)
+            if low == high:
+                return
+            for source, target in zip(pending.columns(), bucket.columns()):
+                target.extend(source[low:high])
+                del source[low:high]
+            return
+
+        inside = [start <= timestamp <= end for timestamp in pending.timestamps]
+        if not any(inside):
+            return
+        remaining = RecordColumns()
+        for source, target, kept in zip(
+            pending.columns(), bucket.columns(), remaining.columns()
+        ):
+            for value, is_inside in zip(source, inside):
+                (target if is_inside else kept).append(value)
+        self._pending = remaining
+
+
+def build_session_waypoints(records: RecordColumns) -> dict:
+    """
+    Build the waypoints of a session from its records.
+
+    Args:
+        records: Records of the session.
+
+    Returns:
+        Dictionary with the lat_lon, ele, hr, cad, power, vel and pace
+        waypoint lists, each waypoint a dict with the ISO time and the
+        value, and the is_*_set flag of each list.
+    """
+    lat_lon_waypoints = []
+    ele_waypoints = []
+    hr_waypoints = []
+    cad_waypoints = []
+    power_waypoints = []
+    vel_waypoints = []
+    pace_waypoints = []
+
+    if records:
+        seconds = np.frombuffer(records.timestamps, dtype=np.float64)
+        times = seconds.astype(np.int64).astype("datetime64[s]").astype(str).tolist()
+        speeds = activities_metrics.instant_speeds(
+            seconds,
+            activities_metrics.vincenty_distances(
+                np.frombuffer(records.latitudes, dtype=np.float64),
+                np.frombuffer(records.longitudes, dtype=np.float64),
+            ),
+        ).tolist()
+
+        for (
+            time,
+            latitude,
+            longitude,
+            elevation,
+            heart_rate,
+            cadence,
+            power,
+            speed,
+        ) in zip(
+            times,
+            records.latitudes,
+            records.longitudes,
+            records.elevations,
+            records.heart_rates,
+            records.cadences,
+            records.powers,
+            speeds,
+        ):
+            # NaN is the only value not equal to itself
+            if latitude == latitude:
+                lat_lon_waypoints.append(
+                    {"time": time, "lat": latitude, "lon": longitude}
+                )
+            if elevation == elevation:
+                ele_waypoints.append({"time": time, "ele": elevation})
+            if heart_rate == heart_rate:
+                hr_waypoints.append({"time": time, "hr": int(heart_rate)})
+            if cadence == cadence:
+                cad_waypoints.append({"time": time, "cad": int(cadence)})
+            if power == power:
+                power_waypoints.append({"time": time, "power": int(power)})
+            if speed == speed:
+                vel_waypoints.append({"time": time, "vel": speed})
+                if speed:
+                    pace_waypoints.append({"time": time, "pace": 1 / speed})
+
+    return {
+        "lat_lon_waypoints": lat_lon_waypoints,
+        "is_lat_lon_set": bool(lat_lon_waypoints),
+        "ele_waypoints": ele_waypoints,
+        "is_elevation_set": bool(ele_waypoints),
+        "hr_waypoints": hr_waypoints,
+        "is_heart_rate_set": bool(hr_waypoints),
+        "cad_waypoints": cad_waypoints,
+        "is_cadence_set": bool(cad_waypoints),
+        "power_waypoints": power_waypoints,
+        "is_power_set": bool(power_waypoints),
+        "vel_waypoints": vel_waypoints,
+        "pace_waypoints": pace_waypoints,
+        "is_velocity_set": bool(pace_waypoints),
+    }
@@ -28,6 +28,8 @@ import core.logger as core_logger
 
 import core.config as core_config
 
+import fit.records as fit_records
+
 
 def create_activity_objects(
     sessions_records: dict,
@@ -227,42 +229,13 @@ def create_activity_objects(
         ) from err
 
 
-def split_records_by_activity(parsed_data: dict) -> dict:
+def split_records_by_activity(parsed_data: dict) -> list:
     sessions = parsed_data["sessions"]
-    lat_lon_waypoints = parsed_data["lat_lon_waypoints"]
-    ele_waypoints = parsed_data.get("ele_waypoints", [])
-    hr_waypoints = parsed_data.get("hr_waypoints", [])
-    cad_waypoints = parsed_data.get("cad_waypoints", [])
-    power_waypoints = parsed_data.get("power_waypoints", [])
-    vel_waypoints = parsed_data.get("vel_waypoints", [])
-    pace_waypoints = parsed_data.get("pace_waypoints", [])
-
-    # Check for each auxiliary flag
-    is_lat_lon_set = parsed_data.get("is_lat_lon_set", False)
-    is_elevation_set = parsed_data.get("is_elevation_set", False)
-    is_heart_rate_set = parsed_data.get("is_heart_rate_set", False)
-    is_cadence_set = parsed_data.get("is_cadence_set", False)
-    is_power_set = parsed_data.get("is_power_set", False)
-    is_velocity_set = parsed_data.get("is_velocity_set", False)
-
-    # Dictionary to hold split waypoints per activity
-    activity_waypoints = {
-        i: {
-            "lat_lon_waypoints": [] if is_lat_lon_set else None,
-            "ele_waypoints": [] if is_elevation_set else None,
-            "hr_waypoints": [] if is_heart_rate_set else None,
-            "cad_waypoints": [] if is_cadence_set else None,
-            "power_waypoints": [] if is_power_set else None,
-            "vel_waypoints": [] if is_velocity_set else None,
-            "pace_waypoints": [] if is_velocity_set else None,
-        }
-        for i in range(len(sessions))
-    }
+    session_records = parsed_data["session_records"]
 
     sessions_records = []
 
-    # Convert session times to datetime objects for easier comparison
-    for i, session in enumerate(sessions):
+    for session, records in zip(sessions, session_records):
         # Use the time as is if it’s already a datetime object; otherwise, parse it
         start_time = session["first_waypoint_time"]
         if not isinstance(start_time, datetime):
@@ -285,24 +258,13 @@ def split_records_by_activity(parsed_data: dict) -> dict:
                     # Append the lap to the session's laps
                     laps_records.append(lap)
 
-        # Initialize a parsed session dictionary
+        # Initialize a parsed session dictionary with the waypoints of the
+        # records routed to the session while decoding the file
         parsed_session = {
             "session": session,
             "time_offset": parsed_data["time_offset"],
             "activity_name": parsed_data["activity_name"],
-            "lat_lon_waypoints": [],
-            "is_lat_lon_set": False,
-            "ele_waypoints": [],
-            "is_elevation_set": False,
-            "hr_waypoints": [],
-            "is_heart_rate_set": False,
-            "cad_waypoints": [],
-            "is_cadence_set": False,
-            "power_waypoints": [],
-            "is_power_set": False,
-            "vel_waypoints": [],
-            "pace_waypoints": [],
-            "is_velocity_set": False,
+            **fit_records.build_session_waypoints(records),
             "laps": laps_records,
             "split_summary": parsed_data["split_summary"],
             "workout_steps": parsed_data["workout_steps"],
@@ -311,121 +273,30 @@ def split_records_by_activity(parsed_data: dict) -> dict:
             "file_id": parsed_data["file_id"],
         }
 
-        # Only parse arrays if the respective flag is set
-        if is_lat_lon_set:
-            activity_waypoints[i]["lat_lon_waypoints"] = [
-                wp
-                for wp in lat_lon_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["lat_lon_waypoints"]:
-                parsed_session["lat_lon_waypoints"] = activity_waypoints[i][
+        if parsed_session["is_lat_lon_set"]:
+            # If initial latitude and longitude are not set, set them to the first waypoint's coordinates
+            if (
+                parsed_session["session"]["initial_latitude"] is None
+                or parsed_session["session"]["initial_longitude"] is None
+            ):
+                # Set initial latitude and longitude to the first waypoint's coordinates
+                parsed_session["session"]["initial_latitude"] = parsed_session[
                     "lat_lon_waypoints"
-                ]
-                parsed_session["is_lat_lon_set"] = True
-
-                # If initial latitude and longitude are not set, set them to the first waypoint's coordinates
-                if (
-                    parsed_session["session"]["initial_latitude"] is None
-                    or parsed_session["session"]["initial_longitude"] is None
-                ):
-                    # Set initial latitude and longitude to the first waypoint's coordinates
-                    parsed_session["session"]["initial_latitude"] = activity_waypoints[
-                        i
-                    ]["lat_lon_waypoints"][0]["lat"]
-                    parsed_session["session"]["initial_longitude"] = activity_waypoints[
-                        i
-                    ]["lat_lon_waypoints"][0]["lon"]
-
-                # Use geocoding API to get city, town, and country based on coordinates
-                location_data = activities_utils.location_based_on_coordinates(
-                    session["initial_latitude"], session["initial_longitude"]
-                )
+                ][0]["lat"]
+                parsed_session["session"]["initial_longitude"] = parsed_session[
+                    "lat_lon_waypoints"
+                ][0]["lon"]
 
-                # Extract city, town, and country from location data
-                if location_data:
-                    parsed_session["session"]["city"] = location_data["city"]
-                    parsed_session["session"]["town"] = location_data["town"]
-                    parsed_session["session"]["country"] = location_data["country"]
-
-        if is_elevation_set:
-            activity_waypoints[i]["ele_waypoints"] = [
-                wp
-                for wp in ele_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["ele_waypoints"]:
-                parsed_session["ele_waypoints"] = activity_waypoints[i]["ele_waypoints"]
-                parsed_session["is_elevation_set"] = True
-        if is_heart_rate_set:
-            activity_waypoints[i]["hr_waypoints"] = [
-                wp
-                for wp in hr_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["hr_waypoints"]:
-                parsed_session["hr_waypoints"] = activity_waypoints[i]["hr_waypoints"]
-                parsed_session["is_heart_rate_set"] = True
-        if is_cadence_set:
-            activity_waypoints[i]["cad_waypoints"] = [
-                wp
-                for wp in cad_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["cad_waypoints"]:
-                parsed_session["cad_waypoints"] = activity_waypoints[i]["cad_waypoints"]
-                parsed_session["is_cadence_set"] = True
-        if is_power_set:
-            activity_waypoints[i]["power_waypoints"] = [
-                wp
-                for wp in power_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["power_waypoints"]:
-                parsed_session["power_waypoints"] = activity_waypoints[i][
-                    "power_waypoints"
-                ]
-                parsed_session["is_power_set"] = True
-        if is_velocity_set:
-            activity_waypoints[i]["vel_waypoints"] = [
-                wp
-                for wp in vel_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["vel_waypoints"]:
-                parsed_session["vel_waypoints"] = activity_waypoints[i]["vel_waypoints"]
-                parsed_session["is_velocity_set"] = True
-            activity_waypoints[i]["pace_waypoints"] = [
-                wp
-                for wp in pace_waypoints
-                if start_time
-                <= datetime.strptime(wp["time"], "%Y-%m-%dT%H:%M:%S")
-                <= end_time
-            ]
-            # If there are waypoints, set the parsed session's waypoints and flag
-            if activity_waypoints[i]["pace_waypoints"]:
-                parsed_session["pace_waypoints"] = activity_waypoints[i][
-                    "pace_waypoints"
-                ]
-                parsed_session["is_velocity_set"] = True
+            # Use geocoding API to get city, town, and country based on coordinates
+            location_data = activities_utils.location_based_on_coordinates(
+                session["initial_latitude"], session["initial_longitude"]
+            )
+
+            # Extract city, town, and country from location data
+            if location_data:
+                parsed_session["session"]["city"] = location_data["city"]
+                parsed_session["session"]["town"] = location_data["town"]
+                parsed_session["session"]["country"] = location_data["country"]
 
         # Append the parsed session to the sessions list
         sessions_records.append(parsed_session)
@@ -441,18 +312,11 @@ def parse_fit_file(
         # Initialize default values for various variables
         sessions = []
         time_offset = 0
-        last_waypoint_time = None
         activity_name = activity_name_input if activity_name_input else "Workout"
         resting_heart_rate = None
 
-        # Arrays to store waypoint data
-        lat_lon_waypoints = []
-        ele_waypoints = []
-        hr_waypoints = []
-        cad_waypoints = []
-        power_waypoints = []
-        vel_waypoints = []
-        pace_waypoints = []
+        # Records routed to the session holding them while decoding
+        session_router = fit_records.SessionRouter()
 
         # Array to store laps
         laps = []
@@ -484,17 +348,6 @@ def parse_fit_file(
         # Dictionary to store file ID data
         file_id = {}
 
-        # Initialize variables to store previous latitude and longitude
-        prev_latitude, prev_longitude = None, None
-
-        # Initialize variables to store whether elevation, power, heart rate, cadence, and velocity are set
-        is_lat_lon_set = False
-        is_elevation_set = False
-        is_power_set = False
-        is_heart_rate_set = False
-        is_cadence_set = False
-        is_velocity_set = False
-
         # Open the FIT file
         with open(file, "rb") as fit_file:
             fit_data = fitdecode.FitReader(fit_file)
@@ -582,6 +435,12 @@ def parse_fit_file(
                         # Append the session data to the sessions list
                         sessions.append(session_data)
 
+                        # Move the records decoded so far inside the session to it
+                        session_router.add_session(
+                            session_data["first_waypoint_time"],
+                            session_data["last_waypoint_time"],
+                        )
+
                     # unknown_147 Sensor Accessories
 
                     # Extract activity name
@@ -652,81 +511,17 @@ def parse_fit_file(
                             power,
                         ) = parse_frame_record(frame)
 
-                        # Check elevation
-                        if elevation is not None:
-                            is_elevation_set = True
-
-                        # Check if heart rate, cadence, power are set
-                        if heart_rate is not None:
-                            is_heart_rate_set = True
-
-                        if cadence is not None:
-                            is_cadence_set = True
-
-                        if power is not None:
-                            is_power_set = True
-
-                        instant_speed = None
-                        # Calculate instant speed, pace, and update waypoint arrays
-                        if (
-                            latitude is not None
-                            and prev_latitude is not None
-                            and longitude is not None
-                            and prev_longitude is not None
-                        ):
-                            instant_speed = activities_utils.calculate_instant_speed(
-                                last_waypoint_time,
+                        # Records without time can't belong to a session
+                        if time is not None:
+                            session_router.add_record(
                                 time,
                                 latitude,
                                 longitude,
-                                prev_latitude,
-                                prev_longitude,
-                            )
-
-                        # Calculate instance pace
-                        instant_pace = None
-                        if instant_speed:
-                            instant_pace = 1 / instant_speed
-                            is_velocity_set = True
-
-                        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
-
-                        # Append waypoint data to respective arrays
-                        if latitude is not None and longitude is not None:
-                            lat_lon_waypoints.append(
-                                {
-                                    "time": timestamp,
-                                    "lat": latitude,
-                                    "lon": longitude,
-                                }
+                                elevation,
+                                heart_rate,
+                                cadence,
+                                power,
                             )
-                            is_lat_lon_set = True
-
-                        activities_utils.append_if_not_none(
-                            ele_waypoints, timestamp, elevation, "ele"
-                        )
-                        activities_utils.append_if_not_none(
-                            hr_waypoints, timestamp, heart_rate, "hr"
-                        )
-                        activities_utils.append_if_not_none(
-                            cad_waypoints, timestamp, cadence, "cad"
-                        )
-                        activities_utils.append_if_not_none(
-                            power_waypoints, timestamp, power, "power"
-                        )
-                        activities_utils.append_if_not_none(
-                            vel_waypoints, timestamp, instant_speed, "vel"
-                        )
-                        activities_utils.append_if_not_none(
-                            pace_waypoints, timestamp, instant_pace, "pace"
-                        )
-
-                        # Update previous latitude, longitude, and last waypoint time
-                        prev_latitude, prev_longitude, last_waypoint_time = (
-                            latitude,
-                            longitude,
-                            time,
-                        )
 
                     if frame.name == "device_settings":
                         time_offset = parse_frame_device_settings(frame)
@@ -757,19 +552,7 @@ def parse_fit_file(
             "sessions": sessions,
             "time_offset": time_offset,
             "activity_name": activity_name,
-            "is_elevation_set": is_elevation_set,
-            "ele_waypoints": ele_waypoints,
-            "is_power_set": is_power_set,
-            "power_waypoints": power_waypoints,
-            "is_heart_rate_set": is_heart_rate_set,
-            "hr_waypoints": hr_waypoints,
-            "is_velocity_set": is_velocity_set,
-            "vel_waypoints": vel_waypoints,
-            "pace_waypoints": pace_waypoints,
-            "is_cadence_set": is_cadence_set,
-            "cad_waypoints": cad_waypoints,
-            "is_lat_lon_set": is_lat_lon_set,
-            "lat_lon_waypoints": lat_lon_waypoints,
+            "session_records": session_router.finish(),
             "laps": laps,
             "splits": splits,
             "split_summary": split_summary,
@@ -1124,36 +907,42 @@ def parse_frame_monitoring(frame, last_timestamp):
     # Reconstruct timestamp with timestamp_16.
     current_timestamp = None
     if data.get("timestamp_16") is not None:
-        current_timestamp = (last_timestamp & 0xffff0000) | data["timestamp_16"]
+        current_timestamp = (last_timestamp & 0xFFFF0000) | data["timestamp_16"]
         if current_timestamp < last_timestamp:
             current_timestamp += 0x10000
     else:
         current_timestamp = last_timestamp
-        
+
     timestamp = datetime.fromtimestamp(
-        current_timestamp + fitdecode.FIT_UTC_REFERENCE, 
+        current_timestamp + fitdecode.FIT_UTC_REFERENCE,
         tz=timezone.utc,
     )
 
     if data.get("steps"):
-        steps.append({
-            "steps": data.get("steps"),
-            "active_time": data.get("active_time"),
-            "active_calories": data.get("active_calories"),
-            "current_activity_type_intensity": data.get("current_activity_type_intensity"),
-            "activity_type": data.get("activity_type"),
-            "intensity": data.get("intensity"),
-            "distance": data.get("distance"),
-            "duration_min": data.get("duration_min"),
-            "timestamp": timestamp,
-        })
+        steps.append(
+            {
+                "steps": data.get("steps"),
+                "active_time": data.get("active_time"),
+                "active_calories": data.get("active_calories"),
+                "current_activity_type_intensity": data.get(
+                    "current_activity_type_intensity"
+                ),
+                "activity_type": data.get("activity_type"),
+                "intensity": data.get("intensity"),
+                "distance": data.get("distance"),
+                "duration_min": data.get("duration_min"),
+                "timestamp": timestamp,
+            }
+        )
 
     if data.get("heart_rate"):
-        heart_rate.append({
-            "heart_rate": data.get("heart_rate"),
-            "timestamp": timestamp,
-        })
-    
+        heart_rate.append(
+            {
+                "heart_rate": data.get("heart_rate"),
+                "timestamp": timestamp,
+            }
+        )
+
     return steps, heart_rate
 
 
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import zipfile
 
@@ -7,20 +8,84 @@ from sqlalchemy.orm import Session
 
 import core.logger as core_logger
 import core.config as core_config
+import core.metrics as core_metrics
 
+import garmin.sync_executor as garmin_sync_executor
 import garmin.utils as garmin_utils
 
 import activities.activity.schema as activities_schema
 import activities.activity.utils as activities_utils
 import activities.activity.crud as activities_crud
 
+import activities.activity_fingerprints.crud as activity_fingerprints_crud
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
+
 import users.users.crud as users_crud
 
+import geocoding.utils as geocoding_utils
+
 import websocket.manager as websocket_manager
 
 from core.database import SessionLocal
 
 
+def download_activity_files(
+    garminconnect_client: garminconnect.Garmin,
+    activity_id: int,
+    metrics: garmin_sync_executor.GarminSyncMetrics,
+) -> tuple[dict | None, list[str]]:
+    """
+    Download and extract the original files of a Garmin Connect activity.
+
+    Blocking, meant to run in the Garmin Connect worker pool.
+
+    Args:
+        garminconnect_client: Authenticated Garmin Connect client.
+        activity_id: Garmin Connect activity ID.
+        metrics: Metrics of the current sync run.
+
+    Returns:
+        Tuple with the activity gear and the paths of the extracted files.
+    """
+    # Get activity gear
+    with metrics.phase("gear"):
+        activity_gear = garminconnect_client.get_activity_gear(activity_id)
+
+    # Download the activity in original format (.zip file)
+    with metrics.phase("download"):
+        zip_data = garminconnect_client.download_activity(
+            activity_id, dl_fmt=garminconnect_client.ActivityDownloadFormat.ORIGINAL
+        )
+    metrics.increment("downloads")
+
+    with metrics.phase("extract"):
+        # Save the zip file
+        output_file = f"{core_config.FILES_DIR}/{str(activity_id)}.zip"
+
+        # Write the ZIP data to the output file
+        with open(output_file, "wb") as fb:
+            fb.write(zip_data)
+
+        # Open the ZIP file
+        with zipfile.ZipFile(output_file, "r") as zip_ref:
+            # Extract all contents to the specified directory
+            zip_ref.extractall(core_config.FILES_DIR)
+            # Populate the array with file names
+            extracted_files = zip_ref.namelist()
+
+        try:
+            os.remove(output_file)
+        except OSError as err:
+            core_logger.print_to_log(
+                f"Error removing file {output_file}: {err}", "error", exc=err
+            )
+
+    return activity_gear, [
+        os.path.join(core_config.FILES_DIR, file_path_suffix)
+        for file_path_suffix in extracted_files
+    ]
+
+
 async def fetch_and_process_activities_by_dates(
     garminconnect_client: garminconnect.Garmin,
     start_date: datetime,
@@ -28,13 +93,20 @@ async def fetch_and_process_activities_by_dates(
     user_id: int,
     ws_manager: websocket_manager.WebSocketManager,
     db: Session,
+    metrics: garmin_sync_executor.GarminSyncMetrics | None = None,
 ) -> list[activities_schema.Activity] | None:
+    metrics = metrics or garmin_sync_executor.GarminSyncMetrics()
+
     try:
         # Fetch Garmin Connect activities for the specified date range
-        garmin_activities = garminconnect_client.get_activities_by_date(
-            str(start_date.date()), str(end_date.date())
-        )
+        with metrics.phase("list"):
+            garmin_activities = await garmin_sync_executor.run_blocking(
+                garminconnect_client.get_activities_by_date,
+                str(start_date.date()),
+                str(end_date.date()),
+            )
     except Exception as err:
+        metrics.increment("failed_users")
         core_logger.print_to_log(
             f"Error fetching activities for user {user_id} between {start_date.date()} and {end_date.date()}: {err}",
             "error",
@@ -50,13 +122,10 @@ async def fetch_and_process_activities_by_dates(
         # Return 0 to indicate no activities were processed
         return None
 
-    parsed_activities = []
-
-    # Download activities
+    new_activities = []
     for activity in garmin_activities:
         # Get the activity ID
         activity_id = activity["activityId"]
-        activity_name = activity["activityName"]
 
         # Check if the activity is already stored in the database
         activity_db = activities_crud.get_activity_by_garminconnect_id_from_user_id(
@@ -70,96 +139,166 @@ async def fetch_and_process_activities_by_dates(
             )
             continue
 
-        core_logger.print_to_log(f"User {user_id}: Processing activity {activity_id}")
-
-        # Get activity gear
-        activity_gear = garminconnect_client.get_activity_gear(activity_id)
+        new_activities.append(activity)
 
-        # Download the activity in original format (.zip file)
-        zip_data = garminconnect_client.download_activity(
-            activity_id, dl_fmt=garminconnect_client.ActivityDownloadFormat.ORIGINAL
+    # Skip the activities already stored from another source (e.g. a file)
+    # before downloading them
+    signatures = {
+        activity["activityId"]: activity_fingerprints_utils.activity_signature(
+            activity["startTimeGMT"]
+        )
+        for activity in new_activities
+        if activity.get("startTimeGMT")
+    }
+    known_signatures = activity_fingerprints_crud.get_known_signatures(
+        user_id, list(signatures.values()), db
+    )
+    if known_signatures:
+        num_activities = len(new_activities)
+        new_activities = [
+            activity
+            for activity in new_activities
+            if signatures.get(activity["activityId"]) not in known_signatures
+        ]
+        num_skipped = num_activities - len(new_activities)
+        metrics.increment("skipped", num_skipped)
+        core_metrics.count_skipped_imports("garmin", num_skipped)
+        core_logger.print_to_log(
+            f"User {user_id}: {num_skipped} Garmin Connect activities already stored, skipped"
         )
-        # Save the zip file
-        output_file = f"{core_config.FILES_DIR}/{str(activity_id)}.zip"
-
-        # Write the ZIP data to the output file
-        with open(output_file, "wb") as fb:
-            fb.write(zip_data)
-
-        # Array to store the names of extracted files
-        extracted_files = []
 
-        # Open the ZIP file
-        with zipfile.ZipFile(output_file, "r") as zip_ref:
-            # Extract all contents to the specified directory
-            zip_ref.extractall(core_config.FILES_DIR)
-            # Populate the array with file names
-            extracted_files = zip_ref.namelist()
+    # Download activities concurrently, bounded per user
+    download_slots = asyncio.Semaphore(
+        core_config.GARMINCONNECT_SYNC_MAX_DOWNLOADS_PER_USER
+    )
 
-        try:
-            os.remove(output_file)
-        except OSError as err:
+    async def download(activity_id: int) -> tuple[dict | None, list[str]]:
+        async with download_slots:
             core_logger.print_to_log(
-                f"Error removing file {output_file}: {err}", "error", exc=err
+                f"User {user_id}: Processing activity {activity_id}"
+            )
+            return await garmin_sync_executor.run_blocking(
+                download_activity_files, garminconnect_client, activity_id, metrics
             )
 
-        for file_path_suffix in extracted_files:
-            # Parse and store the activity from the extracted file
-            full_file_path = os.path.join(core_config.FILES_DIR, file_path_suffix)
+    downloads = [
+        asyncio.create_task(download(activity["activityId"]))
+        for activity in new_activities
+    ]
 
-            parsed_activities.extend(
-                await activities_utils.parse_and_store_activity_from_file(
-                    user_id,
-                    full_file_path,
-                    ws_manager,
-                    db,
-                    True,
-                    activity_gear,
-                    activity_name,
-                )
-                or []
+    parsed_activities = []
+    try:
+        # Resolve the start locations in one batch while downloading, so
+        # parsing the files finds them in the geocode cache
+        with metrics.phase("geocode"):
+            await geocoding_utils.reverse_geocode_batch(
+                [
+                    (activity.get("startLatitude"), activity.get("startLongitude"))
+                    for activity in new_activities
+                ]
             )
 
+        # Parse and store in order while the next downloads are running
+        for activity, download_task in zip(new_activities, downloads):
+            try:
+                activity_gear, file_paths = await download_task
+            except Exception as err:
+                core_logger.print_to_log(
+                    f"User {user_id}: Error downloading activity {activity['activityId']}: {err}",
+                    "error",
+                    exc=err,
+                )
+                continue
+
+            for full_file_path in file_paths:
+                # Parse and store the activity from the extracted file in the
+                # worker pool, parsing and geocoding are blocking
+                with metrics.phase("parse"):
+                    stored_activities = await garmin_sync_executor.run_blocking(
+                        activities_utils.parse_and_store_activity_from_file,
+                        user_id,
+                        full_file_path,
+                        True,
+                        activity_gear,
+                        activity["activityName"],
+                    )
+                if stored_activities:
+                    await activities_utils.notify_stored_activities(
+                        stored_activities, ws_manager
+                    )
+                    parsed_activities.extend(
+                        stored_activity for stored_activity, _ in stored_activities
+                    )
+    finally:
+        for download_task in downloads:
+            download_task.cancel()
+
+    metrics.increment("activities", len(parsed_activities))
+
     # Return the number of activities processed
     return parsed_activities if parsed_activities else None
 
 
-async def retrieve_garminconnect_users_activities_for_days(days: int):
+async def retrieve_garminconnect_users_activities_for_days(days: int) -> dict:
+    """
+    Sync the last days of Garmin Connect activities of every user.
+
+    Users are synced concurrently, up to GARMINCONNECT_SYNC_MAX_USERS at a
+    time, each with its own database session.
+
+    Args:
+        days: Number of days to sync.
+
+    Returns:
+        Timing metrics of the run.
+    """
     ws_manager = websocket_manager.get_websocket_manager()
+    metrics = garmin_sync_executor.GarminSyncMetrics()
 
     # Create a new database session using context manager
     with SessionLocal() as db:
         try:
             # Get all users
-            users = users_crud.get_all_users(db)
+            user_ids = [user.id for user in users_crud.get_all_users(db)]
+        except Exception as err:
+            core_logger.print_to_log(
+                f"Error getting users in retrieve_garminconnect_users_activities_for_days: {err}",
+                "error",
+                exc=err,
+            )
+            return metrics.to_dict()
+
+    # Calculate the start date and end date
+    calculated_start_date = datetime.now(timezone.utc) - timedelta(days=days)
+    calculated_end_date = datetime.now(timezone.utc)
 
-            # Calculate the start date and end date
-            calculated_start_date = datetime.now(timezone.utc) - timedelta(days=days)
-            calculated_end_date = datetime.now(timezone.utc)
+    user_slots = asyncio.Semaphore(core_config.GARMINCONNECT_SYNC_MAX_USERS)
 
-            # Iterate through all users
-            for user in users:
+    async def sync_user(user_id: int) -> None:
+        async with user_slots:
+            with SessionLocal() as user_db:
                 try:
                     await get_user_garminconnect_activities_by_dates(
                         calculated_start_date,
                         calculated_end_date,
-                        user.id,
+                        user_id,
                         ws_manager,
-                        db,
+                        user_db,
+                        metrics,
                     )
                 except Exception as err:
                     # Log specific errors for each user
+                    metrics.increment("failed_users")
                     core_logger.print_to_log(
-                        f"Error processing activities for user {user.id} in retrieve_garminconnect_users_activities_for_days: {err}",
+                        f"Error processing activities for user {user_id} in retrieve_garminconnect_users_activities_for_days: {err}",
                         "error",
                         exc=err,
                     )
-        except Exception as err:
-            core_logger.print_to_log(
-                f"Error getting users in retrieve_garminconnect_users_activities_for_days: {err}",
-                "error",
-                exc=err,
-            )
+
+    await asyncio.gather(*(sync_user(user_id) for user_id in user_ids))
+
+    metrics.log("Garmin Connect activities sync")
+    return metrics.to_dict()
 
 
 def get_user_garminconnect_client(user_id: int, db: Session):
@@ -197,12 +336,20 @@ async def get_user_garminconnect_activities_by_dates(
     user_id: int,
     ws_manager: websocket_manager.WebSocketManager,
     db: Session,
+    metrics: garmin_sync_executor.GarminSyncMetrics | None = None,
 ) -> list[activities_schema.Activity] | None:
+    metrics = metrics or garmin_sync_executor.GarminSyncMetrics()
+
     try:
-        # Get the Garmin Connect client for the user
-        garminconnect_client = get_user_garminconnect_client(user_id, db)
+        # Get the Garmin Connect client for the user, logging in is blocking
+        with metrics.phase("login"):
+            garminconnect_client = await garmin_sync_executor.run_blocking(
+                get_user_garminconnect_client, user_id, db
+            )
 
         if garminconnect_client is not None:
+            metrics.increment("users")
+
             # Fetch Garmin Connect activities for the specified date range
             garminconnect_activities_processed = (
                 await fetch_and_process_activities_by_dates(
@@ -212,6 +359,7 @@ async def get_user_garminconnect_activities_by_dates(
                     user_id,
                     ws_manager,
                     db,
+                    metrics,
                 )
             )
 
@@ -231,6 +379,7 @@ async def get_user_garminconnect_activities_by_dates(
         return None
     except Exception as err:
         # Log specific errors during Garmin Connect processing
+        metrics.increment("failed_users")
         core_logger.print_to_log(
             f"Error in get_user_garminconnect_activities_by_dates: {err}",
             "error",
@@ -0,0 +1,148 @@
+"""Worker pool for blocking Garmin Connect calls.
+
+The garminconnect client performs blocking HTTP requests. Sync jobs run
+on the event loop, so every client call, file write and zip extraction is
+offloaded to a bounded thread pool shared by all syncs:
+
+- run_blocking runs a callable in the pool and awaits its result
+- GARMINCONNECT_SYNC_MAX_WORKERS bounds the concurrent blocking calls
+- GarminSyncMetrics accumulates the time spent per phase of a sync run
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable
+
+import core.config as core_config
+import core.logger as core_logger
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the Garmin Connect worker pool, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor sized by GARMINCONNECT_SYNC_MAX_WORKERS.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=core_config.GARMINCONNECT_SYNC_MAX_WORKERS,
+                thread_name_prefix="garminconnect",
+            )
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the worker pool, cancelling calls that did not start."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking callable in the Garmin Connect worker pool.
+
+    Args:
+        func: Callable to run.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The value returned by func.
+
+    Raises:
+        Exception: Any exception raised by func.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+class GarminSyncMetrics:
+    """
+    Timing metrics of a Garmin Connect sync run.
+
+    Phases are timed with the phase context manager. Concurrent phases
+    (e.g. downloads of several activities) add up, so phase totals can
+    exceed the wall time of the run.
+
+    Attributes:
+        users: Number of users synced.
+        failed_users: Number of users whose sync raised an error.
+        activities: Number of activities stored.
+        skipped: Number of activities skipped as already stored.
+        downloads: Number of activity files downloaded.
+        phase_seconds: Accumulated seconds per phase.
+    """
+
+    def __init__(self):
+        self.users = 0
+        self.failed_users = 0
+        self.activities = 0
+        self.skipped = 0
+        self.downloads = 0
+        self.phase_seconds: dict[str, float] = {}
+        self._started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of code as part of the named phase."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self.phase_seconds[name] = self.phase_seconds.get(name, 0) + elapsed
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        """Increment a counter, safe to call from worker threads."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Wall time since the run started."""
+        return time.perf_counter() - self._started_at
+
+    def to_dict(self) -> dict:
+        """Return the metrics as a dict."""
+        return {
+            "users": self.users,
+            "failed_users": self.failed_users,
+            "activities": self.activities,
+            "skipped": self.skipped,
+            "downloads": self.downloads,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "phase_seconds": {
+                name: round(seconds, 3)
+                for name, seconds in sorted(self.phase_seconds.items())
+            },
+        }
+
+    def log(self, description: str) -> None:
+        """Log the metrics of the run."""
+        metrics = self.to_dict()
+        phases = ", ".join(
+            f"{name} {seconds}s" for name, seconds in metrics["phase_seconds"].items()
+        )
+        core_logger.print_to_log(
+            f"{description}: {metrics['users']} users "
+            f"({metrics['failed_users']} failed), "
+            f"{metrics['activities']} activities "
+            f"({metrics['skipped']} skipped as already stored), "
+            f"{metrics['downloads']} downloads in {metrics['elapsed_seconds']}s"
+            + (f" ({phases})" if phases else "")
+        )
@@ -22,6 +22,7 @@ import websocket.utils as websocket_utils
 import garmin.schema as garmin_schema
 
 import core.logger as core_logger
+import core.metrics as core_metrics
 
 
 async def get_mfa(
@@ -143,6 +144,7 @@ def login_garminconnect_using_tokens(oauth1_token, oauth2_token):
             oauth1_token=deserialize_oauth1_token(oauth1_token),
             oauth2_token=deserialize_oauth2_token(oauth2_token),
         )
+        core_metrics.instrument_session(garmin.garth.sess, "garmin")
         return garmin
     except (
         garminconnect.GarminConnectAuthenticationError,
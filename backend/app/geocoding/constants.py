@@ -0,0 +1,17 @@
+# Provider name of the local gazetteer lookup
+PROVIDER_OFFLINE = "offline"
+
+# Geohash base 32 alphabet
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Number of cells kept in the in-process LRU cache
+MEMORY_CACHE_MAX_ENTRIES = 4096
+
+# Minimum time between last_used_at updates of a cached cell
+CACHE_TOUCH_INTERVAL_HOURS = 24
+
+# Mean Earth radius used for gazetteer distances
+EARTH_RADIUS_METERS = 6371008.8
+
+# Gazetteer places further than this are not used for a lookup
+GAZETTEER_MAX_DISTANCE_METERS = 50_000
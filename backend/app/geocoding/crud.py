@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import geocoding.models as geocoding_models
+
+import core.logger as core_logger
+
+
+def get_cache_entries(
+    provider: str, cells: list[str], created_after: datetime, db: Session
+) -> list[geocoding_models.GeocodeCache]:
+    """
+    Retrieve the cached locations of several cells.
+
+    Args:
+        provider: Reverse geocoding provider name.
+        cells: Geohash cells to look up.
+        created_after: Entries resolved before this time are expired and
+            ignored.
+        db: Database session.
+
+    Returns:
+        GeocodeCache instances of the cells found in the cache.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    if not cells:
+        return []
+
+    try:
+        return (
+            db.query(geocoding_models.GeocodeCache)
+            .filter(
+                geocoding_models.GeocodeCache.provider == provider,
+                geocoding_models.GeocodeCache.cell.in_(cells),
+                geocoding_models.GeocodeCache.created_at >= created_after,
+            )
+            .all()
+        )
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error in get_cache_entries: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def upsert_cache_entry(provider: str, cell: str, location: dict, db: Session) -> None:
+    """
+    Store the location of a cell, replacing an existing entry.
+
+    Concurrent imports resolving the same cell keep the last location.
+
+    Args:
+        provider: Reverse geocoding provider name.
+        cell: Geohash cell.
+        location: Dict with city, town and country.
+        db: Database session.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        values = {
+            "city": location.get("city"),
+            "town": location.get("town"),
+            "country": location.get("country"),
+            "created_at": now,
+            "last_used_at": now,
+        }
+        statement = insert(geocoding_models.GeocodeCache).values(
+            provider=provider, cell=cell, **values
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["provider", "cell"], set_=values
+            )
+        )
+        db.commit()
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in upsert_cache_entry: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def touch_cache_entries(
+    entry_ids: list[int], used_before: datetime, db: Session
+) -> None:
+    """
+    Mark cache entries as used now.
+
+    Entries already used after used_before are left untouched so cache
+    hits don't write on every lookup.
+
+    Args:
+        entry_ids: GeocodeCache primary keys.
+        used_before: Only entries last used before this time are updated.
+        db: Database session.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    if not entry_ids:
+        return
+
+    try:
+        db.query(geocoding_models.GeocodeCache).filter(
+            geocoding_models.GeocodeCache.id.in_(entry_ids),
+            geocoding_models.GeocodeCache.last_used_at < used_before,
+        ).update(
+            {geocoding_models.GeocodeCache.last_used_at: datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+        db.commit()
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in touch_cache_entries: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
+
+
+def delete_stale_cache_entries(ttl_days: int, max_entries: int, db: Session) -> int:
+    """
+    Delete expired cache entries and evict the least recently used ones.
+
+    Args:
+        ttl_days: Entries resolved more than ttl_days ago are deleted.
+        max_entries: Maximum number of entries kept after the cleanup.
+        db: Database session.
+
+    Returns:
+        Number of entries deleted.
+
+    Raises:
+        HTTPException: On internal server error.
+    """
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+        num_deleted = (
+            db.query(geocoding_models.GeocodeCache)
+            .filter(geocoding_models.GeocodeCache.created_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+
+        evicted_ids = (
+            db.query(geocoding_models.GeocodeCache.id)
+            .order_by(geocoding_models.GeocodeCache.last_used_at.desc())
+            .offset(max_entries)
+            .scalar_subquery()
+        )
+        num_deleted += (
+            db.query(geocoding_models.GeocodeCache)
+            .filter(geocoding_models.GeocodeCache.id.in_(evicted_ids))
+            .delete(synchronize_session=False)
+        )
+
+        db.commit()
+        return num_deleted
+    except Exception as err:
+        db.rollback()
+        core_logger.print_to_log(
+            f"Error in delete_stale_cache_entries: {err}", "error", exc=err
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        ) from err
@@ -0,0 +1,70 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Index,
+)
+from sqlalchemy.sql import func
+from core.database import Base
+
+
+class GeocodeCache(Base):
+    __tablename__ = "geocode_cache"
+
+    id = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment="Geocode cache entry ID",
+    )
+
+    provider = Column(
+        String(length=20),
+        nullable=False,
+        comment="Reverse geocoding provider that resolved the cell",
+    )
+
+    cell = Column(
+        String(length=12),
+        nullable=False,
+        comment="Geohash of the cell the location belongs to",
+    )
+
+    city = Column(
+        String(length=250),
+        nullable=True,
+        comment="City of the cell (May include spaces)",
+    )
+
+    town = Column(
+        String(length=250),
+        nullable=True,
+        comment="Town of the cell (May include spaces)",
+    )
+
+    country = Column(
+        String(length=250),
+        nullable=True,
+        comment="Country of the cell (May include spaces)",
+    )
+
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        index=True,
+        comment="Time the cell was resolved",
+    )
+
+    last_used_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        index=True,
+        comment="Time the cell was last used",
+    )
+
+    __table_args__ = (
+        Index("idx_geocode_cache_provider_cell", "provider", "cell", unique=True),
+    )
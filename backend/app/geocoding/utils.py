@@ -0,0 +1,483 @@
+"""Reverse geocoding with a spatial cache.
+
+Locations are resolved per geohash cell instead of per coordinate, so
+activities starting from the same place share one lookup:
+
+- In-process LRU of recently used cells
+- Persistent geocode_cache table shared by all workers, with a TTL and
+  least recently used eviction
+- Provider request (Nominatim, Photon or geocode.maps.co) throttled by
+  REVERSE_GEO_RATE_LIMIT, only for cells missing from both caches
+- Offline provider backed by a local gazetteer CSV file
+
+reverse_geocode resolves a single coordinate and reverse_geocode_batch
+resolves many coordinates with one cache query and one lookup per cell,
+used by the importers to resolve all their pending activities at once.
+"""
+
+import asyncio
+import csv
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from urllib.parse import urlencode
+
+import numpy as np
+import requests
+from fastapi import HTTPException, status
+
+import geocoding.constants as geocoding_constants
+import geocoding.crud as geocoding_crud
+
+import core.config as core_config
+import core.logger as core_logger
+import core.metrics as core_metrics
+from core.database import SessionLocal
+
+_memory_cache: OrderedDict[tuple[str, str], tuple[dict, float]] = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def empty_location() -> dict:
+    """Return a location without city, town and country."""
+    return {"city": None, "town": None, "country": None}
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int) -> str:
+    """
+    Encode a coordinate as a geohash.
+
+    Args:
+        latitude: Latitude in degrees.
+        longitude: Longitude in degrees.
+        precision: Number of geohash characters. Each character narrows
+            the cell, 6 characters is roughly 1.2 km x 0.6 km.
+
+    Returns:
+        Geohash string of the cell containing the coordinate.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        value, value_range = (
+            (longitude, lon_range) if even else (latitude, lat_range)
+        )
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            geohash.append(geocoding_constants.GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def _memory_get(key: tuple[str, str]) -> dict | None:
+    with _memory_lock:
+        cached = _memory_cache.get(key)
+        if cached is None:
+            return None
+        location, expires_at = cached
+        if expires_at < time.monotonic():
+            del _memory_cache[key]
+            return None
+        _memory_cache.move_to_end(key)
+        return dict(location)
+
+
+def _memory_put(key: tuple[str, str], location: dict) -> None:
+    expires_at = time.monotonic() + core_config.REVERSE_GEO_CACHE_TTL_DAYS * 86400
+    with _memory_lock:
+        _memory_cache[key] = (dict(location), expires_at)
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > geocoding_constants.MEMORY_CACHE_MAX_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def clear_memory_cache() -> None:
+    """Clear the in-process cache."""
+    with _memory_lock:
+        _memory_cache.clear()
+
+
+def _read_cached_cells(provider: str, cells: list[str]) -> dict[str, dict]:
+    """Read cells from the persistent cache, an unavailable cache is a miss."""
+    try:
+        with SessionLocal() as db:
+            entries = geocoding_crud.get_cache_entries(
+                provider,
+                cells,
+                datetime.now(timezone.utc)
+                - timedelta(days=core_config.REVERSE_GEO_CACHE_TTL_DAYS),
+                db,
+            )
+            geocoding_crud.touch_cache_entries(
+                [entry.id for entry in entries],
+                datetime.now(timezone.utc)
+                - timedelta(hours=geocoding_constants.CACHE_TOUCH_INTERVAL_HOURS),
+                db,
+            )
+            return {
+                entry.cell: {
+                    "city": entry.city,
+                    "town": entry.town,
+                    "country": entry.country,
+                }
+                for entry in entries
+            }
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Geocode cache unavailable, skipping it: {err}", "warning"
+        )
+        return {}
+
+
+def _store_cell(provider: str, cell: str, location: dict) -> None:
+    """Store a resolved cell in both caches."""
+    _memory_put((provider, cell), location)
+    try:
+        with SessionLocal() as db:
+            geocoding_crud.upsert_cache_entry(provider, cell, location, db)
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Unable to store geocode cache cell {cell}: {err}", "warning"
+        )
+
+
+def _throttle() -> None:
+    """Wait until the next provider request is allowed by the rate limit."""
+    if core_config.REVERSE_GEO_MIN_INTERVAL <= 0:
+        return
+
+    with core_config.REVERSE_GEO_LOCK:
+        now = time.monotonic()
+        interval = core_config.REVERSE_GEO_MIN_INTERVAL - (
+            now - core_config.REVERSE_GEO_LAST_CALL
+        )
+        if interval > 0:
+            time.sleep(interval)
+        core_config.REVERSE_GEO_LAST_CALL = time.monotonic()
+
+
+def fetch_location_from_provider(latitude: float, longitude: float) -> dict | None:
+    """
+    Request the location of a coordinate from the configured provider.
+
+    Args:
+        latitude: Latitude in degrees.
+        longitude: Longitude in degrees.
+
+    Returns:
+        Dict with city, town and country, or None if no provider is
+        configured.
+
+    Raises:
+        HTTPException: 424 if the provider request fails.
+    """
+    # Create a dictionary with the parameters for the request
+    if core_config.REVERSE_GEO_PROVIDER == "nominatim":
+        # Create the URL for the request
+        url_params = {
+            "format": "jsonv2",
+            "lat": latitude,
+            "lon": longitude,
+        }
+        protocol = "https"
+        if not core_config.NOMINATIM_API_USE_HTTPS:
+            protocol = "http"
+        url = f"{protocol}://{core_config.NOMINATIM_API_HOST}/reverse?{urlencode(url_params)}"
+    elif core_config.REVERSE_GEO_PROVIDER == "photon":
+        # Create the URL for the request
+        url_params = {
+            "lat": latitude,
+            "lon": longitude,
+        }
+        protocol = "https"
+        if not core_config.PHOTON_API_USE_HTTPS:
+            protocol = "http"
+        url = f"{protocol}://{core_config.PHOTON_API_HOST}/reverse?{urlencode(url_params)}"
+    elif core_config.REVERSE_GEO_PROVIDER == "geocode":
+        # Check if the API key is set
+        if core_config.GEOCODES_MAPS_API == "changeme":
+            return None
+        # Create the URL for the request
+        url_params = {
+            "lat": latitude,
+            "lon": longitude,
+            "api_key": core_config.GEOCODES_MAPS_API,
+        }
+        url = f"https://geocode.maps.co/reverse?{urlencode(url_params)}"
+    else:
+        # If no provider is set, return None
+        return None
+
+    # Throttle requests according to configured rate limit
+    _throttle()
+
+    # Make the request and get the response
+    try:
+        headers = {
+            "User-Agent": f"Endurain/{core_config.API_VERSION} (ReverseGeocoding)"
+        }
+        # Make the request and get the response
+        with core_metrics.track_external_call("geocoder"):
+            response = requests.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+
+        if core_config.REVERSE_GEO_PROVIDER in ("geocode", "nominatim"):
+            # Get the data from the response
+            data = response.json().get("address", {})
+            # Return the location based on the coordinates
+            # Note: 'town' is used for district in Geocode API
+            return {
+                "city": data.get("city"),
+                "town": data.get("town"),
+                "country": data.get("country"),
+            }
+
+        # Get the data from the response
+        data_root = response.json().get("features", [])
+        data = data_root[0].get("properties", {}) if data_root else {}
+        # Return the location based on the coordinates
+        # Note: 'district' is used for city and 'city' is used for town in Photon API
+        return {
+            "city": data.get("district"),
+            "town": data.get("city"),
+            "country": data.get("country"),
+        }
+    except Exception as err:
+        # Log the error
+        core_logger.print_to_log_and_console(
+            f"Error in location_based_on_coordinates - {str(err)}", "error"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_424_FAILED_DEPENDENCY,
+            detail=f"Error in location_based_on_coordinates: {str(err)}",
+        ) from err
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer(file_path: str) -> dict | None:
+    """
+    Load a gazetteer CSV file.
+
+    The file has a header row with the columns latitude, longitude, city,
+    town and country, one row per place.
+
+    Args:
+        file_path: Path of the gazetteer file.
+
+    Returns:
+        Dict with latitudes and longitudes arrays (radians) and the list of
+        locations, or None if the file can't be read.
+    """
+    try:
+        with open(file_path, newline="", encoding="utf-8") as gazetteer_file:
+            rows = list(csv.DictReader(gazetteer_file))
+    except OSError as err:
+        core_logger.print_to_log_and_console(
+            f"Unable to read gazetteer file {file_path}: {err}", "warning"
+        )
+        return None
+
+    places = [
+        row for row in rows if row.get("latitude") and row.get("longitude")
+    ]
+    return {
+        "latitudes": np.radians([float(row["latitude"]) for row in places]),
+        "longitudes": np.radians([float(row["longitude"]) for row in places]),
+        "locations": [
+            {
+                "city": row.get("city") or None,
+                "town": row.get("town") or None,
+                "country": row.get("country") or None,
+            }
+            for row in places
+        ],
+    }
+
+
+def lookup_gazetteer(latitude: float, longitude: float) -> dict:
+    """
+    Find the location of the nearest gazetteer place.
+
+    Args:
+        latitude: Latitude in degrees.
+        longitude: Longitude in degrees.
+
+    Returns:
+        Dict with city, town and country of the nearest place, empty if
+        there is no place within GAZETTEER_MAX_DISTANCE_METERS.
+    """
+    gazetteer = load_gazetteer(core_config.REVERSE_GEO_GAZETTEER_FILE)
+    if not gazetteer or not gazetteer["locations"]:
+        return empty_location()
+
+    # Equirectangular distance is accurate enough to pick the nearest place
+    latitude = np.radians(latitude)
+    x = (gazetteer["longitudes"] - np.radians(longitude)) * np.cos(
+        (gazetteer["latitudes"] + latitude) / 2
+    )
+    y = gazetteer["latitudes"] - latitude
+    distances = np.hypot(x, y) * geocoding_constants.EARTH_RADIUS_METERS
+    nearest = int(np.argmin(distances))
+
+    if distances[nearest] > geocoding_constants.GAZETTEER_MAX_DISTANCE_METERS:
+        return empty_location()
+    return dict(gazetteer["locations"][nearest])
+
+
+def _resolve_location(latitude: float, longitude: float) -> dict | None:
+    if core_config.REVERSE_GEO_PROVIDER == geocoding_constants.PROVIDER_OFFLINE:
+        return lookup_gazetteer(latitude, longitude)
+    return fetch_location_from_provider(latitude, longitude)
+
+
+def reverse_geocode(latitude: float | None, longitude: float | None) -> dict:
+    """
+    Resolve the city, town and country of a coordinate.
+
+    Args:
+        latitude: Latitude in degrees.
+        longitude: Longitude in degrees.
+
+    Returns:
+        Dict with city, town and country, with None values if the
+        coordinate is missing or no provider is configured.
+
+    Raises:
+        HTTPException: 424 if the provider request fails.
+    """
+    if latitude is None or longitude is None:
+        return empty_location()
+
+    provider = core_config.REVERSE_GEO_PROVIDER
+    cell = encode_geohash(
+        latitude, longitude, core_config.REVERSE_GEO_CACHE_PRECISION
+    )
+
+    location = _memory_get((provider, cell))
+    if location is not None:
+        return location
+
+    location = _read_cached_cells(provider, [cell]).get(cell)
+    if location is not None:
+        _memory_put((provider, cell), location)
+        return location
+
+    location = _resolve_location(latitude, longitude)
+    if location is None:
+        return empty_location()
+
+    _store_cell(provider, cell, location)
+    return location
+
+
+async def reverse_geocode_batch(
+    coordinates: list[tuple[float | None, float | None]],
+) -> list[dict]:
+    """
+    Resolve the locations of several coordinates.
+
+    Coordinates are grouped by cell, cells missing from the in-process
+    cache are read from the persistent cache in one query and each
+    remaining cell is resolved once. A failed lookup only affects the
+    coordinates of its cell.
+
+    Args:
+        coordinates: List of (latitude, longitude) tuples.
+
+    Returns:
+        List of dicts with city, town and country, in the same order as
+        the coordinates.
+    """
+    provider = core_config.REVERSE_GEO_PROVIDER
+    cells = [
+        (
+            encode_geohash(
+                latitude, longitude, core_config.REVERSE_GEO_CACHE_PRECISION
+            )
+            if latitude is not None and longitude is not None
+            else None
+        )
+        for latitude, longitude in coordinates
+    ]
+
+    locations: dict[str, dict] = {}
+    missing: dict[str, tuple[float, float]] = {}
+    for cell, coordinate in zip(cells, coordinates):
+        if cell is None or cell in locations or cell in missing:
+            continue
+        location = _memory_get((provider, cell))
+        if location is not None:
+            locations[cell] = location
+        else:
+            missing[cell] = coordinate
+
+    if missing:
+        cached = await asyncio.to_thread(_read_cached_cells, provider, list(missing))
+        for cell, location in cached.items():
+            _memory_put((provider, cell), location)
+            locations[cell] = location
+            del missing[cell]
+
+    async def resolve_cell(cell: str, latitude: float, longitude: float) -> None:
+        try:
+            location = await asyncio.to_thread(_resolve_location, latitude, longitude)
+        except HTTPException as err:
+            core_logger.print_to_log(
+                f"Unable to resolve geocode cell {cell}: {err.detail}", "warning"
+            )
+            return
+        if location is not None:
+            await asyncio.to_thread(_store_cell, provider, cell, location)
+            locations[cell] = location
+
+    # Provider requests are serialized by the rate limit throttle
+    await asyncio.gather(
+        *(
+            resolve_cell(cell, latitude, longitude)
+            for cell, (latitude, longitude) in missing.items()
+        )
+    )
+
+    return [
+        dict(locations[cell]) if cell in locations else empty_location()
+        for cell in cells
+    ]
+
+
+def delete_stale_geocode_cache_entries() -> None:
+    """
+    Delete expired geocode cache entries and evict the least recently used.
+
+    Designed to be run as a scheduled task. Entries resolved more than
+    REVERSE_GEO_CACHE_TTL_DAYS ago are deleted and only the
+    REVERSE_GEO_CACHE_MAX_ENTRIES most recently used are kept.
+    """
+    with SessionLocal() as db:
+        num_deleted = geocoding_crud.delete_stale_cache_entries(
+            core_config.REVERSE_GEO_CACHE_TTL_DAYS,
+            core_config.REVERSE_GEO_CACHE_MAX_ENTRIES,
+            db,
+        )
+
+        if num_deleted > 0:
+            core_logger.print_to_log(
+                f"Deleted {num_deleted} stale geocode cache entries"
+            )
@@ -1,11 +1,11 @@
 import gpxpy
-from geopy.distance import geodesic
 from timezonefinder import TimezoneFinder
 from sqlalchemy.orm import Session
-from datetime import datetime
 
 from fastapi import HTTPException, status
 
+import activities.activity.laps as activities_laps
+import activities.activity.metrics as activities_metrics
 import activities.activity.utils as activities_utils
 import activities.activity.schema as activities_schema
 
@@ -66,8 +66,11 @@ def parse_gpx_file(
         vel_waypoints = []
         pace_waypoints = []
 
-        # Initialize variables to store previous latitude and longitude
-        prev_latitude, prev_longitude = None, None
+        # Coordinates and timestamps of the timed points, used to compute
+        # distance and instant speed for the whole track at once
+        latitudes = []
+        longitudes = []
+        timestamps = []
 
         # Initialize variables to store whether elevation, power, heart rate, cadence, and velocity are set
         is_lat_lon_set = False
@@ -112,16 +115,6 @@ def parse_gpx_file(
                                 if time is None:
                                     continue
 
-                                # Calculate distance between waypoints
-                                if (
-                                    prev_latitude is not None
-                                    and prev_longitude is not None
-                                ):
-                                    distance += geodesic(
-                                        (prev_latitude, prev_longitude),
-                                        (latitude, longitude),
-                                    ).meters
-
                                 if elevation != 0:
                                     is_elevation_set = True
 
@@ -201,25 +194,10 @@ def parse_gpx_file(
                                 else:
                                     power = None
 
-                                # Calculate instant speed, pace, and update waypoint arrays
-                                instant_speed = (
-                                    activities_utils.calculate_instant_speed(
-                                        last_waypoint_time,
-                                        time,
-                                        latitude,
-                                        longitude,
-                                        prev_latitude,
-                                        prev_longitude,
-                                    )
-                                )
-
-                                # Calculate instance pace
-                                instant_pace = 0
-                                if instant_speed > 0:
-                                    instant_pace = 1 / instant_speed
-                                    is_velocity_set = True
-
                                 timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+                                latitudes.append(latitude)
+                                longitudes.append(longitude)
+                                timestamps.append(timestamp)
 
                                 # Append waypoint data to respective arrays
                                 if latitude is not None and longitude is not None:
@@ -244,19 +222,9 @@ def parse_gpx_file(
                                 activities_utils.append_if_not_none(
                                     power_waypoints, timestamp, power, "power"
                                 )
-                                activities_utils.append_if_not_none(
-                                    vel_waypoints, timestamp, instant_speed, "vel"
-                                )
-                                activities_utils.append_if_not_none(
-                                    pace_waypoints, timestamp, instant_pace, "pace"
-                                )
 
-                                # Update previous latitude, longitude, and last waypoint time
-                                prev_latitude, prev_longitude, last_waypoint_time = (
-                                    latitude,
-                                    longitude,
-                                    time,
-                                )
+                                # Update last waypoint time
+                                last_waypoint_time = time
                     else:
                         raise HTTPException(
                             status_code=status.HTTP_400_BAD_REQUEST,
@@ -275,6 +243,22 @@ def parse_gpx_file(
                 detail="Invalid GPX file - no trackpoints with valid time data found",
             )
 
+        # Calculate distance, instant speed and pace between consecutive points
+        point_distances = activities_metrics.vincenty_distances(latitudes, longitudes)
+        distance = float(point_distances.sum())
+        instant_speeds = activities_metrics.instant_speeds(
+            activities_metrics.to_seconds(timestamps), point_distances, fill_value=0
+        )
+        for timestamp, instant_speed in zip(timestamps, instant_speeds.tolist()):
+            # Calculate instance pace
+            instant_pace = 0
+            if instant_speed > 0:
+                instant_pace = 1 / instant_speed
+                is_velocity_set = True
+
+            vel_waypoints.append({"time": timestamp, "vel": instant_speed})
+            pace_waypoints.append({"time": timestamp, "pace": instant_pace})
+
         # Calculate elevation gain/loss, pace, average speed, and average power
         if ele_waypoints:
             ele_gain, ele_loss = activities_utils.compute_elevation_gain_and_loss(
@@ -379,7 +363,7 @@ def parse_gpx_file(
         )
 
         # Generate activity laps
-        laps = generate_activity_laps(
+        laps = activities_laps.generate_activity_laps(
             lat_lon_waypoints,
             ele_waypoints,
             power_waypoints,
@@ -420,236 +404,3 @@ def parse_gpx_file(
             detail=f"Can't open GPX file: {str(err)}",
         ) from err
 
-
-def generate_activity_laps(
-    lat_lon_waypoints: list[dict],
-    ele_waypoints: list[dict],
-    power_waypoints: list[dict],
-    hr_waypoints: list[dict],
-    cad_waypoints: list[dict],
-    vel_waypoints: list[dict],
-    distance_per_lap_km: float = 1.0,
-) -> list[dict]:
-    laps = []
-    current_lap_distance = 0.0
-    lap_start = None
-    lap_ele_waypoints = []
-    lap_power_waypoints = []
-    lap_hr_waypoints = []
-    lap_cad_waypoints = []
-    lap_vel_waypoints = []
-
-    def filter_waypoints(waypoints, start_time, end_time):
-        return [
-            waypoint
-            for waypoint in waypoints
-            if datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S")
-            <= datetime.strptime(waypoint["time"], "%Y-%m-%dT%H:%M:%S")
-            <= datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S")
-        ]
-
-    for i in range(1, len(lat_lon_waypoints)):
-        # Get the current and previous waypoints
-        prev_point = lat_lon_waypoints[i - 1]
-        current_point = lat_lon_waypoints[i]
-
-        # Calculate the distance between the two waypoints
-        segment_distance = geodesic(
-            (prev_point["lat"], prev_point["lon"]),
-            (current_point["lat"], current_point["lon"]),
-        ).kilometers
-
-        # Accumulate the distance
-        current_lap_distance += segment_distance
-
-        # Set the start of the lap if not already set
-        if lap_start is None:
-            lap_start = prev_point
-
-        # Check if the current lap distance exceeds or equals the lap distance
-        if current_lap_distance >= distance_per_lap_km:
-            # Filter waypoints for the current lap
-            start_time = lap_start["time"]
-            end_time = current_point["time"]
-            lap_ele_waypoints = filter_waypoints(ele_waypoints, start_time, end_time)
-            lap_power_waypoints = filter_waypoints(
-                power_waypoints, start_time, end_time
-            )
-            lap_hr_waypoints = filter_waypoints(hr_waypoints, start_time, end_time)
-            lap_cad_waypoints = filter_waypoints(cad_waypoints, start_time, end_time)
-            lap_vel_waypoints = filter_waypoints(vel_waypoints, start_time, end_time)
-            ele_gain = None
-            ele_loss = None
-            avg_hr = None
-            max_hr = None
-            avg_cadence = None
-            max_cadence = None
-            avg_speed = None
-            max_speed = None
-            avg_power = None
-            max_power = None
-            np = None
-
-            # Calculate total ascent and descent
-            if lap_ele_waypoints:
-                ele_gain, ele_loss = activities_utils.compute_elevation_gain_and_loss(
-                    elevations=lap_ele_waypoints
-                )
-
-            # Calculate average and maximum heart rate
-            if lap_hr_waypoints:
-                avg_hr, max_hr = activities_utils.calculate_avg_and_max(
-                    lap_hr_waypoints, "hr"
-                )
-
-            # Calculate average and maximum cadence
-            if lap_cad_waypoints:
-                avg_cadence, max_cadence = activities_utils.calculate_avg_and_max(
-                    lap_cad_waypoints, "cad"
-                )
-
-            # Calculate average and maximum velocity
-            if lap_vel_waypoints:
-                avg_speed, max_speed = activities_utils.calculate_avg_and_max(
-                    lap_vel_waypoints, "vel"
-                )
-
-            # Calculate average and maximum power
-            if lap_power_waypoints:
-                avg_power, max_power = activities_utils.calculate_avg_and_max(
-                    lap_power_waypoints, "power"
-                )
-
-                # Calculate normalised power
-                np = activities_utils.calculate_np(lap_power_waypoints)
-
-            # Create a lap
-            laps.append(
-                {
-                    "start_time": lap_start["time"],
-                    "start_position_lat": lap_start["lat"],
-                    "start_position_long": lap_start["lon"],
-                    "end_position_lat": current_point["lat"],
-                    "end_position_long": current_point["lon"],
-                    "total_elapsed_time": (
-                        datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S")
-                        - datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S")
-                    ).total_seconds(),
-                    "total_timer_time": (
-                        datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S")
-                        - datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S")
-                    ).total_seconds(),
-                    "total_distance": current_lap_distance * 1000,
-                    "avg_heart_rate": round(avg_hr) if avg_hr else None,
-                    "max_heart_rate": round(max_hr) if max_hr else None,
-                    "avg_cadence": round(avg_cadence) if avg_cadence else None,
-                    "max_cadence": round(max_cadence) if max_cadence else None,
-                    "avg_power": round(avg_power) if avg_power else None,
-                    "max_power": round(max_power) if max_power else None,
-                    "total_ascent": round(ele_gain) if ele_gain else None,
-                    "total_descent": round(ele_loss) if ele_loss else None,
-                    "normalized_power": round(np) if np else None,
-                    "enhanced_avg_pace": (
-                        1 / avg_speed
-                        if avg_speed != 0 and avg_speed is not None
-                        else None
-                    ),
-                    "enhanced_avg_speed": avg_speed,
-                    "enhanced_max_pace": (
-                        1 / max_speed
-                        if max_speed != 0 and max_speed is not None
-                        else None
-                    ),
-                    "enhanced_max_speed": max_speed,
-                }
-            )
-
-            # Reset for the next lap
-            lap_start = current_point
-            current_lap_distance = 0.0
-
-    # Add the final lap if it exists and is less than the lap distance
-    if lap_start is not None and current_lap_distance > 0:
-        start_time = lap_start["time"]
-        end_time = lat_lon_waypoints[-1]["time"]
-        lap_ele_waypoints = filter_waypoints(ele_waypoints, start_time, end_time)
-        lap_power_waypoints = filter_waypoints(power_waypoints, start_time, end_time)
-        lap_hr_waypoints = filter_waypoints(hr_waypoints, start_time, end_time)
-        lap_cad_waypoints = filter_waypoints(cad_waypoints, start_time, end_time)
-        lap_vel_waypoints = filter_waypoints(vel_waypoints, start_time, end_time)
-        ele_gain, ele_loss = None, None
-        avg_hr, max_hr = None, None
-        avg_cadence, max_cadence = None, None
-        avg_speed, max_speed = None, None
-        avg_power, max_power, np = None, None, None
-
-        # Calculate total ascent and descent
-        if lap_ele_waypoints:
-            ele_gain, ele_loss = activities_utils.compute_elevation_gain_and_loss(
-                lap_ele_waypoints
-            )
-
-        # Calculate average and maximum heart rate
-        if lap_hr_waypoints:
-            avg_hr, max_hr = activities_utils.calculate_avg_and_max(
-                lap_hr_waypoints, "hr"
-            )
-
-        # Calculate average and maximum cadence
-        if lap_cad_waypoints:
-            avg_cadence, max_cadence = activities_utils.calculate_avg_and_max(
-                lap_cad_waypoints, "cad"
-            )
-
-        # Calculate average and maximum velocity
-        if lap_vel_waypoints:
-            avg_speed, max_speed = activities_utils.calculate_avg_and_max(
-                lap_vel_waypoints, "vel"
-            )
-
-        # Calculate average and maximum power
-        if lap_power_waypoints:
-            avg_power, max_power = activities_utils.calculate_avg_and_max(
-                lap_power_waypoints, "power"
-            )
-
-            # Calculate normalised power
-            np = activities_utils.calculate_np(lap_power_waypoints)
-
-        laps.append(
-            {
-                "start_time": lap_start["time"],
-                "start_position_lat": lap_start["lat"],
-                "start_position_long": lap_start["lon"],
-                "end_position_lat": lat_lon_waypoints[-1]["lat"],
-                "end_position_long": lat_lon_waypoints[-1]["lon"],
-                "total_elapsed_time": (
-                    datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S")
-                    - datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S")
-                ).total_seconds(),
-                "total_timer_time": (
-                    datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S")
-                    - datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S")
-                ).total_seconds(),
-                "total_distance": current_lap_distance * 1000,
-                "avg_heart_rate": round(avg_hr) if avg_hr else None,
-                "max_heart_rate": round(max_hr) if max_hr else None,
-                "avg_cadence": round(avg_cadence) if avg_cadence else None,
-                "max_cadence": round(max_cadence) if max_cadence else None,
-                "avg_power": round(avg_power) if avg_power else None,
-                "max_power": round(max_power) if max_power else None,
-                "total_ascent": round(ele_gain) if ele_gain else None,
-                "total_descent": round(ele_loss) if ele_loss else None,
-                "normalized_power": round(np) if np else None,
-                "enhanced_avg_pace": (
-                    1 / avg_speed if avg_speed != 0 and avg_speed is not None else None
-                ),
-                "enhanced_avg_speed": avg_speed,
-                "enhanced_max_pace": (
-                    1 / max_speed if max_speed != 0 and max_speed is not None else None
-                ),
-                "enhanced_max_speed": max_speed,
-            }
-        )
-
-    return laps
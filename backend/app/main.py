@@ -1,4 +1,6 @@
+import asyncio
 import os
+import time
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,35 +13,28 @@ from alembic import command
 import core.logger as core_logger
 import core.config as core_config
 import core.scheduler as core_scheduler
+import core.startup as core_startup
 import core.tracing as core_tracing
+import core.metrics as core_metrics
 import core.middleware as core_middleware
 import core.migrations as core_migrations
 import core.rate_limit as core_rate_limit
 
-import garmin.activity_utils as garmin_activity_utils
-import garmin.health_utils as garmin_health_utils
+import garmin.sync_executor as garmin_sync_executor
 
-import strava.activity_utils as strava_activity_utils
-import strava.utils as strava_utils
+import server_settings.snapshot as server_settings_snapshot
 
-import password_reset_tokens.utils as password_reset_tokens_utils
-
-import sign_up_tokens.utils as sign_up_tokens_utils
-
-import auth.oauth_state.utils as oauth_state_utils
-import auth.idp_link_tokens.utils as idp_link_token_utils
-
-import server_settings.utils as server_settings_utils
-import server_settings.schema as server_settings_schema
+import websocket.manager as websocket_manager
 
 from core.routes import router as api_router
-from core.database import SessionLocal
+from core.database import engine
 
 
 async def startup_event():
     core_logger.print_to_log_and_console(
         f"Backend startup event - {core_config.API_VERSION}"
     )
+    startup_started = time.perf_counter()
 
     # Run Alembic migrations to ensure the database is up to date
     alembic_cfg = Config("alembic.ini")
@@ -53,80 +48,59 @@ async def startup_event():
     # Create a scheduler to run background jobs
     core_scheduler.start_scheduler()
 
-    # Retrieve last day activities from Garmin Connect and Strava
-    core_logger.print_to_log_and_console(
-        "Refreshing Strava tokens on startup on startup"
-    )
-    strava_utils.refresh_strava_tokens(True)
-
-    # Retrieve last day activities from Garmin Connect and Strava
-    core_logger.print_to_log_and_console(
-        "Retrieving last day activities from Garmin Connect and Strava on startup"
-    )
-    await garmin_activity_utils.retrieve_garminconnect_users_activities_for_days(1)
-    await strava_activity_utils.retrieve_strava_users_activities_for_days(1, True)
-
-    # Retrieve last day health stats from Garmin Connect
-    core_logger.print_to_log_and_console(
-        "Retrieving last day health stats from Garmin Connect on startup"
-    )
-    garmin_health_utils.retrieve_garminconnect_users_health_for_days(1)
-
-    # Delete invalid password reset tokens
-    core_logger.print_to_log_and_console(
-        "Deleting invalid password reset tokens from the database"
-    )
-    password_reset_tokens_utils.delete_invalid_tokens_from_db()
-
-    # Delete invalid sign-up tokens
-    core_logger.print_to_log_and_console(
-        "Deleting invalid sign-up tokens from the database"
-    )
-    sign_up_tokens_utils.delete_invalid_tokens_from_db()
+    # Relay WebSocket messages between workers
+    websocket_manager.get_websocket_manager().start_relay()
+
+    # Load the server settings snapshot, allowed tile domains for CSP included
+    core_logger.print_to_log_and_console("Loading server settings snapshot")
+    try:
+        snapshot = await asyncio.to_thread(
+            server_settings_snapshot.get_server_settings_snapshot
+        )
+        core_logger.print_to_log_and_console(
+            f"Allowed tile domains: {list(snapshot.allowed_tile_domains)}"
+        )
+    except Exception as err:
+        core_logger.print_to_log(
+            f"Error loading server settings snapshot, it will be loaded on first use: {err}",
+            "error",
+            exc=err,
+        )
+
+    # Reload the server settings snapshot when another worker changes them
+    server_settings_snapshot.get_server_settings_cache().start_listener()
 
-    # Delete expired OAuth states
     core_logger.print_to_log_and_console(
-        "Deleting expired OAuth states from the database"
+        f"Backend ready in {time.perf_counter() - startup_started:.1f} seconds, "
+        "integration syncs and cleanups continue in the background"
     )
-    oauth_state_utils.delete_expired_oauth_states_from_db()
 
-    # Delete expired IdP link tokens
-    core_logger.print_to_log_and_console(
-        "Deleting expired IdP link tokens from the database"
-    )
-    idp_link_token_utils.delete_idp_link_expired_tokens_from_db()
-
-    # Initialize allowed tile domains for CSP
-    core_logger.print_to_log_and_console(
-        "Initializing allowed tile domains for Content Security Policy"
-    )
-    with SessionLocal() as db:
-        try:
-            app.state.allowed_tile_domains = (
-                server_settings_utils.get_allowed_tile_domains(db)
-            )
-            core_logger.print_to_log_and_console(
-                f"Allowed tile domains: {app.state.allowed_tile_domains}"
-            )
-        except Exception as err:
-            core_logger.print_to_log(
-                f"Error initializing tile domains, using defaults: {err}",
-                "error",
-                exc=err,
-            )
-            # Fallback to built-in providers
-            app.state.allowed_tile_domains = (
-                server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS.copy()
-            )
+    # Run the integration syncs and token cleanups once the API is serving
+    core_startup.start_warm_up()
 
 
 def shutdown_event():
     # Log the shutdown event
     core_logger.print_to_log_and_console("Backend shutdown event")
 
+    # Stop the warm-up if it is still running
+    core_startup.stop_warm_up()
+
     # Shutdown the scheduler when the application is shutting down
     core_scheduler.stop_scheduler()
 
+    # Stop relaying WebSocket messages between workers
+    websocket_manager.get_websocket_manager().stop_relay()
+
+    # Stop listening for server settings changes
+    server_settings_snapshot.get_server_settings_cache().stop_listener()
+
+    # Stop the Garmin Connect sync worker pool
+    garmin_sync_executor.shutdown_executor()
+
+    # Drop the live metrics of this worker
+    core_metrics.mark_process_dead()
+
 
 def create_app() -> FastAPI:
     # Define the FastAPI object
@@ -227,6 +201,9 @@ core_logger.setup_main_logger()
 # Setup tracing
 core_tracing.setup_tracing(app)
 
+# Setup metrics
+core_metrics.setup_metrics(app, engine)
+
 # Register the startup event handler
 app.add_event_handler("startup", startup_event)
 
@@ -7,6 +7,7 @@ from pytz import UTC
 from sqlalchemy.orm import Session
 
 import activities.activity.crud as activities_crud
+import activities.activity.laps as activities_laps
 import activities.activity.utils as activities_utils
 import activities.activity.schema as activities_schema
 
@@ -34,7 +35,6 @@ import core.logger as core_logger
 import core.config as core_config
 
 import fit.utils as fit_utils
-import gpx.utils as gpx_utils
 
 
 def process_migration_3(db: Session):
@@ -303,7 +303,7 @@ def process_activity_using_streams(activity: activities_schema.Activity, db: Ses
         )
         stream_map = {stream.stream_type: stream.stream_waypoints for stream in streams}
 
-        laps = gpx_utils.generate_activity_laps(
+        laps = activities_laps.generate_activity_laps(
             (
                 stream_map.get(StreamType.LATLONG.value)
                 if stream_map.get(StreamType.LATLONG.value)
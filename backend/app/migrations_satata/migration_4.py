@@ -0,0 +1,112 @@
+from sqlalchemy.orm import Session
+
+import activities.activity_streams.models as activity_streams_models
+import activities.activity_streams.utils as activity_streams_utils
+import migrations_satata.crud as migrations_crud
+
+import core.logger as core_logger
+
+# Number of streams encoded per transaction
+BATCH_SIZE = 200
+
+
+def process_migration_4(db: Session):
+    """
+    Encode activity streams stored as JSON waypoints into the
+    compressed columnar stream_data column.
+
+    Streams are converted in batches and committed per batch, so an
+    interrupted run resumes from the rows still holding JSON.
+
+    Args:
+        db: Database session.
+
+    Returns:
+        None. Logs errors and marks migration executed on
+        success.
+    """
+    core_logger.print_to_log_and_console(
+        "Started migration_satata 4 - encode activity streams"
+    )
+
+    processed_ok = True
+    streams_processed = 0
+    last_id = 0
+
+    while True:
+        try:
+            streams = (
+                db.query(activity_streams_models.ActivityStreams)
+                .filter(
+                    activity_streams_models.ActivityStreams.id > last_id,
+                    activity_streams_models.ActivityStreams.stream_data.is_(None),
+                    activity_streams_models.ActivityStreams.stream_waypoints.isnot(
+                        None
+                    ),
+                )
+                .order_by(activity_streams_models.ActivityStreams.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+        except Exception as err:
+            processed_ok = False
+            core_logger.print_to_log_and_console(
+                f"Migration satata_4 - Failed to fetch streams: {err}",
+                "error",
+                exc=err,
+            )
+            break
+
+        if not streams:
+            break
+
+        for stream in streams:
+            last_id = stream.id
+            try:
+                stream.stream_data = activity_streams_utils.encode_stream_waypoints(
+                    stream.stream_waypoints
+                )
+                stream.stream_waypoints = None
+            except Exception as err:
+                processed_ok = False
+                core_logger.print_to_log_and_console(
+                    f"Migration satata_4 - Failed to encode stream {stream.id}: {err}",
+                    "error",
+                    exc=err,
+                )
+
+        try:
+            db.commit()
+            # Release the decoded JSON of the committed batch
+            db.expunge_all()
+            streams_processed += len(streams)
+        except Exception as err:
+            db.rollback()
+            processed_ok = False
+            core_logger.print_to_log_and_console(
+                f"Migration satata_4 - Failed to commit streams up to {last_id}: {err}",
+                "error",
+                exc=err,
+            )
+
+        core_logger.print_to_log_and_console(
+            f"Migration satata_4 - Encoded {streams_processed} streams so far"
+        )
+
+    if processed_ok:
+        try:
+            migrations_crud.set_migration_as_executed(4, db)
+        except Exception as err:
+            core_logger.print_to_log_and_console(
+                f"Migration satata_4 - Failed to set migration as executed: {err}",
+                "error",
+                exc=err,
+            )
+            return
+    else:
+        core_logger.print_to_log_and_console(
+            "Migration satata_4 failed to encode all streams. Will try again later.",
+            "error",
+        )
+
+    core_logger.print_to_log_and_console("Finished migration_satata 4")
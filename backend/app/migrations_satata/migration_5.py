@@ -0,0 +1,54 @@
+from sqlalchemy.orm import Session
+
+import activities.activity_daily_rollups.utils as activity_daily_rollups_utils
+import migrations_satata.crud as migrations_crud
+
+import core.logger as core_logger
+
+
+def process_migration_5(db: Session):
+    """
+    Backfill the daily activity rollups of every user.
+
+    Rebuilding a user replaces its rollups, so an interrupted run can
+    simply be repeated.
+
+    Args:
+        db: Database session.
+
+    Returns:
+        None. Logs errors and marks migration executed on
+        success.
+    """
+    core_logger.print_to_log_and_console(
+        "Started migration_satata 5 - backfill daily activity rollups"
+    )
+
+    try:
+        failed_users = activity_daily_rollups_utils.rebuild_daily_rollups(db)
+    except Exception as err:
+        core_logger.print_to_log_and_console(
+            f"Migration satata_5 - Failed to get users: {err}",
+            "error",
+            exc=err,
+        )
+        return
+
+    if failed_users:
+        core_logger.print_to_log_and_console(
+            f"Migration satata_5 failed to backfill {failed_users} users. Will try again later.",
+            "error",
+        )
+        return
+
+    try:
+        migrations_crud.set_migration_as_executed(5, db)
+    except Exception as err:
+        core_logger.print_to_log_and_console(
+            f"Migration satata_5 - Failed to set migration as executed: {err}",
+            "error",
+            exc=err,
+        )
+        return
+
+    core_logger.print_to_log_and_console("Finished migration_satata 5")
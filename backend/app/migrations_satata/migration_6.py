@@ -0,0 +1,54 @@
+from sqlalchemy.orm import Session
+
+import activities.activity_zones.utils as activity_zones_utils
+import migrations_satata.crud as migrations_crud
+
+import core.logger as core_logger
+
+
+def process_migration_6(db: Session):
+    """
+    Compute the HR and power zones of every activity.
+
+    Computing the zones of a user replaces them, so an interrupted run can
+    simply be repeated.
+
+    Args:
+        db: Database session.
+
+    Returns:
+        None. Logs errors and marks migration executed on
+        success.
+    """
+    core_logger.print_to_log_and_console(
+        "Started migration_satata 6 - compute activity zones"
+    )
+
+    try:
+        failed_users = activity_zones_utils.rebuild_activity_zones(db)
+    except Exception as err:
+        core_logger.print_to_log_and_console(
+            f"Migration satata_6 - Failed to get users: {err}",
+            "error",
+            exc=err,
+        )
+        return
+
+    if failed_users:
+        core_logger.print_to_log_and_console(
+            f"Migration satata_6 failed to backfill {failed_users} users. Will try again later.",
+            "error",
+        )
+        return
+
+    try:
+        migrations_crud.set_migration_as_executed(6, db)
+    except Exception as err:
+        core_logger.print_to_log_and_console(
+            f"Migration satata_6 - Failed to set migration as executed: {err}",
+            "error",
+            exc=err,
+        )
+        return
+
+    core_logger.print_to_log_and_console("Finished migration_satata 6")
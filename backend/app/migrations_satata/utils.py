@@ -4,6 +4,9 @@ import migrations_satata.crud as migrations_crud
 import migrations_satata.migration_1 as migrations_migration_1
 import migrations_satata.migration_2 as migrations_migration_2
 import migrations_satata.migration_3 as migrations_migration_3
+import migrations_satata.migration_4 as migrations_migration_4
+import migrations_satata.migration_5 as migrations_migration_5
+import migrations_satata.migration_6 as migrations_migration_6
 
 import core.logger as core_logger
 
@@ -30,4 +33,16 @@ async def check_migrations_not_executed(db: Session):
             if migration.id == 3:
                 # Execute the migration
                 # migrations_migration_3.process_migration_3(db)
-                pass
\ No newline at end of file
+                pass
+
+            if migration.id == 4:
+                # Execute the migration
+                migrations_migration_4.process_migration_4(db)
+
+            if migration.id == 5:
+                # Execute the migration
+                migrations_migration_5.process_migration_5(db)
+
+            if migration.id == 6:
+                # Execute the migration
+                migrations_migration_6.process_migration_6(db)
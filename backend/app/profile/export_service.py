@@ -6,15 +6,19 @@ and settings to a downloadable ZIP archive with streaming.
 
 Key Features:
 - Batched data collection for memory efficiency
-- Streaming ZIP generation
+- Streaming ZIP generation without temporary files
+- Parallel compression of JSON entries
+- Progress notifications over WebSocket
 - Automatic performance tier detection
 - Memory and timeout monitoring
 """
 
+import asyncio
 import os
-import tempfile
-import zipfile
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Generator, Any
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -30,6 +34,7 @@ from profile.exceptions import (
     ExportTimeoutError,
 )
 import profile.utils as profile_utils
+import profile.zip_stream as zip_stream
 import activities.activity.crud as activities_crud
 import activities.activity_laps.crud as activity_laps_crud
 import activities.activity_sets.crud as activity_sets_crud
@@ -47,6 +52,17 @@ import users.users_goals.crud as user_goals_crud
 import users.users_identity_providers.crud as user_identity_providers_crud
 import users.users_integrations.crud as user_integrations_crud
 import users.users_privacy_settings.crud as users_privacy_settings_crud
+import websocket.manager as websocket_manager
+import websocket.utils as websocket_utils
+
+# Number of archive chunks buffered between the producer thread and the response
+EXPORT_QUEUE_CHUNKS = 64
+
+# Interval at which the producer and the response check for cancellation
+QUEUE_POLL_SECONDS = 1
+
+# Marks the end of the archive in the chunk queue
+_EXPORT_DONE = object()
 
 
 class ExportPerformanceConfig(profile_utils.BasePerformanceConfig):
@@ -60,6 +76,7 @@ class ExportPerformanceConfig(profile_utils.BasePerformanceConfig):
         chunk_size: Data chunk size in bytes.
         enable_memory_monitoring: Enable memory monitoring.
         timeout_seconds: Operation timeout in seconds.
+        compression_workers: Number of threads compressing JSON entries.
     """
 
     def __init__(
@@ -70,12 +87,17 @@ class ExportPerformanceConfig(profile_utils.BasePerformanceConfig):
         chunk_size: int = 8192,
         enable_memory_monitoring: bool = True,
         timeout_seconds: int = 3600,
+        compression_workers: int = 2,
     ):
         super().__init__(
-            batch_size, max_memory_mb, enable_memory_monitoring, timeout_seconds
+            batch_size=batch_size,
+            max_memory_mb=max_memory_mb,
+            timeout_seconds=timeout_seconds,
+            enable_memory_monitoring=enable_memory_monitoring,
         )
         self.compression_level = compression_level
         self.chunk_size = chunk_size
+        self.compression_workers = compression_workers
 
     @classmethod
     def _get_tier_configs(cls) -> dict[str, dict[str, Any]]:
@@ -90,22 +112,25 @@ class ExportPerformanceConfig(profile_utils.BasePerformanceConfig):
                 "batch_size": 250,
                 "max_memory_mb": 2048,
                 "compression_level": 6,
-                "chunk_size": 16384,
+                "chunk_size": 65536,
                 "timeout_seconds": 7200,
+                "compression_workers": 4,
             },
             "medium": {
                 "batch_size": 125,
                 "max_memory_mb": 1024,
                 "compression_level": 6,
-                "chunk_size": 8192,
+                "chunk_size": 32768,
                 "timeout_seconds": 3600,
+                "compression_workers": 2,
             },
             "low": {
                 "batch_size": 50,
                 "max_memory_mb": 512,
                 "compression_level": 6,
-                "chunk_size": 4096,
+                "chunk_size": 16384,
                 "timeout_seconds": 1800,
+                "compression_workers": 1,
             },
         }
 
@@ -119,6 +144,8 @@ class ExportService:
         db: Database session.
         counts: Dictionary tracking exported item counts.
         performance_config: Performance configuration.
+        websocket_manager: WebSocket manager notified of the progress.
+        loop: Event loop owning the WebSocket connections.
     """
 
     def __init__(
@@ -126,9 +153,13 @@ class ExportService:
         user_id: int,
         db: Session,
         performance_config: ExportPerformanceConfig | None = None,
+        websocket_manager: websocket_manager.WebSocketManager | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
     ):
         self.user_id = user_id
         self.db = db
+        self.websocket_manager = websocket_manager
+        self.loop = loop
         self.counts = profile_utils.initialize_operation_counts(include_user_count=True)
         self.performance_config: ExportPerformanceConfig = (
             performance_config or ExportPerformanceConfig.get_auto_config()
@@ -139,16 +170,17 @@ class ExportService:
             f"batch_size={self.performance_config.batch_size}, "
             f"max_memory_mb={self.performance_config.max_memory_mb}, "
             f"compression_level={self.performance_config.compression_level}, "
+            f"compression_workers={self.performance_config.compression_workers}, "
             f"timeout_seconds={self.performance_config.timeout_seconds}",
             "info",
         )
 
-    def collect_user_activities_data(self, zipf: zipfile.ZipFile) -> list[Any]:
+    def collect_user_activities_data(self, zipf: zip_stream.StreamingZipFile) -> list[Any]:
         """
         Collect and write user activities to ZIP.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
 
         Returns:
             List of collected activity objects.
@@ -165,9 +197,10 @@ class ExportService:
                 self.performance_config.enable_memory_monitoring,
             )
 
-            # Get activities in batches using pagination
+            # Get activities in batches using cursor pagination
             all_activities = []
-            offset = 0
+            cursor = None
+            batch_number = 0
             batch_size = self.performance_config.batch_size
 
             core_logger.print_to_log(
@@ -177,17 +210,19 @@ class ExportService:
 
             while True:
                 # Get a batch of activities
-                batch_activities = self._get_activities_batch(offset, batch_size)
+                batch_activities, cursor = self._get_activities_batch(
+                    cursor, batch_size
+                )
 
                 if not batch_activities:
                     break
 
                 all_activities.extend(batch_activities)
-                offset += batch_size
+                batch_number += 1
 
                 # Check memory usage after each batch
                 profile_utils.check_memory_usage(
-                    f"activity batch {offset//batch_size}",
+                    f"activity batch {batch_number}",
                     self.performance_config.max_memory_mb,
                     self.performance_config.enable_memory_monitoring,
                 )
@@ -198,6 +233,9 @@ class ExportService:
                     "info",
                 )
 
+                if cursor is None:
+                    break
+
             if not all_activities:
                 core_logger.print_to_log(
                     f"No activities found for user {self.user_id}", "info"
@@ -281,46 +319,43 @@ class ExportService:
 
         return all_activities
 
-    def _get_activities_batch(self, offset: int, limit: int) -> list[Any]:
+    def _get_activities_batch(
+        self, cursor: str | None, limit: int
+    ) -> tuple[list[Any], str | None]:
         """
-        Get batch of activities using pagination.
+        Get batch of activities using cursor pagination.
 
         Args:
-            offset: Offset for pagination.
+            cursor: Cursor returned with the previous batch, None for the first.
             limit: Number of items per batch.
 
         Returns:
-            List of activity objects for the batch.
+            Tuple of the activity objects of the batch and the cursor of the
+            next batch, None after the last batch.
         """
         try:
-            # Convert offset to page number (1-based indexing)
-            page_number = (offset // limit) + 1
-
-            # Use the existing pagination function from activities CRUD
-            activities = activities_crud.get_user_activities_with_pagination(
+            # Sort by start_time descending (most recent first) for consistency
+            return activities_crud.get_user_activities_with_cursor(
                 user_id=self.user_id,
                 db=self.db,
-                page_number=page_number,
                 num_records=limit,
-                # Sort by start_time descending (most recent first) for consistency
+                cursor=cursor,
                 sort_by="start_time",
                 sort_order="desc",
                 user_is_owner=True,
             )
 
-            return activities or []
-
         except Exception as err:
             core_logger.print_to_log(
-                f"Failed to get activities batch (offset={offset}, limit={limit}): {err}",
+                f"Failed to get activities batch (cursor={cursor}, limit={limit}): {err}",
                 "warning",
                 exc=err,
             )
-            return []
+            return [], None
 
     def _collect_and_write_activity_components(
         self,
-        zipf: zipfile.ZipFile,
+        zipf: zip_stream.StreamingZipFile,
         activity_ids: list[int],
         user_activities: list[Any],
     ) -> None:
@@ -328,7 +363,7 @@ class ExportService:
         Collect and write activity components to ZIP.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             activity_ids: List of activity IDs to process.
             user_activities: List of activity objects.
         """
@@ -397,7 +432,7 @@ class ExportService:
 
     def _collect_and_write_component_chunked(
         self,
-        zipf: zipfile.ZipFile,
+        zipf: zip_stream.StreamingZipFile,
         component_key: str,
         base_filename: str,
         crud_func,
@@ -409,7 +444,7 @@ class ExportService:
         Collect and write large components in chunks.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             component_key: Component type identifier.
             base_filename: Base name for output files.
             crud_func: CRUD function to fetch data.
@@ -523,7 +558,7 @@ class ExportService:
 
     def _collect_and_write_component_simple(
         self,
-        zipf: zipfile.ZipFile,
+        zipf: zip_stream.StreamingZipFile,
         component_key: str,
         base_filename: str,
         crud_func,
@@ -535,7 +570,7 @@ class ExportService:
         Collect and write small components in single file.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             component_key: Component type identifier.
             base_filename: Name for output file.
             crud_func: CRUD function to fetch data.
@@ -597,12 +632,12 @@ class ExportService:
                 "info",
             )
 
-    def collect_gear_data(self, zipf: zipfile.ZipFile) -> None:
+    def collect_gear_data(self, zipf: zip_stream.StreamingZipFile) -> None:
         """
         Collect and write gear data to ZIP.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
 
         Raises:
             DatabaseConnectionError: If database error occurs.
@@ -666,12 +701,12 @@ class ExportService:
                 f"Failed to collect gear data: {err}"
             ) from err
 
-    def collect_health_weight(self, zipf: zipfile.ZipFile) -> None:
+    def collect_health_weight(self, zipf: zip_stream.StreamingZipFile) -> None:
         """
         Collect and write health data to ZIP.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
 
         Raises:
             DatabaseConnectionError: If database error occurs.
@@ -740,7 +775,7 @@ class ExportService:
                 f"Failed to collect health data: {err}"
             ) from err
 
-    def collect_notifications_data(self, zipf: zipfile.ZipFile) -> None:
+    def collect_notifications_data(self, zipf: zip_stream.StreamingZipFile) -> None:
         try:
             try:
                 notifications = notifications_crud.get_user_notifications(
@@ -775,12 +810,12 @@ class ExportService:
                 f"Failed to collect user notifications: {err}"
             ) from err
 
-    def collect_user_settings_data(self, zipf: zipfile.ZipFile) -> None:
+    def collect_user_settings_data(self, zipf: zip_stream.StreamingZipFile) -> None:
         """
         Collect and write user settings to ZIP.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
 
         Raises:
             DatabaseConnectionError: If database error occurs.
@@ -940,13 +975,13 @@ class ExportService:
             ) from err
 
     def add_activity_files_to_zip(
-        self, zipf: zipfile.ZipFile, user_activities: list[Any]
+        self, zipf: zip_stream.StreamingZipFile, user_activities: list[Any]
     ):
         """
         Add activity files to ZIP archive.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             user_activities: List of activity objects.
 
         Raises:
@@ -1012,13 +1047,13 @@ class ExportService:
             ) from err
 
     def add_activity_media_to_zip(
-        self, zipf: zipfile.ZipFile, user_activities: list[Any]
+        self, zipf: zip_stream.StreamingZipFile, user_activities: list[Any]
     ):
         """
         Add activity media files to ZIP archive.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             user_activities: List of activity objects.
 
         Raises:
@@ -1086,12 +1121,12 @@ class ExportService:
                 f"Cannot access media files directory: {err}"
             ) from err
 
-    def add_user_images_to_zip(self, zipf: zipfile.ZipFile):
+    def add_user_images_to_zip(self, zipf: zip_stream.StreamingZipFile):
         """
         Add user image files to ZIP archive.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
 
         Raises:
             FileSystemError: If file system error occurs.
@@ -1112,12 +1147,12 @@ class ExportService:
             )
             raise FileSystemError(f"Failed to add user images: {err}") from err
 
-    def _add_user_images_optimized(self, zipf: zipfile.ZipFile, images_dir: str):
+    def _add_user_images_optimized(self, zipf: zip_stream.StreamingZipFile, images_dir: str):
         """
         Recursively add user images from directory.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             images_dir: Directory path containing images.
         """
         try:
@@ -1137,12 +1172,12 @@ class ExportService:
                 f"OS error accessing {images_dir}: {err}", "warning"
             )
 
-    def _process_user_image_file(self, zipf: zipfile.ZipFile, entry, images_dir: str):
+    def _process_user_image_file(self, zipf: zip_stream.StreamingZipFile, entry, images_dir: str):
         """
         Process and add single user image file to ZIP.
 
         Args:
-            zipf: ZipFile instance to write to.
+            zipf: Archive to write to.
             entry: Directory entry for the image file.
             images_dir: Base images directory path.
         """
@@ -1187,12 +1222,126 @@ class ExportService:
                 f"Unexpected error with image {entry.path}: {err}", "warning", exc=err
             )
 
+    def _report_progress(
+        self, stage: str, bytes_written: int, done: bool = False
+    ) -> None:
+        """
+        Notify the user's WebSocket connections of the export progress.
+
+        Args:
+            stage: Archive section being written.
+            bytes_written: Archive bytes produced so far.
+            done: Whether the archive is complete.
+        """
+        core_logger.print_to_log(
+            f"Export for user {self.user_id}: {stage} "
+            f"({bytes_written / (1024 * 1024):.2f}MB written)",
+            "info",
+        )
+        if self.websocket_manager is None:
+            return
+
+        self._run_on_loop(
+            websocket_utils.notify_frontend(
+                self.user_id,
+                self.websocket_manager,
+                {
+                    "message": "PROFILE_EXPORT_PROGRESS",
+                    "stage": stage,
+                    "counts": dict(self.counts),
+                    "bytes_written": bytes_written,
+                    "done": done,
+                },
+            )
+        )
+
+    def _run_on_loop(self, coroutine) -> None:
+        """
+        Schedule a coroutine on the event loop owning the sockets.
+
+        Args:
+            coroutine: Coroutine to schedule without waiting.
+        """
+        if self.loop is None or self.loop.is_closed():
+            coroutine.close()
+            return
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        future.add_done_callback(_log_future_error)
+
+    def write_export_archive(
+        self,
+        zipf: zip_stream.StreamingZipFile,
+        user_dict: dict[str, Any],
+        timeout_seconds: int | None,
+        start_time: float,
+    ) -> None:
+        """
+        Write every section of the export to an archive.
+
+        Args:
+            zipf: Archive to write to.
+            user_dict: User data dictionary to export.
+            timeout_seconds: Optional timeout in seconds.
+            start_time: Start time of the export, for the timeout.
+
+        Raises:
+            ExportTimeoutError: If operation times out.
+        """
+        user_activities: list[Any] = []
+
+        def write_activities() -> None:
+            user_activities.extend(self.collect_user_activities_data(zipf))
+
+        stages = (
+            ("activities", write_activities),
+            ("gear", lambda: self.collect_gear_data(zipf)),
+            ("health", lambda: self.collect_health_weight(zipf)),
+            ("notifications", lambda: self.collect_notifications_data(zipf)),
+            ("settings", lambda: self.collect_user_settings_data(zipf)),
+            (
+                "user",
+                lambda: profile_utils.write_json_to_zip(
+                    zipf, "data/user.json", [user_dict], self.counts
+                ),
+            ),
+            (
+                "activity_files",
+                lambda: self.add_activity_files_to_zip(zipf, user_activities),
+            ),
+            (
+                "activity_media",
+                lambda: self.add_activity_media_to_zip(zipf, user_activities),
+            ),
+            ("user_images", lambda: self.add_user_images_to_zip(zipf)),
+            (
+                "counts",
+                lambda: profile_utils.write_json_to_zip(
+                    zipf, "counts.json", [self.counts], self.counts
+                ),
+            ),
+        )
+
+        core_logger.print_to_log(f"Starting export for user {self.user_id}", "info")
+        for stage, write_stage in stages:
+            profile_utils.check_timeout(
+                timeout_seconds, start_time, ExportTimeoutError, "Export"
+            )
+            self._report_progress(stage, zipf.writer.bytes_written)
+            write_stage()
+
     def generate_export_archive(
         self, user_dict: dict[str, Any], timeout_seconds: int | None = 300
     ) -> Generator[bytes, None, None]:
         """
         Generate and stream export archive as bytes.
 
+        The archive is written by a producer thread into a bounded queue
+        and sent as it is produced, so the first bytes go out once the
+        first entry is compressed and no temporary file is needed. JSON
+        entries are compressed in a worker pool, files that are already
+        compressed are stored as is.
+
         Args:
             user_dict: User data dictionary to export.
             timeout_seconds: Optional timeout in seconds.
@@ -1207,177 +1356,84 @@ class ExportService:
             FileSystemError: If file system error occurs.
         """
         start_time = time.time()
+        chunks: queue.Queue = queue.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+        cancelled = threading.Event()
 
-        try:
-            with tempfile.NamedTemporaryFile(delete=True) as tmp:
+        def put(item) -> None:
+            # Stop waiting for room once the response is gone
+            while not cancelled.is_set():
                 try:
-                    compression_level = self.performance_config.compression_level
-                    core_logger.print_to_log(
-                        f"Creating ZIP with compression level {compression_level}",
-                        "info",
-                    )
-
-                    with zipfile.ZipFile(
-                        tmp,
-                        "w",
-                        compression=zipfile.ZIP_DEFLATED,
-                        compresslevel=compression_level,
+                    chunks.put(item, timeout=QUEUE_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+            raise _ExportCancelled()
+
+        def produce() -> None:
+            compression_workers = self.performance_config.compression_workers
+            try:
+                with ThreadPoolExecutor(
+                    max_workers=compression_workers,
+                    thread_name_prefix=f"export-{self.user_id}",
+                ) as executor:
+                    with zip_stream.StreamingZipFile(
+                        put,
+                        compresslevel=self.performance_config.compression_level,
+                        chunk_size=self.performance_config.chunk_size,
+                        executor=executor,
+                        max_pending=2 * compression_workers,
                     ) as zipf:
-                        core_logger.print_to_log(
-                            f"Starting export for user {self.user_id}", "info"
-                        )
-
-                        # Collect and write activities data progressively
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Collecting and writing activities data...", "info"
-                        )
-                        user_activities = self.collect_user_activities_data(zipf)
-
-                        # Collect and write gear data progressively
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Collecting and writing gear data...", "info"
-                        )
-                        self.collect_gear_data(zipf)
-
-                        # Collect and write health data progressively
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Collecting and writing health data...", "info"
-                        )
-                        self.collect_health_weight(zipf)
-
-                        # Collect and write notifications progressively
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Collecting and writing notifications data...", "info"
+                        self.write_export_archive(
+                            zipf, user_dict, timeout_seconds, start_time
                         )
-                        self.collect_notifications_data(zipf)
-
-                        # Collect and write settings data progressively
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Collecting and writing settings data...", "info"
-                        )
-                        self.collect_user_settings_data(zipf)
-
-                        # Write user data
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log("Writing user data...", "info")
-                        user_dict_list = [user_dict]
-                        profile_utils.write_json_to_zip(
-                            zipf, "data/user.json", user_dict_list, self.counts
-                        )
-
-                        # Add files to ZIP with timeout checks
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Adding activity files to archive...", "info"
-                        )
-                        self.add_activity_files_to_zip(zipf, user_activities)
-
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Adding activity media to archive...", "info"
-                        )
-                        self.add_activity_media_to_zip(zipf, user_activities)
-
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            "Adding user images to archive...", "info"
-                        )
-                        self.add_user_images_to_zip(zipf)
+                self._report_progress("done", zipf.writer.bytes_written, done=True)
+                result = _EXPORT_DONE
+            except _ExportCancelled:
+                return
+            except BaseException as err:
+                result = err
 
-                        # Write counts file
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log("Writing counts file...", "info")
-                        profile_utils.write_json_to_zip(
-                            zipf, "counts.json", [self.counts], self.counts
-                        )
+            try:
+                put(result)
+            except _ExportCancelled:
+                pass
 
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        core_logger.print_to_log(
-                            f"Export completed successfully. Counts: {self.counts}",
-                            "info",
-                        )
+        core_logger.print_to_log(
+            f"Streaming ZIP with compression level "
+            f"{self.performance_config.compression_level} and "
+            f"{self.performance_config.compression_workers} compression workers",
+            "info",
+        )
+        producer = threading.Thread(
+            target=produce, name=f"export-{self.user_id}", daemon=True
+        )
+        producer.start()
 
-                except zipfile.BadZipFile as err:
-                    core_logger.print_to_log(
-                        f"ZIP creation error: {err}", "error", exc=err
-                    )
-                    raise ZipCreationError(
-                        f"Failed to create ZIP archive: {err}"
-                    ) from err
-                except zipfile.LargeZipFile as err:
-                    core_logger.print_to_log(
-                        f"ZIP file too large: {err}", "error", exc=err
-                    )
-                    raise ZipCreationError(f"Export archive too large: {err}") from err
-                except MemoryAllocationError as err:
-                    raise err
-                except Exception as err:
-                    raise err
-
-                # Ensure all data is written to disk before streaming
-                # This is critical for proper ZIP file structure and MIME type detection
-                tmp.flush()
-                os.fsync(tmp.fileno())
-
-                # Get file size for logging
-                file_size = tmp.tell()
-                core_logger.print_to_log(
-                    f"ZIP archive created successfully: {file_size / (1024*1024):.2f}MB",
-                    "info",
+        chunk_count = 0
+        try:
+            while True:
+                profile_utils.check_timeout(
+                    timeout_seconds, start_time, ExportTimeoutError, "Export"
                 )
+                try:
+                    item = chunks.get(timeout=QUEUE_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if item is _EXPORT_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                chunk_count += 1
+                yield item
 
-                # Stream the file with error handling
-                tmp.seek(0)
-                chunk_count = 0
-                while True:
-                    try:
-                        profile_utils.check_timeout(
-                            timeout_seconds, start_time, ExportTimeoutError, "Export"
-                        )
-                        chunk = tmp.read(8192)
-                        if not chunk:
-                            break
-                        chunk_count += 1
-                        yield chunk
-                    except MemoryError as err:
-                        core_logger.print_to_log(
-                            f"Memory error during streaming: {err}", "error", exc=err
-                        )
-                        raise MemoryAllocationError(
-                            f"Insufficient memory to stream export: {err}"
-                        ) from err
-
-                core_logger.print_to_log(
-                    f"Successfully streamed {chunk_count} chunks for user {self.user_id}",
-                    "info",
-                )
+            core_logger.print_to_log(
+                f"Export completed successfully. Streamed {chunk_count} chunks "
+                f"for user {self.user_id}. Counts: {self.counts}",
+                "info",
+            )
+        except zip_stream.ZipStreamError as err:
+            core_logger.print_to_log(f"ZIP creation error: {err}", "error", exc=err)
+            raise ZipCreationError(f"Failed to create ZIP archive: {err}") from err
         except MemoryAllocationError as err:
             raise err
         except OSError as err:
@@ -1392,3 +1448,24 @@ class ExportService:
             raise MemoryAllocationError(
                 f"Insufficient memory for export: {err}"
             ) from err
+        finally:
+            # Also reached when the client disconnects and the generator closes
+            cancelled.set()
+            producer.join()
+
+
+class _ExportCancelled(Exception):
+    """
+    Raised in the producer thread when the export response is closed.
+    """
+
+    pass
+
+
+def _log_future_error(future) -> None:
+    if future.cancelled() or future.exception() is None:
+        return
+    core_logger.print_to_log(
+        f"Profile export: background notification failed - {future.exception()}",
+        "warning",
+    )
@@ -0,0 +1,166 @@
+"""Checkpoints of interrupted profile imports.
+
+An import commits its data in batches. After each batch it saves how far
+it got, so uploading the same archive again picks up where it stopped:
+
+- ImportCheckpoint records the completed stages, the number of items
+  read in the current stage, the ID mappings and the counts
+- Checkpoints are keyed by user and by the SHA-256 of the archive, a
+  different archive starts from scratch
+- Checkpoints are written atomically to PROFILE_IMPORT_DIR and deleted
+  once the import completes
+- The uploaded archive is only kept while it is imported, resuming means
+  uploading it again, then the stages already imported are skipped
+"""
+
+import json
+import os
+from typing import Any
+
+import core.config as core_config
+import core.logger as core_logger
+
+
+def get_checkpoint_path(user_id: int) -> str:
+    """
+    Return the path of the import checkpoint of a user.
+
+    Args:
+        user_id: ID of the importing user.
+
+    Returns:
+        Path of the checkpoint file.
+    """
+    return os.path.join(core_config.PROFILE_IMPORT_DIR, f"{user_id}.json")
+
+
+class ImportCheckpoint:
+    """
+    Progress of a profile import.
+
+    Attributes:
+        user_id: ID of the importing user.
+        archive_sha256: SHA-256 of the imported archive.
+        completed_stages: Stages fully imported.
+        offsets: Number of items already read from each streamed stage.
+        gears_id_mapping: Mapping of old to new gear IDs.
+        activities_id_mapping: Mapping of old to new activity IDs.
+        max_fingerprint_id: Last activity fingerprint ID before the
+            activities were imported, None until they are. Activities
+            fingerprinted after it are never skipped as already stored.
+        counts: Imported item counts.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        archive_sha256: str,
+        counts: dict[str, int],
+        data: dict[str, Any] | None = None,
+    ):
+        data = data or {}
+        self.user_id = user_id
+        self.archive_sha256 = archive_sha256
+        self.completed_stages: list[str] = data.get("completed_stages", [])
+        self.offsets: dict[str, int] = data.get("offsets", {})
+        # JSON object keys are strings
+        self.gears_id_mapping: dict[int, int] = {
+            int(old_id): new_id
+            for old_id, new_id in data.get("gears_id_mapping", {}).items()
+        }
+        self.activities_id_mapping: dict[int, int] = {
+            int(old_id): new_id
+            for old_id, new_id in data.get("activities_id_mapping", {}).items()
+        }
+        self.max_fingerprint_id: int | None = data.get("max_fingerprint_id")
+        self.counts = counts
+        self.counts.update(data.get("counts", {}))
+
+    @classmethod
+    def load(
+        cls, user_id: int, archive_sha256: str, counts: dict[str, int]
+    ) -> "ImportCheckpoint":
+        """
+        Load the checkpoint of an interrupted import of the same archive.
+
+        Args:
+            user_id: ID of the importing user.
+            archive_sha256: SHA-256 of the archive being imported.
+            counts: Counts dictionary of the import, updated with the
+                counts of the checkpoint.
+
+        Returns:
+            The saved checkpoint, or an empty one if there is none for
+            this archive.
+        """
+        try:
+            with open(get_checkpoint_path(user_id), encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return cls(user_id, archive_sha256, counts)
+        except (OSError, ValueError) as err:
+            core_logger.print_to_log(
+                f"Ignoring unreadable import checkpoint of user {user_id}: {err}",
+                "warning",
+            )
+            return cls(user_id, archive_sha256, counts)
+
+        if data.get("archive_sha256") != archive_sha256:
+            return cls(user_id, archive_sha256, counts)
+
+        core_logger.print_to_log(
+            f"Resuming import of user {user_id} after stages "
+            f"{data.get('completed_stages', [])}",
+            "info",
+        )
+        return cls(user_id, archive_sha256, counts, data)
+
+    def is_completed(self, stage: str) -> bool:
+        """
+        Return whether a stage was fully imported.
+
+        Args:
+            stage: Name of the stage.
+
+        Returns:
+            True if the stage is completed.
+        """
+        return stage in self.completed_stages
+
+    def complete(self, stage: str) -> None:
+        """
+        Mark a stage as fully imported and save the checkpoint.
+
+        Args:
+            stage: Name of the stage.
+        """
+        self.completed_stages.append(stage)
+        self.offsets.pop(stage, None)
+        self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint, replacing the previous one atomically."""
+        path = get_checkpoint_path(self.user_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "archive_sha256": self.archive_sha256,
+                    "completed_stages": self.completed_stages,
+                    "offsets": self.offsets,
+                    "gears_id_mapping": self.gears_id_mapping,
+                    "activities_id_mapping": self.activities_id_mapping,
+                    "max_fingerprint_id": self.max_fingerprint_id,
+                    "counts": self.counts,
+                },
+                file,
+            )
+        os.replace(tmp_path, path)
+
+    def delete(self) -> None:
+        """Remove the checkpoint of a completed import."""
+        try:
+            os.remove(get_checkpoint_path(self.user_id))
+        except FileNotFoundError:
+            pass
@@ -5,23 +5,29 @@ user profile data from ZIP archives.
 
 Key Features:
 - ZIP validation and security checks
+- Uploads spooled to disk and large JSON files parsed item by item
 - Batched data processing
+- Resumable imports from checkpoints
 - WebSocket progress updates
 - Automatic performance tier detection
 - Memory and timeout monitoring
 """
 
+import hashlib
 import os
 import json
+import shutil
+import tempfile
 import zipfile
 import time
-from io import BytesIO
-from typing import Any
+from collections import defaultdict
+from typing import IO, Any, Iterator
+from fastapi import UploadFile
 from sqlalchemy.orm import Session
 
 import core.config as core_config
 import core.logger as core_logger
-import core.file_uploads as file_uploads
+import core.metrics as core_metrics
 
 from profile.exceptions import (
     FileFormatError,
@@ -32,6 +38,8 @@ from profile.exceptions import (
     FileSystemError,
 )
 
+import profile.import_checkpoint as import_checkpoint
+import profile.json_stream as json_stream
 import profile.utils as profile_utils
 
 import users.users.crud as users_crud
@@ -57,6 +65,11 @@ import users.users_privacy_settings.schema as users_privacy_settings_schema
 import activities.activity.crud as activities_crud
 import activities.activity.schema as activity_schema
 
+import activities.activity_ai_insight_jobs.utils as activity_ai_insight_jobs_utils
+
+import activities.activity_fingerprints.crud as activity_fingerprints_crud
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
+
 import activities.activity_laps.crud as activity_laps_crud
 
 import activities.activity_media.crud as activity_media_crud
@@ -91,6 +104,19 @@ import health.health_targets.schema as health_targets_schema
 
 import websocket.manager as websocket_manager
 
+# Size of the chunks uploads and archive files are copied in
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Activity component stages, named after their files in the archive
+ACTIVITY_COMPONENT_STAGES = (
+    "activity_laps",
+    "activity_sets",
+    "activity_streams",
+    "activity_workout_steps",
+    "activity_media",
+    "activity_exercise_titles",
+)
+
 
 class ImportPerformanceConfig(profile_utils.BasePerformanceConfig):
     """
@@ -190,6 +216,7 @@ class ImportService:
         self.counts = profile_utils.initialize_operation_counts(
             include_user_count=False
         )
+        self.counts["activities_skipped"] = 0
         self.performance_config: ImportPerformanceConfig = (
             performance_config or ImportPerformanceConfig.get_auto_config()
         )
@@ -203,12 +230,17 @@ class ImportService:
             "info",
         )
 
-    async def import_from_zip_data(self, zip_data: bytes) -> dict[str, Any]:
+    async def import_from_upload(self, upload: UploadFile) -> dict[str, Any]:
         """
-        Import profile data from ZIP file bytes.
+        Import profile data from an uploaded ZIP file.
+
+        The upload is spooled to disk in chunks, so the archive is never
+        held in memory, and removed once the import ends. An interrupted
+        import resumes from its checkpoint when the same archive is
+        uploaded again.
 
         Args:
-            zip_data: ZIP file content as bytes.
+            upload: Uploaded ZIP file.
 
         Returns:
             Dictionary with import results and counts.
@@ -219,17 +251,83 @@ class ImportService:
             FileSystemError: If file system error occurs.
             ImportTimeoutError: If operation times out.
         """
+        try:
+            os.makedirs(core_config.PROFILE_IMPORT_DIR, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=core_config.PROFILE_IMPORT_DIR,
+                prefix=f"{self.user_id}_",
+                suffix=".zip",
+            ) as spool_file:
+                archive_sha256 = await self._spool_upload(upload, spool_file)
+                return await self.import_from_zip_file(
+                    spool_file.name, archive_sha256
+                )
+        except OSError as e:
+            raise FileSystemError(f"File system error during import: {str(e)}") from e
+
+    async def _spool_upload(self, upload: UploadFile, spool_file: IO[bytes]) -> str:
+        """
+        Copy an upload to a file in chunks.
+
+        Args:
+            upload: Uploaded ZIP file.
+            spool_file: File to copy the upload to.
+
+        Returns:
+            SHA-256 of the upload, identifying the archive in checkpoints.
+
+        Raises:
+            FileSizeError: If file exceeds size limit.
+        """
+        max_file_size_mb = self.performance_config.max_file_size_mb
+        digest = hashlib.sha256()
+        file_size = 0
+
+        await upload.seek(0)
+        while chunk := await upload.read(SPOOL_CHUNK_BYTES):
+            file_size += len(chunk)
+            if file_size > max_file_size_mb * 1024 * 1024:
+                raise FileSizeError(
+                    f"ZIP file size exceeds maximum allowed ({max_file_size_mb}MB)"
+                )
+            digest.update(chunk)
+            spool_file.write(chunk)
+        spool_file.flush()
+
+        core_logger.print_to_log(
+            f"Spooled {file_size / (1024 * 1024):.1f}MB import archive "
+            f"for user {self.user_id}",
+            "info",
+        )
+        return digest.hexdigest()
+
+    async def import_from_zip_file(
+        self, zip_path: str, archive_sha256: str
+    ) -> dict[str, Any]:
+        """
+        Import profile data from a ZIP file on disk.
+
+        Each stage commits its data in batches and records its progress in
+        a checkpoint. If an import of the same archive was interrupted, the
+        completed stages and batches are skipped. At most the batch being
+        committed when the import was interrupted is imported twice.
+
+        Args:
+            zip_path: Path of the ZIP file.
+            archive_sha256: SHA-256 of the ZIP file.
+
+        Returns:
+            Dictionary with import results and counts.
+
+        Raises:
+            FileFormatError: If ZIP format is invalid.
+            FileSystemError: If file system error occurs.
+            ImportTimeoutError: If operation times out.
+            ActivityLimitError: If the archive has too many activities.
+        """
         start_time = time.time()
         timeout_seconds = self.performance_config.timeout_seconds
 
-        # Check file size
-        file_size_mb = len(zip_data) / (1024 * 1024)
-        if file_size_mb > self.performance_config.max_file_size_mb:
-            raise FileSizeError(
-                f"ZIP file size ({file_size_mb:.1f}MB) exceeds maximum allowed "
-                f"({self.performance_config.max_file_size_mb}MB)"
-            )
-
         # Early memory check BEFORE loading any data
         profile_utils.check_memory_usage(
             "pre-import memory check",
@@ -237,133 +335,115 @@ class ImportService:
             self.performance_config.enable_memory_monitoring,
         )
 
+        checkpoint = import_checkpoint.ImportCheckpoint.load(
+            self.user_id, archive_sha256, self.counts
+        )
+
         try:
-            with zipfile.ZipFile(BytesIO(zip_data)) as zipf:
+            with zipfile.ZipFile(zip_path) as zipf:
                 file_list = set(zipf.namelist())
 
-                # Create ID mappings for relationships
-                gears_id_mapping = {}
-                activities_id_mapping = {}
-
-                # Import data in dependency order using streaming approach
-                # Load and import gears
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
-                gears_data = self._load_single_json(zipf, "data/gears.json")
-                gears_id_mapping = await self.collect_and_import_gears_data(gears_data)
-                del gears_data  # Explicit memory cleanup
-
-                # Load and import gear components
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
-                gear_components_data = self._load_single_json(
-                    zipf, "data/gear_components.json"
-                )
-                await self.collect_and_import_gear_components_data(
-                    gear_components_data, gears_id_mapping
-                )
-                del gear_components_data
-
-                # Load and import user data (includes user, default gear, integrations, goals, privacy)
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
-                user_data = self._load_single_json(zipf, "data/user.json")
-                user_default_gear_data = self._load_single_json(
-                    zipf, "data/user_default_gear.json"
-                )
-                user_goals_data = self._load_single_json(zipf, "data/user_goals.json")
-                user_identity_providers_data = self._load_single_json(
-                    zipf, "data/user_identity_providers.json"
-                )
-                user_integrations_data = self._load_single_json(
-                    zipf, "data/user_integrations.json"
-                )
-                user_privacy_settings_data = self._load_single_json(
-                    zipf, "data/user_privacy_settings.json"
-                )
+                async def import_gears() -> None:
+                    gears_data = self._load_single_json(zipf, "data/gears.json")
+                    checkpoint.gears_id_mapping = (
+                        await self.collect_and_import_gears_data(gears_data)
+                    )
 
-                await self.collect_and_import_user_data(
-                    user_data,
-                    user_default_gear_data,
-                    user_goals_data,
-                    user_identity_providers_data,
-                    user_integrations_data,
-                    user_privacy_settings_data,
-                    gears_id_mapping,
-                )
-                del user_data, user_default_gear_data, user_integrations_data
-                del user_goals_data, user_privacy_settings_data
+                async def import_gear_components() -> None:
+                    await self.collect_and_import_gear_components_data(
+                        self._load_single_json(zipf, "data/gear_components.json"),
+                        checkpoint.gears_id_mapping,
+                    )
 
-                # Load and import activities with their components
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
+                async def import_user() -> None:
+                    await self.collect_and_import_user_data(
+                        self._load_single_json(zipf, "data/user.json"),
+                        self._load_single_json(zipf, "data/user_default_gear.json"),
+                        self._load_single_json(zipf, "data/user_goals.json"),
+                        self._load_single_json(
+                            zipf, "data/user_identity_providers.json"
+                        ),
+                        self._load_single_json(zipf, "data/user_integrations.json"),
+                        self._load_single_json(
+                            zipf, "data/user_privacy_settings.json"
+                        ),
+                        checkpoint.gears_id_mapping,
+                    )
 
-                # Import activities and components using batched approach to avoid memory issues
-                activities_id_mapping = (
+                async def import_activities() -> None:
                     await self.collect_and_import_activities_data_batched(
-                        zipf,
-                        file_list,
-                        gears_id_mapping,
-                        start_time,
-                        timeout_seconds,
+                        zipf, file_list, checkpoint, start_time, timeout_seconds
                     )
-                )
 
-                # Load and import notifications
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
-                notifications_data = self._load_single_json(
-                    zipf, "data/notifications.json"
-                )
+                def import_components(stage: str):
+                    async def import_stage() -> None:
+                        await self.collect_and_import_activity_components(
+                            zipf,
+                            file_list,
+                            stage,
+                            checkpoint,
+                            start_time,
+                            timeout_seconds,
+                        )
 
-                await self.collect_and_import_notifications_data(notifications_data)
-                del notifications_data
+                    return import_stage
 
-                # Load and import health data
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
-                health_weight_data = self._load_single_json(
-                    zipf, "data/health_weight.json"
-                )
-                health_targets_data = self._load_single_json(
-                    zipf, "data/health_targets.json"
-                )
+                async def import_notifications() -> None:
+                    await self.collect_and_import_notifications_data(
+                        self._load_single_json(zipf, "data/notifications.json")
+                    )
 
-                await self.collect_and_import_health_weight(
-                    health_weight_data, health_targets_data
-                )
-                del health_weight_data, health_targets_data
+                async def import_health() -> None:
+                    await self.collect_and_import_health_weight(
+                        self._load_single_json(zipf, "data/health_weight.json"),
+                        self._load_single_json(zipf, "data/health_targets.json"),
+                    )
 
-                # Import files and media
-                profile_utils.check_timeout(
-                    timeout_seconds, start_time, ImportTimeoutError, "Import"
-                )
-                await self.add_activity_files_from_zip(
-                    zipf, file_list, activities_id_mapping
-                )
-                await self.add_activity_media_from_zip(
-                    zipf, file_list, activities_id_mapping
-                )
-                await self.add_user_images_from_zip(zipf, file_list)
+                async def import_files() -> None:
+                    await self.add_activity_files_from_zip(
+                        zipf, file_list, checkpoint.activities_id_mapping
+                    )
+                    await self.add_activity_media_from_zip(
+                        zipf, file_list, checkpoint.activities_id_mapping
+                    )
+                    await self.add_user_images_from_zip(zipf, file_list)
+
+                # Import data in dependency order
+                stages = [
+                    ("gears", import_gears),
+                    ("gear_components", import_gear_components),
+                    ("user", import_user),
+                    ("activities", import_activities),
+                    *(
+                        (stage, import_components(stage))
+                        for stage in ACTIVITY_COMPONENT_STAGES
+                    ),
+                    ("notifications", import_notifications),
+                    ("health", import_health),
+                    ("files", import_files),
+                ]
+                for stage, import_stage in stages:
+                    if checkpoint.is_completed(stage):
+                        continue
+                    profile_utils.check_timeout(
+                        timeout_seconds, start_time, ImportTimeoutError, "Import"
+                    )
+                    await import_stage()
+                    checkpoint.complete(stage)
 
         except zipfile.BadZipFile as e:
             raise FileFormatError(f"Invalid ZIP file format: {str(e)}") from e
         except (OSError, IOError) as e:
             raise FileSystemError(f"File system error during import: {str(e)}") from e
 
+        checkpoint.delete()
         return {"detail": "Import completed", "imported": self.counts}
 
     def _load_single_json(
         self, zipf: zipfile.ZipFile, filename: str, check_memory: bool = True
     ) -> list[Any]:
         """
-        Load and parse JSON file from ZIP archive.
+        Load and parse a small JSON file from ZIP archive.
 
         Args:
             zipf: ZipFile instance to read from.
@@ -377,11 +457,11 @@ class ImportService:
             JSONParseError: If JSON parsing fails.
         """
         try:
-            file_list = set(zipf.namelist())
-            if filename not in file_list:
+            if filename not in set(zipf.namelist()):
                 return []
 
-            data = json.loads(zipf.read(filename))
+            with zipf.open(filename) as file:
+                data = json.load(file)
             core_logger.print_to_log(
                 f"Loaded {len(data) if isinstance(data, list) else 1} items from {filename}",
                 "debug",
@@ -400,6 +480,49 @@ class ImportService:
             core_logger.print_to_log(error_msg, "error")
             raise JSONParseError(error_msg) from err
 
+    def _iter_json_items(self, zipf: zipfile.ZipFile, filename: str) -> Iterator[Any]:
+        """
+        Parse the items of a large JSON array from ZIP archive one at a time.
+
+        Args:
+            zipf: ZipFile instance to read from.
+            filename: Name of JSON file to read.
+
+        Yields:
+            The items of the array.
+
+        Raises:
+            JSONParseError: If JSON parsing fails.
+        """
+        try:
+            with zipf.open(filename) as file:
+                yield from json_stream.iter_json_array(
+                    file, self.performance_config.chunk_size
+                )
+        except json.JSONDecodeError as err:
+            error_msg = f"Failed to parse JSON from {filename}: {err}"
+            core_logger.print_to_log(error_msg, "error")
+            raise JSONParseError(error_msg) from err
+
+    def _commit_batch(
+        self, checkpoint: import_checkpoint.ImportCheckpoint, stage: str, offset: int
+    ) -> None:
+        """
+        Commit a batch and record it in the checkpoint.
+
+        Args:
+            checkpoint: Checkpoint of the import.
+            stage: Stage the batch belongs to.
+            offset: Number of items of the stage read so far.
+        """
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        checkpoint.offsets[stage] = offset
+        checkpoint.save()
+
     async def collect_and_import_gears_data(
         self, gears_data: list[Any]
     ) -> dict[int, int]:
@@ -706,289 +829,288 @@ class ImportService:
         core_logger.print_to_log(f"Imported user privacy settings", "info")
         self.counts["user_privacy_settings"] += 1
 
+    def _prepare_activity_component(
+        self, stage: str, component_data: dict, new_activity_id: int
+    ) -> Any:
+        """
+        Convert an exported activity component for a new activity.
+
+        Args:
+            stage: Component stage, one of ACTIVITY_COMPONENT_STAGES.
+            component_data: Exported component.
+            new_activity_id: New ID of the component's activity.
+
+        Returns:
+            The component, as expected by its create function.
+        """
+        component_data.pop("id", None)
+
+        # Exercise titles are shared, not linked to an activity
+        if stage == "activity_exercise_titles":
+            return activity_exercise_titles_schema.ActivityExerciseTitles(
+                **component_data
+            )
+
+        component_data["activity_id"] = new_activity_id
+        if stage == "activity_laps":
+            return component_data
+        if stage == "activity_sets":
+            return activity_sets_schema.ActivitySets(**component_data)
+        if stage == "activity_streams":
+            return activity_streams_schema.ActivityStreams(**component_data)
+        if stage == "activity_workout_steps":
+            return activity_workout_steps_schema.ActivityWorkoutSteps(
+                **component_data
+            )
+
+        # Update media path
+        old_path = component_data.get("media_path", None)
+        if old_path:
+            filename = old_path.split("/")[-1]
+            suffix = filename.split("_", 1)[1]
+            component_data["media_path"] = (
+                f"{core_config.ACTIVITY_MEDIA_DIR}/{new_activity_id}_{suffix}"
+            )
+        return activity_media_schema.ActivityMedia(**component_data)
+
+    def _add_activity_components(
+        self, stage: str, components: list[tuple[int, Any]]
+    ) -> None:
+        """
+        Add a batch of activity components without committing.
+
+        Args:
+            stage: Component stage, one of ACTIVITY_COMPONENT_STAGES.
+            components: Tuples of new activity ID and component.
+        """
+        if stage == "activity_exercise_titles":
+            activity_exercise_titles_crud.create_activity_exercise_titles(
+                [component for _, component in components], self.db
+            )
+            return
+        if stage == "activity_streams":
+            activity_streams_crud.create_activity_streams(
+                [component for _, component in components], self.db, commit=False
+            )
+            return
+
+        create_components = {
+            "activity_laps": activity_laps_crud.create_activity_laps,
+            "activity_sets": activity_sets_crud.create_activity_sets,
+            "activity_workout_steps": activity_workout_steps_crud.create_activity_workout_steps,
+            "activity_media": activity_media_crud.create_activity_medias,
+        }[stage]
+
+        components_by_activity = defaultdict(list)
+        for new_activity_id, component in components:
+            components_by_activity[new_activity_id].append(component)
+        for new_activity_id, activity_components in components_by_activity.items():
+            create_components(
+                activity_components, new_activity_id, self.db, commit=False
+            )
+
     async def collect_and_import_activity_components(
         self,
-        activity_laps_data: list[Any],
-        activity_sets_data: list[Any],
-        activity_streams_data: list[Any],
-        activity_workout_steps_data: list[Any],
-        activity_media_data: list[Any],
-        activity_exercise_titles_data: list[Any],
-        original_activity_id: int,
-        new_activity_id: int,
+        zipf: zipfile.ZipFile,
+        file_list: set[str],
+        stage: str,
+        checkpoint: import_checkpoint.ImportCheckpoint,
+        start_time: float,
+        timeout_seconds: int,
     ) -> None:
         """
-        Import all components for a single activity.
+        Import one type of activity component in batches.
+
+        The component files are parsed one item at a time and every batch
+        is committed in one transaction.
 
         Args:
-            activity_laps_data: Laps data for all activities.
-            activity_sets_data: Sets data for all activities.
-            activity_streams_data: Streams data.
-            activity_workout_steps_data: Workout steps data.
-            activity_media_data: Media data for all activities.
-            activity_exercise_titles_data: Exercise titles.
-            original_activity_id: Old activity ID.
-            new_activity_id: New activity ID.
+            zipf: ZipFile instance to read from.
+            file_list: Set of file paths in ZIP.
+            stage: Component stage, one of ACTIVITY_COMPONENT_STAGES.
+            checkpoint: Checkpoint of the import.
+            start_time: Import operation start time.
+            timeout_seconds: Timeout limit in seconds.
+
+        Raises:
+            ImportTimeoutError: If operation times out.
         """
-        # Import laps - filter for this activity
-        if activity_laps_data:
-            laps = []
-            laps_for_activity = [
-                lap
-                for lap in activity_laps_data
-                if lap.get("activity_id") == original_activity_id
-            ]
-            for lap_data in laps_for_activity:
-                lap_data.pop("id", None)
-                lap_data["activity_id"] = new_activity_id
-                laps.append(lap_data)
-
-            if laps:
-                activity_laps_crud.create_activity_laps(laps, new_activity_id, self.db)
-                self.counts["activity_laps"] += len(laps)
-
-        # Import sets - filter for this activity
-        if activity_sets_data:
-            sets = []
-            sets_for_activity = [
-                activity_set
-                for activity_set in activity_sets_data
-                if activity_set.get("activity_id") == original_activity_id
-            ]
-            for activity_set in sets_for_activity:
-                activity_set.pop("id", None)
-                activity_set["activity_id"] = new_activity_id
-                set_activity = activity_sets_schema.ActivitySets(**activity_set)
-                sets.append(set_activity)
-
-            if sets:
-                activity_sets_crud.create_activity_sets(sets, new_activity_id, self.db)
-                self.counts["activity_sets"] += len(sets)
-
-        # Import streams - filter for this activity
-        if activity_streams_data:
-            streams = []
-            streams_for_activity = [
-                stream
-                for stream in activity_streams_data
-                if stream.get("activity_id") == original_activity_id
-            ]
-            for stream_data in streams_for_activity:
-                stream_data.pop("id", None)
-                stream_data["activity_id"] = new_activity_id
-                stream = activity_streams_schema.ActivityStreams(**stream_data)
-                streams.append(stream)
-
-            if streams:
-                activity_streams_crud.create_activity_streams(streams, self.db)
-                self.counts["activity_streams"] += len(streams)
-
-        # Import workout steps
-        if activity_workout_steps_data:
-            steps = []
-            steps_for_activity = [
-                step
-                for step in activity_workout_steps_data
-                if step.get("activity_id") == original_activity_id
-            ]
-            for step_data in steps_for_activity:
-                step_data.pop("id", None)
-                step_data["activity_id"] = new_activity_id
-                step = activity_workout_steps_schema.ActivityWorkoutSteps(**step_data)
-                steps.append(step)
-
-            if steps:
-                activity_workout_steps_crud.create_activity_workout_steps(
-                    steps, new_activity_id, self.db
-                )
-                self.counts["activity_workout_steps"] += len(steps)
-
-        # Import media
-        if activity_media_data:
-            media = []
-            media_for_activity = [
-                media_item
-                for media_item in activity_media_data
-                if media_item.get("activity_id") == original_activity_id
-            ]
-            for media_data in media_for_activity:
-                media_data.pop("id", None)
-                media_data["activity_id"] = new_activity_id
-
-                # Update media path
-                old_path = media_data.get("media_path", None)
-                if old_path:
-                    filename = old_path.split("/")[-1]
-                    suffix = filename.split("_", 1)[1]
-                    media_data["media_path"] = (
-                        f"{core_config.ACTIVITY_MEDIA_DIR}/{new_activity_id}_{suffix}"
-                    )
+        component_files = self._get_split_files_list(file_list, f"data/{stage}")
+        if not component_files:
+            core_logger.print_to_log(f"No {stage} data to import", "debug")
+            return
 
-                media_item = activity_media_schema.ActivityMedia(**media_data)
-                media.append(media_item)
+        batch_size = self.performance_config.batch_size
+        offset = checkpoint.offsets.get(stage, 0)
+        num_read = 0
+        batch = []
 
-            if media:
-                activity_media_crud.create_activity_medias(
-                    media, new_activity_id, self.db
-                )
-                self.counts["activity_media"] += len(media)
-
-        # Import exercise titles
-        if activity_exercise_titles_data:
-            titles = []
-            exercise_titles_for_activity = [
-                title
-                for title in activity_exercise_titles_data
-                if title.get("activity_id") == original_activity_id
-            ]
-            for title_data in exercise_titles_for_activity:
-                title_data.pop("id", None)
-                title_data["activity_id"] = new_activity_id
-                title = activity_exercise_titles_schema.ActivityExerciseTitles(
-                    **title_data
+        for filename in component_files:
+            for component_data in self._iter_json_items(zipf, filename):
+                num_read += 1
+                if num_read <= offset:
+                    continue
+
+                new_activity_id = checkpoint.activities_id_mapping.get(
+                    component_data.get("activity_id")
                 )
-                titles.append(title)
+                if new_activity_id is None and stage != "activity_exercise_titles":
+                    continue
 
-            if titles:
-                activity_exercise_titles_crud.create_activity_exercise_titles(
-                    titles, self.db
+                batch.append(
+                    (
+                        new_activity_id,
+                        self._prepare_activity_component(
+                            stage, component_data, new_activity_id
+                        ),
+                    )
                 )
-                self.counts["activity_exercise_titles"] += len(titles)
+                if len(batch) >= batch_size:
+                    self._add_activity_components(stage, batch)
+                    self.counts[stage] += len(batch)
+                    self._commit_batch(checkpoint, stage, num_read)
+                    batch = []
+
+                    profile_utils.check_timeout(
+                        timeout_seconds, start_time, ImportTimeoutError, "Import"
+                    )
+                    profile_utils.check_memory_usage(
+                        f"{stage} batch",
+                        self.performance_config.max_memory_mb,
+                        self.performance_config.enable_memory_monitoring,
+                    )
+
+        if batch:
+            self._add_activity_components(stage, batch)
+            self.counts[stage] += len(batch)
+            self._commit_batch(checkpoint, stage, num_read)
+
+        core_logger.print_to_log(f"Imported {self.counts[stage]} {stage}", "info")
 
     async def collect_and_import_activities_data_batched(
         self,
         zipf: zipfile.ZipFile,
         file_list: set[str],
-        gears_id_mapping: dict[int, int],
+        checkpoint: import_checkpoint.ImportCheckpoint,
         start_time: float,
         timeout_seconds: int,
-    ) -> dict[int, int]:
+    ) -> None:
         """
         Import activities in batches to manage memory.
 
+        Activities are parsed one at a time and every batch is committed in
+        one transaction. The ID mapping is kept in the checkpoint.
+
+        Activities with the signature of an activity the user already had
+        before the import are skipped, with their components and files.
+
         Args:
             zipf: ZipFile instance to read from.
             file_list: Set of file paths in ZIP.
-            gears_id_mapping: Mapping of old to new gear IDs.
+            checkpoint: Checkpoint of the import.
             start_time: Import operation start time.
             timeout_seconds: Timeout limit in seconds.
 
-        Returns:
-            Dictionary mapping old activity IDs to new IDs.
-
         Raises:
             ActivityLimitError: If too many activities.
             ImportTimeoutError: If operation times out.
         """
-        activities_id_mapping = {}
-
-        # Load activities list
-        activities_data = self._load_single_json(zipf, "data/activities.json")
-        if not activities_data:
+        filename = "data/activities.json"
+        if filename not in file_list:
             core_logger.print_to_log("No activities data to import", "info")
-            return activities_id_mapping
+            return
 
-        # Check activity count limit
-        if len(activities_data) > self.performance_config.max_activities:
+        # Count first so nothing is imported from an archive over the limit
+        num_activities = sum(1 for _ in self._iter_json_items(zipf, filename))
+        if num_activities > self.performance_config.max_activities:
             raise ActivityLimitError(
-                f"Too many activities ({len(activities_data)}). "
+                f"Too many activities ({num_activities}). "
                 f"Maximum allowed: {self.performance_config.max_activities}"
             )
 
-        # Load small component files that won't cause memory issues
-        activity_workout_steps_data = self._load_single_json(
-            zipf, "data/activity_workout_steps.json", check_memory=False
-        )
-        activity_media_data = self._load_single_json(
-            zipf, "data/activity_media.json", check_memory=False
-        )
-        activity_exercise_titles_data = self._load_single_json(
-            zipf, "data/activity_exercise_titles.json", check_memory=False
-        )
-
-        # Get list of split files for large components
-        laps_files = self._get_split_files_list(file_list, "data/activity_laps")
-        sets_files = self._get_split_files_list(file_list, "data/activity_sets")
-        streams_files = self._get_split_files_list(file_list, "data/activity_streams")
-
         core_logger.print_to_log(
-            f"Importing {len(activities_data)} activities with batched component loading",
-            "info",
+            f"Importing {num_activities} activities in batches", "info"
         )
 
-        # Process activities in batches
-        batch_size = self.performance_config.batch_size
-        for batch_start in range(0, len(activities_data), batch_size):
-            profile_utils.check_timeout(
-                timeout_seconds, start_time, ImportTimeoutError, "Import"
+        # Fixed on the first run, so a resumed import doesn't skip the
+        # activities it stored before being interrupted
+        if checkpoint.max_fingerprint_id is None:
+            checkpoint.max_fingerprint_id = (
+                activity_fingerprints_crud.get_max_fingerprint_id(self.db)
             )
+            checkpoint.save()
+        known_signatures = activity_fingerprints_crud.get_known_signatures(
+            self.user_id, None, self.db, checkpoint.max_fingerprint_id
+        )
 
-            batch_end = min(batch_start + batch_size, len(activities_data))
-            activities_batch = activities_data[batch_start:batch_end]
+        batch_size = self.performance_config.batch_size
+        offset = checkpoint.offsets.get("activities", 0)
+        num_added = 0
+        num_skipped = 0
+
+        for num_read, activity_data in enumerate(
+            self._iter_json_items(zipf, filename), start=1
+        ):
+            if num_read <= offset:
+                continue
 
-            core_logger.print_to_log(
-                f"Processing activities batch {batch_start//batch_size + 1}: "
-                f"activities {batch_start}-{batch_end}",
-                "info",
-            )
+            exported_start_time = activity_data.get("start_time")
+            if (
+                exported_start_time
+                and activity_fingerprints_utils.activity_signature(exported_start_time)
+                in known_signatures
+            ):
+                num_skipped += 1
+            else:
+                self._add_activity(activity_data, checkpoint)
+                num_added += 1
 
-            # Load components for this batch only
-            batch_laps = self._load_components_for_batch(
-                zipf, laps_files, activities_batch, "laps"
-            )
-            batch_sets = self._load_components_for_batch(
-                zipf, sets_files, activities_batch, "sets"
-            )
-            batch_streams = self._load_components_for_batch(
-                zipf, streams_files, activities_batch, "streams"
-            )
+            if num_added + num_skipped == batch_size or num_read == num_activities:
+                self.counts["activities"] += num_added
+                self.counts["activities_skipped"] += num_skipped
+                self._commit_batch(checkpoint, "activities", num_read)
+                core_metrics.count_skipped_imports("profile_import", num_skipped)
+                num_added = 0
+                num_skipped = 0
 
-            # Import activities in this batch
-            for activity_data in activities_batch:
-                activity_data["user_id"] = self.user_id
-                activity_data["gear_id"] = (
-                    gears_id_mapping.get(activity_data["gear_id"])
-                    if activity_data.get("gear_id") in gears_id_mapping
-                    else None
+                profile_utils.check_timeout(
+                    timeout_seconds, start_time, ImportTimeoutError, "Import"
                 )
-
-                original_activity_id = activity_data.get("id")
-                activity_data.pop("id", None)
-
-                activity = activity_schema.Activity(**activity_data)
-                new_activity = await activities_crud.create_activity(
-                    activity, self.websocket_manager, self.db, False
+                profile_utils.check_memory_usage(
+                    f"activities batch ending at {num_read}",
+                    self.performance_config.max_memory_mb,
+                    self.performance_config.enable_memory_monitoring,
                 )
 
-                if original_activity_id is not None and new_activity.id is not None:
-                    activities_id_mapping[original_activity_id] = new_activity.id
-
-                    # Import activity components using batch-loaded data
-                    await self.collect_and_import_activity_components(
-                        batch_laps,
-                        batch_sets,
-                        batch_streams,
-                        activity_workout_steps_data,
-                        activity_media_data,
-                        activity_exercise_titles_data,
-                        original_activity_id,
-                        new_activity.id,
-                    )
+        # Generate the AI insights of the new activities
+        activity_ai_insight_jobs_utils.wake_activity_ai_insight_worker()
 
-                self.counts["activities"] += 1
+        core_logger.print_to_log(
+            f"Imported {self.counts['activities']} activities, "
+            f"{self.counts['activities_skipped']} skipped as already stored",
+            "info",
+        )
 
-            # Clear batch data from memory
-            del batch_laps, batch_sets, batch_streams
-            profile_utils.check_memory_usage(
-                f"activities batch {batch_start//batch_size + 1}",
-                self.performance_config.max_memory_mb,
-                self.performance_config.enable_memory_monitoring,
-            )
+    def _add_activity(
+        self, activity_data: dict, checkpoint: import_checkpoint.ImportCheckpoint
+    ) -> None:
+        """
+        Add an exported activity without committing.
 
-        core_logger.print_to_log(
-            f"Imported {self.counts['activities']} activities", "info"
+        Args:
+            activity_data: Exported activity.
+            checkpoint: Checkpoint of the import, its ID mapping is updated.
+        """
+        activity_data["user_id"] = self.user_id
+        activity_data["gear_id"] = checkpoint.gears_id_mapping.get(
+            activity_data.get("gear_id")
         )
-        return activities_id_mapping
+        original_activity_id = activity_data.pop("id", None)
+
+        activity = activity_schema.Activity(**activity_data)
+        activities_crud.add_activity(activity, self.db)
+        if original_activity_id is not None and activity.id is not None:
+            checkpoint.activities_id_mapping[original_activity_id] = activity.id
 
     def _get_split_files_list(
         self, file_list: set[str], base_filename: str
@@ -1018,64 +1140,6 @@ class ImportService:
             return [single_file]
         return []
 
-    def _load_components_for_batch(
-        self,
-        zipf: zipfile.ZipFile,
-        component_files: list[str],
-        activities_batch: list[Any],
-        component_name: str,
-    ) -> list[Any]:
-        """
-        Load components only for activities in current batch.
-
-        Args:
-            zipf: ZipFile instance to read from.
-            component_files: List of component file paths.
-            activities_batch: Activities in current batch.
-            component_name: Name of component type.
-
-        Returns:
-            List of component data for batch activities.
-        """
-        if not component_files:
-            return []
-
-        # Get activity IDs in this batch
-        batch_activity_ids = set(
-            activity.get("id")
-            for activity in activities_batch
-            if activity.get("id") is not None
-        )
-
-        all_components = []
-
-        # Load and filter components from each file
-        for filename in component_files:
-            try:
-                components = json.loads(zipf.read(filename))
-                # Only keep components for activities in this batch
-                filtered = [
-                    comp
-                    for comp in components
-                    if comp.get("activity_id") in batch_activity_ids
-                ]
-                all_components.extend(filtered)
-
-                if filtered:
-                    core_logger.print_to_log(
-                        f"Loaded {len(filtered)}/{len(components)} {component_name} "
-                        f"from {filename} for batch",
-                        "debug",
-                    )
-            except json.JSONDecodeError as err:
-                core_logger.print_to_log(
-                    f"Failed to parse {filename}: {err}", "warning"
-                )
-            except Exception as err:
-                core_logger.print_to_log(f"Error loading {filename}: {err}", "warning")
-
-        return all_components
-
     async def collect_and_import_notifications_data(
         self, notifications_data: list[Any]
     ) -> None:
@@ -1223,10 +1287,8 @@ class ImportService:
 
                     new_file_name = f"{new_id}{ext}"
 
-                    # Read bytes from ZIP and save using file_uploads
-                    file_bytes = zipf.read(file_path)
-                    await file_uploads.save_file(
-                        file_bytes, core_config.FILES_PROCESSED_DIR, new_file_name
+                    self._extract_file(
+                        zipf, file_path, core_config.FILES_PROCESSED_DIR, new_file_name
                     )
                     self.counts["activity_files"] += 1
                 except ValueError:
@@ -1274,10 +1336,11 @@ class ImportService:
 
                         new_file_name = f"{new_id}_{suffix}{ext}"
 
-                        # Read bytes from ZIP and save using file_uploads
-                        file_bytes = zipf.read(file_path)
-                        await file_uploads.save_file(
-                            file_bytes, core_config.ACTIVITY_MEDIA_DIR, new_file_name
+                        self._extract_file(
+                            zipf,
+                            file_path,
+                            core_config.ACTIVITY_MEDIA_DIR,
+                            new_file_name,
                         )
                         self.counts["media"] += 1
                     except ValueError:
@@ -1315,9 +1378,25 @@ class ImportService:
                 ext = os.path.splitext(path)[1]
                 new_file_name = f"{self.user_id}{ext}"
 
-                # Read bytes from ZIP and save using file_uploads
-                file_bytes = zipf.read(file_path)
-                await file_uploads.save_file(
-                    file_bytes, core_config.USER_IMAGES_DIR, new_file_name
+                self._extract_file(
+                    zipf, file_path, core_config.USER_IMAGES_DIR, new_file_name
                 )
                 self.counts["user_images"] += 1
+
+    def _extract_file(
+        self, zipf: zipfile.ZipFile, member: str, directory: str, filename: str
+    ) -> None:
+        """
+        Copy a file from ZIP archive to disk in chunks.
+
+        Args:
+            zipf: ZipFile instance to read from.
+            member: Path of the file in ZIP.
+            directory: Directory to copy the file to.
+            filename: Name of the copied file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with zipf.open(member) as source, open(
+            os.path.join(directory, filename), "wb"
+        ) as target:
+            shutil.copyfileobj(source, target, SPOOL_CHUNK_BYTES)
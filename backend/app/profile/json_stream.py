@@ -0,0 +1,98 @@
+"""Incremental reader for large JSON arrays.
+
+The export writes each table as one JSON array, which json.load can
+only parse once the whole file is in memory. This module parses the
+array one item at a time instead:
+
+- iter_json_array reads a binary file in chunks and yields the items of
+  its top level array as they are decoded
+- Items split across chunks are decoded once more data is read, the read
+  size doubling until the item is complete
+- Memory use is bounded by the largest item, not by the file size
+"""
+
+import io
+import json
+import re
+from typing import IO, Any, Iterator
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+_EXPECT_ARRAY = 0
+_EXPECT_FIRST_ITEM = 1
+_EXPECT_ITEM = 2
+_EXPECT_SEPARATOR = 3
+
+
+def iter_json_array(file: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Yield the items of a JSON array one at a time.
+
+    Args:
+        file: Binary file containing a UTF-8 JSON array.
+        chunk_size: Number of characters read at once.
+
+    Yields:
+        The decoded items of the array, in order.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a valid JSON array.
+    """
+    reader = io.TextIOWrapper(file, encoding="utf-8")
+    buffer = ""
+    position = 0
+    eof = False
+    read_size = chunk_size
+    state = _EXPECT_ARRAY
+
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()
+        incomplete = False
+
+        if position < len(buffer):
+            char = buffer[position]
+            if state == _EXPECT_ARRAY:
+                if char != "[":
+                    raise json.JSONDecodeError("Expected a JSON array", buffer, position)
+                position += 1
+                state = _EXPECT_FIRST_ITEM
+                continue
+            if char == "]" and state in (_EXPECT_FIRST_ITEM, _EXPECT_SEPARATOR):
+                return
+            if state == _EXPECT_SEPARATOR:
+                if char != ",":
+                    raise json.JSONDecodeError(
+                        "Expected ',' or ']' in JSON array", buffer, position
+                    )
+                position += 1
+                state = _EXPECT_ITEM
+                continue
+
+            try:
+                item, end = _DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                incomplete = True
+            else:
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    position = end
+                    read_size = chunk_size
+                    state = _EXPECT_SEPARATOR
+                    yield item
+                    continue
+                incomplete = True
+
+        if eof:
+            raise json.JSONDecodeError("Unexpected end of JSON array", buffer, position)
+
+        chunk = reader.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+        if incomplete:
+            # Grow the reads while an item doesn't fit in the buffer
+            read_size *= 2
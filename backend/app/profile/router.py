@@ -10,11 +10,13 @@ This module provides FastAPI endpoints for:
 - Profile data export and import
 """
 
+import asyncio
 from typing import Annotated
 
 from datetime import datetime, timezone
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
     HTTPException,
     status,
@@ -62,6 +64,8 @@ import auth.mfa_backup_codes.crud as mfa_backup_codes_crud
 import users.users_sessions.crud as users_session_crud
 import users.users_sessions.schema as users_session_schema
 
+import activities.activity_zones.utils as activity_zones_utils
+
 import core.database as core_database
 import core.logger as core_logger
 import core.rate_limit as core_rate_limit
@@ -334,6 +338,7 @@ async def edit_user(
         Session,
         Depends(core_database.get_db),
     ],
+    background_tasks: BackgroundTasks,
 ) -> dict:
     """
     Edit user attributes in database.
@@ -342,6 +347,8 @@ async def edit_user(
         user_attributtes: Updated user attributes.
         token_user_id: User ID from access token.
         db: Database session.
+        background_tasks: Recomputes the activity zones if the max heart
+            rate, birthdate or FTP changed.
 
     Returns:
         Success message with user ID.
@@ -349,6 +356,11 @@ async def edit_user(
     # Update the user in the database
     await users_crud.edit_user(token_user_id, user_attributtes, db)
 
+    # Recompute the activity zones in the background if their settings changed
+    background_tasks.add_task(
+        activity_zones_utils.refresh_user_activity_zones_in_background, token_user_id
+    )
+
     # Return success message
     return {"message": f"User ID {user_attributtes.id} updated successfully"}
 
@@ -491,6 +503,10 @@ async def export_profile_data(
         Session,
         Depends(core_database.get_db),
     ],
+    websocket_manager: Annotated[
+        websocket_manager.WebSocketManager,
+        Depends(websocket_manager.get_websocket_manager),
+    ],
 ) -> StreamingResponse:
     """
     Export all profile data as ZIP archive.
@@ -498,6 +514,7 @@ async def export_profile_data(
     Args:
         token_user_id: User ID from access token.
         db: Database session.
+        websocket_manager: WebSocket manager for progress updates.
 
     Returns:
         Streaming response with ZIP archive.
@@ -521,7 +538,12 @@ async def export_profile_data(
     user_dict.pop("password", None)
 
     # Create export service and generate archive
-    export_service = profile_export_service.ExportService(token_user_id, db)
+    export_service = profile_export_service.ExportService(
+        token_user_id,
+        db,
+        websocket_manager=websocket_manager,
+        loop=asyncio.get_running_loop(),
+    )
 
     headers = {
         "Content-Disposition": f"attachment; filename=user_{token_user_id}_export.zip",
@@ -603,14 +625,11 @@ async def import_profile_data(
         ) from err
 
     try:
-        # Read the ZIP file data
-        zip_data = await file.read()
-
-        # Create import service and process the data
+        # Create import service and process the upload from disk
         import_service = profile_import_service.ImportService(
             token_user_id, db, websocket_manager
         )
-        result = await import_service.import_from_zip_data(zip_data)
+        result = await import_service.import_from_upload(file)
 
         core_logger.print_to_log(
             f"Successfully imported profile data for user {token_user_id}: {result['imported']}",
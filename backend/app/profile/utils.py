@@ -19,6 +19,7 @@ import time
 import psutil
 from io import BytesIO
 from fastapi import HTTPException, status
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Any, TypeVar
 
@@ -421,6 +422,8 @@ def sqlalchemy_obj_to_dict(obj: Any) -> dict[str, Any]:
     """
     if hasattr(obj, "__table__"):
         return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
     return obj
 
 
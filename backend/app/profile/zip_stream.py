@@ -0,0 +1,540 @@
+"""Streaming ZIP archive writer.
+
+zipfile.ZipFile seeks back to patch each local header, so an archive
+has to be staged in a file before it can be sent. This module writes a
+ZIP archive as a sequence of byte chunks instead, without ever seeking:
+
+- compress_entry compresses in memory data ahead of time, so entries can
+  be compressed in a worker pool while earlier ones are being sent
+- ZipStreamWriter turns compressed entries and files into the local
+  headers, data, data descriptors and central directory of the archive
+- StreamingZipFile exposes the writestr/write subset of zipfile.ZipFile
+  used by the export and sends the chunks to a callback
+- Files that are already compressed (FIT, gzip, images, ...) are stored
+  as is instead of being deflated again
+- ZIP64 records are written when an entry or the archive exceeds 4 GiB
+"""
+
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# Extensions of files whose content is already compressed
+STORED_EXTENSIONS = frozenset(
+    {
+        ".fit",
+        ".gz",
+        ".zip",
+        ".jpg",
+        ".jpeg",
+        ".png",
+        ".gif",
+        ".webp",
+        ".heic",
+        ".mp4",
+        ".mov",
+    }
+)
+
+# Largest size or offset a regular ZIP record can hold
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+_CREATE_SYSTEM_UNIX = 3
+_FILE_ATTRIBUTES = 0o100644 << 16
+
+_LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+_CENTRAL_HEADER = struct.Struct("<4sBBBBHHHHLLLHHHHHLL")
+_END_RECORD = struct.Struct("<4sHHHHLLH")
+_ZIP64_END_RECORD = struct.Struct("<4sQHHLLQQQQ")
+_ZIP64_END_LOCATOR = struct.Struct("<4sLQL")
+
+
+class ZipStreamError(Exception):
+    """
+    Raised when an entry can't be added to a streamed archive.
+    """
+
+    pass
+
+
+@dataclass
+class CompressedEntry:
+    """
+    In memory archive entry, compressed ahead of being written.
+
+    Attributes:
+        name: Path of the entry in the archive.
+        method: ZIP_STORED or ZIP_DEFLATED.
+        crc: CRC-32 of the uncompressed data.
+        size: Size of the uncompressed data.
+        data: Compressed data.
+        date_time: Modification time as a time.struct_time.
+    """
+
+    name: str
+    method: int
+    crc: int
+    size: int
+    data: bytes
+    date_time: time.struct_time
+
+
+@dataclass
+class _CentralDirectoryEntry:
+    name: bytes
+    flags: int
+    method: int
+    dos_time: int
+    dos_date: int
+    crc: int
+    compressed_size: int
+    size: int
+    offset: int
+
+
+def should_store(name: str) -> bool:
+    """
+    Return whether a file is already compressed and should be stored.
+
+    Args:
+        name: File name or path.
+
+    Returns:
+        True if the file extension is in STORED_EXTENSIONS.
+    """
+    return os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+
+
+def compress_entry(name: str, data: bytes | str, compresslevel: int) -> CompressedEntry:
+    """
+    Compress in memory data into an archive entry.
+
+    Safe to run in worker threads, zlib releases the GIL while compressing.
+
+    Args:
+        name: Path of the entry in the archive.
+        data: Data of the entry, strings are encoded as UTF-8.
+        compresslevel: Deflate compression level (0-9).
+
+    Returns:
+        The compressed entry.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    if should_store(name):
+        method, compressed = ZIP_STORED, data
+    else:
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+        method, compressed = ZIP_DEFLATED, compressor.compress(data) + compressor.flush()
+
+    return CompressedEntry(
+        name=name,
+        method=method,
+        crc=zlib.crc32(data),
+        size=len(data),
+        data=compressed,
+        date_time=time.localtime(),
+    )
+
+
+def _dos_date_time(date_time: time.struct_time) -> tuple[int, int]:
+    """Return the MS-DOS time and date of a timestamp."""
+    year = min(max(date_time.tm_year, 1980), 2107)
+    dos_time = (
+        date_time.tm_hour << 11 | date_time.tm_min << 5 | date_time.tm_sec // 2
+    )
+    dos_date = (year - 1980) << 9 | date_time.tm_mon << 5 | date_time.tm_mday
+    return dos_time, dos_date
+
+
+class ZipStreamWriter:
+    """
+    Write a ZIP archive as byte chunks, without seeking.
+
+    Attributes:
+        bytes_written: Number of archive bytes produced so far.
+    """
+
+    def __init__(self, compresslevel: int = 6, read_size: int = 64 * 1024):
+        """
+        Initialize the writer.
+
+        Args:
+            compresslevel: Deflate compression level of file entries.
+            read_size: Number of bytes read from files at once.
+        """
+        self.compresslevel = compresslevel
+        self.read_size = read_size
+        self.bytes_written = 0
+        self._entries: list[_CentralDirectoryEntry] = []
+        self._names: set[str] = set()
+
+    def _emit(self, data: bytes) -> bytes:
+        self.bytes_written += len(data)
+        return data
+
+    def _local_header(
+        self,
+        entry: _CentralDirectoryEntry,
+        zip64: bool,
+    ) -> bytes:
+        extra = b""
+        compressed_size, size = entry.compressed_size, entry.size
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, size, compressed_size)
+            compressed_size = size = 0xFFFFFFFF
+        return _LOCAL_HEADER.pack(
+            b"PK\x03\x04",
+            _VERSION_ZIP64 if zip64 else _VERSION_DEFAULT,
+            entry.flags,
+            entry.method,
+            entry.dos_time,
+            entry.dos_date,
+            entry.crc,
+            compressed_size,
+            size,
+            len(entry.name),
+            len(extra),
+        ) + entry.name + extra
+
+    def _register(
+        self, name: str, flags: int, method: int, date_time: time.struct_time
+    ) -> _CentralDirectoryEntry:
+        if name in self._names:
+            raise ZipStreamError(f"Duplicate archive entry: {name}")
+        self._names.add(name)
+
+        dos_time, dos_date = _dos_date_time(date_time)
+        entry = _CentralDirectoryEntry(
+            name=name.encode("utf-8"),
+            flags=flags | _FLAG_UTF8,
+            method=method,
+            dos_time=dos_time,
+            dos_date=dos_date,
+            crc=0,
+            compressed_size=0,
+            size=0,
+            offset=self.bytes_written,
+        )
+        self._entries.append(entry)
+        return entry
+
+    def write_entry(self, compressed: CompressedEntry) -> Iterator[bytes]:
+        """
+        Write an entry compressed by compress_entry.
+
+        Args:
+            compressed: The compressed entry.
+
+        Yields:
+            The local header and the data of the entry.
+
+        Raises:
+            ZipStreamError: If the archive already has an entry with this name.
+        """
+        entry = self._register(
+            compressed.name, 0, compressed.method, compressed.date_time
+        )
+        entry.crc = compressed.crc
+        entry.size = compressed.size
+        entry.compressed_size = len(compressed.data)
+
+        zip64 = max(entry.size, entry.compressed_size) > ZIP64_LIMIT
+        yield self._emit(self._local_header(entry, zip64))
+        yield self._emit(compressed.data)
+
+    def write_file(
+        self, path: str, arcname: str, compress: bool | None = None
+    ) -> Iterator[bytes]:
+        """
+        Write a file, reading it in chunks.
+
+        The CRC and sizes are only known once the file is read, so they
+        follow the data in a data descriptor.
+
+        Args:
+            path: Path of the file on disk.
+            arcname: Path of the entry in the archive.
+            compress: Whether to deflate the file, by default files that
+                are already compressed are stored.
+
+        Yields:
+            The local header, the data and the data descriptor of the entry.
+
+        Raises:
+            ZipStreamError: If the archive already has an entry with this
+                name, or the file grew past 4 GiB while being read.
+        """
+        if compress is None:
+            compress = not should_store(arcname)
+
+        stat = os.stat(path)
+        entry = self._register(
+            arcname,
+            _FLAG_DATA_DESCRIPTOR,
+            ZIP_DEFLATED if compress else ZIP_STORED,
+            time.localtime(stat.st_mtime),
+        )
+        # Deflate can grow incompressible data slightly
+        zip64 = stat.st_size * 1.05 > ZIP64_LIMIT
+        yield self._emit(self._local_header(entry, zip64))
+
+        compressor = (
+            zlib.compressobj(self.compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+            if compress
+            else None
+        )
+        crc = size = compressed_size = 0
+        with open(path, "rb") as file:
+            while chunk := file.read(self.read_size):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    compressed_size += len(chunk)
+                    yield self._emit(chunk)
+        if compressor is not None:
+            chunk = compressor.flush()
+            compressed_size += len(chunk)
+            yield self._emit(chunk)
+
+        entry.crc = crc
+        entry.size = size
+        entry.compressed_size = compressed_size
+        if zip64:
+            descriptor = struct.pack(
+                "<4sLQQ", b"PK\x07\x08", crc, compressed_size, size
+            )
+        else:
+            if max(size, compressed_size) > ZIP64_LIMIT:
+                raise ZipStreamError(f"File grew past the ZIP64 limit: {path}")
+            descriptor = struct.pack(
+                "<4sLLL", b"PK\x07\x08", crc, compressed_size, size
+            )
+        yield self._emit(descriptor)
+
+    def close(self) -> Iterator[bytes]:
+        """
+        Write the central directory and the end of the archive.
+
+        Yields:
+            The central directory and end records.
+        """
+        central_directory_offset = self.bytes_written
+        for entry in self._entries:
+            extra_values = []
+            size, compressed_size, offset = (
+                entry.size,
+                entry.compressed_size,
+                entry.offset,
+            )
+            if size > ZIP64_LIMIT:
+                extra_values.append(size)
+                size = 0xFFFFFFFF
+            if compressed_size > ZIP64_LIMIT:
+                extra_values.append(compressed_size)
+                compressed_size = 0xFFFFFFFF
+            if offset > ZIP64_LIMIT:
+                extra_values.append(offset)
+                offset = 0xFFFFFFFF
+
+            extra = b""
+            if extra_values:
+                extra = struct.pack(
+                    f"<HH{len(extra_values)}Q",
+                    1,
+                    8 * len(extra_values),
+                    *extra_values,
+                )
+            version = _VERSION_ZIP64 if extra_values else _VERSION_DEFAULT
+            yield self._emit(
+                _CENTRAL_HEADER.pack(
+                    b"PK\x01\x02",
+                    version,
+                    _CREATE_SYSTEM_UNIX,
+                    version,
+                    0,
+                    entry.flags,
+                    entry.method,
+                    entry.dos_time,
+                    entry.dos_date,
+                    entry.crc,
+                    compressed_size,
+                    size,
+                    len(entry.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    _FILE_ATTRIBUTES,
+                    offset,
+                )
+                + entry.name
+                + extra
+            )
+
+        count = len(self._entries)
+        central_directory_size = self.bytes_written - central_directory_offset
+        if (
+            count > ZIP_FILECOUNT_LIMIT
+            or central_directory_offset > ZIP64_LIMIT
+            or central_directory_size > ZIP64_LIMIT
+        ):
+            zip64_end_offset = self.bytes_written
+            yield self._emit(
+                _ZIP64_END_RECORD.pack(
+                    b"PK\x06\x06",
+                    _ZIP64_END_RECORD.size - 12,
+                    _VERSION_ZIP64,
+                    _VERSION_ZIP64,
+                    0,
+                    0,
+                    count,
+                    count,
+                    central_directory_size,
+                    central_directory_offset,
+                )
+            )
+            yield self._emit(
+                _ZIP64_END_LOCATOR.pack(b"PK\x06\x07", 0, zip64_end_offset, 1)
+            )
+            count = min(count, 0xFFFF)
+            central_directory_size = min(central_directory_size, 0xFFFFFFFF)
+            central_directory_offset = min(central_directory_offset, 0xFFFFFFFF)
+
+        yield self._emit(
+            _END_RECORD.pack(
+                b"PK\x05\x06",
+                0,
+                0,
+                count,
+                count,
+                central_directory_size,
+                central_directory_offset,
+                0,
+            )
+        )
+
+
+class StreamingZipFile:
+    """
+    zipfile.ZipFile like archive that sends its bytes as they are produced.
+
+    In memory entries are compressed in an optional executor, a few
+    entries ahead of the one being sent. Entries keep the order they were
+    added in.
+
+    Attributes:
+        writer: The underlying ZipStreamWriter.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes], None],
+        compresslevel: int = 6,
+        chunk_size: int = 64 * 1024,
+        executor: Executor | None = None,
+        max_pending: int = 4,
+    ):
+        """
+        Initialize the archive.
+
+        Args:
+            send: Called with each chunk of the archive, in order.
+            compresslevel: Deflate compression level.
+            chunk_size: Minimum size of the chunks passed to send, except
+                the last one.
+            executor: Executor compressing in memory entries, None to
+                compress them in the calling thread.
+            max_pending: Number of entries compressed ahead.
+        """
+        self.writer = ZipStreamWriter(compresslevel, max(chunk_size, 8192))
+        self._send = send
+        self._compresslevel = compresslevel
+        self._chunk_size = chunk_size
+        self._executor = executor
+        self._max_pending = max(max_pending, 1)
+        self._pending: deque[Future] = deque()
+        self._buffer = bytearray()
+
+    def __enter__(self) -> "StreamingZipFile":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't leave compression jobs running for an aborted archive
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+
+    def _write(self, chunks: Iterator[bytes]) -> None:
+        for chunk in chunks:
+            self._buffer += chunk
+            if len(self._buffer) >= self._chunk_size:
+                self._send(bytes(self._buffer))
+                self._buffer.clear()
+
+    def _write_pending(self, block: bool) -> None:
+        while self._pending and (
+            block
+            or len(self._pending) > self._max_pending
+            or self._pending[0].done()
+        ):
+            self._write(self.writer.write_entry(self._pending.popleft().result()))
+
+    def writestr(self, arcname: str, data: bytes | str) -> None:
+        """
+        Add an entry with in memory data.
+
+        Args:
+            arcname: Path of the entry in the archive.
+            data: Data of the entry, strings are encoded as UTF-8.
+        """
+        if self._executor is None:
+            self._write(
+                self.writer.write_entry(
+                    compress_entry(arcname, data, self._compresslevel)
+                )
+            )
+            return
+
+        self._pending.append(
+            self._executor.submit(compress_entry, arcname, data, self._compresslevel)
+        )
+        self._write_pending(block=False)
+
+    def write(self, filename: str, arcname: str | None = None) -> None:
+        """
+        Add a file, reading it in chunks.
+
+        Args:
+            filename: Path of the file on disk.
+            arcname: Path of the entry in the archive, defaults to filename.
+        """
+        self._write_pending(block=True)
+        self._write(self.writer.write_file(filename, arcname or filename))
+
+    def close(self) -> None:
+        """Write the pending entries and the central directory."""
+        self._write_pending(block=True)
+        self._write(self.writer.close())
+        if self._buffer:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
@@ -10,6 +10,7 @@ Exports:
     - Schemas: ServerSettings, ServerSettingsEdit, ServerSettingsRead,
       ServerSettingsReadPublic
     - Utilities: get_server_settings_or_404 (wrapper), get_tile_maps_templates
+    - Snapshot: get_server_settings_snapshot (dependency), ServerSettingsSnapshot
     - Models: ServerSettings (ORM model)
     - Enums: Units, Currency, PasswordType
 """
@@ -21,6 +22,7 @@ from .schema import (
     ServerSettings,
     ServerSettingsBase,
     ServerSettingsEdit,
+    ServerSettingsFrozen,
     ServerSettingsRead,
     ServerSettingsReadPublic,
     TileMapsTemplate,
@@ -28,6 +30,7 @@ from .schema import (
     Currency,
     PasswordType,
 )
+from .snapshot import ServerSettingsSnapshot, get_server_settings_snapshot
 from .utils import get_server_settings_or_404, get_tile_maps_templates
 
 __all__ = [
@@ -40,6 +43,7 @@ __all__ = [
     "ServerSettings",
     "ServerSettingsBase",
     "ServerSettingsEdit",
+    "ServerSettingsFrozen",
     "ServerSettingsRead",
     "ServerSettingsReadPublic",
     "TileMapsTemplate",
@@ -50,4 +54,7 @@ __all__ = [
     # Utility functions
     "get_server_settings_or_404",
     "get_tile_maps_templates",
+    # Settings snapshot
+    "ServerSettingsSnapshot",
+    "get_server_settings_snapshot",
 ]
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 import server_settings.schema as server_settings_schema
 import server_settings.models as server_settings_models
-import server_settings.utils as server_settings_utils
+import server_settings.snapshot as server_settings_snapshot
 
 import core.cryptography as core_cryptography
 import core.decorators as core_decorators
@@ -31,6 +31,57 @@ def get_server_settings(db: Session) -> server_settings_models.ServerSettings |
     return db.execute(stmt).scalar_one_or_none()
 
 
+def get_server_settings_row_or_404(
+    db: Session,
+) -> server_settings_models.ServerSettings:
+    """
+    Retrieve the server settings row to change it, or raise 404.
+
+    Unlike server_settings_utils.get_server_settings_or_404, always
+    queries the database and returns the ORM instance.
+
+    Args:
+        db: Database session.
+
+    Returns:
+        ServerSettings instance.
+
+    Raises:
+        HTTPException: If settings not found or database error.
+    """
+    db_server_settings = get_server_settings(db)
+
+    if not db_server_settings:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Server settings not found",
+        ) from None
+
+    return db_server_settings
+
+
+def _commit_server_settings(
+    db_server_settings: server_settings_models.ServerSettings, db: Session
+) -> None:
+    """
+    Commit a change of the server settings and publish it to all workers.
+
+    Args:
+        db_server_settings: Changed ServerSettings instance.
+        db: Database session.
+    """
+    # Delivered to the other workers when the transaction commits
+    server_settings_snapshot.notify_server_settings_changed(db)
+
+    # Commit the transaction
+    db.commit()
+    # Refresh the object to ensure it reflects database state
+    db.refresh(db_server_settings)
+
+    # Don't wait for the notification to drop the snapshot of this worker
+    server_settings_snapshot.get_server_settings_cache().invalidate()
+
+
 @core_decorators.handle_db_errors
 def edit_server_settings(
     server_settings: server_settings_schema.ServerSettingsEdit, db: Session
@@ -49,7 +100,7 @@ def edit_server_settings(
         HTTPException: If settings not found or database error.
     """
     # Get the server_settings from the database
-    db_server_settings = server_settings_utils.get_server_settings_or_404(db)
+    db_server_settings = get_server_settings_row_or_404(db)
 
     if server_settings.tileserver_api_key is not None:
         # Encrypt the tile server API key before storing
@@ -64,10 +115,7 @@ def edit_server_settings(
     for key, value in server_settings_data.items():
         setattr(db_server_settings, key, value)
 
-    # Commit the transaction
-    db.commit()
-    # Refresh the object to ensure it reflects database state
-    db.refresh(db_server_settings)
+    _commit_server_settings(db_server_settings, db)
 
     return db_server_settings
 
@@ -75,11 +123,8 @@ def edit_server_settings(
 @core_decorators.handle_db_errors
 def update_server_settings_login_photo_set(is_set: bool, db: Session) -> None:
     # Get the server_settings from the database
-    db_server_settings = server_settings_utils.get_server_settings_or_404(db)
+    db_server_settings = get_server_settings_row_or_404(db)
 
     db_server_settings.login_photo_set = is_set
 
-    # Commit the transaction
-    db.commit()
-    # Refresh the object to ensure it reflects database state
-    db.refresh(db_server_settings)
+    _commit_server_settings(db_server_settings, db)
@@ -1,12 +1,11 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Request, Response
-from sqlalchemy.orm import Session
 
 import server_settings.schema as server_settings_schema
+import server_settings.snapshot as server_settings_snapshot
 import server_settings.utils as server_settings_utils
 
-import core.database as core_database
 import core.rate_limit as core_rate_limit
 
 # Define the API router
@@ -18,9 +17,9 @@ router = APIRouter()
 async def read_public_server_settings(
     request: Request,
     response: Response,
-    db: Annotated[
-        Session,
-        Depends(core_database.get_db),
+    snapshot: Annotated[
+        server_settings_snapshot.ServerSettingsSnapshot,
+        Depends(server_settings_snapshot.get_server_settings_snapshot),
     ],
 ) -> server_settings_schema.ServerSettingsReadPublic:
     """
@@ -32,12 +31,15 @@ async def read_public_server_settings(
     Returns only the public subset of server configuration
     (sensitive signup approval/verification settings excluded).
     Pydantic model filtering automatically excludes sensitive fields.
+    Served from the settings snapshot, without querying the database.
 
     Returns:
         Public subset of server configuration.
     """
-    # Pydantic model_validate handles field filtering automatically
-    return server_settings_utils.get_server_settings_or_404(db)
+    # Read the public fields only, the snapshot holds all of them
+    return server_settings_schema.ServerSettingsReadPublic.model_validate(
+        snapshot.settings, from_attributes=True
+    )
 
 
 @router.get(
@@ -9,7 +9,6 @@ from fastapi import (
     Security,
     UploadFile,
     HTTPException,
-    Request,
     status,
 )
 from sqlalchemy.orm import Session
@@ -24,7 +23,6 @@ import server_settings.utils as server_settings_utils
 import auth.security as auth_security
 
 import core.database as core_database
-import core.logger as core_logger
 import core.config as core_config
 import core.file_uploads as core_file_uploads
 
@@ -91,7 +89,6 @@ async def list_tile_maps_templates(
     status_code=status.HTTP_201_CREATED,
 )
 async def edit_server_settings(
-    request: Request,
     server_settings_attributes: server_settings_schema.ServerSettingsEdit,
     _check_scopes: Annotated[
         Callable,
@@ -106,31 +103,16 @@ async def edit_server_settings(
     Update server settings.
 
     Requires admin authentication with server_settings:write scope.
+    The settings snapshot of every worker, allowed tile domains included,
+    is reloaded once the change is committed.
 
     Args:
-        request: FastAPI request object for accessing app state.
         server_settings_attributes: Settings to update.
 
     Returns:
         Updated server settings configuration.
     """
-    result = server_settings_crud.edit_server_settings(server_settings_attributes, db)
-
-    # Update allowed tile domains in app.state if tileserver_url changed
-    if server_settings_attributes.tileserver_url is not None:
-        try:
-            request.app.state.allowed_tile_domains = (
-                server_settings_utils.get_allowed_tile_domains(db)
-            )
-            core_logger.print_to_log(
-                f"Updated allowed tile domains: {request.app.state.allowed_tile_domains}"
-            )
-        except Exception as e:
-            core_logger.print_to_log(
-                f"Error updating tile domains in app.state: {e}", "error", exc=e
-            )
-
-    return result
+    return server_settings_crud.edit_server_settings(server_settings_attributes, db)
 
 
 @router.post(
@@ -292,6 +292,17 @@ class ServerSettingsRead(ServerSettingsEdit):
     """
 
 
+class ServerSettingsFrozen(ServerSettingsRead):
+    """
+    Immutable server settings held by the in-process settings snapshot.
+
+    Same fields as ServerSettingsRead, with the API key still encrypted.
+    Assigning a field raises a validation error.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+
 class ServerSettingsReadPublic(ServerSettingsBase):
     """
     Public-facing schema for unauthenticated server settings access.
@@ -0,0 +1,237 @@
+"""In-process snapshot of the server settings shared by the requests.
+
+Each worker reads the server_settings row once and keeps it as an
+immutable snapshot, so the requests reading the settings, public share
+pages included, don't query the table:
+
+- get_server_settings_snapshot returns the snapshot, loading it on
+  first use, and is the FastAPI dependency of the routes needing it
+- Every invalidation bumps the cache version, so a snapshot loaded
+  before a change is never kept after it
+- Changes are published with pg_notify in the transaction writing them,
+  and every worker listening on the channel drops its snapshot
+- The listener drops the snapshot again each time it connects, in case
+  a change was missed while it was disconnected
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+import psycopg
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import core.database as core_database
+import core.logger as core_logger
+
+import server_settings.crud as server_settings_crud
+import server_settings.schema as server_settings_schema
+import server_settings.utils as server_settings_utils
+
+# Postgres channel settings changes are published on
+NOTIFY_CHANNEL = "server_settings_changed"
+
+# Delay before the listener reconnects after a database error
+LISTEN_RECONNECT_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class ServerSettingsSnapshot:
+    """
+    Immutable view of the server settings.
+
+    Attributes:
+        version: Cache version the snapshot was loaded at.
+        settings: Server settings, API key encrypted.
+        allowed_tile_domains: Domains allowed by the CSP img-src
+            directive for map tiles.
+    """
+
+    version: int
+    settings: server_settings_schema.ServerSettingsFrozen
+    allowed_tile_domains: tuple[str, ...]
+
+
+class ServerSettingsCache:
+    """
+    Hold the server settings snapshot of this worker.
+
+    Attributes:
+        version: Incremented on every invalidation.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache with no snapshot loaded."""
+        self.version = 0
+        self._snapshot: ServerSettingsSnapshot | None = None
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._listen_task: asyncio.Task | None = None
+
+    @property
+    def snapshot(self) -> ServerSettingsSnapshot | None:
+        """Snapshot currently held, None if not loaded."""
+        return self._snapshot
+
+    def get(self, db: Session | None = None) -> ServerSettingsSnapshot:
+        """
+        Return the snapshot, loading it if needed.
+
+        Args:
+            db: Session to load the snapshot with, a new one if None.
+
+        Returns:
+            The server settings snapshot.
+
+        Raises:
+            HTTPException: If the server settings are not found or a
+                database error occurs.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._load_lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+
+            version = self.version
+            if db is None:
+                with core_database.SessionLocal() as session:
+                    snapshot = _load_snapshot(session, version)
+            else:
+                snapshot = _load_snapshot(db, version)
+
+            with self._state_lock:
+                # Keep it only if no change was published during the load
+                if version == self.version:
+                    self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot, the next get loads a new one."""
+        with self._state_lock:
+            self.version += 1
+            self._snapshot = None
+
+    def start_listener(self) -> None:
+        """Start listening for the settings changes of the other workers."""
+        if self._listen_task is None or self._listen_task.done():
+            self._listen_task = asyncio.create_task(self._listen())
+
+    def stop_listener(self) -> None:
+        """Stop listening for the settings changes of the other workers."""
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            self._listen_task = None
+
+    async def _listen(self) -> None:
+        """Reload the snapshot on NOTIFY_CHANNEL, reconnecting on errors."""
+        conninfo = core_database.get_conninfo()
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    core_logger.print_to_log(
+                        f"Listening for server settings changes on {NOTIFY_CHANNEL}",
+                        "debug",
+                    )
+                    await self._reload()
+                    async for _notify in connection.notifies():
+                        await self._reload()
+            except psycopg.Error as err:
+                core_logger.print_to_log(
+                    f"Server settings listener connection lost: {err}", "warning"
+                )
+            await asyncio.sleep(LISTEN_RECONNECT_SECONDS)
+
+    async def _reload(self) -> None:
+        """Drop the snapshot and load a new one off the event loop."""
+        self.invalidate()
+        try:
+            await asyncio.to_thread(self.get)
+        except Exception as err:
+            core_logger.print_to_log(
+                f"Error reloading server settings: {err}", "warning", exc=err
+            )
+
+
+def _load_snapshot(db: Session, version: int) -> ServerSettingsSnapshot:
+    """
+    Read the server settings into a snapshot.
+
+    Args:
+        db: Database session.
+        version: Cache version the snapshot is loaded at.
+
+    Returns:
+        The server settings snapshot.
+
+    Raises:
+        HTTPException: If server settings not found.
+    """
+    db_server_settings = server_settings_crud.get_server_settings(db)
+
+    if not db_server_settings:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Server settings not found",
+        ) from None
+
+    settings = server_settings_schema.ServerSettingsFrozen.model_validate(
+        db_server_settings
+    )
+    return ServerSettingsSnapshot(
+        version=version,
+        settings=settings,
+        allowed_tile_domains=tuple(
+            server_settings_utils.build_allowed_tile_domains(settings.tileserver_url)
+        ),
+    )
+
+
+def notify_server_settings_changed(db: Session) -> None:
+    """
+    Publish a settings change to all workers when db commits.
+
+    Args:
+        db: Session of the transaction changing the settings.
+    """
+    db.execute(
+        text("SELECT pg_notify(:channel, '')"),
+        {"channel": NOTIFY_CHANNEL},
+    )
+
+
+@lru_cache(maxsize=1)
+def get_server_settings_cache() -> ServerSettingsCache:
+    """
+    Get the singleton server settings cache instance.
+
+    Returns:
+        The shared ServerSettingsCache instance.
+    """
+    return ServerSettingsCache()
+
+
+def get_server_settings_snapshot() -> ServerSettingsSnapshot:
+    """
+    Return the server settings snapshot of this worker.
+
+    Used as a FastAPI dependency. Only queries the database when the
+    snapshot is not loaded yet or was invalidated.
+
+    Returns:
+        The server settings snapshot.
+
+    Raises:
+        HTTPException: If the server settings are not found or a
+            database error occurs.
+    """
+    return get_server_settings_cache().get()
@@ -1,13 +1,12 @@
 from urllib.parse import urlparse
-from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 import core.cryptography as core_cryptography
 import core.logger as core_logger
 
 import server_settings.crud as server_settings_crud
-import server_settings.models as server_settings_models
 import server_settings.schema as server_settings_schema
+import server_settings.snapshot as server_settings_snapshot
 
 
 TILE_MAPS_TEMPLATES = {
@@ -54,28 +53,27 @@ TILE_MAPS_TEMPLATES = {
 }
 
 
-def get_server_settings_or_404(db: Session) -> server_settings_models.ServerSettings:
+def get_server_settings_or_404(
+    db: Session,
+) -> server_settings_schema.ServerSettingsFrozen:
     """
     Get server settings or raise 404.
 
+    Served from the in-process settings snapshot, the database is only
+    queried when the snapshot is not loaded. The settings returned are
+    immutable: use server_settings_crud.get_server_settings_row_or_404
+    to change them.
+
     Args:
-        db: Database session.
+        db: Database session, used if the snapshot needs loading.
 
     Returns:
-        ServerSettings instance.
+        Frozen server settings.
 
     Raises:
         HTTPException: If server settings not found.
     """
-    server_settings = server_settings_crud.get_server_settings(db)
-
-    if not server_settings:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Server settings not found",
-        ) from None
-
-    return server_settings
+    return server_settings_snapshot.get_server_settings_cache().get(db).settings
 
 
 def get_server_settings_for_admin(
@@ -175,6 +173,31 @@ def extract_domain_from_tile_url(url: str) -> str | None:
         return None
 
 
+def build_allowed_tile_domains(tileserver_url: str | None) -> list[str]:
+    """
+    Build the list of allowed tile domains for a tile server URL.
+
+    Args:
+        tileserver_url: Tile server URL template of the server settings.
+
+    Returns:
+        Built-in tile provider domains, plus the domain of the tile server
+        if it is not one of them.
+    """
+    # Start with built-in providers
+    allowed_domains: list[str] = (
+        server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS.copy()
+    )
+
+    # Add custom tile server domain if configured
+    if tileserver_url:
+        custom_domain = extract_domain_from_tile_url(tileserver_url)
+        if custom_domain and custom_domain not in allowed_domains:
+            allowed_domains.append(custom_domain)
+
+    return allowed_domains
+
+
 def get_allowed_tile_domains(db: Session) -> list[str]:
     """
     Get list of allowed tile domains for CSP img-src directive.
@@ -189,24 +212,13 @@ def get_allowed_tile_domains(db: Session) -> list[str]:
     Returns:
         List of domain patterns for CSP (e.g., ['https://*.tile.openstreetmap.org', 'https://*.stadiamaps.com']).
     """
-    # Start with built-in providers
-    allowed_domains: list[str] = (
-        server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS.copy()
-    )
-
-    # Add custom tile server domain if configured
     try:
         server_settings = get_server_settings_or_404(db)
-        if server_settings and server_settings.tileserver_url:
-            custom_domain = extract_domain_from_tile_url(server_settings.tileserver_url)
-            if custom_domain and custom_domain not in allowed_domains:
-                allowed_domains.append(custom_domain)
+        return build_allowed_tile_domains(server_settings.tileserver_url)
     except Exception:
         # If we can't get server settings, just use built-in providers
         core_logger.print_to_log(
             "Error retrieving server settings for allowed tile domains, using defaults",
             "debug",
         )
-        pass
-
-    return allowed_domains
+        return server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS.copy()
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
@@ -7,16 +9,21 @@ from timezonefinder import TimezoneFinder
 
 import core.logger as core_logger
 import core.config as core_config
+import core.metrics as core_metrics
 
 import activities.activity.schema as activities_schema
 import activities.activity.crud as activities_crud
 import activities.activity.utils as activities_utils
 
+import activities.activity_fingerprints.crud as activity_fingerprints_crud
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
+
 import activities.activity_laps.crud as activity_laps_crud
 
 import activities.activity_streams.schema as activity_streams_schema
 import activities.activity_streams.crud as activity_streams_crud
 
+import users.users_integrations.crud as user_integrations_crud
 import users.users_integrations.models as user_integrations_models
 
 import users.users_default_gear.utils as user_default_gear_utils
@@ -29,6 +36,7 @@ import users.users.crud as users_crud
 
 import gears.gear.crud as gears_crud
 
+import strava.rate_limiter as strava_rate_limiter
 import strava.utils as strava_utils
 
 import websocket.manager as websocket_manager
@@ -45,15 +53,52 @@ async def fetch_and_process_activities(
     ws_manager: websocket_manager.WebSocketManager,
     db: Session,
     is_startup: bool = False,
-) -> int:
+    update_sync_cursor: bool = False,
+) -> list[activities_schema.Activity] | None:
+    """
+    Fetch, parse and store the Strava activities of a user in a date range.
+
+    The details, streams and laps of up to STRAVA_SYNC_MAX_FETCHES_PER_USER
+    activities are fetched at the same time in worker threads, within the
+    quota of the user's Strava application. Activities are parsed and
+    stored in start date order on the event loop.
+
+    Args:
+        strava_client: Strava client of the user.
+        start_date: Fetch activities started after this date.
+        end_date: Fetch activities started before this date.
+        user_id: The ID of the user.
+        user_integrations: The user's integrations.
+        ws_manager: Websocket manager to notify new activities.
+        db: Database session.
+        is_startup: Whether errors are only logged instead of raised.
+        update_sync_cursor: Whether to store the start date of the latest
+            activity synced without gaps as the user's sync cursor.
+
+    Returns:
+        The stored activities, or None (0 if the activities can't be
+        listed) if no activity was stored.
+
+    Raises:
+        HTTPException: If the activities can't be listed and is_startup is
+            False.
+    """
+    rate_limiter = strava_utils.get_strava_rate_limiter(user_integrations)
+
     # set the strava activities to None
     strava_activities = None
 
     # Fetch Strava activities after the specified start date
     try:
-        strava_activities = list(
-            strava_client.get_activities(after=start_date, before=end_date)
-        )
+        await rate_limiter.acquire(1)
+        try:
+            strava_activities = await asyncio.to_thread(
+                lambda: list(
+                    strava_client.get_activities(after=start_date, before=end_date)
+                )
+            )
+        finally:
+            rate_limiter.release(1)
     except AccessUnauthorized as auth_err:
         # Log a more specific error message for authentication issues
         core_logger.print_to_log(
@@ -108,54 +153,206 @@ async def fetch_and_process_activities(
         users_privacy_settings_crud.get_user_privacy_settings_by_user_id(user.id, db)
     )
 
-    processed_activities = []
+    # Fetch the oldest activities first so the cursor can advance
+    strava_activities.sort(key=lambda activity: activity.start_date)
+    new_activities = [
+        activity
+        for activity in strava_activities
+        if strava_utils.fetch_and_validate_activity(activity.id, user_id, db) is None
+    ]
 
-    # Process the activities
-    for activity in strava_activities:
-        processed_activities.append(
-            await process_activity(
-                activity,
-                user_id,
-                user_privacy_settings,
-                strava_client,
-                user_integrations,
-                ws_manager,
-                db,
-            )
+    # Skip the activities already stored from another source (e.g. a file)
+    # before fetching their details, streams and laps
+    signatures = {
+        activity.id: activity_fingerprints_utils.activity_signature(activity.start_date)
+        for activity in new_activities
+    }
+    known_signatures = activity_fingerprints_crud.get_known_signatures(
+        user_id, list(signatures.values()), db
+    )
+    if known_signatures:
+        num_activities = len(new_activities)
+        new_activities = [
+            activity
+            for activity in new_activities
+            if signatures[activity.id] not in known_signatures
+        ]
+        num_skipped = num_activities - len(new_activities)
+        core_metrics.count_skipped_imports("strava", num_skipped)
+        core_logger.print_to_log(
+            f"User {user_id}: {num_skipped} Strava activities already stored, skipped"
         )
 
+    fetch_slots = asyncio.Semaphore(core_config.STRAVA_SYNC_MAX_FETCHES_PER_USER)
+
+    async def fetch(activity) -> dict:
+        async with fetch_slots:
+            await rate_limiter.acquire(strava_rate_limiter.REQUESTS_PER_ACTIVITY)
+            try:
+                return await asyncio.to_thread(
+                    fetch_activity_data, strava_client, activity.id, user_id
+                )
+            finally:
+                rate_limiter.release(strava_rate_limiter.REQUESTS_PER_ACTIVITY)
+
+    fetches = {
+        activity.id: asyncio.create_task(fetch(activity))
+        for activity in new_activities
+    }
+
+    processed_activities = []
+    sync_cursor = None
+    is_cursor_blocked = False
+    try:
+        # Parse and store in order while the next fetches are running
+        for activity in strava_activities:
+            if activity.id in fetches:
+                try:
+                    processed_activities.append(
+                        await process_activity(
+                            activity,
+                            user_id,
+                            user_privacy_settings,
+                            strava_client,
+                            user_integrations,
+                            ws_manager,
+                            db,
+                            await fetches[activity.id],
+                        )
+                    )
+                except strava_rate_limiter.StravaQuotaExceeded as err:
+                    core_logger.print_to_log(
+                        f"User {user_id}: Stopping Strava sync: {err}", "warning"
+                    )
+                    break
+                except Exception as err:
+                    # Keep syncing, the next run retries this activity
+                    core_logger.print_to_log(
+                        f"User {user_id}: Error processing Strava activity {activity.id}: {err}",
+                        "error",
+                        exc=err,
+                    )
+                    is_cursor_blocked = True
+                    continue
+
+            if not is_cursor_blocked:
+                sync_cursor = activity.start_date
+    finally:
+        for fetch_task in fetches.values():
+            fetch_task.cancel()
+
+    if update_sync_cursor and sync_cursor is not None:
+        user_integrations_crud.set_user_strava_sync_cursor(user_id, sync_cursor, db)
+
     # Return the activities processed
     return processed_activities if processed_activities else None
 
 
-def parse_activity(
-    activity,
-    user_id: int,
-    user_privacy_settings: users_privacy_settings_models.UsersPrivacySettings,
+def fetch_activity_data(
     strava_client: Client,
-    user_integrations: user_integrations_models.UsersIntegrations,
-    db: Session,
+    strava_activity_id: int,
+    user_id: int,
 ) -> dict:
-    # Create an instance of TimezoneFinder
-    tf = TimezoneFinder()
-    timezone = core_config.TZ
+    """
+    Fetch the details, streams and laps of a Strava activity.
+
+    Makes blocking Strava requests and no database queries, so it can run
+    in a worker thread.
+
+    Args:
+        strava_client: Strava client of the user.
+        strava_activity_id: The Strava activity ID.
+        user_id: The ID of the user.
 
+    Returns:
+        Dict with the detailed_activity, the processed streams tuple, the
+        stream_data list and the processed laps.
+
+    Raises:
+        HTTPException: If the activity or its streams can't be fetched.
+    """
     # Get the detailed activity
     try:
-        detailedActivity = strava_client.get_activity(activity.id)
+        detailed_activity = strava_client.get_activity(strava_activity_id)
     except Exception as err:
         # Log an error event if an exception occurred
         core_logger.print_to_log(
-            f"User {user_id}: Error fetching detailed Strava activity {activity.id}: {str(err)}",
+            f"User {user_id}: Error fetching detailed Strava activity {strava_activity_id}: {str(err)}",
             "error",
             exc=err,
         )
-        # Return None to indicate the activity was not processed
-        # return None
         raise HTTPException(
             status_code=status.HTTP_424_FAILED_DEPENDENCY,
             detail="Not able to fetch Strava activity",
-        )
+        ) from err
+
+    # Fetch and process activity streams
+    streams = fetch_and_process_activity_streams(
+        strava_client,
+        strava_activity_id,
+        user_id,
+    )
+    (
+        lat_lon_waypoints,
+        _,
+        ele_waypoints,
+        is_elevation_set,
+        hr_waypoints,
+        is_heart_rate_set,
+        cad_waypoints,
+        is_cadence_set,
+        power_waypoints,
+        is_power_set,
+        vel_waypoints,
+        is_velocity_set,
+        pace_waypoints,
+    ) = streams
+
+    # List of conditions, stream types, and corresponding waypoints
+    stream_data = [
+        (is_heart_rate_set, 1, hr_waypoints),
+        (is_power_set, 2, power_waypoints),
+        (is_cadence_set, 3, cad_waypoints),
+        (is_elevation_set, 4, ele_waypoints),
+        (is_velocity_set, 5, vel_waypoints),
+        (is_velocity_set, 6, pace_waypoints),
+        (detailed_activity.start_latlng is not None, 7, lat_lon_waypoints),
+    ]
+
+    # Fetch and process activity laps
+    laps = fetch_and_process_activity_laps(
+        strava_client,
+        strava_activity_id,
+        user_id,
+        stream_data,
+    )
+
+    return {
+        "detailed_activity": detailed_activity,
+        "streams": streams,
+        "stream_data": stream_data,
+        "laps": laps,
+    }
+
+
+def parse_activity(
+    activity,
+    user_id: int,
+    user_privacy_settings: users_privacy_settings_models.UsersPrivacySettings,
+    strava_client: Client,
+    user_integrations: user_integrations_models.UsersIntegrations,
+    db: Session,
+    activity_data: dict | None = None,
+) -> dict:
+    # Create an instance of TimezoneFinder
+    tf = TimezoneFinder()
+    timezone = core_config.TZ
+
+    # Fetch the activity unless it was fetched ahead by the sync
+    if activity_data is None:
+        activity_data = fetch_activity_data(strava_client, activity.id, user_id)
+
+    detailedActivity = activity_data["detailed_activity"]
 
     # Parse start and end dates
     start_date_parsed = detailedActivity.start_date
@@ -184,26 +381,22 @@ def parse_activity(
     if detailedActivity.location_country is not None:
         country = detailedActivity.location_country
 
-    # Fetch and process activity streams
+    # Processed activity streams
     (
         lat_lon_waypoints,
         is_lat_lon_set,
         ele_waypoints,
-        is_elevation_set,
-        hr_waypoints,
-        is_heart_rate_set,
+        _,
+        _,
+        _,
         cad_waypoints,
-        is_cadence_set,
+        _,
         power_waypoints,
-        is_power_set,
-        vel_waypoints,
-        is_velocity_set,
-        pace_waypoints,
-    ) = fetch_and_process_activity_streams(
-        strava_client,
-        activity.id,
-        user_id,
-    )
+        _,
+        _,
+        _,
+        _,
+    ) = activity_data["streams"]
 
     ele_gain, ele_loss = None, None
     # Calculate elevation gain and loss
@@ -259,17 +452,6 @@ def parse_activity(
     if power_waypoints:
         np = activities_utils.calculate_np(power_waypoints)
 
-    # List of conditions, stream types, and corresponding waypoints
-    stream_data = [
-        (is_heart_rate_set, 1, hr_waypoints),
-        (is_power_set, 2, power_waypoints),
-        (is_cadence_set, 3, cad_waypoints),
-        (is_elevation_set, 4, ele_waypoints),
-        (is_velocity_set, 5, vel_waypoints),
-        (is_velocity_set, 6, pace_waypoints),
-        (detailedActivity.start_latlng is not None, 7, lat_lon_waypoints),
-    ]
-
     gear_id = None
 
     if user_integrations.strava_sync_gear:
@@ -348,19 +530,11 @@ def parse_activity(
         hide_gear=user_privacy_settings.hide_activity_gear or False,
     )
 
-    # Fetch and process activity laps
-    laps = fetch_and_process_activity_laps(
-        strava_client,
-        activity.id,
-        user_id,
-        stream_data,
-    )
-
     # Return the activity and stream data
     return {
         "activity_to_store": activity_to_store,
-        "stream_data": stream_data,
-        "laps": laps,
+        "stream_data": activity_data["stream_data"],
+        "laps": activity_data["laps"],
     }
 
 
@@ -410,6 +584,7 @@ async def process_activity(
     user_integrations: user_integrations_models.UsersIntegrations,
     ws_manager: websocket_manager.WebSocketManager,
     db: Session,
+    activity_data: dict | None = None,
 ):
     # Get the activity by Strava ID from the user
     activity_db = strava_utils.fetch_and_validate_activity(activity.id, user_id, db)
@@ -431,6 +606,7 @@ async def process_activity(
         strava_client,
         user_integrations,
         db,
+        activity_data,
     )
 
     # Save the activity and streams to the database
@@ -692,51 +868,25 @@ def fetch_and_process_activity_laps(
 async def retrieve_strava_users_activities_for_days(
     days: int, is_startup: bool = False
 ):
+    """
+    Sync the new Strava activities of every user.
+
+    Users are synced concurrently, up to STRAVA_SYNC_MAX_USERS at a time,
+    each with its own database session. Each user's sync starts from their
+    sync cursor, or from days ago on the first sync.
+
+    Args:
+        days: Number of days to sync for users without a sync cursor.
+        is_startup: Whether errors are only logged instead of raised.
+
+    Raises:
+        HTTPException: If a user's sync fails and is_startup is False.
+    """
     # Create a new database session using context manager
     with SessionLocal() as db:
         try:
             # Get all users
-            users = users_crud.get_all_users(db)
-
-            # Calculate the start date and end date
-            calculated_start_date = datetime.now(timezone.utc) - timedelta(days=days)
-            calculated_end_date = datetime.now(timezone.utc)
-
-            # Process the activities for each user
-            if users:
-                for user in users:
-                    try:
-                        await get_user_strava_activities_by_dates(
-                            calculated_start_date,
-                            calculated_end_date,
-                            user.id,
-                            None,
-                            None,
-                            is_startup,
-                        )
-                    except HTTPException as err:
-                        # Log the error but continue processing other users
-                        core_logger.print_to_log(
-                            f"User {user.id}: Error processing Strava activities: {str(err)}",
-                            "error",
-                            exc=err,
-                        )
-                        # Don't reraise the exception if we're in startup mode
-                        if not is_startup:
-                            raise err
-                    except Exception as err:
-                        # Log the error but continue processing other users
-                        core_logger.print_to_log(
-                            f"User {user.id}: Unexpected error processing Strava activities: {str(err)}",
-                            "error",
-                            exc=err,
-                        )
-                        # Don't reraise the exception if we're in startup mode
-                        if not is_startup:
-                            raise HTTPException(
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                detail="Internal Server Error",
-                            ) from err
+            user_ids = [user.id for user in users_crud.get_all_users(db)]
         except HTTPException as err:
             # Log an error event if an HTTPException occurred
             core_logger.print_to_log(
@@ -747,6 +897,7 @@ async def retrieve_strava_users_activities_for_days(
             # Raise the HTTPException to propagate the error
             if not is_startup:
                 raise err
+            return
         except Exception as err:
             # Log an error event if an exception occurred
             core_logger.print_to_log(
@@ -760,6 +911,56 @@ async def retrieve_strava_users_activities_for_days(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Internal Server Error",
                 ) from err
+            return
+
+    # Calculate the start date and end date
+    calculated_start_date = datetime.now(timezone.utc) - timedelta(days=days)
+    calculated_end_date = datetime.now(timezone.utc)
+
+    user_slots = asyncio.Semaphore(core_config.STRAVA_SYNC_MAX_USERS)
+
+    async def sync_user(user_id: int) -> None:
+        async with user_slots:
+            with SessionLocal() as user_db:
+                try:
+                    await get_user_strava_activities_by_dates(
+                        calculated_start_date,
+                        calculated_end_date,
+                        user_id,
+                        None,
+                        user_db,
+                        is_startup,
+                        use_sync_cursor=True,
+                    )
+                except HTTPException as err:
+                    # Log the error but continue processing other users
+                    core_logger.print_to_log(
+                        f"User {user_id}: Error processing Strava activities: {str(err)}",
+                        "error",
+                        exc=err,
+                    )
+                    raise err
+                except Exception as err:
+                    # Log the error but continue processing other users
+                    core_logger.print_to_log(
+                        f"User {user_id}: Unexpected error processing Strava activities: {str(err)}",
+                        "error",
+                        exc=err,
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="Internal Server Error",
+                    ) from err
+
+    results = await asyncio.gather(
+        *(sync_user(user_id) for user_id in user_ids), return_exceptions=True
+    )
+
+    # Don't reraise the exception if we're in startup mode
+    if not is_startup:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
 
 async def get_user_strava_activities_by_dates(
@@ -769,6 +970,7 @@ async def get_user_strava_activities_by_dates(
     ws_manager: websocket_manager.WebSocketManager | None = None,
     db: Session = None,
     is_startup: bool = False,
+    use_sync_cursor: bool = False,
 ) -> list[activities_schema.Activity] | None:
     close_session = False
     if db is None:
@@ -795,6 +997,12 @@ async def get_user_strava_activities_by_dates(
             f"User {user_id}: Started Strava activities processing"
         )
 
+        # Only fetch activities newer than the last synced one
+        if use_sync_cursor and user_integrations.strava_sync_cursor is not None:
+            start_date = user_integrations.strava_sync_cursor.replace(
+                tzinfo=timezone.utc
+            )
+
         # Create a Strava client with the user's access token
         strava_client = strava_utils.create_strava_client(user_integrations)
 
@@ -809,6 +1017,7 @@ async def get_user_strava_activities_by_dates(
                 ws_manager,
                 db,
                 is_startup,
+                use_sync_cursor,
             )
 
             # Log an informational event for tracing
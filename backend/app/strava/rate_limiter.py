@@ -0,0 +1,171 @@
+"""Strava API quota tracking.
+
+Strava limits the read requests of every API application per 15 minute
+window and per day, and reports the usage in the response headers of
+every request. Syncs fetch several activities at the same time, so the
+usage is tracked per application and checked before requests are sent:
+
+- StravaRateLimiter is passed to the stravalib Client and keeps the
+  usage reported by the response headers
+- acquire reserves requests, waiting for the next 15 minute window when
+  the short quota is used up
+- StravaQuotaExceeded is raised when the daily quota is used up
+"""
+
+import asyncio
+import threading
+import time
+
+from stravalib.util.limiter import get_rates_from_response_headers
+
+import core.logger as core_logger
+
+# Strava read limits of a new API application
+DEFAULT_SHORT_LIMIT = 100
+DEFAULT_LONG_LIMIT = 1000
+
+SHORT_WINDOW_SECONDS = 15 * 60
+LONG_WINDOW_SECONDS = 24 * 60 * 60
+
+# Requests made to fetch one activity: details, streams and laps
+REQUESTS_PER_ACTIVITY = 3
+
+_rate_limiters: dict[str, "StravaRateLimiter"] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class StravaQuotaExceeded(Exception):
+    """Raised when the daily quota of a Strava application is used up."""
+
+
+def _window_end(now: float, window_seconds: int) -> float:
+    """Return the end of the window containing now, windows start at UTC 0h."""
+    return (now // window_seconds + 1) * window_seconds
+
+
+class StravaRateLimiter:
+    """
+    Request usage of a Strava API application.
+
+    Windows are aligned like Strava's: 15 minute windows start at 0, 15,
+    30 and 45 minutes past the hour and daily windows at midnight UTC.
+
+    Attributes:
+        short_usage: Requests made in the current 15 minute window.
+        long_usage: Requests made in the current day.
+        short_limit: Requests allowed per 15 minute window.
+        long_limit: Requests allowed per day.
+        reserved: Requests reserved by fetches still running, which are
+            not yet reflected in the usage.
+    """
+
+    def __init__(self):
+        now = time.time()
+        self.short_usage = 0
+        self.long_usage = 0
+        self.short_limit = DEFAULT_SHORT_LIMIT
+        self.long_limit = DEFAULT_LONG_LIMIT
+        self.reserved = 0
+        self._short_window_end = _window_end(now, SHORT_WINDOW_SECONDS)
+        self._long_window_end = _window_end(now, LONG_WINDOW_SECONDS)
+        self._lock = threading.Lock()
+
+    def __call__(self, response_headers: dict[str, str], method: str) -> None:
+        """
+        Update the usage from the headers of a Strava response.
+
+        Called by stravalib after every API request, possibly from worker
+        threads.
+
+        Args:
+            response_headers: HTTP response headers.
+            method: HTTP method of the request.
+        """
+        rates = get_rates_from_response_headers(response_headers, method)
+        if rates is None:
+            return
+
+        with self._lock:
+            self._reset_expired_windows(time.time())
+            self.short_usage = rates.short_usage
+            self.long_usage = rates.long_usage
+            self.short_limit = rates.short_limit
+            self.long_limit = rates.long_limit
+
+    def _reset_expired_windows(self, now: float) -> None:
+        if now >= self._short_window_end:
+            self.short_usage = 0
+            self._short_window_end = _window_end(now, SHORT_WINDOW_SECONDS)
+        if now >= self._long_window_end:
+            self.long_usage = 0
+            self._long_window_end = _window_end(now, LONG_WINDOW_SECONDS)
+
+    def reserve(self, requests: int) -> float:
+        """
+        Reserve requests if the quotas allow it.
+
+        Args:
+            requests: Number of requests to reserve.
+
+        Returns:
+            0 if the requests were reserved, otherwise the seconds until the
+            15 minute window resets.
+
+        Raises:
+            StravaQuotaExceeded: If the daily quota is used up.
+        """
+        with self._lock:
+            now = time.time()
+            self._reset_expired_windows(now)
+
+            if self.long_usage + self.reserved + requests > self.long_limit:
+                raise StravaQuotaExceeded(
+                    f"Strava daily quota of {self.long_limit} requests used up"
+                )
+            if self.short_usage + self.reserved + requests > self.short_limit:
+                return max(self._short_window_end - now, 0.001)
+
+            self.reserved += requests
+            return 0
+
+    def release(self, requests: int) -> None:
+        """
+        Release reserved requests once they were sent.
+
+        Args:
+            requests: Number of requests reserved with reserve.
+        """
+        with self._lock:
+            self.reserved = max(self.reserved - requests, 0)
+
+    async def acquire(self, requests: int) -> None:
+        """
+        Wait until requests can be sent without exceeding the quotas.
+
+        Args:
+            requests: Number of requests to reserve.
+
+        Raises:
+            StravaQuotaExceeded: If the daily quota is used up.
+        """
+        while (wait_seconds := self.reserve(requests)) > 0:
+            core_logger.print_to_log(
+                f"Strava 15 minute quota used up, waiting {round(wait_seconds)}s"
+            )
+            await asyncio.sleep(wait_seconds)
+
+
+def get_rate_limiter(key: str) -> StravaRateLimiter:
+    """
+    Return the rate limiter of a Strava application, creating it on first use.
+
+    Args:
+        key: Identifier of the Strava application, e.g. its client ID.
+
+    Returns:
+        StravaRateLimiter shared by every client of the application.
+    """
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = StravaRateLimiter()
+        return _rate_limiters[key]
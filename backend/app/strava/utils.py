@@ -6,6 +6,7 @@ import time
 
 import core.cryptography as core_cryptography
 import core.logger as core_logger
+import core.metrics as core_metrics
 
 import activities.activity.schema as activities_schema
 import activities.activity.crud as activities_crud
@@ -15,6 +16,8 @@ import users.users_integrations.models as user_integrations_models
 
 import users.users.crud as users_crud
 
+import strava.rate_limiter as strava_rate_limiter
+
 from core.database import SessionLocal
 
 
@@ -132,6 +135,30 @@ def fetch_user_integrations_and_validate_token(
     return user_integrations
 
 
+def get_strava_rate_limiter(
+    user_integrations: user_integrations_models.UsersIntegrations,
+) -> strava_rate_limiter.StravaRateLimiter:
+    """
+    Return the rate limiter of the Strava application used by a user.
+
+    Strava quotas apply per API application. Users linking the same
+    client ID share a rate limiter.
+
+    Args:
+        user_integrations: The user's integrations.
+
+    Returns:
+        The application's StravaRateLimiter.
+    """
+    if user_integrations.strava_client_id:
+        key = core_cryptography.decrypt_token_fernet(
+            user_integrations.strava_client_id
+        )
+    else:
+        key = f"user-{user_integrations.user_id}"
+    return strava_rate_limiter.get_rate_limiter(key)
+
+
 def create_strava_client(
     user_integrations: user_integrations_models.UsersIntegrations,
 ) -> Client:
@@ -144,7 +171,7 @@ def create_strava_client(
 
     # Create a Strava client with the user's access token and return it
     try:
-        return Client(
+        client = Client(
             access_token=(
                 core_cryptography.decrypt_token_fernet(user_integrations.strava_token)
                 if user_integrations.strava_token
@@ -158,7 +185,10 @@ def create_strava_client(
                 else None
             ),
             token_expires=epoch_time,
+            rate_limiter=get_strava_rate_limiter(user_integrations),
         )
+        core_metrics.instrument_session(client.protocol.rsession, "strava")
+        return client
     except Exception as err:
         # Log the error and re-raise the exception
         core_logger.print_to_log_and_console(
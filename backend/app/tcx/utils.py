@@ -3,6 +3,7 @@ from timezonefinder import TimezoneFinder
 from datetime import datetime
 
 import tcxreader
+import activities.activity.laps as activities_laps
 import activities.activity.schema as activities_schema
 import activities.activity.utils as activities_utils
 
@@ -33,7 +34,6 @@ def parse_tcx_file(
     avg_power = None
     max_power = None
     np = None
-    last_waypoint_time, prev_latitude, prev_longitude = None, None, None
     cad_waypoints = []
     vel_waypoints = []
     pace_waypoints = []
@@ -170,42 +170,36 @@ def parse_tcx_file(
         if hasattr(trackpoint, "tpx_ext") and "Watts" in trackpoint.tpx_ext
     ]
 
-    for trackpoint in trackpoints:
-        latitude, longitude, time = (
-            trackpoint["latitude"],
-            trackpoint["longitude"],
-            trackpoint["time"],
-        )
-
-        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    # Calculate instant speed and pace for all trackpoints at once
+    timestamps = [
+        trackpoint["time"].strftime("%Y-%m-%dT%H:%M:%S") for trackpoint in trackpoints
+    ]
+    instant_speeds = activities_utils.calculate_instant_speeds(
+        timestamps,
+        [trackpoint.get("latitude") for trackpoint in trackpoints],
+        [trackpoint.get("longitude") for trackpoint in trackpoints],
+    )
 
-        # Calculate instant speed, pace, and update waypoint arrays
-        instant_speed = activities_utils.calculate_instant_speed(
-            last_waypoint_time,
-            time,
-            latitude,
-            longitude,
-            prev_latitude,
-            prev_longitude,
-        )
+    for timestamp, instant_speed in zip(timestamps, instant_speeds):
+        instant_speed = instant_speed or 0
 
         # Calculate instance pace
         instant_pace = 0
         if instant_speed > 0:
             instant_pace = 1 / instant_speed
 
-        activities_utils.append_if_not_none(
-            vel_waypoints, timestamp, instant_speed, "vel"
-        )
-        activities_utils.append_if_not_none(
-            pace_waypoints, timestamp, instant_pace, "pace"
-        )
-
-        # Update previous latitude, longitude, and last waypoint time
-        prev_latitude, prev_longitude, last_waypoint_time = (
-            latitude,
-            longitude,
-            time,
+        vel_waypoints.append({"time": timestamp, "vel": instant_speed})
+        pace_waypoints.append({"time": timestamp, "pace": instant_pace})
+
+    # Generate auto laps if the file has no recorded laps
+    if not laps:
+        laps = activities_laps.generate_activity_laps(
+            [waypoint for waypoint in lat_lon_waypoints if waypoint["lat"] is not None],
+            ele_waypoints,
+            power_waypoints,
+            hr_waypoints,
+            cad_waypoints,
+            vel_waypoints,
         )
 
     distance = round(tcx_file.distance) if tcx_file.distance else 0
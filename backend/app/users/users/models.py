@@ -25,6 +25,7 @@ class Users(Base):
         units: Measurement units (metric, imperial).
         height: User's height in centimeters.
         max_heart_rate: User maximum heart rate (bpm).
+        ftp: User functional threshold power (watts).
         access_type: User type (regular, admin).
         photo_path: Path to user's photo.
         active: Whether the user is active.
@@ -128,6 +129,10 @@ class Users(Base):
         nullable=True,
         comment="User maximum heart rate (bpm)",
     )
+    ftp: Mapped[int | None] = mapped_column(
+        nullable=True,
+        comment="User functional threshold power (watts)",
+    )
     access_type: Mapped[str] = mapped_column(
         String(20),
         nullable=False,
@@ -3,7 +3,15 @@
 import os
 from typing import Annotated, Callable
 
-from fastapi import APIRouter, Depends, UploadFile, Security, HTTPException, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    UploadFile,
+    Security,
+    HTTPException,
+    status,
+)
 from sqlalchemy.orm import Session
 
 import users.users.schema as users_schema
@@ -14,6 +22,8 @@ import users.users.models as users_models
 
 import users.users_identity_providers.crud as user_idp_crud
 
+import activities.activity_zones.utils as activity_zones_utils
+
 import sign_up_tokens.utils as sign_up_tokens_utils
 import auth.security as auth_security
 import auth.password_hasher as auth_password_hasher
@@ -285,6 +295,7 @@ async def edit_user(
         Session,
         Depends(core_database.get_db),
     ],
+    background_tasks: BackgroundTasks,
 ) -> users_schema.UsersRead:
     """
     Update user information.
@@ -295,11 +306,16 @@ async def edit_user(
         user_attributtes: User data to update.
         _check_scopes: Authorization check.
         db: Database session dependency.
+        background_tasks: Recomputes the activity zones if the max heart
+            rate, birthdate or FTP changed.
 
     Returns:
         Updated user data.
     """
     db_user = await users_crud.edit_user(user_id, user_attributtes, db)
+    background_tasks.add_task(
+        activity_zones_utils.refresh_user_activity_zones_in_background, user_id
+    )
 
     # Enrich with IDP count before serializing
     idp_count = len(
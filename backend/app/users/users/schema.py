@@ -117,6 +117,7 @@ class UsersBase(BaseModel):
         units: User units (metric, imperial).
         height: User's height in centimeters (1-300).
         max_heart_rate: Maximum heart rate in bpm (30-250).
+        ftp: Functional threshold power in watts (1-2000).
         first_day_of_week: First day of the week.
         currency: User currency (euro, dollar, pound).
     """
@@ -172,6 +173,12 @@ class UsersBase(BaseModel):
         le=250,
         description="Maximum heart rate in bpm",
     )
+    ftp: StrictInt | None = Field(
+        default=None,
+        ge=1,
+        le=2000,
+        description="Functional threshold power in watts",
+    )
     first_day_of_week: WeekDay = Field(
         default=WeekDay.MONDAY,
         description="First day of the week",
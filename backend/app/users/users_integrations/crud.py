@@ -1,6 +1,6 @@
 """CRUD operations for user integrations."""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -176,6 +176,7 @@ def unlink_strava_account(user_id: int, db: Session) -> None:
     user_integrations.strava_refresh_token = None
     user_integrations.strava_token_expires_at = None
     user_integrations.strava_sync_gear = False
+    user_integrations.strava_sync_cursor = None
     user_integrations.strava_client_id = None
     user_integrations.strava_client_secret = None
 
@@ -296,6 +297,47 @@ def set_user_strava_sync_gear(
     db.refresh(user_integrations)
 
 
+@core_decorators.handle_db_errors
+def set_user_strava_sync_cursor(
+    user_id: int, strava_sync_cursor: datetime | None, db: Session
+) -> None:
+    """
+    Set the Strava sync cursor for a user.
+
+    Args:
+        user_id: The ID of the user.
+        strava_sync_cursor: Start date of the latest Strava activity
+            synced, or None to sync from scratch.
+        db: SQLAlchemy database session.
+
+    Returns:
+        None
+
+    Raises:
+        HTTPException: 404 error if integrations not found.
+        HTTPException: 500 error if database operation fails.
+    """
+    # Get the user integrations by the user id
+    user_integrations = get_user_integrations_by_user_id(user_id, db)
+
+    if user_integrations is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User integrations not found",
+        )
+
+    # Store the cursor as naive UTC like the other timestamps
+    if strava_sync_cursor is not None and strava_sync_cursor.tzinfo is not None:
+        strava_sync_cursor = strava_sync_cursor.astimezone(timezone.utc).replace(
+            tzinfo=None
+        )
+    user_integrations.strava_sync_cursor = strava_sync_cursor
+
+    # Commit the changes to the database
+    db.commit()
+    db.refresh(user_integrations)
+
+
 @core_decorators.handle_db_errors
 def link_garminconnect_account(
     user_id: int,
@@ -21,6 +21,8 @@ class UsersIntegrations(Base):
         strava_token_expires_at: Strava token expiration
             timestamp.
         strava_sync_gear: Enable Strava gear synchronization.
+        strava_sync_cursor: Start date of the latest Strava activity
+            synced by the scheduled sync.
         garminconnect_oauth1: Garmin Connect OAuth1 token
             data.
         garminconnect_oauth2: Garmin Connect OAuth2 token
@@ -85,6 +87,11 @@ class UsersIntegrations(Base):
         default=False,
         comment="Whether Strava gear is to be synced",
     )
+    strava_sync_cursor: Mapped[datetime | None] = mapped_column(
+        default=None,
+        nullable=True,
+        comment="Start date (UTC) of the latest Strava activity synced",
+    )
     garminconnect_oauth1: Mapped[dict | None] = mapped_column(
         JSON,
         default=None,
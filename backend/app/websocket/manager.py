@@ -1,8 +1,42 @@
+"""WebSocket connection registry shared by the uvicorn workers.
+
+Each worker only holds its own sockets, so messages are relayed to the
+other workers through Postgres:
+
+- A user can have several connections, one per open tab or device
+- Messages are sent to the sockets concurrently, each socket with its
+  own lock and send timeout, and sockets too slow to keep up are dropped
+- send_message and broadcast publish the message with pg_notify, and
+  every worker listening on the channel delivers it to its own sockets,
+  each relayed message in its own task so a slow socket can't hold up
+  the next ones
+- The listener reconnects on its own after any error
+"""
+
+import asyncio
+import json
+import uuid
 from functools import lru_cache
 
+import psycopg
 from fastapi import WebSocket
+from sqlalchemy import text
 
+import core.database as core_database
 import core.logger as core_logger
+import core.metrics as core_metrics
+
+# Postgres channel messages are relayed between workers on
+NOTIFY_CHANNEL = "websocket_messages"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7999
+
+# Time a socket has to accept a message before it is dropped
+SEND_TIMEOUT_SECONDS = 5
+
+# Delay before the listener reconnects after a database error
+RELAY_RECONNECT_SECONDS = 5
 
 
 class WebSocketManager:
@@ -11,15 +45,25 @@ class WebSocketManager:
 
     Maintains a registry of authenticated WebSocket connections
     indexed by user ID, enabling message broadcasting and
-    targeted notifications.
+    targeted notifications across workers.
 
     Attributes:
-        active_connections: Maps user IDs to their WebSocket.
+        active_connections: Maps user IDs to their WebSockets.
+        worker_id: Identifies the messages published by this worker.
     """
 
     def __init__(self) -> None:
         """Initialize the WebSocket manager with empty connections."""
-        self.active_connections: dict[int, WebSocket] = {}
+        self.active_connections: dict[int, set[WebSocket]] = {}
+        self.worker_id = uuid.uuid4().hex
+        self._send_locks: dict[WebSocket, asyncio.Lock] = {}
+        self._relay_task: asyncio.Task | None = None
+        self._delivery_tasks: set[asyncio.Task] = set()
+
+    @property
+    def relay_active(self) -> bool:
+        """Whether messages are relayed to the other workers."""
+        return self._relay_task is not None and not self._relay_task.done()
 
     async def connect(self, user_id: int, websocket: WebSocket) -> None:
         """
@@ -30,33 +74,68 @@ class WebSocketManager:
             websocket: The WebSocket connection to register.
         """
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        self.active_connections.setdefault(user_id, set()).add(websocket)
+        self._send_locks[websocket] = asyncio.Lock()
+        core_metrics.websocket_connected()
         core_logger.print_to_log(f"WebSocket connected for user {user_id}", "debug")
 
-    def disconnect(self, user_id: int) -> None:
+    def disconnect(self, user_id: int, websocket: WebSocket | None = None) -> None:
         """
         Remove a user's WebSocket connection.
 
         Args:
             user_id: The user's unique identifier.
+            websocket: The connection to remove, all of the user's
+                connections if None.
         """
-        if self.active_connections.pop(user_id, None):
+        connections = self.active_connections.get(user_id)
+        if not connections:
+            return
+
+        removed = set(connections) if websocket is None else {websocket} & connections
+        for connection in removed:
+            connections.discard(connection)
+            self._send_locks.pop(connection, None)
+            core_metrics.websocket_disconnected()
+        if not connections:
+            del self.active_connections[user_id]
+
+        if removed:
             core_logger.print_to_log(
                 f"WebSocket disconnected for user {user_id}",
                 "debug",
             )
 
-    async def send_message(self, user_id: int, message: dict) -> None:
+    def get_connections(self, user_id: int) -> list[WebSocket]:
+        """
+        Retrieve a user's WebSocket connections on this worker.
+
+        Args:
+            user_id: The user's unique identifier.
+
+        Returns:
+            The user's WebSocket connections, empty if none.
+        """
+        return list(self.active_connections.get(user_id, ()))
+
+    async def send_message(self, user_id: int, message: dict) -> bool:
         """
-        Send a JSON message to a specific user.
+        Send a JSON message to every connection of a user.
 
         Args:
             user_id: The user's unique identifier.
             message: JSON-serializable data to send.
+
+        Returns:
+            True if the message was sent to a connection of this worker or
+            relayed to the other workers.
         """
-        websocket = self.active_connections.get(user_id)
-        if websocket:
-            await websocket.send_json(message)
+        num_sent = await self._deliver(
+            [(user_id, websocket) for websocket in self.get_connections(user_id)],
+            message,
+        )
+        relayed = await self._publish(user_id, message)
+        return num_sent > 0 or relayed
 
     async def broadcast(self, message: dict) -> None:
         """
@@ -65,20 +144,201 @@ class WebSocketManager:
         Args:
             message: JSON-serializable data to broadcast.
         """
-        for websocket in self.active_connections.values():
-            await websocket.send_json(message)
+        await self._deliver(self._all_connections(), message)
+        await self._publish(None, message)
+
+    def _all_connections(self) -> list[tuple[int, WebSocket]]:
+        return [
+            (user_id, websocket)
+            for user_id, connections in self.active_connections.items()
+            for websocket in connections
+        ]
 
-    def get_connection(self, user_id: int) -> WebSocket | None:
+    async def _deliver(
+        self, connections: list[tuple[int, WebSocket]], message: dict
+    ) -> int:
         """
-        Retrieve a user's WebSocket connection.
+        Send a message to connections of this worker concurrently.
+
+        Args:
+            connections: Tuples of user ID and WebSocket.
+            message: JSON-serializable data to send.
+
+        Returns:
+            Number of connections the message was sent to.
+        """
+        if not connections:
+            return 0
+        results = await asyncio.gather(
+            *(
+                self._send(user_id, websocket, message)
+                for user_id, websocket in connections
+            )
+        )
+        return sum(results)
+
+    async def _send(self, user_id: int, websocket: WebSocket, message: dict) -> bool:
+        """
+        Send a message to one connection, dropping it if it fails.
+
+        Messages to the same connection are sent one at a time, in order.
+        A connection that doesn't accept a message within
+        SEND_TIMEOUT_SECONDS is dropped so it can't hold up the others.
 
         Args:
             user_id: The user's unique identifier.
+            websocket: The WebSocket connection.
+            message: JSON-serializable data to send.
 
         Returns:
-            The WebSocket connection or None if not found.
+            True if the message was sent.
         """
-        return self.active_connections.get(user_id)
+        lock = self._send_locks.get(websocket)
+        if lock is None:
+            return False
+
+        try:
+            async with lock:
+                await asyncio.wait_for(
+                    websocket.send_json(message), SEND_TIMEOUT_SECONDS
+                )
+            return True
+        except Exception as err:
+            core_logger.print_to_log(
+                f"Dropping WebSocket of user {user_id} after failed send: {err!r}",
+                "warning",
+            )
+            self.disconnect(user_id, websocket)
+            return False
+
+    async def _publish(self, user_id: int | None, message: dict) -> bool:
+        """
+        Relay a message to the other workers.
+
+        Args:
+            user_id: Recipient of the message, None for everyone.
+            message: JSON-serializable data to relay.
+
+        Returns:
+            True if the message was published.
+        """
+        if not self.relay_active:
+            return False
+
+        payload = json.dumps(
+            {"worker_id": self.worker_id, "user_id": user_id, "message": message},
+            default=str,
+        )
+        if len(payload.encode("utf-8")) > MAX_NOTIFY_PAYLOAD_BYTES:
+            core_logger.print_to_log(
+                f"WebSocket message too large to relay to other workers: "
+                f"{message.get('message')}",
+                "warning",
+            )
+            return False
+
+        try:
+            await asyncio.to_thread(_notify, payload)
+            return True
+        except Exception as err:
+            core_logger.print_to_log(
+                f"Error relaying WebSocket message to other workers: {err}",
+                "warning",
+                exc=err,
+            )
+            return False
+
+    async def _receive(self, payload: str) -> None:
+        """
+        Deliver a message relayed by another worker.
+
+        Args:
+            payload: NOTIFY payload published by _publish.
+        """
+        try:
+            relayed = json.loads(payload)
+        except ValueError:
+            relayed = None
+
+        if not isinstance(relayed, dict):
+            core_logger.print_to_log(
+                "Ignoring malformed relayed WebSocket message", "warning"
+            )
+            return
+
+        if relayed.get("worker_id") == self.worker_id:
+            return
+
+        user_id = relayed.get("user_id")
+        connections = (
+            self._all_connections()
+            if user_id is None
+            else [(user_id, websocket) for websocket in self.get_connections(user_id)]
+        )
+        await self._deliver(connections, relayed.get("message"))
+
+    def start_relay(self) -> None:
+        """Start listening for the messages of the other workers."""
+        if self._relay_task is None or self._relay_task.done():
+            self._relay_task = asyncio.create_task(self._listen())
+
+    def stop_relay(self) -> None:
+        """Stop listening for the messages of the other workers."""
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            self._relay_task = None
+
+    async def _listen(self) -> None:
+        """Deliver the messages relayed on NOTIFY_CHANNEL, reconnecting on errors."""
+        conninfo = core_database.get_conninfo()
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    core_logger.print_to_log(
+                        f"Relaying WebSocket messages on {NOTIFY_CHANNEL}", "debug"
+                    )
+                    async for notify in connection.notifies():
+                        # Deliver without waiting, sends can take up to
+                        # SEND_TIMEOUT_SECONDS
+                        task = asyncio.create_task(self._receive(notify.payload))
+                        self._delivery_tasks.add(task)
+                        task.add_done_callback(self._delivery_done)
+            except psycopg.Error as err:
+                core_logger.print_to_log(
+                    f"WebSocket relay connection lost: {err}", "warning"
+                )
+            except Exception as err:
+                core_logger.print_to_log(
+                    f"WebSocket relay failed: {err}", "error", exc=err
+                )
+            await asyncio.sleep(RELAY_RECONNECT_SECONDS)
+
+    def _delivery_done(self, task: asyncio.Task) -> None:
+        """Forget a finished delivery of a relayed message, logging its error."""
+        self._delivery_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            core_logger.print_to_log(
+                f"Error delivering relayed WebSocket message: {task.exception()}",
+                "warning",
+            )
+
+
+def _notify(payload: str) -> None:
+    """
+    Publish a payload on NOTIFY_CHANNEL.
+
+    Args:
+        payload: NOTIFY payload.
+    """
+    with core_database.engine.connect() as connection:
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": NOTIFY_CHANNEL, "payload": payload},
+        )
+        connection.commit()
 
 
 @lru_cache(maxsize=1)
@@ -47,4 +47,4 @@ async def websocket_endpoint(
                     "warning",
                 )
     except WebSocketDisconnect:
-        websocket_manager.disconnect(token_user_id)
+        websocket_manager.disconnect(token_user_id, websocket)
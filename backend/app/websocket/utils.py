@@ -9,10 +9,11 @@ async def notify_frontend(
     json_data: dict,
 ) -> bool:
     """
-    Send a JSON message to a user's WebSocket connection.
+    Send a JSON message to a user's WebSocket connections.
 
-    Attempts to send data to the user's WebSocket. For MFA
-    verification, raises an exception if no connection exists.
+    Sends the data to every connection of the user, on every worker.
+    For MFA verification, raises an exception if the message can't
+    reach any connection.
 
     Args:
         user_id: The target user's identifier.
@@ -20,14 +21,12 @@ async def notify_frontend(
         json_data: JSON-serializable data to send.
 
     Returns:
-        True if message was sent, False if no connection.
+        True if message was sent or relayed, False if no connection.
 
     Raises:
         HTTPException: If MFA_REQUIRED but no connection exists.
     """
-    websocket = websocket_manager.get_connection(user_id)
-    if websocket:
-        await websocket.send_json(json_data)
+    if await websocket_manager.send_message(user_id, json_data):
         return True
 
     if json_data.get("message") == "MFA_REQUIRED":
@@ -0,0 +1,613 @@
+"""Deterministic synthetic activity files for the parser benchmarks.
+
+Every activity is computed from its point index only, so the same
+profile always produces byte identical files:
+
+- run_1h: one hour run at 1 Hz with GPS, elevation, heart rate and
+  cadence, with a lap every kilometre
+- ride_8h: eight hour ride at 1 Hz, power included, with a lap every
+  ten kilometres
+- multisport: open water swim, ride and run as three sessions of one
+  FIT file
+- pool_swim: 25 m pool swim with active and rest lengths, heart rate
+  every five seconds and no GPS
+
+FIT files are encoded with the field definitions of the fitdecode
+profile. GPX and TCX files only exist for the single session profiles.
+"""
+
+import math
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+from fitdecode import profile, types
+from fitdecode.utils import compute_crc
+
+START_TIME = datetime(2024, 5, 4, 7, 30, tzinfo=timezone.utc)
+# Lisbon, Portugal
+ORIGIN = (38.7223, -9.1393)
+POOL_LENGTH = 25.0
+
+FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
+FIT_PROFILE_VERSION = 2132
+
+_METERS_PER_DEGREE = 111_320.0
+
+
+@dataclass
+class Point:
+    """A 1 Hz sample of an activity."""
+
+    time: datetime
+    lat: float | None
+    lon: float | None
+    ele: float | None
+    distance: float
+    speed: float
+    hr: int
+    cad: int | None = None
+    power: int | None = None
+
+
+@dataclass
+class Length:
+    """A pool length."""
+
+    start_time: datetime
+    seconds: float
+    strokes: int
+    active: bool
+
+
+@dataclass
+class Session:
+    """A session of an activity with its points, laps and lengths."""
+
+    sport: str
+    sub_sport: str
+    points: list[Point]
+    laps: list[list[Point]]
+    lengths: list[Length] = field(default_factory=list)
+    pool_length: float | None = None
+
+    @property
+    def start_time(self) -> datetime:
+        return self.lengths[0].start_time if self.lengths else self.points[0].time
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.lengths:
+            last = self.lengths[-1]
+            end = last.start_time + timedelta(seconds=last.seconds)
+            return (end - self.start_time).total_seconds()
+        return (self.points[-1].time - self.points[0].time).total_seconds()
+
+    @property
+    def distance(self) -> float:
+        if self.lengths:
+            return POOL_LENGTH * sum(length.active for length in self.lengths)
+        return self.points[-1].distance
+
+
+@dataclass
+class Activity:
+    """A synthetic activity made of one or more sessions."""
+
+    name: str
+    sessions: list[Session]
+
+
+def build_track(
+    start: datetime,
+    seconds: int,
+    speed: float,
+    origin: tuple[float, float] = ORIGIN,
+    cadence: int | None = None,
+    power: int | None = None,
+) -> list[Point]:
+    """
+    Build a 1 Hz track winding around an origin.
+
+    Args:
+        start: Time of the first point.
+        seconds: Number of points.
+        speed: Average speed in m/s.
+        origin: Latitude and longitude of the first point.
+        cadence: Average cadence, no cadence if None.
+        power: Average power in watts, no power if None.
+
+    Returns:
+        The points of the track.
+    """
+    lat, lon = origin
+    distance = 0.0
+    points = []
+    for i in range(seconds):
+        point_speed = speed * (1 + 0.08 * math.sin(i / 45) + 0.03 * math.sin(i / 7))
+        heading = i / 900
+        step = point_speed if i else 0.0
+        lat += step * math.cos(heading) / _METERS_PER_DEGREE
+        lon += (
+            step
+            * math.sin(heading)
+            / (_METERS_PER_DEGREE * math.cos(math.radians(lat)))
+        )
+        distance += step
+        points.append(
+            Point(
+                time=start + timedelta(seconds=i),
+                lat=round(lat, 7),
+                lon=round(lon, 7),
+                ele=round(80 + 25 * math.sin(i / 600) + 3 * math.sin(i / 40), 1),
+                distance=round(distance, 2),
+                speed=round(point_speed, 3),
+                hr=int(130 + 25 * math.sin(i / 1200) ** 2 + 5 * math.sin(i / 30)),
+                cad=None if cadence is None else int(cadence + 4 * math.sin(i / 20)),
+                power=(
+                    None
+                    if power is None
+                    else max(
+                        0, int(power + 60 * math.sin(i / 25) + 15 * math.sin(i / 3))
+                    )
+                ),
+            )
+        )
+    return points
+
+
+def split_laps(points: list[Point], lap_distance: float) -> list[list[Point]]:
+    """
+    Split a track in laps of a distance, the last lap holding the rest.
+
+    Args:
+        points: Points of the track.
+        lap_distance: Distance of each lap in meters.
+
+    Returns:
+        The points of each lap.
+    """
+    laps = [[]]
+    start_distance = points[0].distance
+    for point in points:
+        if point.distance - start_distance >= lap_distance * len(laps):
+            laps.append([])
+        laps[-1].append(point)
+    return [lap for lap in laps if lap]
+
+
+def build_pool_swim(start: datetime, lengths: int = 80) -> Session:
+    """
+    Build a pool swim with a rest after every four lengths.
+
+    Args:
+        start: Start time of the swim.
+        lengths: Number of active lengths.
+
+    Returns:
+        The swim session.
+    """
+    swim_lengths = []
+    time = start
+    for i in range(lengths):
+        seconds = 24 + 3 * math.sin(i / 5)
+        swim_lengths.append(Length(time, round(seconds, 3), 16 + i % 3, True))
+        time += timedelta(seconds=seconds)
+        if i % 4 == 3:
+            swim_lengths.append(Length(time, 20.0, 0, False))
+            time += timedelta(seconds=20)
+
+    total_seconds = int((time - start).total_seconds())
+    points = [
+        Point(
+            time=start + timedelta(seconds=second),
+            lat=None,
+            lon=None,
+            ele=None,
+            distance=0.0,
+            speed=0.0,
+            hr=int(125 + 20 * math.sin(second / 300) ** 2),
+        )
+        for second in range(0, total_seconds, 5)
+    ]
+    return Session(
+        "swimming", "lap_swimming", points, [points], swim_lengths, POOL_LENGTH
+    )
+
+
+def build_activity(name: str) -> Activity:
+    """
+    Build the activity of a profile.
+
+    Args:
+        name: One of PROFILES.
+
+    Returns:
+        The activity.
+    """
+    if name == "run_1h":
+        points = build_track(START_TIME, 3600, 3.2, cadence=86)
+        return Activity(
+            name, [Session("running", "generic", points, split_laps(points, 1000))]
+        )
+    if name == "ride_8h":
+        points = build_track(START_TIME, 8 * 3600, 8.0, cadence=88, power=210)
+        return Activity(
+            name, [Session("cycling", "road", points, split_laps(points, 10_000))]
+        )
+    if name == "multisport":
+        swim = build_track(START_TIME, 1800, 1.0)
+        ride = build_track(
+            START_TIME + timedelta(seconds=1800),
+            5400,
+            9.0,
+            origin=(swim[-1].lat, swim[-1].lon),
+            cadence=90,
+            power=200,
+        )
+        run = build_track(
+            START_TIME + timedelta(seconds=7200),
+            2700,
+            3.4,
+            origin=(ride[-1].lat, ride[-1].lon),
+            cadence=88,
+        )
+        return Activity(
+            name,
+            [
+                Session("swimming", "open_water", swim, split_laps(swim, 500)),
+                Session("cycling", "road", ride, split_laps(ride, 10_000)),
+                Session("running", "generic", run, split_laps(run, 1000)),
+            ],
+        )
+    if name == "pool_swim":
+        return Activity(name, [build_pool_swim(START_TIME)])
+    raise ValueError(f"Unknown activity profile: {name}")
+
+
+PROFILES = ("run_1h", "ride_8h", "multisport", "pool_swim")
+
+
+def _average(values: list) -> float | None:
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _maximum(values: list):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _ascent_and_descent(points: list[Point]) -> tuple[int, int]:
+    ascent = descent = 0.0
+    for previous, point in zip(points, points[1:]):
+        if previous.ele is None or point.ele is None:
+            continue
+        ascent += max(0.0, point.ele - previous.ele)
+        descent += max(0.0, previous.ele - point.ele)
+    return round(ascent), round(descent)
+
+
+def _semicircles(degrees: float) -> int:
+    return int(round(degrees * 2**31 / 180))
+
+
+_FIT_MESSAGES = {
+    message.name: (number, {f.name: f for f in message.fields.values()})
+    for number, message in profile.MESSAGE_TYPES.items()
+}
+
+
+class FitWriter:
+    """Minimal FIT encoder writing little-endian definition and data messages."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._local_types: dict[tuple, int] = {}
+        self._next_local_type = 0
+
+    def write(self, message: str, **values) -> None:
+        """
+        Append a data message, preceded by its definition if needed.
+
+        Values are given in profile units: datetimes, enum names, and
+        scaled values such as seconds or meters. None values are left out.
+
+        Args:
+            message: Profile name of the message.
+            values: Profile names and values of the fields.
+        """
+        number, profile_fields = _FIT_MESSAGES[message]
+        fields = [
+            profile_fields[name] for name, value in values.items() if value is not None
+        ]
+        key = (number, tuple(f.def_num for f in fields))
+
+        local_type = self._local_types.get(key)
+        if local_type is None:
+            local_type = self._next_local_type % 16
+            self._next_local_type += 1
+            self._local_types = {
+                other: local
+                for other, local in self._local_types.items()
+                if local != local_type
+            }
+            self._local_types[key] = local_type
+            self._data += struct.pack(
+                "<BBBHB", 0x40 | local_type, 0, 0, number, len(fields)
+            )
+            for f in fields:
+                base_type = _base_type(f)
+                self._data += struct.pack(
+                    "<BBB", f.def_num, base_type.size, base_type.identifier
+                )
+
+        self._data.append(local_type)
+        for f in fields:
+            self._data += struct.pack(
+                "<" + _base_type(f).fmt, _encode(f, values[f.name])
+            )
+
+    def getvalue(self) -> bytes:
+        """Return the file, header and CRCs included."""
+        header = struct.pack(
+            "<BBHI4s", 14, 0x20, FIT_PROFILE_VERSION, len(self._data), b".FIT"
+        )
+        header += struct.pack("<H", compute_crc(header))
+        content = header + bytes(self._data)
+        return content + struct.pack("<H", compute_crc(content))
+
+
+def _base_type(profile_field) -> types.BaseType:
+    if isinstance(profile_field.type, types.FieldType):
+        return profile_field.type.base_type
+    return profile_field.type
+
+
+def _encode(profile_field, value) -> int:
+    if isinstance(value, datetime):
+        return int((value - FIT_EPOCH).total_seconds())
+    if isinstance(value, str):
+        enum = profile_field.type.enum
+        return next(number for number, name in enum.items() if name == value)
+    scale = profile_field.scale or 1
+    offset = profile_field.offset or 0
+    return int(round((value + offset) * scale))
+
+
+def _write_fit_summary(
+    writer: FitWriter, message: str, points: list[Point], sport: str, **overrides
+) -> None:
+    start, end = points[0], points[-1]
+    ascent, descent = _ascent_and_descent(points)
+    elapsed = (end.time - start.time).total_seconds()
+    speeds = [point.speed for point in points]
+    cadence = _average([point.cad for point in points])
+    power = _average([point.power for point in points])
+    values = {
+        "timestamp": end.time,
+        "event": message,
+        "event_type": "stop",
+        "start_time": start.time,
+        "start_position_lat": None if start.lat is None else _semicircles(start.lat),
+        "start_position_long": None if start.lon is None else _semicircles(start.lon),
+        "total_elapsed_time": elapsed,
+        "total_timer_time": elapsed,
+        "total_distance": end.distance - start.distance,
+        "total_calories": round(elapsed / 60 * 11),
+        "avg_heart_rate": round(_average([point.hr for point in points])),
+        "max_heart_rate": _maximum([point.hr for point in points]),
+        "avg_cadence": None if cadence is None else round(cadence),
+        "max_cadence": _maximum([point.cad for point in points]),
+        "avg_power": None if power is None else round(power),
+        "max_power": _maximum([point.power for point in points]),
+        "total_ascent": ascent,
+        "total_descent": descent,
+        "sport": sport,
+        "enhanced_avg_speed": _average(speeds),
+        "enhanced_max_speed": _maximum(speeds),
+    }
+    values.update(overrides)
+    writer.write(message, **values)
+
+
+def write_fit(activity: Activity) -> bytes:
+    """
+    Encode an activity as a FIT file.
+
+    Args:
+        activity: Activity to encode.
+
+    Returns:
+        The FIT file.
+    """
+    writer = FitWriter()
+    writer.write(
+        "file_id",
+        type="activity",
+        manufacturer="garmin",
+        product=3113,
+        serial_number=3_456_789_012,
+        time_created=activity.sessions[0].start_time,
+    )
+
+    for session in activity.sessions:
+        for point in session.points:
+            writer.write(
+                "record",
+                timestamp=point.time,
+                position_lat=None if point.lat is None else _semicircles(point.lat),
+                position_long=None if point.lon is None else _semicircles(point.lon),
+                enhanced_altitude=point.ele,
+                heart_rate=point.hr,
+                cadence=point.cad,
+                power=point.power,
+                enhanced_speed=None if point.lat is None else point.speed,
+            )
+
+        for index, length in enumerate(session.lengths):
+            writer.write(
+                "length",
+                timestamp=length.start_time + timedelta(seconds=length.seconds),
+                message_index=index,
+                event="length",
+                event_type="stop",
+                start_time=length.start_time,
+                total_elapsed_time=length.seconds,
+                total_timer_time=length.seconds,
+                total_strokes=length.strokes if length.active else None,
+                avg_speed=POOL_LENGTH / length.seconds if length.active else None,
+                swim_stroke="freestyle" if length.active else None,
+                avg_swimming_cadence=(
+                    round(length.strokes / length.seconds * 60)
+                    if length.active
+                    else None
+                ),
+                length_type="active" if length.active else "idle",
+            )
+
+        for lap in session.laps:
+            _write_fit_summary(
+                writer, "lap", lap, session.sport, lap_trigger="distance"
+            )
+
+        overrides = {}
+        if session.lengths:
+            overrides = {
+                "total_elapsed_time": session.elapsed_seconds,
+                "total_timer_time": session.elapsed_seconds,
+                "total_distance": session.distance,
+                "enhanced_avg_speed": session.distance / session.elapsed_seconds,
+                "enhanced_max_speed": None,
+                "pool_length": session.pool_length,
+                "pool_length_unit": "metric",
+            }
+        _write_fit_summary(
+            writer,
+            "session",
+            session.points,
+            session.sport,
+            sub_sport=session.sub_sport,
+            num_laps=len(session.laps),
+            **overrides,
+        )
+
+    last = activity.sessions[-1]
+    writer.write(
+        "activity",
+        timestamp=last.start_time + timedelta(seconds=last.elapsed_seconds),
+        num_sessions=len(activity.sessions),
+        type="manual" if len(activity.sessions) == 1 else "auto_multi_sport",
+        event="activity",
+        event_type="stop",
+    )
+    return writer.getvalue()
+
+
+def _iso(time: datetime) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def write_gpx(activity: Activity) -> bytes:
+    """
+    Encode a single session activity as a GPX 1.1 track.
+
+    Heart rate and cadence are written as Garmin TrackPointExtension
+    values, power as a power extension.
+
+    Args:
+        activity: Activity to encode.
+
+    Returns:
+        The GPX file.
+    """
+    session = _single_session(activity)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<gpx version="1.1" creator="Endurain benchmarks"'
+        ' xmlns="http://www.topografix.com/GPX/1/1"'
+        ' xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">',
+        f"<metadata><time>{_iso(session.start_time)}</time></metadata>",
+        f"<trk><name>{escape(activity.name)}</name>"
+        f"<type>{session.sport}</type><trkseg>",
+    ]
+    for point in session.points:
+        extensions = f"<gpxtpx:hr>{point.hr}</gpxtpx:hr>"
+        if point.cad is not None:
+            extensions += f"<gpxtpx:cad>{point.cad}</gpxtpx:cad>"
+        power = "" if point.power is None else f"<power>{point.power}</power>"
+        lines.append(
+            f'<trkpt lat="{point.lat}" lon="{point.lon}"><ele>{point.ele}</ele>'
+            f"<time>{_iso(point.time)}</time><extensions>{power}"
+            f"<gpxtpx:TrackPointExtension>{extensions}</gpxtpx:TrackPointExtension>"
+            "</extensions></trkpt>"
+        )
+    lines.append("</trkseg></trk></gpx>")
+    return "\n".join(lines).encode()
+
+
+def write_tcx(activity: Activity) -> bytes:
+    """
+    Encode a single session activity as a TCX file with its laps.
+
+    Speed and power are written as ActivityExtension v2 values.
+
+    Args:
+        activity: Activity to encode.
+
+    Returns:
+        The TCX file.
+    """
+    session = _single_session(activity)
+    sport = {"running": "Running", "cycling": "Biking"}.get(session.sport, "Other")
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        "<TrainingCenterDatabase"
+        ' xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2"'
+        ' xmlns:ns3="http://www.garmin.com/xmlschemas/ActivityExtension/v2">',
+        f'<Activities><Activity Sport="{sport}"><Id>{_iso(session.start_time)}</Id>',
+    ]
+    for lap in session.laps:
+        elapsed = (lap[-1].time - lap[0].time).total_seconds()
+        lines.append(
+            f'<Lap StartTime="{_iso(lap[0].time)}">'
+            f"<TotalTimeSeconds>{elapsed}</TotalTimeSeconds>"
+            "<DistanceMeters>"
+            f"{round(lap[-1].distance - lap[0].distance, 2)}</DistanceMeters>"
+            f"<Calories>{round(elapsed / 60 * 11)}</Calories>"
+            "<AverageHeartRateBpm>"
+            f"<Value>{round(_average([p.hr for p in lap]))}</Value>"
+            "</AverageHeartRateBpm>"
+            f"<MaximumHeartRateBpm><Value>{_maximum([p.hr for p in lap])}</Value>"
+            "</MaximumHeartRateBpm>"
+            "<Intensity>Active</Intensity><TriggerMethod>Distance</TriggerMethod>"
+            "<Track>"
+        )
+        for point in lap:
+            cadence = "" if point.cad is None else f"<Cadence>{point.cad}</Cadence>"
+            power = (
+                "" if point.power is None else f"<ns3:Watts>{point.power}</ns3:Watts>"
+            )
+            lines.append(
+                f"<Trackpoint><Time>{_iso(point.time)}</Time>"
+                f"<Position><LatitudeDegrees>{point.lat}</LatitudeDegrees>"
+                f"<LongitudeDegrees>{point.lon}</LongitudeDegrees></Position>"
+                f"<AltitudeMeters>{point.ele}</AltitudeMeters>"
+                f"<DistanceMeters>{point.distance}</DistanceMeters>"
+                f"<HeartRateBpm><Value>{point.hr}</Value></HeartRateBpm>{cadence}"
+                f"<Extensions><ns3:TPX><ns3:Speed>{point.speed}</ns3:Speed>{power}"
+                "</ns3:TPX></Extensions></Trackpoint>"
+            )
+        lines.append("</Track></Lap>")
+    lines.append("</Activity></Activities></TrainingCenterDatabase>")
+    return "\n".join(lines).encode()
+
+
+def _single_session(activity: Activity) -> Session:
+    if len(activity.sessions) != 1 or activity.sessions[0].lengths:
+        raise ValueError(f"{activity.name} can only be written as a FIT file")
+    return activity.sessions[0]
+
+
+WRITERS = {".fit": write_fit, ".gpx": write_gpx, ".tcx": write_tcx}
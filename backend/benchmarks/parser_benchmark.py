@@ -0,0 +1,289 @@
+"""Benchmark the activity file parsers on synthetic FIT, GPX and TCX files.
+
+Each case writes a file from benchmarks/activity_files.py and runs the
+import pipeline stages on it:
+
+- parse_file: parse the file with the parser of its extension
+- split_records_by_activity and create_activity_objects: split a FIT
+  file in sessions and build their activities
+- stream_persistence: build the activity streams and encode their rows
+  with activity_streams.crud.create_activity_streams
+
+Wall time is the best of --repeat runs. Peak memory, retained memory and
+retained blocks come from one more run traced with tracemalloc. Reverse
+geocoding, default gear lookups and the database session are replaced
+with in-process stand-ins so only the parsing is measured.
+
+Pass --save-baseline to store the results, then --baseline to compare a
+run with them: the command exits with status 1 when a stage is slower or
+uses more peak memory than the baseline by more than --tolerance.
+
+Usage (from the backend directory):
+    python benchmarks/parser_benchmark.py [--repeat 3] [--cases run_1h.fit ...]
+        [--output results.json] [--save-baseline baseline.json]
+        [--baseline baseline.json] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import activity_files  # noqa: E402
+
+# Import every router so all the ORM models are registered
+import core.routes  # noqa: E402, F401
+
+import activities.activity.utils as activities_utils  # noqa: E402
+import activities.activity_streams.crud as activity_streams_crud  # noqa: E402
+import fit.utils as fit_utils  # noqa: E402
+import users.users_default_gear.utils as user_default_gear_utils  # noqa: E402
+import users.users_privacy_settings.models as users_privacy_settings_models  # noqa: E402
+
+CASES = (
+    "run_1h.fit",
+    "run_1h.gpx",
+    "run_1h.tcx",
+    "ride_8h.fit",
+    "ride_8h.gpx",
+    "ride_8h.tcx",
+    "multisport.fit",
+    "pool_swim.fit",
+)
+
+# Metrics compared against the baseline
+COMPARED_METRICS = ("seconds", "peak_kib")
+
+USER_ID = 1
+LOCATION = {"city": "Lisboa", "town": "Lisboa", "country": "Portugal"}
+
+
+class BenchmarkSession:
+    """Database session stand-in keeping the rows it is given."""
+
+    def __init__(self):
+        self.rows = []
+
+    def bulk_save_objects(self, objects):
+        self.rows.extend(objects)
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def filter_by(self, **kwargs):
+        return self
+
+    def first(self):
+        return None
+
+    def all(self):
+        return []
+
+    def add_all(self, objects):
+        self.rows.extend(objects)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def privacy_settings() -> users_privacy_settings_models.UsersPrivacySettings:
+    """Return privacy settings hiding nothing."""
+    return users_privacy_settings_models.UsersPrivacySettings(
+        user_id=USER_ID, default_activity_visibility="public"
+    )
+
+
+def run_pipeline(path: str, extension: str, timings: dict, measure) -> None:
+    """Run the stages of a case, measuring each with measure."""
+    db = BenchmarkSession()
+    settings = privacy_settings()
+
+    parsed = measure(
+        timings,
+        "parse_file",
+        activities_utils.parse_file,
+        USER_ID,
+        settings,
+        extension,
+        path,
+        db,
+    )
+
+    if extension == ".fit":
+        sessions = measure(
+            timings,
+            "split_records_by_activity",
+            fit_utils.split_records_by_activity,
+            parsed,
+        )
+        activities = measure(
+            timings,
+            "create_activity_objects",
+            fit_utils.create_activity_objects,
+            sessions,
+            USER_ID,
+            settings,
+            None,
+            None,
+            db,
+        )
+    else:
+        activities = [parsed]
+
+    def persist_streams():
+        for activity_id, activity in enumerate(activities, start=1):
+            streams = activities_utils.parse_activity_streams_from_file(
+                activity, activity_id
+            )
+            if streams is not None:
+                activity_streams_crud.create_activity_streams(streams, db, commit=False)
+        return db.rows
+
+    measure(timings, "stream_persistence", persist_streams)
+
+
+def time_stage(timings: dict, stage: str, func, *args):
+    """Run a stage and keep its best wall time."""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    timings[stage] = min(timings.get(stage, elapsed), elapsed)
+    return result
+
+
+def trace_stage(memory: dict, stage: str, func, *args):
+    """Run a stage traced by tracemalloc and keep its memory use."""
+    tracemalloc.reset_peak()
+    current_before, _ = tracemalloc.get_traced_memory()
+    blocks_before = sys.getallocatedblocks()
+    result = func(*args)
+    current_after, peak = tracemalloc.get_traced_memory()
+    memory[stage] = {
+        "peak_kib": round((peak - current_before) / 1024, 1),
+        "retained_kib": round((current_after - current_before) / 1024, 1),
+        "retained_blocks": sys.getallocatedblocks() - blocks_before,
+    }
+    return result
+
+
+def run_case(case: str, directory: str, repeat: int) -> dict:
+    """Write the file of a case and measure its stages."""
+    profile, extension = os.path.splitext(case)
+    content = activity_files.WRITERS[extension](activity_files.build_activity(profile))
+    path = os.path.join(directory, case)
+    with open(path, "wb") as file:
+        file.write(content)
+
+    timings: dict[str, float] = {}
+    for _ in range(repeat):
+        run_pipeline(path, extension, timings, time_stage)
+
+    memory: dict[str, dict] = {}
+    tracemalloc.start()
+    try:
+        run_pipeline(path, extension, memory, trace_stage)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "file_kib": round(len(content) / 1024, 1),
+        "stages": {
+            stage: {"seconds": round(seconds, 4), **memory[stage]}
+            for stage, seconds in timings.items()
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Return the stages worse than the baseline by more than the tolerance.
+
+    Args:
+        results: Cases of this run.
+        baseline: Cases of the baseline.
+        tolerance: Allowed increase, as a share of the baseline value.
+
+    Returns:
+        A description of each regression.
+    """
+    regressions = []
+    for case, result in results.items():
+        baseline_stages = baseline.get(case, {}).get("stages", {})
+        for stage, values in result["stages"].items():
+            for metric in COMPARED_METRICS:
+                reference = baseline_stages.get(stage, {}).get(metric)
+                if not reference:
+                    continue
+                ratio = values[metric] / reference
+                if ratio > 1 + tolerance:
+                    regressions.append(
+                        f"{case} {stage} {metric}: {values[metric]} vs "
+                        f"{reference} in the baseline ({ratio:.2f}x)"
+                    )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--output", help="Write the results to this file")
+    parser.add_argument("--save-baseline", help="Store the results as a baseline")
+    parser.add_argument("--baseline", help="Compare the results with a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as directory:
+        stack.enter_context(
+            patch.object(
+                activities_utils,
+                "location_based_on_coordinates",
+                return_value=LOCATION,
+            )
+        )
+        stack.enter_context(
+            patch.object(
+                user_default_gear_utils,
+                "get_user_default_gear_by_activity_type",
+                return_value=None,
+            )
+        )
+        results = {case: run_case(case, directory, args.repeat) for case in args.cases}
+
+    report = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "cases": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["cases"]
+        report["tolerance"] = args.tolerance
+        report["regressions"] = compare(results, baseline, args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                file.write(output + "\n")
+
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark the overhead of the API rate limiter per request.
+
+Compares the per worker in-memory storage against the Postgres storage of
+core.rate_limit_storage, once reserving a single hit per query and once
+with leases, using the sliding window counter strategy of the API.
+
+The Postgres storage uses the database configured by the DB_* environment
+variables. Pass --simulate-latency-ms to replace the database with
+in-process counters answering after a fixed delay.
+
+Usage (from the backend directory):
+    python benchmarks/rate_limit_benchmark.py [--requests 5000] [--clients 50]
+        [--limit 100] [--simulate-latency-ms 0.5]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+from limits import RateLimitItemPerMinute
+from limits.storage import MemoryStorage
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import core.rate_limit_storage as core_rate_limit_storage  # noqa: E402
+
+
+def simulate_database(
+    storage: core_rate_limit_storage.PostgresRateLimitStorage, latency: float
+) -> None:
+    """Answer the reservations of a storage in process after a delay."""
+    hits: dict[str, int] = {}
+
+    def reserve(key, limit, expiry, amount, lease_size, now):
+        storage.round_trips += 1
+        time.sleep(latency)
+        previous_key, current_key = storage.sliding_window_keys(key, expiry, now)
+        previous = hits.get(previous_key, 0)
+        current = hits.get(current_key, 0)
+        weight = core_rate_limit_storage._previous_weight(now, expiry)
+        room = limit - math.floor(previous * weight + current)
+        granted = min(lease_size, room) if room >= amount else 0
+        hits[current_key] = current + granted
+        return previous, current + granted, granted
+
+    storage._reserve = reserve
+
+
+def run(storage, requests: int, clients: int, limit: int) -> dict[str, float]:
+    """Hit the limiter as clients taking turns and time each hit."""
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    item = RateLimitItemPerMinute(limit)
+    allowed = 0
+    start = time.perf_counter()
+    for request in range(requests):
+        allowed += limiter.hit(item, "benchmark", f"client-{request % clients}")
+    elapsed = time.perf_counter() - start
+    return {
+        "microseconds_per_request": round(elapsed / requests * 1e6, 2),
+        "round_trips_per_request": round(
+            getattr(storage, "round_trips", 0) / requests, 3
+        ),
+        "allowed": allowed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--simulate-latency-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    results = {"memory": run(MemoryStorage(), args.requests, args.clients, args.limit)}
+    for name, lease_fraction in (
+        ("postgres_per_hit", 0.0),
+        ("postgres_leased", core_rate_limit_storage.LEASE_FRACTION),
+    ):
+        storage = core_rate_limit_storage.PostgresRateLimitStorage(
+            lease_fraction=lease_fraction
+        )
+        if args.simulate_latency_ms is not None:
+            simulate_database(storage, args.simulate_latency_ms / 1000)
+        else:
+            storage.reset()
+        results[name] = run(storage, args.requests, args.clients, args.limit)
+
+    print(
+        json.dumps(
+            {
+                "requests": args.requests,
+                "clients": args.clients,
+                "limit_per_minute": args.limit,
+                "simulated_latency_ms": args.simulate_latency_ms,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark the stream metrics computed while parsing an activity.
+
+Compares the previous per point Python implementations (distance with
+geopy, per pair instant speed, statistics based elevation smoothing and
+list based power metrics) against activities.activity.metrics on a
+synthetic 1 Hz track.
+
+Usage (from the backend directory):
+    python benchmarks/stream_metrics_benchmark.py [--points 10000] [--repeat 3]
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import activities.activity.metrics as activities_metrics  # noqa: E402
+
+
+def build_track(points: int) -> dict[str, list]:
+    """Build a synthetic 1 Hz running track with elevation and power."""
+    start = datetime(2024, 5, 1, 6, 0, 0)
+    return {
+        "times": [start + timedelta(seconds=i) for i in range(points)],
+        "lat": [38.7 + 0.00003 * i + 0.00001 * math.sin(i / 40) for i in range(points)],
+        "lon": [-9.1 + 0.00002 * i + 0.00001 * math.cos(i / 40) for i in range(points)],
+        "ele": [100 + 15 * math.sin(i / 120) + (i % 7) * 0.3 for i in range(points)],
+        "power": [220 + 60 * math.sin(i / 25) + (i % 11) for i in range(points)],
+        "hr": [120 + 40 * math.sin(i / 600) ** 2 for i in range(points)],
+    }
+
+
+def legacy_metrics(track: dict[str, list]) -> dict[str, float]:
+    """Compute the metrics with the previous per point implementations."""
+    distance = 0.0
+    speeds = [0.0]
+    for i in range(1, len(track["times"])):
+        segment = geodesic(
+            (track["lat"][i - 1], track["lon"][i - 1]),
+            (track["lat"][i], track["lon"][i]),
+        ).meters
+        distance += segment
+        time_calc = datetime.fromisoformat(
+            track["times"][i].strftime("%Y-%m-%dT%H:%M:%S")
+        )
+        prev_time_calc = datetime.fromisoformat(
+            track["times"][i - 1].strftime("%Y-%m-%dT%H:%M:%S")
+        )
+        elapsed = (time_calc - prev_time_calc).total_seconds()
+        speeds.append(segment / elapsed if elapsed > 0 else 0)
+
+    def smooth(values, window_size, reducer):
+        half = window_size // 2
+        return [
+            reducer(values[max(0, i - half) : min(len(values), i + half + 1)])
+            for i in range(len(values))
+        ]
+
+    filtered = smooth(smooth(track["ele"], 6, statistics.median), 3, statistics.mean)
+    gain = loss = 0.0
+    for i in range(1, len(filtered)):
+        diff = filtered[i] - filtered[i - 1]
+        if diff > 0.1:
+            gain += diff
+        elif diff < -0.1:
+            loss -= diff
+
+    power = [float(value) for value in track["power"]]
+    normalized_power = (sum(p**4 for p in power) / len(power)) ** (1 / 4)
+
+    max_hr = max(track["hr"])
+    bounds = [max_hr * ratio for ratio in (0.6, 0.7, 0.8, 0.9)]
+    zones = [0] * 5
+    for value in track["hr"]:
+        zones[sum(value >= bound for bound in bounds)] += 1
+
+    return {
+        "distance": distance,
+        "max_speed": max(speeds),
+        "elevation_gain": gain,
+        "elevation_loss": loss,
+        "normalized_power": normalized_power,
+        "avg_power": statistics.mean(power),
+    }
+
+
+def vectorized_metrics(track: dict[str, list]) -> dict[str, float]:
+    """Compute the metrics with activities.activity.metrics."""
+    seconds = activities_metrics.to_seconds(track["times"])
+    distances = activities_metrics.vincenty_distances(track["lat"], track["lon"])
+    speeds = activities_metrics.instant_speeds(seconds, distances, fill_value=0)
+    gain, loss = activities_metrics.elevation_gain_and_loss(track["ele"])
+    avg_power, _ = activities_metrics.avg_and_max(track["power"])
+    normalized_power = activities_metrics.normalized_power(track["power"], seconds)
+
+    max_hr = max(track["hr"])
+    activities_metrics.zone_histogram(
+        track["hr"], [max_hr * ratio for ratio in (0.6, 0.7, 0.8, 0.9)]
+    )
+
+    return {
+        "distance": float(distances.sum()),
+        "max_speed": float(speeds.max()),
+        "elevation_gain": gain,
+        "elevation_loss": loss,
+        "normalized_power": normalized_power,
+        "avg_power": avg_power,
+    }
+
+
+def time_call(func, track: dict[str, list], repeat: int) -> tuple[float, dict]:
+    """Return the best wall time of repeat runs and the last result."""
+    best = math.inf
+    result = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(track)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    track = build_track(args.points)
+    legacy_seconds, legacy = time_call(legacy_metrics, track, args.repeat)
+    vectorized_seconds, vectorized = time_call(vectorized_metrics, track, args.repeat)
+
+    print(
+        json.dumps(
+            {
+                "points": args.points,
+                "legacy_seconds": round(legacy_seconds, 4),
+                "vectorized_seconds": round(vectorized_seconds, 4),
+                "speedup": round(legacy_seconds / vectorized_seconds, 1),
+                "legacy": legacy,
+                "vectorized": vectorized,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Tests for activities.activity.bulk_import_service module."""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import activities.activity.bulk_import_service as bulk_import_service
+
+
+class InlineProcessPool(ThreadPoolExecutor):
+    """Thread pool standing in for the process pool in tests."""
+
+    def __init__(self, max_workers=None, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers=max_workers)
+
+
+def parsed_file(path: str, error: str | None = None, activities=None) -> dict:
+    """Build a parse result as returned by the workers."""
+    return {
+        "file_path": path,
+        "file_extension": ".gpx",
+        "activities": activities if activities is not None else [{"activity": path}],
+        "error": error,
+    }
+
+
+class TestParseBulkImportFile:
+    """Tests for parse_bulk_import_file function."""
+
+    @patch("activities.activity.bulk_import_service.core_logger.print_to_log")
+    @patch("activities.activity.bulk_import_service.SessionLocal")
+    @patch("activities.activity.bulk_import_service.activities_utils.parse_file")
+    @patch(
+        "activities.activity.bulk_import_service.users_privacy_settings_crud.get_user_privacy_settings_by_user_id"
+    )
+    def test_parse_error_is_returned(
+        self, mock_privacy, mock_parse, mock_session, mock_log
+    ):
+        """Test that parser exceptions are returned instead of raised."""
+        mock_parse.side_effect = ValueError("corrupt file")
+
+        result = bulk_import_service.parse_bulk_import_file(1, "/tmp/a.gpx")
+
+        assert result["error"] == "corrupt file"
+        assert result["activities"] == []
+        assert result["file_extension"] == ".gpx"
+
+    @patch("activities.activity.bulk_import_service.SessionLocal")
+    @patch("activities.activity.bulk_import_service.activities_utils.parse_file")
+    @patch(
+        "activities.activity.bulk_import_service.users_privacy_settings_crud.get_user_privacy_settings_by_user_id"
+    )
+    def test_gpx_file_returns_single_activity(
+        self, mock_privacy, mock_parse, mock_session
+    ):
+        """Test that GPX files produce one parsed activity."""
+        mock_parse.return_value = {"activity": "parsed"}
+
+        result = bulk_import_service.parse_bulk_import_file(1, "/tmp/a.gpx")
+
+        assert result["error"] is None
+        assert result["activities"] == [{"activity": "parsed"}]
+
+
+class TestInitParseWorker:
+    """Tests for init_parse_worker function."""
+
+    @patch.object(bulk_import_service.core_config, "REVERSE_GEO_DEFERRED", False)
+    @patch.object(bulk_import_service.core_logger, "setup_main_logger")
+    def test_geocoding_is_left_to_the_writer(self, mock_setup_logger):
+        """Test that the workers don't reverse geocode."""
+        bulk_import_service.init_parse_worker()
+
+        assert bulk_import_service.core_config.REVERSE_GEO_DEFERRED is True
+
+
+class TestBulkImportService:
+    """Tests for BulkImportService class."""
+
+    @pytest.fixture
+    def service(self):
+        """Create a BulkImportService without an event loop."""
+        return bulk_import_service.BulkImportService(
+            1,
+            MagicMock(),
+            None,
+            bulk_import_service.BulkImportConfig(max_workers=2, batch_size=2),
+        )
+
+    @pytest.fixture(autouse=True)
+    def patch_pipeline(self):
+        """Patch the process pool, database and file moves."""
+        with (
+            patch.object(bulk_import_service, "ProcessPoolExecutor", InlineProcessPool),
+            patch.object(bulk_import_service, "SessionLocal", MagicMock()),
+            patch.object(
+                bulk_import_service.users_crud, "get_user_by_id", return_value=object()
+            ),
+            patch.object(bulk_import_service.activities_utils, "move_file") as move,
+            patch.object(bulk_import_service.core_logger, "print_to_log"),
+            patch.object(bulk_import_service.core_logger, "print_to_log_and_console"),
+        ):
+            yield move
+
+    def test_failed_file_does_not_stop_others(self, service, patch_pipeline):
+        """Test that a parse failure only affects its own file."""
+        results = {
+            "ok.gpx": parsed_file("ok.gpx"),
+            "bad.gpx": parsed_file("bad.gpx", error="boom", activities=[]),
+        }
+        stored = []
+
+        with (
+            patch.object(
+                bulk_import_service,
+                "parse_bulk_import_file",
+                side_effect=lambda user_id, path: results[path],
+            ),
+            patch.object(
+                service,
+                "_add_file_activities",
+                side_effect=lambda parsed, db: stored.append(parsed["file_path"])
+                or [(SimpleNamespace(id=7, user_id=1), False)],
+            ),
+        ):
+            counts = service.import_files(["ok.gpx", "bad.gpx"])
+
+        assert stored == ["ok.gpx"]
+        assert counts["files_processed"] == 2
+        assert counts["files_failed"] == 1
+        assert counts["activities"] == 1
+
+    def test_failed_batch_is_retried_per_file(self, service):
+        """Test that a batch failure falls back to one transaction per file."""
+        results = {name: parsed_file(name) for name in ("a.gpx", "b.gpx")}
+
+        def add_file_activities(parsed, db):
+            if parsed["file_path"] == "b.gpx":
+                raise RuntimeError("duplicate key")
+            return [(SimpleNamespace(id=1, user_id=1), False)]
+
+        with (
+            patch.object(
+                bulk_import_service,
+                "parse_bulk_import_file",
+                side_effect=lambda user_id, path: results[path],
+            ),
+            patch.object(
+                service, "_add_file_activities", side_effect=add_file_activities
+            ),
+        ):
+            counts = service.import_files(["a.gpx", "b.gpx"])
+
+        assert counts["files_processed"] == 2
+        assert counts["files_failed"] == 1
+        assert counts["activities"] == 1
+
+    def test_missing_user_aborts_import(self, service):
+        """Test that nothing is parsed for an unknown user."""
+        with (
+            patch.object(
+                bulk_import_service.users_crud, "get_user_by_id", return_value=None
+            ),
+            patch.object(bulk_import_service, "parse_bulk_import_file") as mock_parse,
+        ):
+            counts = service.import_files(["a.gpx"])
+
+        mock_parse.assert_not_called()
+        assert counts["files_processed"] == 0
+
+    def test_known_files_are_not_parsed(self, service, patch_pipeline):
+        """Test that imported files and copies in the import are skipped."""
+        content_hashes = {"new.gpx": "h1", "copy.gpx": "h1", "old.gpx": "h2"}
+        parsed_paths = []
+        stored_hashes = []
+
+        def parse(user_id, path):
+            parsed_paths.append(path)
+            return parsed_file(path)
+
+        with (
+            patch.object(
+                bulk_import_service.activity_fingerprints_utils,
+                "hash_file",
+                side_effect=content_hashes.get,
+            ),
+            patch.object(
+                bulk_import_service.activity_fingerprints_crud,
+                "get_known_content_hashes",
+                return_value={"h2"},
+            ),
+            patch.object(
+                bulk_import_service, "parse_bulk_import_file", side_effect=parse
+            ),
+            patch.object(
+                service,
+                "_add_file_activities",
+                side_effect=lambda parsed, db: stored_hashes.append(
+                    parsed["content_hash"]
+                )
+                or [(SimpleNamespace(id=7, user_id=1), False)],
+            ),
+        ):
+            counts = service.import_files(["new.gpx", "copy.gpx", "old.gpx"])
+
+        assert parsed_paths == ["new.gpx"]
+        assert stored_hashes == ["h1"]
+        assert counts["files_processed"] == 3
+        assert counts["files_skipped"] == 2
+        assert counts["activities"] == 1
+        moved = {call.args[2] for call in patch_pipeline.call_args_list}
+        assert moved == {"new.gpx", "copy.gpx", "old.gpx"}
+
+    def test_batch_is_geocoded_once(self, service):
+        """Test that the activities of a batch are geocoded together."""
+        results = {name: parsed_file(name) for name in ("a.gpx", "b.gpx")}
+
+        with (
+            patch.object(
+                bulk_import_service,
+                "parse_bulk_import_file",
+                side_effect=lambda user_id, path: results[path],
+            ),
+            patch.object(
+                service,
+                "_add_file_activities",
+                return_value=[(SimpleNamespace(id=1, user_id=1), False)],
+            ),
+            patch.object(
+                bulk_import_service.activities_utils, "geocode_parsed_activities"
+            ) as mock_geocode,
+        ):
+            counts = service.import_files(["a.gpx", "b.gpx"])
+
+        mock_geocode.assert_called_once()
+        assert sorted(
+            parsed_info["activity"] for parsed_info in mock_geocode.call_args.args[0]
+        ) == ["a.gpx", "b.gpx"]
+        assert counts["activities"] == 2
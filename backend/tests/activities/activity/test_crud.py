@@ -0,0 +1,60 @@
+"""Tests for activities.activity.crud module."""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import activities.activity.crud as activities_crud
+import activities.activity.schema as activities_schema
+import activities.activity_daily_rollups.models as activity_daily_rollups_models
+
+
+def _activity(start_time: datetime, distance: int) -> activities_schema.Activity:
+    activity = activities_schema.Activity(
+        user_id=1,
+        name="Run",
+        activity_type=1,
+        distance=distance,
+        total_elapsed_time=1800,
+        total_timer_time=1800,
+        timezone="UTC",
+        visibility=0,
+        **{
+            field: False
+            for field in activities_schema.Activity.model_fields
+            if field.startswith("hide_")
+        },
+    )
+    # SQLite only binds datetime objects
+    activity.start_time = start_time
+    activity.end_time = start_time
+    return activity
+
+
+class TestEditActivity:
+    """Tests for edit_activity function."""
+
+    def test_rollups_of_both_days_are_refreshed(self, sqlite_db):
+        """Test that moving an activity updates the rollups of both days."""
+        moved, _ = activities_crud.add_activity(
+            _activity(datetime(2024, 5, 1, 8), 5000), sqlite_db
+        )
+        activities_crud.add_activity(
+            _activity(datetime(2024, 5, 1, 18), 3000), sqlite_db
+        )
+        sqlite_db.commit()
+
+        activities_crud.edit_activity(
+            1,
+            SimpleNamespace(
+                id=moved.id, start_time=datetime(2024, 5, 2, 8), distance=8000
+            ),
+            sqlite_db,
+        )
+
+        rollups = {
+            rollup.day: (rollup.activity_count, rollup.total_distance)
+            for rollup in sqlite_db.query(
+                activity_daily_rollups_models.ActivityDailyRollup
+            )
+        }
+        assert rollups == {date(2024, 5, 1): (1, 3000), date(2024, 5, 2): (1, 8000)}
@@ -0,0 +1,156 @@
+"""Tests for activities.activity.laps module."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import activities.activity.laps as activities_laps
+
+
+def build_streams(points: int, step_lat: float = 0.0001) -> dict[str, list]:
+    """Build 1 Hz streams along a meridian, about 11 m per point."""
+    start = datetime(2024, 5, 1, 6, 0, 0)
+    times = [
+        (start + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(points)
+    ]
+    return {
+        "lat_lon_waypoints": [
+            {"time": time, "lat": 38.7 + step_lat * i, "lon": -9.1}
+            for i, time in enumerate(times)
+        ],
+        "ele_waypoints": [
+            {"time": time, "ele": 100 + i * 0.5} for i, time in enumerate(times)
+        ],
+        "power_waypoints": [{"time": time, "power": 200} for time in times],
+        "hr_waypoints": [
+            {"time": time, "hr": 100 + i % 2 * 20} for i, time in enumerate(times)
+        ],
+        "cad_waypoints": [],
+        "vel_waypoints": [{"time": time, "vel": 4.0} for time in times],
+    }
+
+
+class TestLapSplit:
+    """Tests for LapSplit class."""
+
+    def test_default_is_one_kilometer(self):
+        """Test that the default split is a 1 km auto lap."""
+        lap_split = activities_laps.LapSplit()
+
+        assert lap_split.kind == activities_laps.LAP_SPLIT_DISTANCE
+        assert lap_split.length == 1000
+
+    def test_custom_marks_are_sorted(self):
+        """Test that custom marks are stored in order."""
+        lap_split = activities_laps.LapSplit.custom(
+            activities_laps.LAP_SPLIT_TIME, [600, 60]
+        )
+
+        assert lap_split.marks == (60, 600)
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"kind": "pace"}, {"length": 0}, {"length": None}],
+    )
+    def test_invalid_split(self, kwargs):
+        """Test that invalid splits are rejected."""
+        with pytest.raises(ValueError):
+            activities_laps.LapSplit(**kwargs)
+
+
+class TestFindLapBoundaries:
+    """Tests for find_lap_boundaries function."""
+
+    progress = np.array([0, 400, 800, 1000, 1300, 2100, 2500], dtype=np.float64)
+
+    def test_auto_laps_restart_on_boundary(self):
+        """Test that each lap starts where the previous one ended."""
+        boundaries = activities_laps.find_lap_boundaries(
+            self.progress, activities_laps.LapSplit.distance(1000)
+        )
+
+        assert boundaries == [0, 3, 5, 6]
+
+    def test_custom_marks(self):
+        """Test that laps end on the first waypoint reaching each mark."""
+        boundaries = activities_laps.find_lap_boundaries(
+            self.progress,
+            activities_laps.LapSplit.custom(
+                activities_laps.LAP_SPLIT_DISTANCE, [500, 2000]
+            ),
+        )
+
+        assert boundaries == [0, 2, 5, 6]
+
+    def test_no_final_lap_without_progress(self):
+        """Test that trailing waypoints without progress do not add a lap."""
+        boundaries = activities_laps.find_lap_boundaries(
+            np.array([0, 500, 1000, 1000], dtype=np.float64),
+            activities_laps.LapSplit.distance(1000),
+        )
+
+        assert boundaries == [0, 2]
+
+    def test_single_waypoint(self):
+        """Test that a single waypoint has no laps."""
+        assert (
+            activities_laps.find_lap_boundaries(
+                np.zeros(1), activities_laps.LapSplit()
+            )
+            == []
+        )
+
+
+class TestGenerateActivityLaps:
+    """Tests for generate_activity_laps function."""
+
+    def test_distance_laps(self):
+        """Test 1 km laps over a 2.5 km track."""
+        streams = build_streams(226)
+
+        laps = activities_laps.generate_activity_laps(**streams)
+
+        assert len(laps) == 3
+        assert [round(lap["total_distance"] / 1000) for lap in laps[:2]] == [1, 1]
+        assert sum(lap["total_distance"] for lap in laps) == pytest.approx(
+            2500, rel=0.01
+        )
+        assert laps[0]["start_position_lat"] == 38.7
+        assert laps[1]["start_position_lat"] == laps[0]["end_position_lat"]
+        assert laps[0]["avg_heart_rate"] == 110
+        assert laps[0]["max_heart_rate"] == 120
+        assert laps[0]["avg_power"] == 200
+        assert laps[0]["normalized_power"] == 200
+        assert laps[0]["avg_cadence"] is None
+        assert laps[0]["enhanced_avg_speed"] == 4.0
+        assert laps[0]["enhanced_avg_pace"] == 0.25
+        assert laps[0]["total_ascent"] > 0
+
+    def test_time_laps(self):
+        """Test 60 s laps over a 150 s activity."""
+        streams = build_streams(151)
+
+        laps = activities_laps.generate_activity_laps(
+            **streams, lap_split=activities_laps.LapSplit.time(60)
+        )
+
+        assert [lap["total_elapsed_time"] for lap in laps] == [60, 60, 30]
+        assert laps[1]["start_time"] == "2024-05-01T06:01:00"
+
+    def test_missing_values_are_ignored(self):
+        """Test that null samples do not affect averages."""
+        streams = build_streams(20)
+        streams["hr_waypoints"][1]["hr"] = None
+
+        laps = activities_laps.generate_activity_laps(**streams)
+
+        assert laps[0]["avg_heart_rate"] == round((10 * 100 + 9 * 120) / 19)
+
+    def test_invalid_times_return_no_laps(self):
+        """Test that waypoints without valid times produce no laps."""
+        streams = build_streams(5)
+        streams["lat_lon_waypoints"][2]["time"] = "not a time"
+
+        assert activities_laps.generate_activity_laps(**streams) == []
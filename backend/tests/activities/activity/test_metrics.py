@@ -0,0 +1,193 @@
+"""Tests for activities.activity.metrics module."""
+
+import statistics
+from datetime import datetime
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+import activities.activity.metrics as activities_metrics
+
+
+class TestDistances:
+    """Tests for haversine_distances and vincenty_distances functions."""
+
+    def test_vincenty_matches_geodesic(self):
+        """Test that Vincenty distances match geopy within millimeters."""
+        rng = np.random.default_rng(7)
+        lat = 38.7 + np.cumsum(rng.normal(0, 1e-4, 500))
+        lon = -9.1 + np.cumsum(rng.normal(0, 1e-4, 500))
+
+        distances = activities_metrics.vincenty_distances(lat, lon)
+        expected = [
+            geodesic((lat[i], lon[i]), (lat[i + 1], lon[i + 1])).meters
+            for i in range(len(lat) - 1)
+        ]
+
+        np.testing.assert_allclose(distances, expected, atol=1e-3)
+
+    def test_identical_points_have_zero_distance(self):
+        """Test that repeated points do not add distance."""
+        distances = activities_metrics.vincenty_distances([1.0, 1.0], [2.0, 2.0])
+
+        assert distances.tolist() == [0.0]
+
+    def test_haversine_is_close_to_geodesic(self):
+        """Test that the haversine distance is within 0.5% of geodesic."""
+        distance = activities_metrics.haversine_distances([38.7, 38.8], [-9.1, -9.0])
+
+        expected = geodesic((38.7, -9.1), (38.8, -9.0)).meters
+        assert distance[0] == pytest.approx(expected, rel=5e-3)
+
+    def test_missing_coordinates_give_nan(self):
+        """Test that a NaN coordinate only affects its own segments."""
+        distances = activities_metrics.vincenty_distances(
+            [1.0, np.nan, 1.001, 1.002], [2.0, 2.0, 2.0, 2.0]
+        )
+
+        assert np.isnan(distances[:2]).all()
+        assert distances[2] > 0
+
+    @pytest.mark.parametrize("count", [0, 1])
+    def test_short_tracks_have_no_segments(self, count):
+        """Test that tracks with fewer than two points have no distances."""
+        distances = activities_metrics.vincenty_distances([0.0] * count, [0.0] * count)
+
+        assert distances.size == 0
+
+
+class TestInstantSpeeds:
+    """Tests for instant_speeds function."""
+
+    def test_speed_from_previous_point(self):
+        """Test that speeds use the distance and time to the previous point."""
+        speeds = activities_metrics.instant_speeds([0, 2, 2, 5], [10.0, 4.0, 9.0])
+
+        assert np.isnan(speeds[0])
+        assert speeds[1:].tolist() == [5.0, 0.0, 3.0]
+
+    def test_fill_value(self):
+        """Test that undefined speeds use the fill value."""
+        speeds = activities_metrics.instant_speeds(
+            [0, 1, 2], [np.nan, 3.0], fill_value=0
+        )
+
+        assert speeds.tolist() == [0.0, 0.0, 3.0]
+
+
+class TestToSeconds:
+    """Tests for to_seconds function."""
+
+    def test_iso_strings_and_datetimes_match(self):
+        """Test that ISO strings and datetimes convert to the same seconds."""
+        strings = activities_metrics.to_seconds(
+            ["2024-05-01T06:00:00", "2024-05-01T06:00:05"]
+        )
+        datetimes = activities_metrics.to_seconds(
+            [datetime(2024, 5, 1, 6, 0, 0), datetime(2024, 5, 1, 6, 0, 5)]
+        )
+
+        assert strings.tolist() == datetimes.tolist()
+        assert np.diff(strings).tolist() == [5.0]
+
+    def test_numeric_offsets_are_kept(self):
+        """Test that numeric time offsets are returned as is."""
+        assert activities_metrics.to_seconds([0, 1, 3]).tolist() == [0.0, 1.0, 3.0]
+
+
+class TestElevationGainAndLoss:
+    """Tests for rolling filters and elevation_gain_and_loss function."""
+
+    @staticmethod
+    def legacy_filter(values, window_size, reducer):
+        half = window_size // 2
+        return [
+            reducer(values[max(0, i - half) : min(len(values), i + half + 1)])
+            for i in range(len(values))
+        ]
+
+    def test_rolling_filters_match_truncated_windows(self):
+        """Test that edge windows shrink like the per point implementation."""
+        values = [100.0, 103.0, 99.0, 104.0, 110.0, 108.0, 107.0, 115.0, 111.0]
+
+        np.testing.assert_allclose(
+            activities_metrics.rolling_median(values, 6),
+            self.legacy_filter(values, 6, statistics.median),
+        )
+        np.testing.assert_allclose(
+            activities_metrics.rolling_mean(values, 3),
+            self.legacy_filter(values, 3, statistics.mean),
+        )
+
+    def test_gain_and_loss(self):
+        """Test gain and loss of a climb followed by a descent."""
+        elevations = list(range(100, 151)) + list(range(150, 119, -1))
+
+        gain, loss = activities_metrics.elevation_gain_and_loss(elevations)
+
+        assert gain == pytest.approx(50, abs=3)
+        assert loss == pytest.approx(30, abs=3)
+
+    def test_noise_below_threshold_is_ignored(self):
+        """Test that small oscillations do not count as gain or loss."""
+        gain, loss = activities_metrics.elevation_gain_and_loss([100.0, 100.05] * 50)
+
+        assert (gain, loss) == (0.0, 0.0)
+
+    def test_empty_profile(self):
+        """Test that an empty profile has no gain or loss."""
+        assert activities_metrics.elevation_gain_and_loss([]) == (0.0, 0.0)
+
+
+class TestNormalizedPower:
+    """Tests for normalized_power function."""
+
+    def test_constant_power(self):
+        """Test that constant power normalizes to itself."""
+        assert activities_metrics.normalized_power([250.0] * 120) == pytest.approx(250)
+
+    def test_variable_power_is_above_average(self):
+        """Test that surges raise normalized power above average power."""
+        power = ([400.0] * 60 + [100.0] * 60) * 5
+
+        normalized = activities_metrics.normalized_power(power)
+
+        assert normalized > np.mean(power)
+
+    def test_sparse_samples_are_resampled(self):
+        """Test that samples are held until the next timestamp."""
+        seconds = np.arange(0, 120, 2, dtype=np.float64)
+        power = np.full(seconds.shape, 300.0)
+
+        assert activities_metrics.normalized_power(power, seconds) == pytest.approx(
+            300
+        )
+
+    def test_short_effort_uses_raw_samples(self):
+        """Test that efforts shorter than the window still return a value."""
+        assert activities_metrics.normalized_power([100.0, 300.0]) == pytest.approx(
+            ((100**4 + 300**4) / 2) ** 0.25
+        )
+
+    def test_empty_stream(self):
+        """Test that an empty stream returns 0."""
+        assert activities_metrics.normalized_power([]) == 0
+
+
+class TestZoneHistogram:
+    """Tests for zone_histogram function."""
+
+    def test_counts_per_zone(self):
+        """Test that values are binned with inclusive lower bounds."""
+        counts = activities_metrics.zone_histogram(
+            [100, 120, 130, 150, 160, 175, 190, np.nan], [120, 140, 160, 180]
+        )
+
+        assert counts.tolist() == [1, 2, 1, 2, 1]
+
+    def test_weights(self):
+        """Test that weights are summed per zone."""
+        counts = activities_metrics.zone_histogram([100, 150, 150], [120], [1, 2, 3])
+
+        assert counts.tolist() == [1.0, 5.0]
@@ -0,0 +1,209 @@
+"""Tests for activities.activity.search module."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.orm import Session
+
+import activities.activity.models as activities_models
+import activities.activity.search as activities_search
+
+
+def _session(dialect_name: str) -> MagicMock:
+    db = MagicMock(spec=Session)
+    db.get_bind.return_value.dialect.name = dialect_name
+    return db
+
+
+def _postgresql_sql(expression) -> str:
+    return str(
+        expression.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+class TestSearchTerms:
+    """Tests for search_terms function."""
+
+    def test_splits_url_search_into_words(self):
+        """Test that a URL encoded search is split into lowercase words."""
+        assert activities_search.search_terms("Morning+Run%2C%20Lisbon") == [
+            "morning",
+            "run",
+            "lisbon",
+        ]
+
+    def test_drops_duplicates_and_punctuation(self):
+        """Test that repeated words and punctuation are dropped."""
+        assert activities_search.search_terms("run! RUN _ 5k") == ["run", "5k"]
+
+    def test_limits_number_of_terms(self):
+        """Test that only the first MAX_SEARCH_TERMS terms are kept."""
+        search = " ".join(f"w{index}" for index in range(20))
+
+        terms = activities_search.search_terms(search)
+
+        assert len(terms) == activities_search.MAX_SEARCH_TERMS
+
+    @pytest.mark.parametrize("search", [None, "", " ", "%20-+"])
+    def test_empty_search(self, search):
+        """Test that a search without words has no terms."""
+        assert activities_search.search_terms(search) == []
+
+
+class TestMatchSpans:
+    """Tests for match_spans function."""
+
+    def test_long_term_matches_anywhere(self):
+        """Test that a long term matches inside words, ignoring case."""
+        assert activities_search.match_spans("run", "Trail RUN, rerun") == [
+            (6, 9),
+            (13, 16),
+        ]
+
+    def test_short_term_matches_word_start(self):
+        """Test that a short term only matches the start of words."""
+        assert activities_search.match_spans("ru", "Trail run, rerun") == [(6, 8)]
+
+    def test_no_value(self):
+        """Test that a missing value has no match."""
+        assert activities_search.match_spans("run", None) == []
+
+
+class TestGetMatchingGear:
+    """Tests for get_matching_gear function."""
+
+    def test_matches_nicknames_per_term(self):
+        """Test that the gear is matched against each term."""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [
+            (1, "Road Bike"),
+            (2, "Trail shoes"),
+        ]
+
+        matching_gear = activities_search.get_matching_gear(
+            7, ["bike", "tr", "run"], db
+        )
+
+        assert matching_gear == {
+            "bike": {1: "Road Bike"},
+            "tr": {2: "Trail shoes"},
+            "run": {},
+        }
+
+    def test_no_terms_skips_query(self):
+        """Test that the gear isn't queried without terms."""
+        db = MagicMock()
+
+        assert activities_search.get_matching_gear(7, [], db) == {}
+        db.query.assert_not_called()
+
+
+class TestSearchCondition:
+    """Tests for search_condition function."""
+
+    def test_postgresql_uses_indexed_operators(self):
+        """Test that PostgreSQL conditions use the search index expressions."""
+        condition = activities_search.search_condition(
+            ["lisbon", "mo"], {}, _session("postgresql")
+        )
+
+        compiled = condition.compile(dialect=postgresql.dialect())
+
+        assert f"{activities_models.SEARCH_DOCUMENT} ILIKE %(" in str(compiled)
+        assert (
+            "to_tsvector('simple'::regconfig, "
+            f"{activities_models.SEARCH_DOCUMENT}) @@ "
+            "to_tsquery('simple'::regconfig, %("
+        ) in str(compiled)
+        assert set(compiled.params.values()) == {"%lisbon%", "mo:*"}
+
+    def test_gear_is_matched_unless_hidden(self):
+        """Test that the gear of others is only matched when not hidden."""
+        db = _session("postgresql")
+
+        owner_sql = _postgresql_sql(
+            activities_search.search_condition(["bike"], {"bike": {3: "Bike"}}, db)
+        )
+        other_sql = _postgresql_sql(
+            activities_search.search_condition(
+                ["bike"], {"bike": {3: "Bike"}}, db, user_is_owner=False
+            )
+        )
+
+        assert "activities.gear_id IN (3)" in owner_sql
+        assert "hide_gear" not in owner_sql
+        assert "activities.hide_gear IS false" in other_sql
+
+    def test_no_terms_matches_nothing(self):
+        """Test that a search without terms matches no activity."""
+        condition = activities_search.search_condition([], {}, _session("mysql"))
+
+        assert _postgresql_sql(condition) == "false"
+
+
+class TestHighlightActivity:
+    """Tests for highlight_activity function."""
+
+    def test_merges_matches_per_field(self):
+        """Test that overlapping matches of the terms are merged."""
+        activity = SimpleNamespace(
+            name="Morning run",
+            description=None,
+            town=None,
+            city="Lisbon",
+            country="Portugal",
+            gear_id=3,
+        )
+
+        highlights = activities_search.highlight_activity(
+            activity, ["morn", "ning", "lis", "bike"], {"bike": {3: "Old bike"}}
+        )
+
+        assert highlights == {
+            "name": [(0, 7)],
+            "city": [(0, 3)],
+            "gear": [(4, 8)],
+        }
+
+    def test_hidden_gear_is_not_highlighted(self):
+        """Test that a cleared gear isn't highlighted."""
+        activity = SimpleNamespace(
+            name="Ride", description=None, town=None, city=None, country=None
+        )
+        activity.gear_id = None
+
+        highlights = activities_search.highlight_activity(
+            activity, ["bike"], {"bike": {3: "Bike"}}
+        )
+
+        assert highlights == {}
+
+
+class TestFallbackSearch:
+    """Tests for the search on databases other than PostgreSQL."""
+
+    def test_condition_uses_like(self):
+        """Test that long terms match inside words and short ones at starts."""
+        condition = activities_search.search_condition(
+            ["lisbon", "mo"], {}, _session("mysql")
+        )
+
+        compiled = condition.compile(dialect=mysql.dialect())
+
+        assert f"lower({activities_models.SEARCH_DOCUMENT}) LIKE" in str(compiled)
+        assert "to_tsvector" not in str(compiled)
+        assert set(compiled.params.values()) == {"%lisbon%", "mo%", "% mo%"}
+
+    def test_rank_counts_terms_in_name(self):
+        """Test that the rank counts the terms found in the name."""
+        rank = activities_search.search_rank(["run", "la"], _session("mysql"))
+
+        compiled = rank.compile(dialect=mysql.dialect())
+
+        assert str(compiled).count("CASE WHEN") == 2
+        assert "word_similarity" not in str(compiled)
+        assert {"%run%", "la%", "% la%"} <= set(compiled.params.values())
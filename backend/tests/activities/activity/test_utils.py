@@ -0,0 +1,214 @@
+"""Tests for activities.activity.utils module."""
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import activities.activity.models as activities_models
+import activities.activity.schema as activities_schema
+import activities.activity.utils as activities_utils
+import activities.activity_fingerprints.models as activity_fingerprints_models
+
+
+def _parsed_activity() -> activities_schema.Activity:
+    activity = activities_schema.Activity(
+        user_id=1,
+        name="Morning run",
+        activity_type=1,
+        distance=5000,
+        total_elapsed_time=1800,
+        total_timer_time=1800,
+        timezone="UTC",
+        visibility=0,
+        **{
+            field: False
+            for field in activities_schema.Activity.model_fields
+            if field.startswith("hide_")
+        },
+    )
+    # SQLite only binds datetime objects
+    activity.start_time = datetime(2026, 5, 1, 8)
+    activity.end_time = datetime(2026, 5, 1, 8, 30)
+    return activity
+
+
+class TestParseAndStoreActivityFromFile:
+    """Tests for parse_and_store_activity_from_file function."""
+
+    def test_known_file_is_not_parsed(self, tmp_path):
+        """Test that a file already imported is moved without parsing it."""
+        path = tmp_path / "activity.fit"
+        path.write_bytes(b"fit content")
+        content_hash = activities_utils.activity_fingerprints_utils.hash_file(str(path))
+
+        with (
+            patch.object(
+                activities_utils.activity_fingerprints_crud,
+                "get_known_content_hashes",
+                return_value={content_hash},
+            ) as mock_known,
+            patch.object(activities_utils, "parse_file") as mock_parse,
+            patch.object(activities_utils, "move_file") as mock_move,
+            patch.object(activities_utils.core_logger, "print_to_log_and_console"),
+            patch.object(activities_utils, "SessionLocal") as mock_session_local,
+        ):
+            result = activities_utils.parse_and_store_activity_from_file(1, str(path))
+
+        assert result is None
+        mock_known.assert_called_once()
+        mock_parse.assert_not_called()
+        mock_move.assert_called_once()
+        assert mock_move.call_args.args[1:] == ("activity.fit", str(path))
+
+    def test_file_stored_on_own_session(self, tmp_path, sqlite_db):
+        """Test that a parsed file is stored and committed on its own session."""
+        path = tmp_path / "activity.gpx"
+        path.write_bytes(b"gpx content")
+
+        with (
+            patch.object(activities_utils.users_crud, "get_user_by_id"),
+            patch.object(
+                activities_utils.users_privacy_settings_crud,
+                "get_user_privacy_settings_by_user_id",
+            ),
+            patch.object(
+                activities_utils,
+                "parse_file",
+                return_value={"activity": _parsed_activity()},
+            ),
+            patch.object(
+                activities_utils, "parse_activity_streams_from_file", return_value=None
+            ),
+            patch.object(activities_utils, "move_file") as mock_move,
+            patch.object(activities_utils.core_logger, "print_to_log_and_console"),
+            patch.object(activities_utils, "SessionLocal", return_value=sqlite_db),
+        ):
+            result = activities_utils.parse_and_store_activity_from_file(1, str(path))
+
+        assert len(result) == 1
+        activity, is_duplicate = result[0]
+        assert isinstance(activity, activities_schema.Activity)
+        assert (activity.id, activity.user_id, is_duplicate) == (1, 1, False)
+        assert mock_move.call_args.args[1:] == ("1.gpx", str(path))
+
+        stored = sqlite_db.get(activities_models.Activity, activity.id)
+        assert (stored.name, stored.distance) == ("Morning run", 5000)
+        fingerprint = sqlite_db.query(
+            activity_fingerprints_models.ActivityFingerprint
+        ).one()
+        assert fingerprint.activity_id == activity.id
+        assert fingerprint.content_hash is not None
+
+
+class TestNotifyStoredActivities:
+    """Tests for notify_stored_activities function."""
+
+    async def test_notifications_per_activity(self):
+        """Test that each stored activity gets its notification."""
+        ws_manager = MagicMock()
+        new_activity = SimpleNamespace(id=1, user_id=5)
+        duplicate_activity = SimpleNamespace(id=2, user_id=5)
+
+        with (
+            patch.object(
+                activities_utils.notifications_utils,
+                "create_new_activity_notification",
+                new_callable=AsyncMock,
+            ) as mock_new,
+            patch.object(
+                activities_utils.notifications_utils,
+                "create_new_duplicate_start_time_activity_notification",
+                new_callable=AsyncMock,
+            ) as mock_duplicate,
+            patch.object(
+                activities_utils.activity_ai_insight_jobs_utils,
+                "wake_activity_ai_insight_worker",
+            ) as mock_wake,
+        ):
+            await activities_utils.notify_stored_activities(
+                [(new_activity, False), (duplicate_activity, True)], ws_manager
+            )
+
+        mock_new.assert_awaited_once_with(5, 1, ws_manager)
+        mock_duplicate.assert_awaited_once_with(5, 2, ws_manager)
+        mock_wake.assert_called_once()
+
+    @pytest.mark.parametrize("activities", [[]])
+    async def test_nothing_stored(self, activities):
+        """Test that nothing is sent when no activity was stored."""
+        with patch.object(
+            activities_utils.activity_ai_insight_jobs_utils,
+            "wake_activity_ai_insight_worker",
+        ) as mock_wake:
+            await activities_utils.notify_stored_activities(activities, MagicMock())
+
+        mock_wake.assert_not_called()
+
+
+class TestLocationBasedOnCoordinates:
+    """Tests for location_based_on_coordinates function."""
+
+    @patch.object(activities_utils.core_config, "REVERSE_GEO_DEFERRED", True)
+    def test_deferred_geocoding_is_skipped(self):
+        """Test that nothing is resolved while the importer geocodes."""
+        with patch.object(
+            activities_utils.geocoding_utils, "reverse_geocode"
+        ) as mock_reverse_geocode:
+            assert activities_utils.location_based_on_coordinates(38.7, -9.1) is None
+
+        mock_reverse_geocode.assert_not_called()
+
+
+class TestGeocodeParsedActivities:
+    """Tests for geocode_parsed_activities function."""
+
+    def test_pending_activities_are_resolved_in_one_batch(self):
+        """Test that activities without location are resolved from their start."""
+        lisbon = {"city": "Lisboa", "town": None, "country": "Portugal"}
+        pending = {
+            "activity": SimpleNamespace(city=None, town=None, country=None),
+            "is_lat_lon_set": True,
+            "lat_lon_waypoints": [
+                {"lat": 38.7, "lon": -9.1},
+                {"lat": 38.8, "lon": -9.2},
+            ],
+        }
+        located = {
+            "activity": SimpleNamespace(city="Porto", town=None, country=None),
+            "is_lat_lon_set": True,
+            "lat_lon_waypoints": [{"lat": 41.1, "lon": -8.6}],
+        }
+        indoor = {
+            "activity": SimpleNamespace(city=None, town=None, country=None),
+            "is_lat_lon_set": False,
+            "lat_lon_waypoints": [],
+        }
+
+        with patch.object(
+            activities_utils.geocoding_utils,
+            "reverse_geocode_batch",
+            new_callable=AsyncMock,
+            return_value=[lisbon],
+        ) as mock_batch:
+            activities_utils.geocode_parsed_activities([pending, located, indoor])
+
+        mock_batch.assert_awaited_once_with([(38.7, -9.1)])
+        assert (pending["activity"].city, pending["activity"].country) == (
+            "Lisboa",
+            "Portugal",
+        )
+        assert located["activity"].city == "Porto"
+        assert indoor["activity"].city is None
+
+    def test_nothing_pending(self):
+        """Test that no lookup is made without pending activities."""
+        with patch.object(
+            activities_utils.geocoding_utils,
+            "reverse_geocode_batch",
+            new_callable=AsyncMock,
+        ) as mock_batch:
+            activities_utils.geocode_parsed_activities([{"activity": "parsed"}])
+
+        mock_batch.assert_not_awaited()
@@ -0,0 +1,64 @@
+"""Tests for activities.activity_ai_insight_jobs.crud module."""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+import activities.activity_ai_insight_jobs.constants as jobs_constants
+import activities.activity_ai_insight_jobs.crud as jobs_crud
+import activities.activity_ai_insight_jobs.models as jobs_models
+
+
+class TestDeleteFinishedJobs:
+    """Tests for delete_finished_jobs function."""
+
+    def test_only_old_finished_jobs_are_deleted(self, sqlite_db):
+        """Test that pending and recently finished jobs are kept."""
+        old = datetime.now() - timedelta(days=31)
+        recent = datetime.now() - timedelta(days=1)
+        jobs = {
+            "old_succeeded": (jobs_constants.STATUS_SUCCEEDED, old),
+            "old_skipped": (jobs_constants.STATUS_SKIPPED, old),
+            "old_failed": (jobs_constants.STATUS_FAILED, old),
+            "old_pending": (jobs_constants.STATUS_PENDING, old),
+            "old_running": (jobs_constants.STATUS_RUNNING, old),
+            "recent_succeeded": (jobs_constants.STATUS_SUCCEEDED, recent),
+        }
+        for activity_id, (job_status, updated_at) in enumerate(jobs.values(), 1):
+            sqlite_db.add(
+                jobs_models.ActivityAIInsightJobs(
+                    activity_id=activity_id,
+                    user_id=1,
+                    status=job_status,
+                    attempts=1,
+                    next_run_at=updated_at,
+                    updated_at=updated_at,
+                )
+            )
+        sqlite_db.commit()
+
+        num_deleted = jobs_crud.delete_finished_jobs(30, sqlite_db)
+
+        assert num_deleted == 3
+        remaining = {
+            job.status for job in sqlite_db.query(jobs_models.ActivityAIInsightJobs)
+        }
+        assert remaining == {
+            jobs_constants.STATUS_PENDING,
+            jobs_constants.STATUS_RUNNING,
+            jobs_constants.STATUS_SUCCEEDED,
+        }
+        assert sqlite_db.query(jobs_models.ActivityAIInsightJobs).count() == 3
+
+    def test_error_rolls_back(self):
+        """Test that a database error is rolled back and raised as a 500."""
+        db = MagicMock()
+        db.query.side_effect = RuntimeError("database down")
+
+        with pytest.raises(HTTPException) as exc_info:
+            jobs_crud.delete_finished_jobs(30, db)
+
+        assert exc_info.value.status_code == 500
+        db.rollback.assert_called_once()
@@ -0,0 +1,241 @@
+"""Tests for activities.activity_ai_insight_jobs.utils module."""
+
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import activities.activity_ai_insight_jobs.constants as jobs_constants
+import activities.activity_ai_insight_jobs.utils as jobs_utils
+
+
+def build_job(**kwargs) -> SimpleNamespace:
+    """Build a claimed job with sensible defaults."""
+    values = {
+        "id": 1,
+        "activity_id": 10,
+        "user_id": 5,
+        "attempts": 1,
+        "delta_record_id": None,
+    }
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+
+class TestGetRetryDelay:
+    """Tests for get_retry_delay function."""
+
+    @patch.object(jobs_utils.core_config, "AI_INSIGHTS_RETRY_BASE_SECONDS", 30)
+    def test_delay_doubles_per_attempt(self):
+        """Test that the backoff doubles on every attempt."""
+        assert jobs_utils.get_retry_delay(1) == timedelta(seconds=30)
+        assert jobs_utils.get_retry_delay(2) == timedelta(seconds=60)
+        assert jobs_utils.get_retry_delay(4) == timedelta(seconds=240)
+
+    @patch.object(jobs_utils.core_config, "AI_INSIGHTS_RETRY_BASE_SECONDS", 30)
+    def test_delay_is_capped(self):
+        """Test that the backoff never exceeds the maximum delay."""
+        assert jobs_utils.get_retry_delay(30) == timedelta(
+            seconds=jobs_constants.MAX_RETRY_DELAY_SECONDS
+        )
+
+
+class TestRunActivityAIInsightJob:
+    """Tests for run_activity_ai_insight_job function."""
+
+    @pytest.fixture(autouse=True)
+    def patch_dependencies(self):
+        """Patch the database session and job crud."""
+        with (
+            patch.object(jobs_utils, "SessionLocal", MagicMock()),
+            patch.object(jobs_utils.jobs_crud, "get_job_by_id") as get_job,
+            patch.object(jobs_utils.jobs_crud, "finish_job") as finish_job,
+            patch.object(jobs_utils.jobs_crud, "set_job_delta_record_id"),
+            patch.object(jobs_utils.core_config, "OPENAI_API_KEY", "key"),
+            patch.object(jobs_utils.core_config, "AI_INSIGHTS_MAX_ATTEMPTS", 3),
+            patch.object(jobs_utils.core_logger, "print_to_log"),
+        ):
+            yield SimpleNamespace(get_job=get_job, finish_job=finish_job)
+
+    def test_stores_insight_and_returns_ids(self, patch_dependencies):
+        """Test that a successful attempt marks the job as succeeded."""
+        job = build_job()
+        patch_dependencies.get_job.return_value = job
+
+        with (
+            patch.object(
+                jobs_utils.activity_ai_insights_utils,
+                "create_activity_delta_record",
+                return_value=SimpleNamespace(id=3, activity_id=10),
+            ),
+            patch.object(
+                jobs_utils.activity_ai_insights_utils,
+                "create_activity_ai_insight",
+                return_value=SimpleNamespace(id=99),
+            ),
+        ):
+            result = jobs_utils.run_activity_ai_insight_job(job.id)
+
+        assert result == {"user_id": 5, "activity_id": 10, "insight_id": 99}
+        assert (
+            patch_dependencies.finish_job.call_args.args[1]
+            == jobs_constants.STATUS_SUCCEEDED
+        )
+
+    def test_no_rules_skips_job(self, patch_dependencies):
+        """Test that activities without category rules are skipped."""
+        job = build_job()
+        patch_dependencies.get_job.return_value = job
+
+        with (
+            patch.object(
+                jobs_utils.activity_ai_insights_utils,
+                "create_activity_delta_record",
+                return_value=None,
+            ),
+            patch.object(
+                jobs_utils.activity_ai_insights_utils, "create_activity_ai_insight"
+            ) as create_insight,
+        ):
+            result = jobs_utils.run_activity_ai_insight_job(job.id)
+
+        assert result is None
+        create_insight.assert_not_called()
+        assert (
+            patch_dependencies.finish_job.call_args.args[1]
+            == jobs_constants.STATUS_SKIPPED
+        )
+
+    def test_retry_reuses_stored_delta_record(self, patch_dependencies):
+        """Test that a retried job does not compute a second delta record."""
+        job = build_job(attempts=2, delta_record_id=3)
+        patch_dependencies.get_job.return_value = job
+
+        with (
+            patch.object(
+                jobs_utils.delta_crud,
+                "get_delta_by_id",
+                return_value=SimpleNamespace(id=3, activity_id=10),
+            ),
+            patch.object(
+                jobs_utils.activity_ai_insights_utils, "create_activity_delta_record"
+            ) as create_delta,
+            patch.object(
+                jobs_utils.activity_ai_insights_utils,
+                "create_activity_ai_insight",
+                return_value=SimpleNamespace(id=99),
+            ),
+        ):
+            jobs_utils.run_activity_ai_insight_job(job.id)
+
+        create_delta.assert_not_called()
+
+    def test_failed_attempt_is_rescheduled(self, patch_dependencies):
+        """Test that a provider error puts the job back with a backoff."""
+        job = build_job(attempts=1, delta_record_id=3)
+        patch_dependencies.get_job.return_value = job
+
+        with (
+            patch.object(jobs_utils.delta_crud, "get_delta_by_id"),
+            patch.object(
+                jobs_utils.activity_ai_insights_utils,
+                "create_activity_ai_insight",
+                side_effect=TimeoutError("provider timeout"),
+            ),
+        ):
+            result = jobs_utils.run_activity_ai_insight_job(job.id)
+
+        assert result is None
+        call = patch_dependencies.finish_job.call_args
+        assert call.args[1] == jobs_constants.STATUS_PENDING
+        assert call.kwargs["error"] == "provider timeout"
+        assert call.kwargs["retry_at"] is not None
+
+    def test_last_attempt_marks_job_failed(self, patch_dependencies):
+        """Test that the job fails once the attempts are exhausted."""
+        job = build_job(attempts=3, delta_record_id=3)
+        patch_dependencies.get_job.return_value = job
+
+        with (
+            patch.object(jobs_utils.delta_crud, "get_delta_by_id"),
+            patch.object(
+                jobs_utils.activity_ai_insights_utils,
+                "create_activity_ai_insight",
+                side_effect=TimeoutError("provider timeout"),
+            ),
+        ):
+            jobs_utils.run_activity_ai_insight_job(job.id)
+
+        assert (
+            patch_dependencies.finish_job.call_args.args[1]
+            == jobs_constants.STATUS_FAILED
+        )
+
+
+class TestProcessActivityAIInsightJobs:
+    """Tests for process_activity_ai_insight_jobs function."""
+
+    @patch.object(jobs_utils.core_config, "AI_INSIGHTS_MAX_CONCURRENCY", 2)
+    @patch("activities.activity_ai_insight_jobs.utils.websocket_utils.notify_frontend")
+    async def test_runs_claimed_jobs_and_notifies(self, mock_notify):
+        """Test that claimed jobs run with bounded concurrency and notify users."""
+        claims = [[1, 2], [3], [], []]
+        claim_limits = []
+        running = []
+        max_running = 0
+
+        def claim(limit):
+            claim_limits.append(limit)
+            return claims.pop(0) if claims else []
+
+        def run_job(job_id):
+            nonlocal max_running
+            running.append(job_id)
+            max_running = max(max_running, len(running))
+            running.remove(job_id)
+            if job_id == 2:
+                return None
+            return {"user_id": 5, "activity_id": job_id, "insight_id": job_id}
+
+        with (
+            patch.object(jobs_utils, "_claim_due_job_ids", side_effect=claim),
+            patch.object(
+                jobs_utils, "run_activity_ai_insight_job", side_effect=run_job
+            ),
+        ):
+            processed = await jobs_utils.process_activity_ai_insight_jobs()
+
+        assert processed == 3
+        assert all(limit <= 2 for limit in claim_limits)
+        assert max_running <= 2
+        assert mock_notify.await_count == 2
+        message = mock_notify.call_args.args[2]
+        assert message["message"] == "AI_INSIGHT_READY"
+
+    async def test_concurrent_drain_is_ignored(self):
+        """Test that only one drain runs at a time in a process."""
+        with (
+            patch.object(jobs_utils, "_draining", True),
+            patch.object(jobs_utils, "_claim_due_job_ids") as claim,
+        ):
+            processed = await jobs_utils.process_activity_ai_insight_jobs()
+
+        assert processed == 0
+        claim.assert_not_called()
+
+
+class TestDeleteFinishedActivityAIInsightJobs:
+    """Tests for delete_finished_activity_ai_insight_jobs function."""
+
+    @patch.object(jobs_utils.core_logger, "print_to_log")
+    @patch.object(jobs_utils.jobs_crud, "delete_finished_jobs", return_value=2)
+    @patch.object(jobs_utils, "SessionLocal")
+    def test_deletes_with_retention_window(self, mock_session, mock_delete, mock_log):
+        """Test that finished jobs are deleted after the retention window."""
+        jobs_utils.delete_finished_activity_ai_insight_jobs()
+
+        assert (
+            mock_delete.call_args.args[0] == jobs_constants.FINISHED_JOB_RETENTION_DAYS
+        )
+        mock_log.assert_called_once_with("Deleted 2 finished AI insight jobs")
@@ -0,0 +1,97 @@
+"""Tests for activities.activity_daily_rollups.crud module."""
+
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+import activities.activity_daily_rollups.crud as activity_daily_rollups_crud
+
+DAY = date(2024, 5, 1)
+
+
+def totals(activity_count, **values):
+    """Return an aggregate row of a day's activities."""
+    row = {column: None for column in activity_daily_rollups_crud.ROLLUP_COLUMNS}
+    row.update(activity_count=activity_count, **values)
+    return SimpleNamespace(**row)
+
+
+class TestRefreshDailyRollups:
+    """Tests for refresh_daily_rollups function."""
+
+    def test_day_with_activities_is_upserted(self):
+        """Test that a day's totals replace its rollup in one statement."""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.one.return_value = totals(
+            2, total_distance=15000, max_distance=10000
+        )
+
+        activity_daily_rollups_crud.refresh_daily_rollups({(1, DAY, 1)}, db)
+
+        statement = db.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (user_id, day, activity_type) DO UPDATE" in sql
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert params["activity_count"] == 2
+        assert params["max_distance"] == 10000
+        db.commit.assert_not_called()
+
+    def test_day_without_activities_is_deleted(self):
+        """Test that the rollup is removed with the day's last activity."""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.one.return_value = totals(0)
+
+        activity_daily_rollups_crud.refresh_daily_rollups({(1, DAY, 1)}, db)
+
+        db.query.return_value.filter.return_value.delete.assert_called_once()
+        db.execute.assert_not_called()
+
+    def test_each_key_is_refreshed(self):
+        """Test that an edit refreshes the previous and the new day."""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.one.return_value = totals(1)
+
+        activity_daily_rollups_crud.refresh_daily_rollups(
+            {(1, DAY, 1), (1, date(2024, 5, 2), 1)}, db
+        )
+
+        assert db.execute.call_count == 2
+
+
+class TestRebuildUserDailyRollups:
+    """Tests for rebuild_user_daily_rollups function."""
+
+    @patch.object(activity_daily_rollups_crud, "select")
+    @patch.object(activity_daily_rollups_crud, "insert")
+    def test_rollups_are_rebuilt_with_one_insert(self, mock_insert, mock_select):
+        """Test that the rollups are rebuilt from an aggregate select."""
+        db = MagicMock()
+        db.execute.return_value.rowcount = 12
+
+        assert activity_daily_rollups_crud.rebuild_user_daily_rollups(1, db) == 12
+
+        columns, totals_select = mock_insert.return_value.from_select.call_args.args
+        assert columns == [
+            "user_id",
+            "day",
+            "activity_type",
+            *activity_daily_rollups_crud.ROLLUP_COLUMNS,
+        ]
+        totals = mock_select.return_value.where.return_value.group_by.return_value
+        assert totals_select is totals
+        db.commit.assert_called_once()
+
+    def test_error_rolls_back(self):
+        """Test that a failed rebuild keeps the previous rollups."""
+        db = MagicMock()
+        db.execute.side_effect = RuntimeError("boom")
+
+        with pytest.raises(HTTPException):
+            activity_daily_rollups_crud.rebuild_user_daily_rollups(1, db)
+
+        db.rollback.assert_called_once()
+        db.commit.assert_not_called()
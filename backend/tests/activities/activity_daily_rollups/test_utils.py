@@ -0,0 +1,71 @@
+"""Tests for activities.activity_daily_rollups.utils module."""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+
+import activities.activity_daily_rollups.utils as activity_daily_rollups_utils
+
+
+class TestGetRollupKey:
+    """Tests for get_rollup_key function."""
+
+    def test_datetime_start_time(self):
+        """Test the key of a stored activity."""
+        assert activity_daily_rollups_utils.get_rollup_key(
+            1, datetime(2024, 5, 1, 23, 59), "4"
+        ) == (1, date(2024, 5, 1), 4)
+
+    def test_string_start_time(self):
+        """Test the key of a parsed activity."""
+        assert activity_daily_rollups_utils.get_rollup_key(
+            1, "2024-05-01T06:30:00", 1
+        ) == (1, date(2024, 5, 1), 1)
+
+
+class TestRebuildDailyRollups:
+    """Tests for rebuild_daily_rollups function."""
+
+    def test_failed_user_does_not_stop_the_backfill(self):
+        """Test that every user is rebuilt and failures are counted."""
+        rebuilt_user_ids = []
+
+        def rebuild(user_id, db):
+            if user_id == 2:
+                raise HTTPException(status_code=500)
+            rebuilt_user_ids.append(user_id)
+            return 3
+
+        with (
+            patch.object(
+                activity_daily_rollups_utils.users_crud,
+                "get_all_users",
+                return_value=[SimpleNamespace(id=user_id) for user_id in (1, 2, 3)],
+            ),
+            patch.object(
+                activity_daily_rollups_utils.activity_daily_rollups_crud,
+                "rebuild_user_daily_rollups",
+                side_effect=rebuild,
+            ),
+        ):
+            failed_users = activity_daily_rollups_utils.rebuild_daily_rollups(
+                MagicMock()
+            )
+
+        assert failed_users == 1
+        assert rebuilt_user_ids == [1, 3]
+
+    @patch.object(activity_daily_rollups_utils.users_crud, "get_all_users")
+    def test_selected_users(self, mock_get_all_users):
+        """Test that only the given users are rebuilt."""
+        with patch.object(
+            activity_daily_rollups_utils.activity_daily_rollups_crud,
+            "rebuild_user_daily_rollups",
+            return_value=0,
+        ) as mock_rebuild:
+            activity_daily_rollups_utils.rebuild_daily_rollups(MagicMock(), [7])
+
+        mock_get_all_users.assert_not_called()
+        assert mock_rebuild.call_args.args[0] == 7
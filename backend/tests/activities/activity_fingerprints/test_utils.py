@@ -0,0 +1,46 @@
+"""Tests for activities.activity_fingerprints.utils module."""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+import activities.activity_fingerprints.utils as activity_fingerprints_utils
+
+
+class TestHashFile:
+    """Tests for hash_file function."""
+
+    def test_matches_sha256_of_content(self, tmp_path):
+        """Test that the file is hashed in chunks to its SHA-256."""
+        content = bytes(range(256)) * 40
+        path = tmp_path / "activity.fit"
+        path.write_bytes(content)
+
+        with patch.object(activity_fingerprints_utils, "HASH_CHUNK_SIZE", 1000):
+            content_hash = activity_fingerprints_utils.hash_file(str(path))
+
+        assert content_hash == hashlib.sha256(content).hexdigest()
+
+
+class TestActivitySignature:
+    """Tests for activity_signature function."""
+
+    @pytest.mark.parametrize(
+        "start_time",
+        [
+            "2024-05-01T06:30:00",
+            "2024-05-01 06:30:00",
+            "2024-05-01T06:30:00.750",
+            datetime(2024, 5, 1, 6, 30),
+            datetime(2024, 5, 1, 6, 30, tzinfo=timezone.utc),
+            datetime(2024, 5, 1, 8, 30, tzinfo=timezone(timedelta(hours=2))),
+        ],
+    )
+    def test_normalized_to_utc_seconds(self, start_time):
+        """Test that every source's start time gives the same signature."""
+        assert (
+            activity_fingerprints_utils.activity_signature(start_time)
+            == "2024-05-01T06:30:00"
+        )
@@ -0,0 +1,158 @@
+"""Tests for activities.activity_streams.simplification module."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import activities.activity_streams.constants as activity_streams_constants
+import activities.activity_streams.simplification as activity_streams_simplification
+
+
+class TestLttbIndices:
+    """Tests for lttb_indices function."""
+
+    def test_keeps_endpoints_and_threshold(self):
+        """Test the first and last points are kept with threshold points."""
+        values = np.sin(np.arange(5000) / 50)
+
+        indices = activity_streams_simplification.lttb_indices(values, 200)
+
+        assert len(indices) == 200
+        assert indices[0] == 0
+        assert indices[-1] == 4999
+        assert np.all(np.diff(indices) > 0)
+
+    def test_keeps_spike(self):
+        """Test a single spike survives downsampling."""
+        values = np.full(3000, 100.0)
+        values[1234] = 400.0
+
+        indices = activity_streams_simplification.lttb_indices(values, 100)
+
+        assert 1234 in indices
+
+    def test_short_series_unchanged(self):
+        """Test series shorter than the threshold are returned whole."""
+        indices = activity_streams_simplification.lttb_indices(np.arange(10), 50)
+
+        assert indices.tolist() == list(range(10))
+
+
+class TestDouglasPeuckerIndices:
+    """Tests for douglas_peucker_indices function."""
+
+    def test_straight_line(self):
+        """Test a straight track is reduced to its endpoints."""
+        latitudes = np.linspace(38.70, 38.80, 1000)
+        longitudes = np.full(1000, -9.14)
+
+        indices = activity_streams_simplification.douglas_peucker_indices(
+            latitudes, longitudes, 1.0
+        )
+
+        assert indices.tolist() == [0, 999]
+
+    def test_keeps_corner(self):
+        """Test the corner of an L shaped track is kept."""
+        latitudes = np.concatenate(
+            (np.linspace(38.70, 38.71, 100), np.full(100, 38.71))
+        )
+        longitudes = np.concatenate(
+            (np.full(100, -9.14), np.linspace(-9.14, -9.13, 100))
+        )
+
+        indices = activity_streams_simplification.douglas_peucker_indices(
+            latitudes, longitudes, 1.0
+        )
+
+        assert indices.tolist() == [0, 99, 199]
+
+
+class TestEncodePolyline:
+    """Tests for encode_polyline function."""
+
+    def test_reference_vector(self):
+        """Test the example of the encoded polyline format documentation."""
+        coordinates = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+        assert (
+            activity_streams_simplification.encode_polyline(coordinates)
+            == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        )
+
+    def test_empty(self):
+        """Test an empty track encodes to an empty string."""
+        assert activity_streams_simplification.encode_polyline([]) == ""
+
+
+class TestSimplifyStreamWaypoints:
+    """Tests for simplify_stream_waypoints function."""
+
+    def test_chart_stream_downsampled(self):
+        """Test value streams are reduced to the level point count."""
+        waypoints = [{"time": i, "power": 200 + i % 30} for i in range(5000)]
+
+        result = activity_streams_simplification.simplify_stream_waypoints(
+            activity_streams_constants.STREAM_TYPE_POWER,
+            waypoints,
+            activity_streams_constants.STREAM_DETAIL_LEVEL_LOW,
+        )
+
+        assert (
+            len(result)
+            == activity_streams_constants.STREAM_DETAIL_MAX_POINTS[
+                activity_streams_constants.STREAM_DETAIL_LEVEL_LOW
+            ]
+        )
+        assert result[0] is waypoints[0]
+        assert result[-1] is waypoints[-1]
+
+    def test_map_drops_waypoints_without_coordinates(self):
+        """Test map waypoints without coordinates are dropped."""
+        waypoints = [
+            {"time": 0, "lat": 38.70, "lon": -9.14},
+            {"time": 1, "lat": None, "lon": None},
+            {"time": 2, "lat": 38.71, "lon": -9.14},
+        ]
+
+        result = activity_streams_simplification.simplify_stream_waypoints(
+            activity_streams_constants.STREAM_TYPE_MAP,
+            waypoints,
+            activity_streams_constants.STREAM_DETAIL_LEVEL_HIGH,
+        )
+
+        assert result == [waypoints[0], waypoints[2]]
+
+
+class TestGetDetailWaypoints:
+    """Tests for get_detail_waypoints function."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        activity_streams_simplification._detail_cache.clear()
+        yield
+        activity_streams_simplification._detail_cache.clear()
+
+    def test_cached_per_stream_and_level(self):
+        """Test the stream is decoded and simplified once per level."""
+        stream = SimpleNamespace(
+            id=7, stream_type=activity_streams_constants.STREAM_TYPE_CADENCE
+        )
+        waypoints = [{"time": i, "cad": 80 + i % 9} for i in range(3000)]
+
+        with patch.object(
+            activity_streams_simplification.activity_streams_utils,
+            "get_stream_waypoints",
+            return_value=waypoints,
+        ) as mock_decode:
+            first = activity_streams_simplification.get_detail_waypoints(
+                stream, activity_streams_constants.STREAM_DETAIL_LEVEL_MEDIUM
+            )
+            second = activity_streams_simplification.get_detail_waypoints(
+                stream, activity_streams_constants.STREAM_DETAIL_LEVEL_MEDIUM
+            )
+
+        assert first is second
+        mock_decode.assert_called_once_with(stream)
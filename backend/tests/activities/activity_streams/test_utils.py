@@ -0,0 +1,134 @@
+"""Tests for activities.activity_streams.utils module."""
+
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import activities.activity_streams.utils as activity_streams_utils
+
+
+def build_waypoints(count: int, key: str, value_fn) -> list[dict]:
+    """Build a list of 1 Hz waypoints with ISO timestamps."""
+    start = datetime(2024, 5, 1, 6, 0, 0)
+    return [
+        {
+            "time": (start + timedelta(seconds=i)).strftime(
+                activity_streams_utils.STREAM_TIME_FORMAT
+            ),
+            key: value_fn(i),
+        }
+        for i in range(count)
+    ]
+
+
+class TestEncodeDecodeStreamWaypoints:
+    """Tests for encode_stream_waypoints and decode_stream_waypoints."""
+
+    @pytest.mark.parametrize(
+        "waypoints",
+        [
+            [],
+            build_waypoints(500, "hr", lambda i: 120 + i % 40),
+            build_waypoints(500, "vel", lambda i: 3.0 + (i % 17) / 7),
+            build_waypoints(500, "ele", lambda i: round(100 + i * 0.2, 1)),
+            [{"time": i, "pace": 0 if i % 5 == 0 else 0.25} for i in range(50)],
+            [
+                {"time": "2024-05-01T06:00:00", "lat": 38.7223344, "lon": -9.1393366},
+                {"time": "2024-05-01T06:00:01", "lat": 38.7223401, "lon": -9.1393402},
+            ],
+        ],
+    )
+    def test_round_trip(self, waypoints):
+        """Test that decoding returns exactly the encoded waypoints."""
+        data = activity_streams_utils.encode_stream_waypoints(waypoints)
+
+        assert isinstance(data, bytes)
+        assert activity_streams_utils.decode_stream_waypoints(data) == waypoints
+
+    def test_round_trip_with_nulls_and_missing_keys(self):
+        """Test that None values and absent keys are preserved."""
+        waypoints = [
+            {"time": "2024-05-01T06:00:00", "hr": 120},
+            {"time": "2024-05-01T06:00:01", "hr": None},
+            {"time": "2024-05-01T06:00:02"},
+            {"hr": 125},
+        ]
+
+        data = activity_streams_utils.encode_stream_waypoints(waypoints)
+
+        assert activity_streams_utils.decode_stream_waypoints(data) == waypoints
+
+    def test_round_trip_non_numeric_values(self):
+        """Test that values without a columnar encoding are kept verbatim."""
+        waypoints = [
+            {"time": "2024-05-01T06:00:00+01:00", "label": "a", "flag": True},
+            {"time": "not a date", "label": ["b"], "flag": False},
+        ]
+
+        data = activity_streams_utils.encode_stream_waypoints(waypoints)
+
+        assert activity_streams_utils.decode_stream_waypoints(data) == waypoints
+
+    def test_none_input_encodes_empty_stream(self):
+        """Test that None is encoded as an empty stream."""
+        data = activity_streams_utils.encode_stream_waypoints(None)
+
+        assert activity_streams_utils.decode_stream_waypoints(data) == []
+
+    def test_encoded_stream_is_smaller_than_json(self):
+        """Test that a long 1 Hz stream compresses well below its JSON size."""
+        waypoints = build_waypoints(3600, "hr", lambda i: 130 + (i * 7) % 25)
+
+        data = activity_streams_utils.encode_stream_waypoints(waypoints)
+
+        assert len(data) * 10 < len(json.dumps(waypoints))
+
+
+class TestDecodeStreamChannels:
+    """Tests for decode_stream_channels function."""
+
+    def test_returns_numpy_channels(self):
+        """Test that channels are returned as typed arrays."""
+        waypoints = build_waypoints(10, "power", lambda i: 200 + i)
+        data = activity_streams_utils.encode_stream_waypoints(waypoints)
+
+        count, channels = activity_streams_utils.decode_stream_channels(data)
+
+        assert count == 10
+        assert channels["power"]["kind"] == activity_streams_utils.CHANNEL_INT
+        np.testing.assert_array_equal(channels["power"]["values"], np.arange(200, 210))
+        assert channels["time"]["values"].dtype == np.dtype("datetime64[s]")
+
+    def test_unsupported_version_raises(self):
+        """Test that blobs with an unknown version are rejected."""
+        import struct
+        import zlib
+
+        data = zlib.compress(struct.pack("<BI", 99, 2) + b"{}")
+
+        with pytest.raises(ValueError):
+            activity_streams_utils.decode_stream_channels(data)
+
+
+class TestGetStreamWaypoints:
+    """Tests for get_stream_waypoints function."""
+
+    def test_prefers_encoded_data(self):
+        """Test that encoded data is decoded when present."""
+        waypoints = build_waypoints(3, "cad", lambda i: 80 + i)
+        stream = SimpleNamespace(
+            stream_data=activity_streams_utils.encode_stream_waypoints(waypoints),
+            stream_waypoints=None,
+        )
+
+        assert activity_streams_utils.get_stream_waypoints(stream) == waypoints
+
+    def test_falls_back_to_legacy_json(self):
+        """Test that legacy rows return their JSON waypoints."""
+        waypoints = [{"time": "2024-05-01T06:00:00", "cad": 80}]
+        stream = SimpleNamespace(stream_data=None, stream_waypoints=waypoints)
+
+        assert activity_streams_utils.get_stream_waypoints(stream) == waypoints
@@ -0,0 +1,243 @@
+"""Tests for activities.activity_zones.utils module."""
+
+import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+import activities.activity_streams.constants as activity_streams_constants
+import activities.activity_streams.schema as activity_streams_schema
+import activities.activity_zones.utils as activity_zones_utils
+
+
+def build_user(max_heart_rate=None, birthdate=None, ftp=None):
+    return SimpleNamespace(
+        id=1, max_heart_rate=max_heart_rate, birthdate=birthdate, ftp=ftp
+    )
+
+
+class TestGetMaxHeartRate:
+    """Tests for get_max_heart_rate function."""
+
+    def test_user_max_heart_rate(self):
+        """Test the user's max heart rate is used when set."""
+        user = build_user(max_heart_rate=190, birthdate=datetime.date(1990, 1, 1))
+
+        assert activity_zones_utils.get_max_heart_rate(user) == 190
+
+    @pytest.mark.parametrize("birthdate", [datetime.date(1990, 6, 1), "1990-06-01"])
+    def test_age_formula(self, birthdate):
+        """Test 220 minus the age is used without a max heart rate."""
+        expected = 220 - (datetime.datetime.now().year - 1990)
+
+        assert (
+            activity_zones_utils.get_max_heart_rate(build_user(birthdate=birthdate))
+            == expected
+        )
+
+    def test_no_settings(self):
+        """Test None is returned without max heart rate or birthdate."""
+        assert activity_zones_utils.get_max_heart_rate(build_user()) is None
+
+
+class TestZoneDistribution:
+    """Tests for zone_distribution function."""
+
+    def test_hr_zones(self):
+        """Test percentages, boundaries and times of each zone."""
+        zones = activity_zones_utils.zone_distribution(
+            [100, 130, 150, 170, 185], [120, 140, 160, 180], 1000, "hr"
+        )
+
+        assert zones == {
+            "zone_1": {"percent": 20.0, "hr": "< 120", "time_seconds": 200},
+            "zone_2": {"percent": 20.0, "hr": "120 - 139", "time_seconds": 200},
+            "zone_3": {"percent": 20.0, "hr": "140 - 159", "time_seconds": 200},
+            "zone_4": {"percent": 20.0, "hr": "160 - 179", "time_seconds": 200},
+            "zone_5": {"percent": 20.0, "hr": ">= 180", "time_seconds": 200},
+        }
+
+    def test_without_timer_time(self):
+        """Test zone times are 0 when the timer time is unknown."""
+        zones = activity_zones_utils.zone_distribution([100, 200], [150], None, "hr")
+
+        assert [zone["time_seconds"] for zone in zones.values()] == [0, 0]
+
+    def test_no_values(self):
+        """Test None is returned without samples."""
+        assert activity_zones_utils.zone_distribution([], [150], 100, "hr") is None
+
+
+class TestComputeActivityZones:
+    """Tests for compute_activity_zones function."""
+
+    def test_hr_and_power_zones(self):
+        """Test both distributions are computed with the user's thresholds."""
+        activity = SimpleNamespace(id=5, user_id=1, total_timer_time=60)
+        user = build_user(max_heart_rate=200, ftp=250)
+        hr_waypoints = [{"time": i, "hr": 150} for i in range(60)]
+        power_waypoints = [{"time": i, "power": 240} for i in range(59)] + [
+            {"time": 59, "power": None}
+        ]
+
+        row = activity_zones_utils.compute_activity_zones(
+            activity, user, hr_waypoints, power_waypoints
+        )
+
+        assert row["activity_id"] == 5
+        assert row["max_heart_rate"] == 200
+        assert row["ftp"] == 250
+        assert row["hr_zones"]["zone_3"]["percent"] == 100.0
+        assert len(row["power_zones"]) == 7
+        assert row["power_zones"]["zone_4"] == {
+            "percent": 100.0,
+            "power": "225 - 261",
+            "time_seconds": 60,
+        }
+
+    def test_without_thresholds(self):
+        """Test no distributions are stored without max heart rate or FTP."""
+        activity = SimpleNamespace(id=5, user_id=1, total_timer_time=60)
+
+        row = activity_zones_utils.compute_activity_zones(
+            activity, build_user(), [{"hr": 150}], [{"power": 200}]
+        )
+
+        assert row["hr_zones"] is None
+        assert row["power_zones"] is None
+
+
+class TestStoreActivityZones:
+    """Tests for store_activity_zones function."""
+
+    @patch.object(activity_zones_utils.activity_zones_crud, "upsert_activity_zones")
+    def test_only_zone_streams(self, mock_upsert):
+        """Test activities without HR or power streams are not queried."""
+        streams = [
+            activity_streams_schema.ActivityStreams(
+                activity_id=5,
+                stream_type=activity_streams_constants.STREAM_TYPE_CADENCE,
+                stream_waypoints=[{"cad": 80}],
+            )
+        ]
+        db = MagicMock()
+
+        activity_zones_utils.store_activity_zones(streams, db)
+
+        db.query.assert_not_called()
+        mock_upsert.assert_not_called()
+
+    @patch.object(activity_zones_utils.activity_zones_crud, "upsert_activity_zones")
+    def test_zones_from_new_waypoints(self, mock_upsert):
+        """Test the zones are computed from the waypoints being stored."""
+        streams = [
+            activity_streams_schema.ActivityStreams(
+                activity_id=5,
+                stream_type=activity_streams_constants.STREAM_TYPE_HR,
+                stream_waypoints=[{"hr": 190}],
+            )
+        ]
+        activity = SimpleNamespace(id=5, user_id=1, total_timer_time=10)
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.side_effect = [
+            [activity],
+            [build_user(max_heart_rate=200)],
+        ]
+
+        activity_zones_utils.store_activity_zones(streams, db)
+
+        rows = mock_upsert.call_args.args[0]
+        assert len(rows) == 1
+        assert rows[0]["hr_zones"]["zone_5"]["percent"] == 100.0
+        assert rows[0]["power_zones"] is None
+
+
+class TestRefreshUserActivityZones:
+    """Tests for refresh_user_activity_zones function."""
+
+    @patch.object(activity_zones_utils.activity_zones_crud, "upsert_activity_zones")
+    @patch.object(
+        activity_zones_utils.activity_zones_crud,
+        "get_user_zone_activity_ids",
+        return_value=[],
+    )
+    @patch.object(activity_zones_utils.users_crud, "get_user_by_id")
+    def test_nothing_stale(self, mock_get_user, mock_get_ids, mock_upsert):
+        """Test nothing is recomputed when the thresholds didn't change."""
+        mock_get_user.return_value = build_user(max_heart_rate=190, ftp=250)
+        db = MagicMock()
+
+        assert activity_zones_utils.refresh_user_activity_zones(1, db) == 0
+
+        mock_get_ids.assert_called_once_with(1, 190, 250, True, db)
+        mock_upsert.assert_not_called()
+        db.commit.assert_not_called()
+
+    @patch.object(activity_zones_utils.activity_zones_crud, "upsert_activity_zones")
+    @patch.object(
+        activity_zones_utils.activity_zones_crud, "get_activities_zone_streams"
+    )
+    @patch.object(
+        activity_zones_utils.activity_zones_crud,
+        "get_user_zone_activity_ids",
+        return_value=[5],
+    )
+    @patch.object(activity_zones_utils.users_crud, "get_user_by_id")
+    def test_recomputes_stale_activities(
+        self, mock_get_user, mock_get_ids, mock_get_streams, mock_upsert
+    ):
+        """Test stale activities are recomputed from their stored streams."""
+        mock_get_user.return_value = build_user(max_heart_rate=200)
+        mock_get_streams.return_value = [
+            SimpleNamespace(
+                activity_id=5, stream_type=activity_streams_constants.STREAM_TYPE_HR
+            )
+        ]
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [
+            SimpleNamespace(id=5, user_id=1, total_timer_time=10)
+        ]
+
+        with patch.object(
+            activity_zones_utils.activity_streams_utils,
+            "get_stream_waypoints",
+            return_value=[{"hr": 100}],
+        ):
+            assert activity_zones_utils.refresh_user_activity_zones(1, db) == 1
+
+        rows = mock_upsert.call_args.args[0]
+        assert rows[0]["hr_zones"]["zone_1"]["percent"] == 100.0
+        db.commit.assert_called_once()
+
+
+class TestRebuildActivityZones:
+    """Tests for rebuild_activity_zones function."""
+
+    def test_failed_user_does_not_stop_the_backfill(self):
+        """Test that every user is rebuilt and failures are counted."""
+        rebuilt_user_ids = []
+
+        def refresh(user_id, db, only_stale):
+            if user_id == 2:
+                raise HTTPException(status_code=500)
+            rebuilt_user_ids.append((user_id, only_stale))
+            return 3
+
+        with (
+            patch.object(
+                activity_zones_utils.users_crud,
+                "get_all_users",
+                return_value=[SimpleNamespace(id=user_id) for user_id in (1, 2, 3)],
+            ),
+            patch.object(
+                activity_zones_utils,
+                "refresh_user_activity_zones",
+                side_effect=refresh,
+            ),
+        ):
+            failed_users = activity_zones_utils.rebuild_activity_zones(MagicMock())
+
+        assert failed_users == 1
+        assert rebuilt_user_ids == [(1, False), (3, False)]
@@ -618,3 +618,60 @@ class TestTokenManagerSecurity:
         assert "users:read" in scope
         assert isinstance(scope, (list, tuple))
         assert len(scope) > 0
+
+
+class TestVerifiedTokenCache:
+    """Test the cache of verified tokens used by decode_token."""
+
+    def test_decode_token_verifies_signature_once(
+        self, token_manager, sample_user_read
+    ):
+        """Test that a token is decoded once, then served from the cache."""
+        _, token = token_manager.create_token(
+            "session-id", sample_user_read, auth_token_manager.TokenType.ACCESS
+        )
+
+        with patch(
+            "auth.token_manager.jwt.decode",
+            wraps=auth_token_manager.jwt.decode,
+        ) as mock_decode:
+            first = token_manager.decode_token(token)
+            second = token_manager.decode_token(token)
+            token_manager.get_token_claim(token, "sub")
+
+        assert first is second
+        mock_decode.assert_called_once()
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test that the cache keeps at most max_size tokens."""
+        cache = auth_token_manager.VerifiedTokenCache(max_size=2)
+        exp = int(datetime.now(timezone.utc).timestamp()) + 60
+        decoded = {
+            name: MagicMock(claims={"exp": exp}) for name in ("a", "b", "c")
+        }
+
+        cache.put("a", decoded["a"])
+        cache.put("b", decoded["b"])
+        cache.get("a")
+        cache.put("c", decoded["c"])
+
+        assert cache.get("a") is decoded["a"]
+        assert cache.get("b") is None
+        assert cache.get("c") is decoded["c"]
+
+    def test_cache_drops_expired_tokens(self):
+        """Test that expired tokens are not served from the cache."""
+        cache = auth_token_manager.VerifiedTokenCache(max_size=2)
+        exp = int(datetime.now(timezone.utc).timestamp()) + 60
+        cache.put("token", MagicMock(claims={"exp": exp}))
+
+        with patch("auth.token_manager.time.time", return_value=exp + 1):
+            assert cache.get("token") is None
+
+    def test_cache_skips_tokens_without_expiration(self):
+        """Test that tokens without a numeric expiration are not stored."""
+        cache = auth_token_manager.VerifiedTokenCache(max_size=2)
+
+        cache.put("token", MagicMock(claims={}))
+
+        assert cache.get("token") is None
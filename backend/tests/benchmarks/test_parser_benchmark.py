@@ -0,0 +1,199 @@
+"""
+Tests for the parser benchmarks in benchmarks/.
+
+Verifies:
+1. Synthetic files are deterministic and decode with valid checksums
+2. The parsers read back the sessions, laps and lengths written
+3. Every stage of a case is measured
+4. Stages worse than the baseline are reported as regressions
+"""
+
+import io
+import os
+import sys
+from unittest.mock import patch
+
+import fitdecode
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+import activity_files  # noqa: E402
+import parser_benchmark  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def stand_ins():
+    """Replace reverse geocoding and default gear lookups."""
+    with (
+        patch.object(
+            parser_benchmark.activities_utils,
+            "location_based_on_coordinates",
+            return_value=parser_benchmark.LOCATION,
+        ),
+        patch.object(
+            parser_benchmark.user_default_gear_utils,
+            "get_user_default_gear_by_activity_type",
+            return_value=None,
+        ),
+    ):
+        yield
+
+
+def write_file(tmp_path, case: str) -> str:
+    """Write the synthetic file of a case and return its path."""
+    profile, extension = os.path.splitext(case)
+    path = tmp_path / case
+    path.write_bytes(
+        activity_files.WRITERS[extension](activity_files.build_activity(profile))
+    )
+    return str(path)
+
+
+def parse_fit_activities(path: str) -> list[dict]:
+    """Parse a FIT file into the activities it holds."""
+    settings = parser_benchmark.privacy_settings()
+    db = parser_benchmark.BenchmarkSession()
+    parsed = parser_benchmark.activities_utils.parse_file(1, settings, ".fit", path, db)
+    return parser_benchmark.fit_utils.create_activity_objects(
+        parser_benchmark.fit_utils.split_records_by_activity(parsed),
+        1,
+        settings,
+        None,
+        None,
+        db,
+    )
+
+
+class TestActivityFiles:
+    """Tests for the synthetic activity files."""
+
+    def test_deterministic(self):
+        """Test a profile always produces the same bytes."""
+        first = activity_files.write_fit(activity_files.build_activity("pool_swim"))
+        second = activity_files.write_fit(activity_files.build_activity("pool_swim"))
+
+        assert first == second
+
+    def test_fit_checksums(self):
+        """Test the FIT file decodes with header and file CRCs checked."""
+        data = activity_files.write_fit(activity_files.build_activity("multisport"))
+
+        with fitdecode.FitReader(
+            io.BytesIO(data), check_crc=fitdecode.CrcCheck.RAISE
+        ) as reader:
+            names = [
+                frame.name
+                for frame in reader
+                if isinstance(frame, fitdecode.FitDataMessage)
+            ]
+
+        assert names.count("session") == 3
+        assert names.count("record") == 9900
+
+    def test_multisport_only_as_fit(self):
+        """Test multi-session activities can't be written as GPX."""
+        with pytest.raises(ValueError):
+            activity_files.write_gpx(activity_files.build_activity("multisport"))
+
+
+class TestParsers:
+    """Tests for the parsers fed with the synthetic files."""
+
+    def test_run(self, tmp_path):
+        """Test a FIT run is read with its distance, laps and streams."""
+        activity = activity_files.build_activity("run_1h")
+
+        (parsed,) = parse_fit_activities(write_file(tmp_path, "run_1h.fit"))
+
+        assert parsed["activity"].distance == round(activity.sessions[0].distance)
+        assert parsed["activity"].city == "Lisboa"
+        assert len(parsed["laps"]) == len(activity.sessions[0].laps)
+        assert len(parsed["hr_waypoints"]) == 3600
+
+    def test_multisport(self, tmp_path):
+        """Test each session of a multi-sport file becomes an activity."""
+        parsed = parse_fit_activities(write_file(tmp_path, "multisport.fit"))
+
+        assert [len(activity["lat_lon_waypoints"]) for activity in parsed] == [
+            1800,
+            5400,
+            2700,
+        ]
+        assert len({activity["activity"].activity_type for activity in parsed}) == 3
+
+    def test_pool_swim(self, tmp_path):
+        """Test the pace of a pool swim only counts active lengths."""
+        session = activity_files.build_activity("pool_swim").sessions[0]
+        active_seconds = sum(
+            length.seconds for length in session.lengths if length.active
+        )
+
+        (parsed,) = parse_fit_activities(write_file(tmp_path, "pool_swim.fit"))
+
+        assert parsed["activity"].distance == 2000
+        assert parsed["activity"].total_timer_time == pytest.approx(active_seconds)
+        assert parsed["is_lat_lon_set"] is False
+
+    @pytest.mark.parametrize("case", ["run_1h.gpx", "run_1h.tcx"])
+    def test_xml_formats(self, tmp_path, case):
+        """Test GPX and TCX runs are read with the same track."""
+        activity = activity_files.build_activity("run_1h")
+        _, extension = os.path.splitext(case)
+
+        parsed = parser_benchmark.activities_utils.parse_file(
+            1,
+            parser_benchmark.privacy_settings(),
+            extension,
+            write_file(tmp_path, case),
+            parser_benchmark.BenchmarkSession(),
+        )
+
+        assert len(parsed["lat_lon_waypoints"]) == 3600
+        assert parsed["activity"].distance == pytest.approx(
+            activity.sessions[0].distance, rel=0.01
+        )
+
+
+class TestBenchmark:
+    """Tests for the benchmark runner."""
+
+    def test_stages_measured(self, tmp_path):
+        """Test a FIT case reports time and memory for every stage."""
+        result = parser_benchmark.run_case("pool_swim.fit", str(tmp_path), 1)
+
+        assert list(result["stages"]) == [
+            "parse_file",
+            "split_records_by_activity",
+            "create_activity_objects",
+            "stream_persistence",
+        ]
+        for stage in result["stages"].values():
+            assert set(stage) == {
+                "seconds",
+                "peak_kib",
+                "retained_kib",
+                "retained_blocks",
+            }
+
+    def test_regressions(self):
+        """Test only stages beyond the tolerance are reported."""
+        baseline = {
+            "run_1h.fit": {
+                "stages": {"parse_file": {"seconds": 1.0, "peak_kib": 100.0}}
+            }
+        }
+        results = {
+            "run_1h.fit": {
+                "stages": {"parse_file": {"seconds": 1.2, "peak_kib": 150.0}}
+            },
+            "run_1h.gpx": {
+                "stages": {"parse_file": {"seconds": 9.0, "peak_kib": 900.0}}
+            },
+        }
+
+        regressions = parser_benchmark.compare(results, baseline, 0.25)
+
+        assert regressions == [
+            "run_1h.fit parse_file peak_kib: 150.0 vs 100.0 in the baseline (1.50x)"
+        ]
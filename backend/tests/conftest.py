@@ -8,7 +8,9 @@ from dotenv import load_dotenv
 import pytest
 from fastapi import Request, FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, configure_mappers
+from sqlalchemy.pool import StaticPool
 
 # Load test environment variables from .env.test before importing app modules
 env_test_path = Path(__file__).parent.parent / ".env.test"
@@ -22,6 +24,8 @@ import auth.password_hasher as auth_password_hasher
 import auth.token_manager as auth_token_manager
 import auth.security as auth_security
 import users.users.schema as user_schema
+import server_settings.snapshot as server_settings_snapshot
+from core.database import Base, SessionLocal
 
 # Variables and constants
 DEFAULT_ROUTER_MODULES = [
@@ -37,6 +41,24 @@ PUBLIC_ROUTER_MODULES = [
     "server_settings.public_router",
 ]
 
+# Tables created in the SQLite database of the sqlite_db fixture
+SQLITE_TABLES = [
+    "activities",
+    "activity_ai_insight_jobs",
+    "activity_daily_rollups",
+    "activity_fingerprints",
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_server_settings_snapshot():
+    """
+    Drop the server settings snapshot so tests don't share settings.
+    """
+    server_settings_snapshot.get_server_settings_cache().invalidate()
+    yield
+    server_settings_snapshot.get_server_settings_cache().invalidate()
+
 
 @pytest.fixture
 def password_hasher() -> auth_password_hasher.PasswordHasher:
@@ -73,6 +95,34 @@ def mock_db() -> MagicMock:
     return MagicMock(spec=Session)
 
 
+@pytest.fixture
+def sqlite_db() -> Session:
+    """
+    Creates a session on an in-memory SQLite database with the activity tables.
+
+    The session is configured like the application sessions (no autoflush),
+    so tests can check what is actually written and read back. SQLite only
+    binds datetime objects to DateTime columns, not ISO strings.
+
+    Yields:
+        Session: A session bound to the SQLite database.
+    """
+    # Register every model so the relationships can be configured
+    import_module("main")
+    configure_mappers()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(
+        engine, tables=[Base.metadata.tables[name] for name in SQLITE_TABLES]
+    )
+    db = SessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
 @pytest.fixture
 def sample_user_read() -> user_schema.UsersRead:
     """
@@ -0,0 +1,203 @@
+"""
+Tests for core.metrics module.
+
+Verifies:
+1. Requests are timed per route with the queries they ran
+2. Waits for a pool connection and connections in use are recorded
+3. External calls are timed with their status
+4. The endpoint serves the metrics only when enabled
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import core.metrics as core_metrics
+import core.router as core_router
+
+
+def sample(name: str, **labels) -> float:
+    """Return the value of a sample of the default registry, 0 if missing."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def run_query():
+    """Stand-in for a query seen by the cursor events."""
+    connection = MagicMock(info={})
+    core_metrics._before_cursor_execute(connection, None, "SELECT 1", {}, None, False)
+    core_metrics._after_cursor_execute(connection, None, "SELECT 1", {}, None, False)
+
+
+@pytest.fixture
+def client():
+    """Return a client of an app timed by the metrics middleware."""
+    app = FastAPI()
+    app.add_middleware(core_metrics.MetricsMiddleware)
+
+    @app.get("/metrics-test/{item_id}")
+    def read_item(item_id: int):
+        run_query()
+        run_query()
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"item_id": item_id}
+
+    return TestClient(app)
+
+
+class TestMetricsMiddleware:
+    """Tests for the MetricsMiddleware class."""
+
+    def test_request_timed_per_route(self, client):
+        """Test the route template labels the request, not its path."""
+        labels = {"method": "GET", "route": "/metrics-test/{item_id}", "status": "200"}
+        before = sample("endurain_http_request_duration_seconds_count", **labels)
+
+        client.get("/metrics-test/1")
+        client.get("/metrics-test/2")
+
+        after = sample("endurain_http_request_duration_seconds_count", **labels)
+        assert after - before == 2
+
+    def test_status_recorded(self, client):
+        """Test error responses are labelled with their status."""
+        labels = {"method": "GET", "route": "/metrics-test/{item_id}", "status": "404"}
+        before = sample("endurain_http_request_duration_seconds_count", **labels)
+
+        client.get("/metrics-test/0")
+
+        assert sample("endurain_http_request_duration_seconds_count", **labels) == (
+            before + 1
+        )
+
+    def test_queries_counted_per_request(self, client):
+        """Test the queries run during a request are counted for its route."""
+        route = "/metrics-test/{item_id}"
+        before = sample("endurain_http_request_db_queries_sum", route=route)
+
+        client.get("/metrics-test/1")
+
+        assert sample("endurain_http_request_db_queries_sum", route=route) == (
+            before + 2
+        )
+
+    def test_unmatched_route(self, client):
+        """Test requests matching no route share one label."""
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = sample("endurain_http_request_duration_seconds_count", **labels)
+
+        client.get("/missing/page")
+
+        assert sample("endurain_http_request_duration_seconds_count", **labels) == (
+            before + 1
+        )
+
+    def test_queries_outside_requests_ignored(self):
+        """Test queries of background jobs are not timed."""
+        connection = MagicMock(info={})
+
+        core_metrics._before_cursor_execute(connection, None, "", {}, None, False)
+        core_metrics._after_cursor_execute(connection, None, "", {}, None, False)
+
+        assert connection.info == {}
+
+
+class TestDatabasePool:
+    """Tests for the pool metrics."""
+
+    def test_checkout_wait_and_connections_in_use(self):
+        """Test checkouts are timed and the connections in use tracked."""
+        pool = core_metrics.InstrumentedQueuePool(MagicMock, pool_size=2, max_overflow=3)
+        core_metrics._instrument_pool(pool)
+        before = sample("endurain_db_pool_checkout_wait_seconds_count")
+
+        connection = pool.connect()
+        in_use = sample("endurain_db_pool_checked_out_connections")
+        connection.close()
+
+        assert sample("endurain_db_pool_checkout_wait_seconds_count") == before + 1
+        assert in_use == 1
+        assert sample("endurain_db_pool_checked_out_connections") == 0
+        assert sample("endurain_db_pool_capacity_connections") == 5
+
+    def test_disabled(self):
+        """Test nothing is instrumented when metrics are disabled."""
+        app = MagicMock()
+        with patch.object(core_metrics.core_config, "METRICS_ENABLED", False):
+            core_metrics.setup_metrics(app, MagicMock())
+
+        app.add_middleware.assert_not_called()
+
+
+class TestExternalCalls:
+    """Tests for the external call metrics."""
+
+    def test_track_external_call(self):
+        """Test a failing call is recorded as an error and re-raised."""
+        before = sample(
+            "endurain_external_call_duration_seconds_count",
+            service="geocoder",
+            status="error",
+        )
+
+        with pytest.raises(requests.Timeout):
+            with core_metrics.track_external_call("geocoder"):
+                raise requests.Timeout()
+
+        assert (
+            sample(
+                "endurain_external_call_duration_seconds_count",
+                service="geocoder",
+                status="error",
+            )
+            == before + 1
+        )
+
+    def test_instrument_session(self):
+        """Test the responses of a session are timed once per response."""
+        session = requests.Session()
+        core_metrics.instrument_session(session, "strava")
+        core_metrics.instrument_session(session, "strava")
+        response = MagicMock(ok=True)
+        response.elapsed.total_seconds.return_value = 0.2
+        before = sample(
+            "endurain_external_call_duration_seconds_sum",
+            service="strava",
+            status="ok",
+        )
+
+        for hook in session.hooks["response"]:
+            hook(response)
+
+        assert len(session.hooks["response"]) == 1
+        assert sample(
+            "endurain_external_call_duration_seconds_sum",
+            service="strava",
+            status="ok",
+        ) == pytest.approx(before + 0.2)
+
+
+class TestMetricsEndpoint:
+    """Tests for the /metrics endpoint."""
+
+    def test_served_when_enabled(self):
+        """Test the metrics are served in the Prometheus text format."""
+        core_metrics.observe_parse("fit", 0.1)
+
+        with patch.object(core_router.core_config, "METRICS_ENABLED", True):
+            response = core_router.metrics()
+
+        assert response.media_type.startswith("text/plain")
+        assert b"endurain_activity_parse_duration_seconds" in response.body
+
+    def test_not_found_when_disabled(self):
+        """Test the endpoint is hidden when metrics are disabled."""
+        with patch.object(core_router.core_config, "METRICS_ENABLED", False):
+            with pytest.raises(HTTPException) as exc_info:
+                core_router.metrics()
+
+        assert exc_info.value.status_code == 404
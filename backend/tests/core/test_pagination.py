@@ -0,0 +1,127 @@
+"""
+Tests for core.pagination module.
+
+Verifies:
+1. Cursors round trip datetimes, decimals and plain values
+2. Malformed cursors and cursors of another listing are rejected
+3. Keyset queries resume after the cursor sort key
+4. Pages are split from the next page cursor
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from core import pagination
+
+
+class TestCursorEncoding:
+    """Tests for encode_cursor and decode_cursor functions."""
+
+    def test_round_trip(self):
+        """Test the sort key values are restored with their types."""
+        values = [datetime(2026, 3, 1, 7, 30), Decimal("5.25"), "Lisbon", 42]
+
+        cursor = pagination.encode_cursor("activities:pace:desc", values)
+
+        assert pagination.decode_cursor(cursor, "activities:pace:desc") == values
+
+    def test_cursor_is_url_safe(self):
+        """Test cursors can be used as query parameters without escaping."""
+        cursor = pagination.encode_cursor("activities:name:asc", ["?/+&= ~" * 5, 1])
+
+        assert all(char.isalnum() or char in "-_" for char in cursor)
+
+    def test_scope_mismatch_rejected(self):
+        """Test a cursor of another sort order is rejected."""
+        cursor = pagination.encode_cursor("activities:distance:desc", [100, 1])
+
+        with pytest.raises(HTTPException) as exc_info:
+            pagination.decode_cursor(cursor, "activities:distance:asc")
+
+        assert exc_info.value.status_code == 422
+
+    @pytest.mark.parametrize("cursor", ["not a cursor", "e30", "eyJzIjoxfQ", "%%%"])
+    def test_malformed_cursor_rejected(self, cursor):
+        """Test garbage cursors are rejected with a 422."""
+        with pytest.raises(HTTPException) as exc_info:
+            pagination.decode_cursor(cursor, "activities:start_time:desc")
+
+        assert exc_info.value.status_code == 422
+        assert exc_info.value.detail == "Invalid cursor"
+
+
+class TestPaginateByKeyset:
+    """Tests for paginate_by_keyset function."""
+
+    table = Table(
+        "items",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("value", Integer),
+    )
+
+    def _sql(self, query: Query) -> str:
+        return str(query.statement.compile(dialect=postgresql.dialect()))
+
+    def test_first_page(self):
+        """Test the first page is ordered without a keyset filter."""
+        columns = (self.table.c.value, self.table.c.id)
+
+        query = pagination.paginate_by_keyset(
+            Query(self.table), columns, True, None, 10
+        )
+
+        sql = self._sql(query)
+        assert "WHERE" not in sql
+        assert "ORDER BY items.value DESC, items.id DESC" in sql
+        assert query.statement.compile().params["param_1"] == 11
+
+    @pytest.mark.parametrize("descending, operator", [(True, "<"), (False, ">")])
+    def test_resumes_after_cursor(self, descending, operator):
+        """Test later pages compare the sort key with the cursor values."""
+        columns = (self.table.c.value, self.table.c.id)
+
+        query = pagination.paginate_by_keyset(
+            Query(self.table), columns, descending, [7, 3], 10
+        )
+
+        assert f"WHERE (items.value, items.id) {operator} " in self._sql(query)
+
+    def test_cursor_length_mismatch_rejected(self):
+        """Test a cursor with another number of values is rejected."""
+        columns = (self.table.c.value, self.table.c.id)
+
+        with pytest.raises(HTTPException) as exc_info:
+            pagination.paginate_by_keyset(Query(self.table), columns, True, [7], 10)
+
+        assert exc_info.value.status_code == 422
+
+
+class TestSplitPage:
+    """Tests for split_page function."""
+
+    def test_next_cursor_from_last_item(self):
+        """Test the next cursor points after the last item of the page."""
+        rows = [("a", 3, 1), ("b", 2, 2), ("c", 1, 3)]
+
+        items, next_cursor = pagination.split_page(rows, 2, "scope")
+
+        assert items == ["a", "b"]
+        assert pagination.decode_cursor(next_cursor, "scope") == [2, 2]
+
+    def test_last_page(self):
+        """Test no cursor is returned on the last page."""
+        items, next_cursor = pagination.split_page([("a", 3, 1)], 2, "scope")
+
+        assert items == ["a"]
+        assert next_cursor is None
+
+    def test_empty_page(self):
+        """Test an empty result returns no items and no cursor."""
+        assert pagination.split_page([], 2, "scope") == ([], None)
@@ -0,0 +1,237 @@
+"""
+Tests for core.rate_limit_storage module.
+
+Verifies:
+1. Hits are served from the lease of a worker without a round trip
+2. Workers sharing the counters never exceed the limit together
+3. Refused hits are refused locally until the window slid enough
+4. The window statistics are read from the lease when possible
+5. The storage is selected by its URI scheme
+"""
+
+import math
+from unittest.mock import patch
+
+import pytest
+from limits import RateLimitItemPerMinute
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+import core.rate_limit_storage as core_rate_limit_storage
+
+# Start of a one minute window
+WINDOW_START = 60 * 29_000_000.0
+
+
+class SharedCounters:
+    """In-memory stand-in for the rate_limit_counters table."""
+
+    def __init__(self):
+        self.hits: dict[str, int] = {}
+        self.round_trips = 0
+
+    def reserve(self, storage, key, limit, expiry, amount, lease_size, now):
+        """Reserve hits the way the acquisition query does."""
+        self.round_trips += 1
+        previous_key, current_key = storage.sliding_window_keys(key, expiry, now)
+        previous = self.hits.get(previous_key, 0)
+        current = self.hits.get(current_key, 0)
+        weight = core_rate_limit_storage._previous_weight(now, expiry)
+        room = limit - math.floor(previous * weight + current)
+        granted = min(lease_size, room) if room >= amount else 0
+        self.hits[current_key] = current + granted
+        return previous, current + granted, granted
+
+
+@pytest.fixture
+def clock():
+    """Patch the time seen by the storage, starting at WINDOW_START."""
+    now = [WINDOW_START]
+    with patch.object(
+        core_rate_limit_storage.time, "time", side_effect=lambda: now[0]
+    ):
+        yield now
+
+
+@pytest.fixture
+def counters():
+    """Return the counters shared by the workers of a test."""
+    return SharedCounters()
+
+
+@pytest.fixture
+def make_storage(counters):
+    """Return a factory of worker storages sharing the counters."""
+
+    def factory(lease_fraction=0.1):
+        storage = core_rate_limit_storage.PostgresRateLimitStorage(
+            lease_fraction=lease_fraction
+        )
+        storage._reserve = lambda *args: counters.reserve(storage, *args)
+        storage._execute = lambda *args: pytest.fail("Unexpected query")
+        return storage
+
+    return factory
+
+
+class TestAcquireSlidingWindowEntry:
+    """Tests for PostgresRateLimitStorage.acquire_sliding_window_entry."""
+
+    def test_hits_served_from_lease(self, clock, counters, make_storage):
+        """Test a lease of a tenth of the limit takes one round trip."""
+        storage = make_storage()
+
+        results = [
+            storage.acquire_sliding_window_entry("ip", 100, 60) for _ in range(10)
+        ]
+
+        assert all(results)
+        assert counters.round_trips == 1
+        assert counters.hits == {"ip/29000000": 10}
+
+    def test_workers_share_the_limit(self, clock, counters, make_storage):
+        """Test several workers allow the limit once, not once each."""
+        workers = [make_storage() for _ in range(4)]
+
+        allowed = sum(
+            workers[attempt % 4].acquire_sliding_window_entry("ip", 20, 60)
+            for attempt in range(80)
+        )
+
+        assert allowed == 20
+
+    def test_small_limits_reserve_one_hit(self, clock, counters, make_storage):
+        """Test limits below ten hits are checked on every hit."""
+        storage = make_storage()
+
+        results = [storage.acquire_sliding_window_entry("ip", 3, 60) for _ in range(3)]
+
+        assert all(results)
+        assert counters.round_trips == 3
+
+    def test_refused_hit_cached(self, clock, counters, make_storage):
+        """Test a refused hit is refused again without a round trip."""
+        storage = make_storage()
+        for _ in range(3):
+            storage.acquire_sliding_window_entry("ip", 3, 60)
+
+        assert not storage.acquire_sliding_window_entry("ip", 3, 60)
+        assert not storage.acquire_sliding_window_entry("ip", 3, 60)
+        assert counters.round_trips == 4
+
+    def test_previous_window_slides_out(self, clock, counters, make_storage):
+        """Test the hits of the previous window weigh less over time."""
+        storage = make_storage()
+        for _ in range(3):
+            storage.acquire_sliding_window_entry("ip", 3, 60)
+
+        clock[0] = WINDOW_START + 60
+        assert not storage.acquire_sliding_window_entry("ip", 3, 60)
+
+        # Half of the previous window slid out, 1.5 of its hits remain
+        clock[0] = WINDOW_START + 90
+        assert storage.acquire_sliding_window_entry("ip", 3, 60)
+        assert storage.acquire_sliding_window_entry("ip", 3, 60)
+        assert not storage.acquire_sliding_window_entry("ip", 3, 60)
+
+    def test_amount_above_limit_refused(self, clock, counters, make_storage):
+        """Test a hit larger than the limit is refused without a round trip."""
+        storage = make_storage()
+
+        assert not storage.acquire_sliding_window_entry("ip", 3, 60, amount=4)
+        assert counters.round_trips == 0
+
+    def test_reserve_query_parameters(self, clock):
+        """Test the acquisition query gets the keys and window of the hit."""
+        storage = core_rate_limit_storage.PostgresRateLimitStorage()
+        with patch.object(
+            storage,
+            "_execute",
+            return_value=[{"previous_hits": 4, "current_hits": 6, "granted": 2}],
+        ) as execute:
+            result = storage._reserve("ip", 20, 60, 1, 2, WINDOW_START + 15)
+
+        assert result == (4, 6, 2)
+        params = execute.call_args.args[1]
+        assert params["previous_key"] == "ip/28999999"
+        assert params["current_key"] == "ip/29000000"
+        assert params["previous_weight"] == pytest.approx(0.75)
+        assert params["expires_at"] == WINDOW_START + 120
+
+
+class TestRetryAt:
+    """Tests for the _retry_at function."""
+
+    def test_waits_for_previous_window(self):
+        """Test the retry happens once enough of the previous window slid out."""
+        now = WINDOW_START + 12
+
+        retry_at = core_rate_limit_storage._retry_at(now, 10, 60, 1, 10, 5)
+
+        assert retry_at == pytest.approx(WINDOW_START + 30)
+
+    def test_full_current_window_waits_for_next_one(self):
+        """Test a full current window is retried in the next window."""
+        retry_at = core_rate_limit_storage._retry_at(WINDOW_START + 12, 10, 60, 1, 0, 10)
+
+        assert retry_at == WINDOW_START + 60
+
+
+class TestGetSlidingWindow:
+    """Tests for PostgresRateLimitStorage.get_sliding_window."""
+
+    def test_read_from_lease(self, clock, counters, make_storage):
+        """Test the statistics exclude the unused hits of the lease."""
+        storage = make_storage()
+        for _ in range(3):
+            storage.acquire_sliding_window_entry("ip", 100, 60)
+
+        clock[0] = WINDOW_START + 15
+        previous_hits, previous_ttl, current_hits, current_ttl = (
+            storage.get_sliding_window("ip", 60)
+        )
+
+        assert (previous_hits, previous_ttl) == (0, 0.0)
+        assert current_hits == 3
+        assert current_ttl == pytest.approx(105)
+
+    def test_read_from_database_without_lease(self, clock):
+        """Test the statistics of an unknown key are queried."""
+        storage = core_rate_limit_storage.PostgresRateLimitStorage()
+        with patch.object(
+            storage,
+            "_execute",
+            return_value=[
+                {"key": "ip/28999999", "hits": 8},
+                {"key": "ip/29000000", "hits": 2},
+            ],
+        ):
+            previous_hits, previous_ttl, current_hits, _ = storage.get_sliding_window(
+                "ip", 60
+            )
+
+        assert (previous_hits, previous_ttl, current_hits) == (8, 60, 2)
+
+
+class TestStrategy:
+    """Tests for the storage used by the limits strategies."""
+
+    def test_selected_by_uri(self):
+        """Test storage_from_string returns the storage with its options."""
+        storage = storage_from_string(
+            f"{core_rate_limit_storage.STORAGE_SCHEME}://", lease_fraction=0.5
+        )
+
+        assert isinstance(storage, core_rate_limit_storage.PostgresRateLimitStorage)
+        assert storage.lease_fraction == 0.5
+
+    def test_sliding_window_counter(self, clock, counters, make_storage):
+        """Test the sliding window counter strategy enforces the limit."""
+        limiter = SlidingWindowCounterRateLimiter(make_storage())
+        limit = RateLimitItemPerMinute(5)
+
+        results = [limiter.hit(limit, "login", "ip") for _ in range(6)]
+        stats = limiter.get_window_stats(limit, "login", "ip")
+
+        assert results == [True] * 5 + [False]
+        assert stats.remaining == 0
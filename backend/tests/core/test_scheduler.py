@@ -0,0 +1,243 @@
+"""
+Tests for core.scheduler module.
+
+Verifies:
+1. Jobs are added with jitter and without overlapping runs
+2. Sync jobs run in a thread and coroutine jobs on the event loop
+3. Runs are skipped while another worker holds the job lock or ran the
+   job within its interval
+4. Duration, lag and failures are recorded per job
+5. The outcome of each run is saved in the database
+"""
+
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_SUBMITTED,
+    JobSubmissionEvent,
+)
+
+import core.scheduler as core_scheduler
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    """Reset the job statistics around each test."""
+    core_scheduler.job_stats.clear()
+    core_scheduler._scheduled_run_times.clear()
+    yield
+    core_scheduler.job_stats.clear()
+    core_scheduler._scheduled_run_times.clear()
+
+
+@pytest.fixture(autouse=True)
+def record_job_run():
+    """Patch the recording of the runs in the database."""
+    with patch.object(core_scheduler, "_record_job_run") as record:
+        yield record
+
+
+@pytest.fixture
+def job_lock():
+    """Patch the job lock with one that is always free."""
+    connection = MagicMock()
+    with patch.object(
+        core_scheduler, "_acquire_job_lock", return_value=connection
+    ) as acquire:
+        yield acquire
+
+
+def cleanup_job():
+    """Sync job used by the tests."""
+
+
+class TestAddSchedulerJob:
+    """Tests for the add_scheduler_job function."""
+
+    def test_job_options(self):
+        """Test jobs are jittered, coalesced and never overlap."""
+        with patch.object(core_scheduler.scheduler, "add_job") as add_job:
+            core_scheduler.add_scheduler_job(
+                cleanup_job, "interval", 60, [], "clean up"
+            )
+
+        job_id = f"{__name__}.cleanup_job"
+        args, kwargs = add_job.call_args
+        assert args[0] is core_scheduler.run_job
+        assert args[1].jitter == 300
+        assert kwargs["args"] == [job_id, cleanup_job, [], 60]
+        assert kwargs["id"] == job_id
+        assert kwargs["max_instances"] == 1
+        assert kwargs["coalesce"] is True
+        assert kwargs["replace_existing"] is True
+        assert core_scheduler.job_stats[job_id].description == "clean up"
+
+    @pytest.mark.parametrize(
+        "minutes, jitter",
+        [(1, 6), (15, 90), (60, 300), (1440, 300)],
+    )
+    def test_jitter(self, minutes, jitter):
+        """Test the jitter is a share of the interval, capped."""
+        assert core_scheduler.get_jitter_seconds(minutes) == jitter
+
+    @pytest.mark.parametrize(
+        "minutes, window",
+        [(1, 42), (15, 630), (60, 2700), (1440, 85500)],
+    )
+    def test_run_window(self, minutes, window):
+        """Test the run window leaves room for the jitter both ways."""
+        assert core_scheduler.get_run_window_seconds(minutes) == window
+
+
+class TestRunJob:
+    """Tests for the run_job function."""
+
+    async def test_sync_job_runs_in_thread(self, job_lock):
+        """Test sync jobs don't run on the event loop thread."""
+        threads = []
+
+        await core_scheduler.run_job(
+            "job", lambda value: threads.append(threading.get_ident()), [1]
+        )
+
+        assert threads and threads[0] != threading.get_ident()
+        job_lock.return_value.close.assert_called_once()
+
+    async def test_coroutine_job_awaited(self, job_lock):
+        """Test coroutine jobs run on the event loop with their arguments."""
+        calls = []
+
+        async def job(days):
+            calls.append(days)
+
+        outcome = await core_scheduler.run_job("job", job, [1])
+
+        assert calls == [1]
+        assert outcome == core_scheduler.JOB_SUCCEEDED
+        assert core_scheduler.job_stats["job"].runs == 1
+
+    async def test_skipped_when_locked(self):
+        """Test a job running on another worker is skipped."""
+        func = MagicMock()
+        with patch.object(core_scheduler, "_acquire_job_lock", return_value=None):
+            outcome = await core_scheduler.run_job("job", func, [])
+
+        func.assert_not_called()
+        assert outcome == core_scheduler.JOB_SKIPPED
+        stats = core_scheduler.job_stats["job"]
+        assert (stats.runs, stats.skipped) == (0, 1)
+
+    async def test_staggered_replica_skipped(self, job_lock, record_job_run):
+        """Test a replica running the job later in the interval is skipped."""
+        # scheduler_job_runs shared by the replicas
+        last_started = {}
+        record_job_run.side_effect = lambda job_id, started_at, succeeded: (
+            last_started.__setitem__(job_id, started_at)
+        )
+        now = {"value": 1_000_000.0}
+
+        def started_recently(job_id, seconds):
+            return job_id in last_started and (
+                last_started[job_id] > now["value"] - seconds
+            )
+
+        func = MagicMock()
+        with (
+            patch.object(
+                core_scheduler, "started_recently", side_effect=started_recently
+            ),
+            patch.object(core_scheduler.time, "time", side_effect=lambda: now["value"]),
+        ):
+            first = await core_scheduler.run_job("job", func, [], 60)
+            now["value"] += 20 * 60
+            second = await core_scheduler.run_job("job", func, [], 60)
+            now["value"] += 45 * 60
+            third = await core_scheduler.run_job("job", func, [], 60)
+
+        assert (first, second, third) == (
+            core_scheduler.JOB_SUCCEEDED,
+            core_scheduler.JOB_SKIPPED,
+            core_scheduler.JOB_SUCCEEDED,
+        )
+        assert func.call_count == 2
+        stats = core_scheduler.job_stats["job"]
+        assert (stats.runs, stats.skipped) == (2, 1)
+        assert job_lock.return_value.close.call_count == 3
+
+    async def test_without_interval_always_runs(self, job_lock):
+        """Test runs without an interval don't read the previous runs."""
+        with patch.object(core_scheduler, "started_recently") as started_recently:
+            outcome = await core_scheduler.run_job("job", lambda: None, [])
+
+        assert outcome == core_scheduler.JOB_SUCCEEDED
+        started_recently.assert_not_called()
+
+    async def test_failure_recorded(self, job_lock, record_job_run):
+        """Test a failing job is counted and its lock released."""
+
+        def job():
+            raise ValueError("boom")
+
+        outcome = await core_scheduler.run_job("job", job, [])
+
+        assert outcome == core_scheduler.JOB_FAILED
+        stats = core_scheduler.job_stats["job"]
+        assert (stats.runs, stats.failures, stats.last_error) == (1, 1, "boom")
+        job_lock.return_value.close.assert_called_once()
+        record_job_run.assert_called_once_with("job", stats.last_run_at, False)
+
+    async def test_success_saved(self, job_lock, record_job_run):
+        """Test a successful run is saved with its start time."""
+        await core_scheduler.run_job("job", lambda: None, [])
+
+        record_job_run.assert_called_once_with(
+            "job", core_scheduler.job_stats["job"].last_run_at, True
+        )
+
+    async def test_lag_from_scheduled_time(self, job_lock):
+        """Test the lag is the delay after the scheduled run time."""
+        scheduled = datetime(2026, 10, 17, 8, 0, tzinfo=timezone.utc)
+        core_scheduler._on_job_event(
+            JobSubmissionEvent(EVENT_JOB_SUBMITTED, "job", "default", [scheduled])
+        )
+
+        with patch.object(
+            core_scheduler.time, "time", return_value=scheduled.timestamp() + 2.5
+        ):
+            await core_scheduler.run_job("job", lambda: None, [])
+
+        stats = core_scheduler.job_stats["job"]
+        assert stats.last_lag_seconds == pytest.approx(2.5)
+        assert stats.max_lag_seconds == pytest.approx(2.5)
+        assert stats.last_run_at == scheduled.timestamp() + 2.5
+
+
+class TestJobEvents:
+    """Tests for the recorded scheduler events."""
+
+    def test_overlapping_run_counted(self):
+        """Test a run skipped because the previous one is still going."""
+        core_scheduler.job_stats["job"] = core_scheduler.JobStats("clean up")
+
+        core_scheduler._on_job_event(
+            JobSubmissionEvent(
+                EVENT_JOB_MAX_INSTANCES, "job", "default", [datetime.now(timezone.utc)]
+            )
+        )
+
+        assert core_scheduler.get_job_stats()["job"].overlaps == 1
+
+    def test_lock_keys(self):
+        """Test each job gets its own stable 64-bit lock key."""
+        first = core_scheduler.get_job_lock_key("strava.utils.refresh_strava_tokens")
+        second = core_scheduler.get_job_lock_key("geocoding.utils.cleanup")
+
+        assert first != second
+        assert first == core_scheduler.get_job_lock_key(
+            "strava.utils.refresh_strava_tokens"
+        )
+        assert -(2**63) <= first < 2**63
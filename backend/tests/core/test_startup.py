@@ -0,0 +1,137 @@
+"""
+Tests for core.startup module.
+
+Verifies:
+1. Warm-up steps run in order through the scheduler jobs
+2. Syncs that ran recently are skipped
+3. Failed steps don't stop the warm-up
+4. The readiness endpoint reports the database and warm-up progress
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Response
+
+import core.router as core_router
+import core.scheduler as core_scheduler
+import core.startup as core_startup
+
+
+def sync_job():
+    """Job used by the tests."""
+
+
+def cleanup_job():
+    """Job used by the tests."""
+
+
+@pytest.fixture
+def steps():
+    """Return a sync skipped when recent and a cleanup always run."""
+    return [
+        core_startup.WarmUpStep(sync_job, [1], "sync", 60),
+        core_startup.WarmUpStep(cleanup_job, [], "clean up"),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def reset_progress():
+    """Reset the warm-up progress around each test."""
+    core_startup.warm_up_progress = core_startup.WarmUpProgress()
+    yield
+    core_startup.warm_up_progress = core_startup.WarmUpProgress()
+
+
+class TestRunWarmUp:
+    """Tests for the run_warm_up function."""
+
+    async def test_steps_run_in_order(self, steps):
+        """Test each step runs as its scheduler job."""
+        with (
+            patch.object(core_scheduler, "ran_recently", return_value=False),
+            patch.object(
+                core_scheduler,
+                "run_job",
+                AsyncMock(return_value=core_scheduler.JOB_SUCCEEDED),
+            ) as run_job,
+        ):
+            progress = await core_startup.run_warm_up(steps)
+
+        assert [call.args for call in run_job.call_args_list] == [
+            (f"{__name__}.sync_job", sync_job, [1]),
+            (f"{__name__}.cleanup_job", cleanup_job, []),
+        ]
+        assert progress.status == core_startup.WARM_UP_COMPLETED
+        assert progress.steps == {
+            "sync": core_startup.WARM_UP_COMPLETED,
+            "clean up": core_startup.WARM_UP_COMPLETED,
+        }
+
+    async def test_recent_sync_skipped(self, steps):
+        """Test a sync that succeeded recently isn't run again."""
+        with (
+            patch.object(core_scheduler, "ran_recently", return_value=True) as recent,
+            patch.object(
+                core_scheduler,
+                "run_job",
+                AsyncMock(return_value=core_scheduler.JOB_SUCCEEDED),
+            ) as run_job,
+        ):
+            progress = await core_startup.run_warm_up(steps)
+
+        recent.assert_called_once_with(f"{__name__}.sync_job", 60)
+        run_job.assert_called_once()
+        assert progress.steps["sync"] == core_startup.WARM_UP_SKIPPED
+
+    async def test_failed_step_doesnt_stop_warm_up(self, steps):
+        """Test the warm-up goes on after a failed step."""
+        with (
+            patch.object(core_scheduler, "ran_recently", return_value=False),
+            patch.object(
+                core_scheduler,
+                "run_job",
+                AsyncMock(
+                    side_effect=[core_scheduler.JOB_FAILED, core_scheduler.JOB_SKIPPED]
+                ),
+            ),
+        ):
+            progress = await core_startup.run_warm_up(steps)
+
+        assert progress.steps == {
+            "sync": core_startup.WARM_UP_FAILED,
+            "clean up": core_startup.WARM_UP_SKIPPED,
+        }
+        assert core_startup.get_warm_up_progress()["status"] == (
+            core_startup.WARM_UP_COMPLETED
+        )
+
+
+class TestStatusEndpoints:
+    """Tests for the liveness and readiness endpoints."""
+
+    async def test_live(self):
+        """Test the liveness probe always answers."""
+        assert await core_router.live() == {"status": "alive"}
+
+    def test_ready_during_warm_up(self):
+        """Test the backend is ready while the warm-up runs."""
+        core_startup.warm_up_progress.status = core_startup.WARM_UP_RUNNING
+        response = Response()
+
+        with patch.object(core_startup, "check_database", return_value=True):
+            body = core_router.ready(response)
+
+        assert response.status_code == 200
+        assert body["status"] == "ready"
+        assert body["warm_up"]["status"] == core_startup.WARM_UP_RUNNING
+
+    def test_not_ready_without_database(self):
+        """Test the readiness probe fails when the database is unavailable."""
+        response = Response()
+
+        with patch.object(core_startup, "check_database", return_value=False):
+            body = core_router.ready(response)
+
+        assert response.status_code == 503
+        assert body["database"] == "unavailable"
@@ -0,0 +1,155 @@
+"""
+Tests for fit.records module.
+
+Verifies:
+1. Records are moved into the session holding them when it is decoded
+2. Sessions written before their records get them at the end of the file
+3. Records out of time order are still routed
+4. Waypoints are built per session with its instant speeds
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import fit.records as fit_records
+
+START = datetime(2024, 5, 4, 7, 30)
+
+
+def add_records(router, first: int, count: int, **values):
+    """Add one record per second from first seconds after START."""
+    for offset in range(first, first + count):
+        router.add_record(
+            START + timedelta(seconds=offset),
+            values.get("latitude"),
+            values.get("longitude"),
+            values.get("elevation"),
+            values.get("heart_rate"),
+            values.get("cadence"),
+            values.get("power"),
+        )
+
+
+def add_session(router, first: int, last: int):
+    """Add a session from first to last seconds after START, UTC aware."""
+    router.add_session(
+        (START + timedelta(seconds=first)).replace(tzinfo=timezone.utc),
+        (START + timedelta(seconds=last)).replace(tzinfo=timezone.utc),
+    )
+
+
+class TestSessionRouter:
+    """Tests for the SessionRouter class."""
+
+    def test_routed_when_session_decoded(self):
+        """Test a session message takes the records decoded before it."""
+        router = fit_records.SessionRouter()
+        add_records(router, 0, 10, heart_rate=120)
+        add_session(router, 0, 9)
+        add_records(router, 20, 5, heart_rate=150)
+        add_session(router, 20, 24)
+
+        buckets = router.finish()
+
+        assert [len(bucket) for bucket in buckets] == [10, 5]
+        assert set(buckets[1].heart_rates) == {150.0}
+
+    def test_sessions_before_records(self):
+        """Test sessions written first get their records at the end."""
+        router = fit_records.SessionRouter()
+        add_session(router, 0, 4)
+        add_session(router, 5, 9)
+        add_records(router, 0, 12)
+
+        buckets = router.finish()
+
+        assert [len(bucket) for bucket in buckets] == [5, 5]
+
+    def test_records_outside_sessions_dropped(self):
+        """Test records before and after every session are dropped."""
+        router = fit_records.SessionRouter()
+        add_records(router, 0, 30)
+        add_session(router, 10, 19)
+
+        (bucket,) = router.finish()
+
+        assert bucket.timestamps[0] == fit_records.to_seconds(
+            START + timedelta(seconds=10)
+        )
+        assert len(bucket) == 10
+
+    def test_out_of_order_records(self):
+        """Test records with a clock jump back are routed by time."""
+        router = fit_records.SessionRouter()
+        add_records(router, 10, 5)
+        add_records(router, 0, 5)
+        add_session(router, 0, 4)
+        add_session(router, 10, 14)
+
+        buckets = router.finish()
+
+        assert [len(bucket) for bucket in buckets] == [5, 5]
+        assert max(buckets[0].timestamps) < min(buckets[1].timestamps)
+
+
+class TestBuildSessionWaypoints:
+    """Tests for the build_session_waypoints function."""
+
+    def test_waypoints(self):
+        """Test each channel gets the records having a value."""
+        router = fit_records.SessionRouter()
+        add_records(router, 0, 3, heart_rate=140, elevation=12.5)
+        add_records(router, 3, 2, cadence=80)
+        add_session(router, 0, 4)
+        (bucket,) = router.finish()
+
+        waypoints = fit_records.build_session_waypoints(bucket)
+
+        assert waypoints["hr_waypoints"] == [
+            {"time": "2024-05-04T07:30:00", "hr": 140},
+            {"time": "2024-05-04T07:30:01", "hr": 140},
+            {"time": "2024-05-04T07:30:02", "hr": 140},
+        ]
+        assert waypoints["ele_waypoints"][0] == {
+            "time": "2024-05-04T07:30:00",
+            "ele": 12.5,
+        }
+        assert len(waypoints["cad_waypoints"]) == 2
+        assert waypoints["is_power_set"] is False
+        assert waypoints["is_lat_lon_set"] is False
+        assert waypoints["is_velocity_set"] is False
+
+    def test_instant_speeds(self):
+        """Test speed and pace come from the previous record of the session."""
+        router = fit_records.SessionRouter()
+        for offset in range(3):
+            router.add_record(
+                START + timedelta(seconds=offset * 10),
+                0.0,
+                offset * 0.001,
+                None,
+                None,
+                None,
+                None,
+            )
+        add_session(router, 0, 20)
+        (bucket,) = router.finish()
+
+        waypoints = fit_records.build_session_waypoints(bucket)
+
+        assert waypoints["is_lat_lon_set"] is True
+        assert [waypoint["time"] for waypoint in waypoints["vel_waypoints"]] == [
+            "2024-05-04T07:30:10",
+            "2024-05-04T07:30:20",
+        ]
+        speed = waypoints["vel_waypoints"][0]["vel"]
+        assert speed == pytest.approx(11.13, abs=0.01)
+        assert waypoints["pace_waypoints"][0]["pace"] == pytest.approx(1 / speed)
+
+    def test_empty_session(self):
+        """Test a session without records has no waypoints."""
+        waypoints = fit_records.build_session_waypoints(fit_records.RecordColumns())
+
+        assert waypoints["lat_lon_waypoints"] == []
+        assert waypoints["is_heart_rate_set"] is False
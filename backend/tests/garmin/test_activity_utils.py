@@ -0,0 +1,256 @@
+"""Tests for garmin.activity_utils module."""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import garmin.activity_utils as garmin_activity_utils
+import garmin.sync_executor as garmin_sync_executor
+
+
+class ConcurrencyProbe:
+    """Track the maximum number of calls running at the same time."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def __exit__(self, *args):
+        with self._lock:
+            self.running -= 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    """Use a new worker pool per test."""
+    garmin_sync_executor.shutdown_executor()
+    yield
+    garmin_sync_executor.shutdown_executor()
+
+
+class TestGarminSyncMetrics:
+    """Tests for GarminSyncMetrics class."""
+
+    def test_phases_accumulate(self):
+        """Test that repeated phases add up."""
+        metrics = garmin_sync_executor.GarminSyncMetrics()
+
+        for _ in range(2):
+            with metrics.phase("download"):
+                time.sleep(0.01)
+        metrics.increment("downloads", 2)
+
+        result = metrics.to_dict()
+        assert result["downloads"] == 2
+        assert result["phase_seconds"]["download"] >= 0.02
+
+
+class TestFetchAndProcessActivitiesByDates:
+    """Tests for fetch_and_process_activities_by_dates function."""
+
+    @patch.object(
+        garmin_activity_utils.core_config,
+        "GARMINCONNECT_SYNC_MAX_DOWNLOADS_PER_USER",
+        2,
+    )
+    async def test_downloads_concurrently_and_parses_in_order(self):
+        """Test that downloads overlap while parsing keeps the activity order."""
+        client = MagicMock()
+        client.get_activities_by_date.return_value = [
+            {
+                "activityId": activity_id,
+                "activityName": f"Run {activity_id}",
+                "startLatitude": float(activity_id),
+                "startLongitude": -9.1,
+            }
+            for activity_id in (1, 2, 3, 4)
+        ]
+        probe = ConcurrencyProbe()
+
+        def download(garminconnect_client, activity_id, metrics):
+            with probe:
+                time.sleep(0.05)
+            if activity_id == 3:
+                raise TimeoutError("download timeout")
+            return {"gear": activity_id}, [f"/tmp/{activity_id}_ACTIVITY.fit"]
+
+        parsed_names = []
+        parse_threads = set()
+
+        def parse(user_id, file_path, from_garmin, gear, name):
+            parsed_names.append(name)
+            parse_threads.add(threading.get_ident())
+            return [(SimpleNamespace(name=name), False)]
+
+        ws_manager = MagicMock()
+
+        with (
+            patch.object(
+                garmin_activity_utils.activities_crud,
+                "get_activity_by_garminconnect_id_from_user_id",
+                side_effect=lambda activity_id, user_id, db: activity_id == 2,
+            ),
+            patch.object(
+                garmin_activity_utils, "download_activity_files", side_effect=download
+            ),
+            patch.object(
+                garmin_activity_utils.activities_utils,
+                "parse_and_store_activity_from_file",
+                side_effect=parse,
+            ),
+            patch.object(
+                garmin_activity_utils.activities_utils,
+                "notify_stored_activities",
+                new_callable=AsyncMock,
+            ) as mock_notify,
+            patch.object(
+                garmin_activity_utils.geocoding_utils,
+                "reverse_geocode_batch",
+                new_callable=AsyncMock,
+            ) as mock_geocode,
+        ):
+            metrics = garmin_sync_executor.GarminSyncMetrics()
+            activities = await (
+                garmin_activity_utils.fetch_and_process_activities_by_dates(
+                    client,
+                    datetime.now(timezone.utc) - timedelta(days=1),
+                    datetime.now(timezone.utc),
+                    1,
+                    ws_manager,
+                    MagicMock(),
+                    metrics,
+                )
+            )
+
+        assert parsed_names == ["Run 1", "Run 4"]
+        # The start points of the new activities are resolved in one batch
+        mock_geocode.assert_awaited_once_with([(1.0, -9.1), (3.0, -9.1), (4.0, -9.1)])
+        # Parsing and storing run in the worker pool, off the event loop
+        assert threading.get_ident() not in parse_threads
+        assert [activity.name for activity in activities] == ["Run 1", "Run 4"]
+        assert mock_notify.await_count == 2
+        assert mock_notify.await_args.args[1] is ws_manager
+        assert probe.max_running == 2
+        assert metrics.activities == 2
+
+    async def test_activities_stored_from_files_are_not_downloaded(self):
+        """Test that activities with a known signature are skipped before download."""
+        client = MagicMock()
+        client.get_activities_by_date.return_value = [
+            {
+                "activityId": activity_id,
+                "activityName": f"Run {activity_id}",
+                "startTimeGMT": f"2024-05-0{activity_id} 06:30:00",
+            }
+            for activity_id in (1, 2)
+        ]
+
+        with (
+            patch.object(
+                garmin_activity_utils.activities_crud,
+                "get_activity_by_garminconnect_id_from_user_id",
+                return_value=None,
+            ),
+            patch.object(
+                garmin_activity_utils.activity_fingerprints_crud,
+                "get_known_signatures",
+                return_value={"2024-05-02T06:30:00"},
+            ),
+            patch.object(
+                garmin_activity_utils,
+                "download_activity_files",
+                return_value=(None, []),
+            ) as mock_download,
+        ):
+            metrics = garmin_sync_executor.GarminSyncMetrics()
+            await garmin_activity_utils.fetch_and_process_activities_by_dates(
+                client,
+                datetime.now(timezone.utc) - timedelta(days=1),
+                datetime.now(timezone.utc),
+                1,
+                MagicMock(),
+                MagicMock(),
+                metrics,
+            )
+
+        assert [call.args[1] for call in mock_download.call_args_list] == [1]
+        assert metrics.skipped == 1
+
+    async def test_list_error_returns_none(self):
+        """Test that a failing activity list is reported as a failed user."""
+        client = MagicMock()
+        client.get_activities_by_date.side_effect = ConnectionError("down")
+        metrics = garmin_sync_executor.GarminSyncMetrics()
+
+        result = await garmin_activity_utils.fetch_and_process_activities_by_dates(
+            client,
+            datetime.now(timezone.utc),
+            datetime.now(timezone.utc),
+            1,
+            MagicMock(),
+            MagicMock(),
+            metrics,
+        )
+
+        assert result is None
+        assert metrics.failed_users == 1
+
+
+class TestRetrieveGarminconnectUsersActivitiesForDays:
+    """Tests for retrieve_garminconnect_users_activities_for_days function."""
+
+    @patch.object(garmin_activity_utils.core_config, "GARMINCONNECT_SYNC_MAX_USERS", 2)
+    async def test_users_are_synced_concurrently(self):
+        """Test that users fan out up to the configured limit."""
+        probe = ConcurrencyProbe()
+        sessions = []
+
+        def session_factory():
+            session = MagicMock()
+            sessions.append(session)
+            return session
+
+        async def sync_user(start_date, end_date, user_id, ws_manager, db, metrics):
+            with probe:
+                await garmin_sync_executor.run_blocking(time.sleep, 0.05)
+            metrics.increment("users")
+            if user_id == 3:
+                raise RuntimeError("boom")
+
+        with (
+            patch.object(
+                garmin_activity_utils, "SessionLocal", side_effect=session_factory
+            ),
+            patch.object(
+                garmin_activity_utils.users_crud,
+                "get_all_users",
+                return_value=[SimpleNamespace(id=user_id) for user_id in (1, 2, 3, 4)],
+            ),
+            patch.object(
+                garmin_activity_utils,
+                "get_user_garminconnect_activities_by_dates",
+                new=AsyncMock(side_effect=sync_user),
+            ),
+            patch.object(
+                garmin_activity_utils.websocket_manager, "get_websocket_manager"
+            ),
+        ):
+            result = await (
+                garmin_activity_utils.retrieve_garminconnect_users_activities_for_days(1)
+            )
+
+        assert probe.max_running == 2
+        assert result["users"] == 4
+        assert result["failed_users"] == 1
+        # One session to list users and one per user
+        assert len(sessions) == 5
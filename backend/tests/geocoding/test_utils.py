@@ -0,0 +1,235 @@
+"""Tests for geocoding.utils module."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+import geocoding.constants as geocoding_constants
+import geocoding.utils as geocoding_utils
+
+LISBON = {"city": "Lisboa", "town": None, "country": "Portugal"}
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache():
+    """Use an empty in-process cache and a mocked database session."""
+    geocoding_utils.clear_memory_cache()
+    with (
+        patch.object(geocoding_utils, "SessionLocal", MagicMock()),
+        patch.object(geocoding_utils.core_config, "REVERSE_GEO_PROVIDER", "nominatim"),
+        patch.object(geocoding_utils.core_config, "REVERSE_GEO_CACHE_PRECISION", 6),
+    ):
+        yield
+    geocoding_utils.clear_memory_cache()
+
+
+class TestEncodeGeohash:
+    """Tests for encode_geohash function."""
+
+    def test_known_geohash(self):
+        """Test the geohash of a reference coordinate."""
+        assert geocoding_utils.encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_nearby_points_share_a_cell(self):
+        """Test that points a few meters apart map to the same cell."""
+        assert geocoding_utils.encode_geohash(
+            38.7223, -9.1393, 6
+        ) == geocoding_utils.encode_geohash(38.7225, -9.1391, 6)
+
+
+class TestReverseGeocode:
+    """Tests for reverse_geocode function."""
+
+    def test_missing_coordinates(self):
+        """Test that missing coordinates return an empty location."""
+        assert geocoding_utils.reverse_geocode(None, -9.1) == {
+            "city": None,
+            "town": None,
+            "country": None,
+        }
+
+    @patch.object(geocoding_utils.geocoding_crud, "upsert_cache_entry")
+    @patch.object(geocoding_utils.geocoding_crud, "get_cache_entries", return_value=[])
+    @patch.object(
+        geocoding_utils, "fetch_location_from_provider", return_value=LISBON
+    )
+    def test_cell_is_resolved_once(self, mock_fetch, mock_get, mock_upsert):
+        """Test that repeated lookups in a cell stay in the process."""
+        first = geocoding_utils.reverse_geocode(38.7223, -9.1393)
+        second = geocoding_utils.reverse_geocode(38.7225, -9.1391)
+
+        assert first == second == LISBON
+        mock_fetch.assert_called_once()
+        mock_get.assert_called_once()
+        mock_upsert.assert_called_once()
+
+    @patch.object(geocoding_utils, "fetch_location_from_provider")
+    def test_persistent_cache_hit(self, mock_fetch):
+        """Test that cells stored by another worker skip the provider."""
+        entry = MagicMock(
+            id=1, cell=geocoding_utils.encode_geohash(38.7223, -9.1393, 6), **LISBON
+        )
+
+        with (
+            patch.object(
+                geocoding_utils.geocoding_crud,
+                "get_cache_entries",
+                return_value=[entry],
+            ),
+            patch.object(
+                geocoding_utils.geocoding_crud, "touch_cache_entries"
+            ) as mock_touch,
+        ):
+            location = geocoding_utils.reverse_geocode(38.7223, -9.1393)
+
+        assert location == LISBON
+        mock_fetch.assert_not_called()
+        assert mock_touch.call_args.args[0] == [1]
+
+    @patch.object(
+        geocoding_utils.geocoding_crud,
+        "get_cache_entries",
+        side_effect=HTTPException(status_code=500),
+    )
+    @patch.object(geocoding_utils.geocoding_crud, "upsert_cache_entry")
+    @patch.object(
+        geocoding_utils, "fetch_location_from_provider", return_value=LISBON
+    )
+    def test_unavailable_cache_falls_back_to_provider(
+        self, mock_fetch, mock_upsert, mock_get
+    ):
+        """Test that database errors do not fail the lookup."""
+        assert geocoding_utils.reverse_geocode(38.7223, -9.1393) == LISBON
+
+    @patch.object(geocoding_utils.geocoding_crud, "upsert_cache_entry")
+    @patch.object(geocoding_utils.geocoding_crud, "get_cache_entries", return_value=[])
+    @patch.object(geocoding_utils, "fetch_location_from_provider", return_value=None)
+    def test_unconfigured_provider_is_not_cached(
+        self, mock_fetch, mock_get, mock_upsert
+    ):
+        """Test that lookups without a provider are not stored."""
+        assert geocoding_utils.reverse_geocode(38.7223, -9.1393)["city"] is None
+        mock_upsert.assert_not_called()
+
+
+class TestReverseGeocodeBatch:
+    """Tests for reverse_geocode_batch function."""
+
+    @patch.object(geocoding_utils.geocoding_crud, "upsert_cache_entry")
+    async def test_one_query_and_one_lookup_per_cell(self, mock_upsert):
+        """Test that coordinates are grouped by cell."""
+        porto = {"city": "Porto", "town": None, "country": "Portugal"}
+
+        def fetch(latitude, longitude):
+            return LISBON if latitude < 40 else porto
+
+        with (
+            patch.object(
+                geocoding_utils.geocoding_crud, "get_cache_entries", return_value=[]
+            ) as mock_get,
+            patch.object(
+                geocoding_utils, "fetch_location_from_provider", side_effect=fetch
+            ) as mock_fetch,
+        ):
+            locations = await geocoding_utils.reverse_geocode_batch(
+                [
+                    (38.7223, -9.1393),
+                    (41.1579, -8.6291),
+                    (None, None),
+                    (38.7225, -9.1391),
+                ]
+            )
+
+        assert [location["city"] for location in locations] == [
+            "Lisboa",
+            "Porto",
+            None,
+            "Lisboa",
+        ]
+        mock_get.assert_called_once()
+        assert len(mock_get.call_args.args[1]) == 2
+        assert mock_fetch.call_count == 2
+
+    @patch.object(geocoding_utils.geocoding_crud, "get_cache_entries", return_value=[])
+    @patch.object(
+        geocoding_utils,
+        "fetch_location_from_provider",
+        side_effect=HTTPException(status_code=424, detail="timeout"),
+    )
+    async def test_failed_cell_returns_empty_location(self, mock_fetch, mock_get):
+        """Test that a provider error does not fail the whole batch."""
+        locations = await geocoding_utils.reverse_geocode_batch([(38.7223, -9.1393)])
+
+        assert locations == [{"city": None, "town": None, "country": None}]
+
+
+class TestLookupGazetteer:
+    """Tests for the offline gazetteer provider."""
+
+    @pytest.fixture
+    def gazetteer_file(self, tmp_path):
+        """Write a small gazetteer file."""
+        path = tmp_path / "gazetteer.csv"
+        path.write_text(
+            "latitude,longitude,city,town,country\n"
+            "38.7223,-9.1393,Lisboa,,Portugal\n"
+            "41.1579,-8.6291,Porto,,Portugal\n",
+            encoding="utf-8",
+        )
+        geocoding_utils.load_gazetteer.cache_clear()
+        yield str(path)
+        geocoding_utils.load_gazetteer.cache_clear()
+
+    def test_nearest_place(self, gazetteer_file):
+        """Test that the nearest place is returned."""
+        with patch.object(
+            geocoding_utils.core_config, "REVERSE_GEO_GAZETTEER_FILE", gazetteer_file
+        ):
+            location = geocoding_utils.lookup_gazetteer(41.10, -8.60)
+
+        assert location == {"city": "Porto", "town": None, "country": "Portugal"}
+
+    def test_far_away_place_is_ignored(self, gazetteer_file):
+        """Test that places beyond the maximum distance are not used."""
+        with patch.object(
+            geocoding_utils.core_config, "REVERSE_GEO_GAZETTEER_FILE", gazetteer_file
+        ):
+            location = geocoding_utils.lookup_gazetteer(48.85, 2.35)
+
+        assert location["city"] is None
+
+    @patch.object(geocoding_utils.geocoding_crud, "upsert_cache_entry")
+    @patch.object(geocoding_utils.geocoding_crud, "get_cache_entries", return_value=[])
+    @patch.object(geocoding_utils, "fetch_location_from_provider")
+    def test_offline_provider_never_requests(
+        self, mock_fetch, mock_get, mock_upsert, gazetteer_file
+    ):
+        """Test that the offline provider uses the gazetteer only."""
+        with (
+            patch.object(
+                geocoding_utils.core_config,
+                "REVERSE_GEO_PROVIDER",
+                geocoding_constants.PROVIDER_OFFLINE,
+            ),
+            patch.object(
+                geocoding_utils.core_config,
+                "REVERSE_GEO_GAZETTEER_FILE",
+                gazetteer_file,
+            ),
+        ):
+            location = geocoding_utils.reverse_geocode(38.72, -9.14)
+
+        assert location["city"] == "Lisboa"
+        mock_fetch.assert_not_called()
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing gazetteer returns an empty location."""
+        geocoding_utils.load_gazetteer.cache_clear()
+        with patch.object(
+            geocoding_utils.core_config,
+            "REVERSE_GEO_GAZETTEER_FILE",
+            str(tmp_path / "missing.csv"),
+        ):
+            assert geocoding_utils.lookup_gazetteer(38.72, -9.14)["city"] is None
+        geocoding_utils.load_gazetteer.cache_clear()
@@ -0,0 +1,67 @@
+"""Tests for profile.export_service module."""
+
+import io
+import threading
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import profile.export_service as profile_export_service
+from profile.exceptions import FileSystemError
+
+
+@pytest.fixture
+def export_service():
+    return profile_export_service.ExportService(
+        1,
+        MagicMock(),
+        profile_export_service.ExportPerformanceConfig(
+            chunk_size=1024, compression_workers=2
+        ),
+    )
+
+
+class TestGenerateExportArchive:
+    """Tests for ExportService.generate_export_archive method."""
+
+    def test_streams_archive(self, export_service):
+        """Test the archive written by the producer thread is streamed."""
+
+        def write(zipf, user_dict, timeout_seconds, start_time):
+            for index in range(100):
+                zipf.writestr(f"data/{index}.json", f'{{"id": {index}}}' * 200)
+
+        with patch.object(export_service, "write_export_archive", side_effect=write):
+            chunks = list(export_service.generate_export_archive({"id": 1}))
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        assert len(chunks) > 1
+        assert archive.testzip() is None
+        assert len(archive.namelist()) == 100
+
+    def test_producer_error_raised(self, export_service):
+        """Test errors of the producer thread are mapped in the response."""
+        with patch.object(
+            export_service,
+            "write_export_archive",
+            side_effect=OSError("disk gone"),
+        ):
+            with pytest.raises(FileSystemError):
+                list(export_service.generate_export_archive({"id": 1}))
+
+    def test_closing_stops_producer(self, export_service):
+        """Test closing the response stops the producer thread."""
+
+        def write(zipf, user_dict, timeout_seconds, start_time):
+            for index in range(10000):
+                zipf.writestr(f"data/{index}.json", "x" * 4096)
+
+        with patch.object(export_service, "write_export_archive", side_effect=write):
+            archive = export_service.generate_export_archive({"id": 1})
+            next(archive)
+            archive.close()
+
+        assert not any(
+            thread.name.startswith("export-1") for thread in threading.enumerate()
+        )
@@ -0,0 +1,164 @@
+"""Tests for profile.import_service module."""
+
+import json
+import os
+import zipfile
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import profile.import_checkpoint as import_checkpoint
+import profile.import_service as profile_import_service
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w") as zipf:
+        zipf.writestr(
+            "data/activities.json",
+            json.dumps(
+                [
+                    {
+                        "id": 10 + index,
+                        "name": f"Run {index}",
+                        "start_time": f"2024-05-0{index + 1}T06:30:00",
+                    }
+                    for index in range(5)
+                ]
+            ),
+        )
+        zipf.writestr(
+            "data/activity_laps.json",
+            json.dumps(
+                [{"id": index, "activity_id": 10 + index % 5} for index in range(10)]
+            ),
+        )
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def import_dir(tmp_path):
+    with patch.object(
+        import_checkpoint.core_config,
+        "PROFILE_IMPORT_DIR",
+        str(tmp_path / "profile_import"),
+    ):
+        yield
+
+
+def _import_service(db):
+    return profile_import_service.ImportService(
+        1,
+        db,
+        MagicMock(),
+        profile_import_service.ImportPerformanceConfig(
+            batch_size=2, enable_memory_monitoring=False
+        ),
+    )
+
+
+class TestImportFromZipFile:
+    """Tests for ImportService.import_from_zip_file method."""
+
+    @pytest.fixture(autouse=True)
+    def crud(self):
+        new_ids = iter(range(100, 200))
+
+        def add_activity(activity, db):
+            activity.id = next(new_ids)
+
+        with patch.object(
+            profile_import_service.activity_schema,
+            "Activity",
+            side_effect=lambda **data: SimpleNamespace(**data),
+        ), patch.object(
+            profile_import_service.activities_crud,
+            "add_activity",
+            side_effect=add_activity,
+        ) as mock_add_activity, patch.object(
+            profile_import_service.activity_laps_crud, "create_activity_laps"
+        ) as mock_create_laps, patch.object(
+            profile_import_service.activity_ai_insight_jobs_utils,
+            "wake_activity_ai_insight_worker",
+        ), patch.object(
+            profile_import_service.activity_fingerprints_crud,
+            "get_max_fingerprint_id",
+            return_value=0,
+        ), patch.object(
+            profile_import_service.activity_fingerprints_crud,
+            "get_known_signatures",
+            return_value=set(),
+        ) as mock_get_known_signatures:
+            yield SimpleNamespace(
+                add_activity=mock_add_activity,
+                create_laps=mock_create_laps,
+                get_known_signatures=mock_get_known_signatures,
+            )
+
+    @pytest.mark.asyncio
+    async def test_batches(self, archive, crud):
+        """Test activities and components are committed in batches."""
+        db = MagicMock()
+
+        result = await _import_service(db).import_from_zip_file(archive, "sha")
+
+        assert result["imported"]["activities"] == 5
+        assert result["imported"]["activity_laps"] == 10
+        assert db.commit.call_count == 3 + 5
+        laps_by_activity = {
+            call.args[1]: len(call.args[0]) for call in crud.create_laps.call_args_list
+        }
+        assert set(laps_by_activity) == {100, 101, 102, 103, 104}
+        assert not os.path.exists(import_checkpoint.get_checkpoint_path(1))
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, archive, crud):
+        """Test an interrupted import skips the committed batches."""
+        db = MagicMock()
+        db.commit.side_effect = [None, RuntimeError("connection lost")]
+
+        with pytest.raises(RuntimeError):
+            await _import_service(db).import_from_zip_file(archive, "sha")
+        assert crud.add_activity.call_count == 4
+
+        db.commit.side_effect = None
+        result = await _import_service(db).import_from_zip_file(archive, "sha")
+
+        assert crud.add_activity.call_count == 4 + 3
+        assert result["imported"]["activities"] == 5
+        assert result["imported"]["activity_laps"] == 10
+
+    @pytest.mark.asyncio
+    async def test_other_archive_starts_over(self, archive, crud):
+        """Test a checkpoint of another archive is ignored."""
+        db = MagicMock()
+        db.commit.side_effect = [None, RuntimeError("connection lost")]
+
+        with pytest.raises(RuntimeError):
+            await _import_service(db).import_from_zip_file(archive, "sha")
+
+        db.commit.side_effect = None
+        result = await _import_service(db).import_from_zip_file(archive, "other")
+
+        assert crud.add_activity.call_count == 4 + 5
+        assert result["imported"]["activities"] == 5
+
+    @pytest.mark.asyncio
+    async def test_skips_known_activities(self, archive, crud):
+        """Test activities already stored are skipped with their components."""
+        db = MagicMock()
+        crud.get_known_signatures.return_value = {
+            "2024-05-02T06:30:00",
+            "2024-05-05T06:30:00",
+        }
+
+        result = await _import_service(db).import_from_zip_file(archive, "sha")
+
+        assert crud.add_activity.call_count == 3
+        assert result["imported"]["activities"] == 3
+        assert result["imported"]["activities_skipped"] == 2
+        assert result["imported"]["activity_laps"] == 6
+        laps_by_activity = {call.args[1] for call in crud.create_laps.call_args_list}
+        assert laps_by_activity == {100, 101, 102}
@@ -0,0 +1,35 @@
+"""Tests for profile.json_stream module."""
+
+import io
+import json
+
+import pytest
+
+import profile.json_stream as json_stream
+
+
+class TestIterJsonArray:
+    """Tests for iter_json_array function."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+    def test_items_across_chunks(self, chunk_size):
+        """Test items split across chunks are decoded whole."""
+        items = [
+            {"activity_id": index, "stream_waypoints": [{"hr": 140 + index}] * index}
+            for index in range(20)
+        ] + [12345, "Évora", None, []]
+        data = json.dumps(items).encode("utf-8")
+
+        assert (
+            list(json_stream.iter_json_array(io.BytesIO(data), chunk_size)) == items
+        )
+
+    def test_empty_array(self):
+        """Test an empty array yields nothing."""
+        assert list(json_stream.iter_json_array(io.BytesIO(b" [ ]\n"))) == []
+
+    @pytest.mark.parametrize("data", [b"", b"{}", b"[1,", b"[1 2]", b"[1,]"])
+    def test_invalid(self, data):
+        """Test invalid arrays raise JSONDecodeError."""
+        with pytest.raises(json.JSONDecodeError):
+            list(json_stream.iter_json_array(io.BytesIO(data), 2))
@@ -0,0 +1,115 @@
+"""Tests for profile.zip_stream module."""
+
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+import profile.zip_stream as zip_stream
+
+
+def _build_archive(write, **kwargs) -> zipfile.ZipFile:
+    chunks = []
+    with zip_stream.StreamingZipFile(chunks.append, **kwargs) as zipf:
+        write(zipf)
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+class TestCompressEntry:
+    """Tests for compress_entry function."""
+
+    def test_json_deflated(self):
+        """Test JSON entries are deflated."""
+        entry = zip_stream.compress_entry("data/a.json", '{"a": 1}' * 100, 6)
+
+        assert entry.method == zip_stream.ZIP_DEFLATED
+        assert entry.size == 800
+        assert len(entry.data) < entry.size
+
+    def test_fit_stored(self):
+        """Test already compressed files are stored as is."""
+        entry = zip_stream.compress_entry("activity_files/1.FIT", b"\x0e\x10", 6)
+
+        assert entry.method == zip_stream.ZIP_STORED
+        assert entry.data == b"\x0e\x10"
+
+
+class TestStreamingZipFile:
+    """Tests for StreamingZipFile class."""
+
+    def test_round_trip(self, tmp_path):
+        """Test in memory entries and files are read back by zipfile."""
+        gpx = tmp_path / "1.gpx"
+        gpx.write_bytes(b"<gpx>" + b"<trkpt/>" * 20000 + b"</gpx>")
+        fit = tmp_path / "2.fit"
+        fit.write_bytes(bytes(range(256)) * 40)
+
+        def write(zipf):
+            zipf.writestr("data/activities.json", '[{"name": "Corrida"}]')
+            zipf.write(str(gpx), "activity_files/1.gpx")
+            zipf.write(str(fit), "activity_files/2.fit")
+
+        archive = _build_archive(write, chunk_size=1024)
+
+        assert archive.testzip() is None
+        assert archive.read("data/activities.json") == b'[{"name": "Corrida"}]'
+        assert archive.read("activity_files/1.gpx") == gpx.read_bytes()
+        assert archive.read("activity_files/2.fit") == fit.read_bytes()
+        assert (
+            archive.getinfo("activity_files/1.gpx").compress_type
+            == zipfile.ZIP_DEFLATED
+        )
+        assert (
+            archive.getinfo("activity_files/2.fit").compress_type
+            == zipfile.ZIP_STORED
+        )
+
+    def test_executor_keeps_order(self):
+        """Test entries compressed in a pool keep the order they were added."""
+        names = [f"data/{index}.json" for index in range(50)]
+
+        def write(zipf):
+            for index, name in enumerate(names):
+                zipf.writestr(name, str(index) * (index * 100 + 1))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            archive = _build_archive(write, executor=executor, max_pending=8)
+
+        assert archive.testzip() is None
+        assert archive.namelist() == names
+
+    def test_chunk_size(self):
+        """Test chunks are at least chunk_size bytes, except the last one."""
+        chunks = []
+        with zip_stream.StreamingZipFile(chunks.append, chunk_size=4096) as zipf:
+            for index in range(20):
+                zipf.writestr(f"activity_files/{index}.fit", os.urandom(1000))
+
+        assert len(chunks) > 1
+        assert all(len(chunk) >= 4096 for chunk in chunks[:-1])
+
+    def test_zip64(self, tmp_path):
+        """Test ZIP64 records are written past the size limit."""
+        gpx = tmp_path / "1.gpx"
+        gpx.write_bytes(b"<trkpt/>" * 1000)
+
+        def write(zipf):
+            zipf.writestr("data/user.json", "{}" * 100)
+            zipf.write(str(gpx), "activity_files/1.gpx")
+
+        with patch.object(zip_stream, "ZIP64_LIMIT", 16):
+            archive = _build_archive(write)
+
+        assert archive.testzip() is None
+        assert archive.read("activity_files/1.gpx") == gpx.read_bytes()
+        assert archive.read("data/user.json") == b"{}" * 100
+
+    def test_duplicate_entry(self):
+        """Test adding an entry twice raises ZipStreamError."""
+        with pytest.raises(zip_stream.ZipStreamError):
+            with zip_stream.StreamingZipFile(lambda chunk: None) as zipf:
+                zipf.writestr("counts.json", "{}")
+                zipf.writestr("counts.json", "{}")
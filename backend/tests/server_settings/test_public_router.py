@@ -7,7 +7,6 @@ accessible without authentication.
 
 import pytest
 from unittest.mock import MagicMock, patch
-from fastapi import HTTPException, status
 
 import server_settings.schema as server_settings_schema
 import server_settings.models as server_settings_models
@@ -16,9 +15,7 @@ import server_settings.models as server_settings_models
 class TestReadPublicServerSettings:
     """Test suite for read_public_server_settings endpoint."""
 
-    @patch(
-        "server_settings.public_router.server_settings_utils.get_server_settings_or_404"
-    )
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
     def test_read_public_server_settings_success(
         self, mock_get_settings, fast_api_client_public, fast_api_app
     ):
@@ -44,6 +41,9 @@ class TestReadPublicServerSettings:
         mock_settings.password_type = "strict"
         mock_settings.password_length_regular_users = 8
         mock_settings.password_length_admin_users = 12
+        mock_settings.signup_require_admin_approval = True
+        mock_settings.signup_require_email_verification = True
+        mock_settings.tileserver_api_key = None
 
         mock_get_settings.return_value = mock_settings
 
@@ -58,19 +58,15 @@ class TestReadPublicServerSettings:
         # Ensure sensitive fields are not exposed
         assert "signup_require_admin_approval" not in data
         assert "signup_require_email_verification" not in data
+        assert "tileserver_api_key" not in data
 
-    @patch(
-        "server_settings.public_router.server_settings_utils.get_server_settings_or_404"
-    )
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
     def test_read_public_server_settings_not_found(
         self, mock_get_settings, fast_api_client_public, fast_api_app
     ):
         """Test retrieval when settings not found."""
         # Arrange
-        mock_get_settings.side_effect = HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Server settings not found",
-        )
+        mock_get_settings.return_value = None
 
         # Act
         response = fast_api_client_public.get("/server_settings/public")
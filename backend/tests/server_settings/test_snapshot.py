@@ -0,0 +1,196 @@
+"""
+Tests for server_settings.snapshot module.
+
+Verifies:
+1. The settings are read once and kept as a frozen snapshot
+2. Invalidation reloads them, and a load overtaken by a change is dropped
+3. Changes are published in the writing transaction
+4. The CSP tile domains come from the snapshot, defaults if unreadable
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+import core.middleware as core_middleware
+import server_settings.crud as server_settings_crud
+import server_settings.schema as server_settings_schema
+import server_settings.snapshot as server_settings_snapshot
+
+
+def settings_row(**overrides) -> SimpleNamespace:
+    """Return a stand-in of the server settings row with default values."""
+    values = {
+        "id": 1,
+        "units": "metric",
+        "public_shareable_links": True,
+        "public_shareable_links_user_info": False,
+        "login_photo_set": False,
+        "currency": "euro",
+        "num_records_per_page": 25,
+        "signup_enabled": False,
+        "signup_require_admin_approval": True,
+        "signup_require_email_verification": True,
+        "sso_enabled": False,
+        "local_login_enabled": True,
+        "sso_auto_redirect": False,
+        "tileserver_url": "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+        "tileserver_attribution": "&copy; OpenStreetMap",
+        "tileserver_api_key": None,
+        "map_background_color": "#dddddd",
+        "password_type": "strict",
+        "password_length_regular_users": 8,
+        "password_length_admin_users": 12,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def cache():
+    """Return an empty settings cache."""
+    return server_settings_snapshot.ServerSettingsCache()
+
+
+class TestServerSettingsCache:
+    """Tests for the ServerSettingsCache class."""
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    def test_loaded_once(self, mock_get_settings, cache, mock_db):
+        """Test the settings are read on first use only."""
+        mock_get_settings.return_value = settings_row()
+
+        first = cache.get(mock_db)
+        second = cache.get(mock_db)
+
+        assert first is second
+        mock_get_settings.assert_called_once_with(mock_db)
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    def test_snapshot_frozen(self, mock_get_settings, cache, mock_db):
+        """Test the settings of a snapshot can't be changed."""
+        mock_get_settings.return_value = settings_row()
+
+        snapshot = cache.get(mock_db)
+
+        with pytest.raises(ValidationError):
+            snapshot.settings.public_shareable_links = False
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    def test_custom_tile_domain(self, mock_get_settings, cache, mock_db):
+        """Test the domain of a custom tile server is allowed."""
+        mock_get_settings.return_value = settings_row(
+            tileserver_url="https://tiles.example.com/{z}/{x}/{y}.png"
+        )
+
+        snapshot = cache.get(mock_db)
+
+        assert snapshot.allowed_tile_domains == (
+            *server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS,
+            "https://*.example.com",
+        )
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    def test_invalidate_reloads(self, mock_get_settings, cache, mock_db):
+        """Test a snapshot loaded after an invalidation has the new values."""
+        mock_get_settings.return_value = settings_row()
+        before = cache.get(mock_db)
+        mock_get_settings.return_value = settings_row(public_shareable_links=False)
+
+        cache.invalidate()
+        after = cache.get(mock_db)
+
+        assert before.settings.public_shareable_links is True
+        assert after.settings.public_shareable_links is False
+        assert after.version > before.version
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    def test_load_overtaken_by_change(self, mock_get_settings, cache, mock_db):
+        """Test a load racing with an invalidation isn't kept."""
+
+        def read_then_change(db):
+            row = settings_row()
+            cache.invalidate()
+            return row
+
+        mock_get_settings.side_effect = read_then_change
+        cache.get(mock_db)
+
+        assert cache.snapshot is None
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    def test_not_found(self, mock_get_settings, cache, mock_db):
+        """Test 404 when the settings row is missing."""
+        mock_get_settings.return_value = None
+
+        with pytest.raises(HTTPException) as exc_info:
+            cache.get(mock_db)
+
+        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+        assert cache.snapshot is None
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    async def test_reload_on_notification(self, mock_get_settings, cache):
+        """Test a notification replaces the snapshot with a new one."""
+        mock_get_settings.return_value = settings_row()
+        with patch.object(server_settings_snapshot.core_database, "SessionLocal"):
+            before = cache.get()
+            await cache._reload()
+
+        assert cache.snapshot is not before
+        assert cache.snapshot.version == before.version + 1
+
+
+class TestServerSettingsChanges:
+    """Tests for the publication of the settings changes."""
+
+    def test_notify(self, mock_db):
+        """Test the change is published on the settings channel."""
+        server_settings_snapshot.notify_server_settings_changed(mock_db)
+
+        statement, parameters = mock_db.execute.call_args.args
+        assert "pg_notify" in str(statement)
+        assert parameters == {"channel": server_settings_snapshot.NOTIFY_CHANNEL}
+
+    @patch("server_settings.crud.get_server_settings")
+    def test_login_photo_change_invalidates(self, mock_get_settings, mock_db):
+        """Test a committed change drops the snapshot of this worker."""
+        mock_get_settings.return_value = settings_row()
+        cache = server_settings_snapshot.get_server_settings_cache()
+        cache.get(mock_db)
+
+        server_settings_crud.update_server_settings_login_photo_set(True, mock_db)
+
+        assert cache.snapshot is None
+        mock_db.execute.assert_called_once()
+        mock_db.commit.assert_called_once()
+
+
+class TestCSPTileDomains:
+    """Tests for the tile domains of the CSP middleware."""
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    async def test_from_snapshot(self, mock_get_settings, mock_db):
+        """Test the held snapshot is used without loading it again."""
+        mock_get_settings.return_value = settings_row(
+            tileserver_url="https://tiles.example.com/{z}/{x}/{y}.png"
+        )
+        server_settings_snapshot.get_server_settings_cache().get(mock_db)
+
+        domains = await core_middleware.get_allowed_tile_domains()
+
+        assert "https://*.example.com" in domains
+        mock_get_settings.assert_called_once()
+
+    @patch("server_settings.snapshot.server_settings_crud.get_server_settings")
+    async def test_defaults_when_unreadable(self, mock_get_settings):
+        """Test the built-in providers are used if settings can't be read."""
+        mock_get_settings.side_effect = HTTPException(status_code=500)
+
+        with patch.object(server_settings_snapshot.core_database, "SessionLocal"):
+            domains = await core_middleware.get_allowed_tile_domains()
+
+        assert domains == tuple(server_settings_schema.DEFAULT_ALLOWED_TILE_DOMAINS)
@@ -6,6 +6,7 @@ including settings retrieval and tile map templates.
 """
 
 import pytest
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 from fastapi import HTTPException, status
 
@@ -13,24 +14,48 @@ import server_settings.utils as server_settings_utils
 import server_settings.schema as server_settings_schema
 import server_settings.models as server_settings_models
 
+SERVER_SETTINGS_ROW = {
+    "id": 1,
+    "units": "metric",
+    "public_shareable_links": True,
+    "public_shareable_links_user_info": False,
+    "login_photo_set": False,
+    "currency": "euro",
+    "num_records_per_page": 25,
+    "signup_enabled": False,
+    "signup_require_admin_approval": True,
+    "signup_require_email_verification": True,
+    "sso_enabled": False,
+    "local_login_enabled": True,
+    "sso_auto_redirect": False,
+    "tileserver_url": "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+    "tileserver_attribution": "&copy; OpenStreetMap",
+    "tileserver_api_key": None,
+    "map_background_color": "#dddddd",
+    "password_type": "strict",
+    "password_length_regular_users": 8,
+    "password_length_admin_users": 12,
+}
+
 
 class TestGetServerSettings:
     """Test suite for get_server_settings_or_404 utility function."""
 
     @patch("server_settings.utils.server_settings_crud.get_server_settings")
     def test_get_server_settings_success(self, mock_crud_get_settings, mock_db):
-        """Test successful retrieval of server settings."""
+        """Test settings are read once and returned frozen."""
         # Arrange
-        mock_settings = MagicMock(spec=server_settings_models.ServerSettings)
-        mock_settings.id = 1
-        mock_settings.units = 1
+        mock_settings = SimpleNamespace(**SERVER_SETTINGS_ROW)
         mock_crud_get_settings.return_value = mock_settings
 
         # Act
         result = server_settings_utils.get_server_settings_or_404(mock_db)
+        server_settings_utils.get_server_settings_or_404(mock_db)
 
         # Assert
-        assert result == mock_settings
+        assert isinstance(result, server_settings_schema.ServerSettingsFrozen)
+        assert result.units == "metric"
+        assert result.public_shareable_links is True
         mock_crud_get_settings.assert_called_once_with(mock_db)
 
     @patch("server_settings.utils.server_settings_crud.get_server_settings")
@@ -0,0 +1,338 @@
+"""Tests for strava.activity_utils module."""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import strava.activity_utils as strava_activity_utils
+import strava.rate_limiter as strava_rate_limiter
+
+START = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+class ConcurrencyProbe:
+    """Track the maximum number of calls running at the same time."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def __exit__(self, *args):
+        with self._lock:
+            self.running -= 1
+
+
+def summary_activity(activity_id):
+    """Return a Strava summary activity started activity_id hours after START."""
+    return SimpleNamespace(
+        id=activity_id, start_date=START + timedelta(hours=activity_id)
+    )
+
+
+@pytest.fixture
+def rate_limiter():
+    """Return a rate limiter with room for every test request."""
+    rate_limiter = strava_rate_limiter.StravaRateLimiter()
+    with patch.object(
+        strava_activity_utils.strava_utils,
+        "get_strava_rate_limiter",
+        return_value=rate_limiter,
+    ):
+        yield rate_limiter
+
+
+@pytest.fixture
+def user_lookups():
+    """Mock the user and privacy settings lookups."""
+    with (
+        patch.object(strava_activity_utils.users_crud, "get_user_by_id"),
+        patch.object(
+            strava_activity_utils.users_privacy_settings_crud,
+            "get_user_privacy_settings_by_user_id",
+        ),
+    ):
+        yield
+
+
+class TestFetchAndProcessActivities:
+    """Tests for fetch_and_process_activities function."""
+
+    @patch.object(
+        strava_activity_utils.core_config, "STRAVA_SYNC_MAX_FETCHES_PER_USER", 2
+    )
+    async def test_fetches_concurrently_and_stores_in_order(
+        self, rate_limiter, user_lookups
+    ):
+        """Test that fetches overlap while activities are stored oldest first."""
+        client = MagicMock()
+        client.get_activities.return_value = [
+            summary_activity(activity_id) for activity_id in (4, 3, 2, 1)
+        ]
+        probe = ConcurrencyProbe()
+
+        def fetch(strava_client, strava_activity_id, user_id):
+            with probe:
+                time.sleep(0.05)
+            return {"id": strava_activity_id}
+
+        stored_ids = []
+
+        async def process(activity, *args):
+            assert args[-1] == {"id": activity.id}
+            stored_ids.append(activity.id)
+            return SimpleNamespace(id=activity.id)
+
+        with (
+            patch.object(
+                strava_activity_utils.strava_utils,
+                "fetch_and_validate_activity",
+                side_effect=lambda activity_id, user_id, db: None,
+            ),
+            patch.object(
+                strava_activity_utils, "fetch_activity_data", side_effect=fetch
+            ),
+            patch.object(
+                strava_activity_utils,
+                "process_activity",
+                new=AsyncMock(side_effect=process),
+            ),
+        ):
+            activities = await strava_activity_utils.fetch_and_process_activities(
+                client,
+                START,
+                START + timedelta(days=1),
+                1,
+                MagicMock(),
+                MagicMock(),
+                MagicMock(),
+                True,
+            )
+
+        assert stored_ids == [1, 2, 3, 4]
+        assert len(activities) == 4
+        assert probe.max_running == 2
+        assert rate_limiter.reserved == 0
+
+    async def test_cursor_stops_at_the_first_failed_activity(
+        self, rate_limiter, user_lookups
+    ):
+        """Test that the cursor never skips an activity that failed."""
+        client = MagicMock()
+        client.get_activities.return_value = [
+            summary_activity(activity_id) for activity_id in (1, 2, 3, 4)
+        ]
+
+        def fetch(strava_client, strava_activity_id, user_id):
+            if strava_activity_id == 3:
+                raise ConnectionError("timeout")
+            return {}
+
+        with (
+            patch.object(
+                strava_activity_utils.strava_utils,
+                "fetch_and_validate_activity",
+                side_effect=lambda activity_id, user_id, db: activity_id == 2 or None,
+            ),
+            patch.object(
+                strava_activity_utils, "fetch_activity_data", side_effect=fetch
+            ),
+            patch.object(
+                strava_activity_utils,
+                "process_activity",
+                new=AsyncMock(side_effect=lambda activity, *args: activity),
+            ),
+            patch.object(
+                strava_activity_utils.user_integrations_crud,
+                "set_user_strava_sync_cursor",
+            ) as mock_set_cursor,
+        ):
+            activities = await strava_activity_utils.fetch_and_process_activities(
+                client,
+                START,
+                START + timedelta(days=1),
+                1,
+                MagicMock(),
+                MagicMock(),
+                MagicMock(),
+                True,
+                update_sync_cursor=True,
+            )
+
+        # Activity 2 already existed, 3 failed and 4 is stored anyway
+        assert [activity.id for activity in activities] == [1, 4]
+        assert mock_set_cursor.call_args.args[1] == START + timedelta(hours=2)
+
+    async def test_daily_quota_stops_the_sync(self, rate_limiter, user_lookups):
+        """Test that no activity is fetched once the daily quota is used up."""
+        client = MagicMock()
+        client.get_activities.return_value = [summary_activity(1)]
+        rate_limiter.long_usage = rate_limiter.long_limit - 1
+
+        with (
+            patch.object(
+                strava_activity_utils.strava_utils,
+                "fetch_and_validate_activity",
+                return_value=None,
+            ),
+            patch.object(strava_activity_utils, "fetch_activity_data") as mock_fetch,
+            patch.object(
+                strava_activity_utils.user_integrations_crud,
+                "set_user_strava_sync_cursor",
+            ) as mock_set_cursor,
+        ):
+            activities = await strava_activity_utils.fetch_and_process_activities(
+                client,
+                START,
+                START + timedelta(days=1),
+                1,
+                MagicMock(),
+                MagicMock(),
+                MagicMock(),
+                True,
+                update_sync_cursor=True,
+            )
+
+        assert activities is None
+        mock_fetch.assert_not_called()
+        mock_set_cursor.assert_not_called()
+
+    async def test_activities_stored_from_files_are_not_fetched(
+        self, rate_limiter, user_lookups
+    ):
+        """Test that activities with a known signature are skipped before fetch."""
+        client = MagicMock()
+        client.get_activities.return_value = [
+            summary_activity(activity_id) for activity_id in (1, 2, 3)
+        ]
+
+        with (
+            patch.object(
+                strava_activity_utils.strava_utils,
+                "fetch_and_validate_activity",
+                return_value=None,
+            ),
+            patch.object(
+                strava_activity_utils.activity_fingerprints_crud,
+                "get_known_signatures",
+                return_value={"2024-01-01T10:00:00"},
+            ),
+            patch.object(
+                strava_activity_utils, "fetch_activity_data", return_value={}
+            ) as mock_fetch,
+            patch.object(
+                strava_activity_utils,
+                "process_activity",
+                new=AsyncMock(side_effect=lambda activity, *args: activity),
+            ),
+            patch.object(
+                strava_activity_utils.user_integrations_crud,
+                "set_user_strava_sync_cursor",
+            ) as mock_set_cursor,
+        ):
+            activities = await strava_activity_utils.fetch_and_process_activities(
+                client,
+                START,
+                START + timedelta(days=1),
+                1,
+                MagicMock(),
+                MagicMock(),
+                MagicMock(),
+                True,
+                update_sync_cursor=True,
+            )
+
+        # Activity 2 started at 10:00 UTC, like an activity already stored
+        assert [activity.id for activity in activities] == [1, 3]
+        assert [call.args[1] for call in mock_fetch.call_args_list] == [1, 3]
+        assert mock_set_cursor.call_args.args[1] == START + timedelta(hours=3)
+
+
+class TestGetUserStravaActivitiesByDates:
+    """Tests for get_user_strava_activities_by_dates function."""
+
+    @pytest.mark.parametrize(
+        "use_sync_cursor, expected_start_date",
+        [(True, START + timedelta(hours=5)), (False, START)],
+    )
+    async def test_scheduled_sync_starts_at_the_cursor(
+        self, use_sync_cursor, expected_start_date
+    ):
+        """Test that only scheduled syncs start at the sync cursor."""
+        user_integrations = SimpleNamespace(
+            strava_sync_cursor=datetime(2024, 1, 1, 13, 0)
+        )
+
+        with (
+            patch.object(
+                strava_activity_utils.strava_utils,
+                "fetch_user_integrations_and_validate_token",
+                return_value=user_integrations,
+            ),
+            patch.object(strava_activity_utils.strava_utils, "create_strava_client"),
+            patch.object(
+                strava_activity_utils,
+                "fetch_and_process_activities",
+                new=AsyncMock(return_value=None),
+            ) as mock_fetch,
+        ):
+            await strava_activity_utils.get_user_strava_activities_by_dates(
+                START,
+                START + timedelta(days=1),
+                1,
+                MagicMock(),
+                MagicMock(),
+                True,
+                use_sync_cursor=use_sync_cursor,
+            )
+
+        assert mock_fetch.call_args.args[1] == expected_start_date
+        assert mock_fetch.call_args.args[-1] is use_sync_cursor
+
+
+class TestRetrieveStravaUsersActivitiesForDays:
+    """Tests for retrieve_strava_users_activities_for_days function."""
+
+    @patch.object(strava_activity_utils.core_config, "STRAVA_SYNC_MAX_USERS", 2)
+    async def test_users_are_synced_concurrently(self):
+        """Test that users fan out up to the configured limit."""
+        probe = ConcurrencyProbe()
+        synced_user_ids = []
+
+        async def sync_user(start_date, end_date, user_id, *args, **kwargs):
+            assert kwargs["use_sync_cursor"] is True
+            with probe:
+                await asyncio.sleep(0.05)
+            if user_id == 3:
+                raise RuntimeError("boom")
+            synced_user_ids.append(user_id)
+
+        with (
+            patch.object(strava_activity_utils, "SessionLocal"),
+            patch.object(
+                strava_activity_utils.users_crud,
+                "get_all_users",
+                return_value=[SimpleNamespace(id=user_id) for user_id in (1, 2, 3, 4)],
+            ),
+            patch.object(
+                strava_activity_utils,
+                "get_user_strava_activities_by_dates",
+                new=AsyncMock(side_effect=sync_user),
+            ),
+        ):
+            await strava_activity_utils.retrieve_strava_users_activities_for_days(
+                1, True
+            )
+
+        assert probe.max_running == 2
+        assert sorted(synced_user_ids) == [1, 2, 4]
@@ -0,0 +1,105 @@
+"""Tests for strava.rate_limiter module."""
+
+from unittest.mock import patch
+
+import pytest
+
+import strava.rate_limiter as strava_rate_limiter
+
+# 2024-01-01 10:05:00 UTC, 10 minutes before the 15 minute window resets
+NOW = 1704103500.0
+
+
+def read_headers(short_usage, long_usage, short_limit=100, long_limit=1000):
+    """Return Strava read rate limit response headers."""
+    return {
+        "X-ReadRateLimit-Usage": f"{short_usage},{long_usage}",
+        "X-ReadRateLimit-Limit": f"{short_limit},{long_limit}",
+        "X-RateLimit-Usage": f"{short_usage},{long_usage}",
+        "X-RateLimit-Limit": "200,2000",
+    }
+
+
+@pytest.fixture
+def rate_limiter():
+    """Return a rate limiter with a fixed clock."""
+    with patch.object(strava_rate_limiter.time, "time", return_value=NOW):
+        yield strava_rate_limiter.StravaRateLimiter()
+
+
+class TestStravaRateLimiter:
+    """Tests for StravaRateLimiter class."""
+
+    def test_usage_is_read_from_headers(self, rate_limiter):
+        """Test that read limits are used for GET requests."""
+        with patch.object(strava_rate_limiter.time, "time", return_value=NOW):
+            rate_limiter(read_headers(42, 420, 150, 1500), "GET")
+
+        assert rate_limiter.short_usage == 42
+        assert rate_limiter.long_usage == 420
+        assert rate_limiter.short_limit == 150
+        assert rate_limiter.long_limit == 1500
+
+    def test_missing_headers_are_ignored(self, rate_limiter):
+        """Test that responses without rate limit headers keep the usage."""
+        rate_limiter({}, "GET")
+
+        assert rate_limiter.short_usage == 0
+        assert rate_limiter.short_limit == strava_rate_limiter.DEFAULT_SHORT_LIMIT
+
+    def test_waits_for_the_next_window(self, rate_limiter):
+        """Test that a used up 15 minute quota waits until the window resets."""
+        with patch.object(strava_rate_limiter.time, "time", return_value=NOW):
+            rate_limiter(read_headers(98, 500), "GET")
+
+            assert rate_limiter.reserve(3) == 600
+
+    def test_reservations_count_against_the_quota(self, rate_limiter):
+        """Test that running fetches are counted before their headers arrive."""
+        with patch.object(strava_rate_limiter.time, "time", return_value=NOW):
+            rate_limiter(read_headers(95, 500), "GET")
+
+            assert rate_limiter.reserve(3) == 0
+            assert rate_limiter.reserve(3) > 0
+            rate_limiter.release(3)
+            assert rate_limiter.reserve(3) == 0
+
+    def test_window_reset_clears_short_usage(self, rate_limiter):
+        """Test that the short usage resets once the window ended."""
+        with patch.object(strava_rate_limiter.time, "time", return_value=NOW):
+            rate_limiter(read_headers(100, 500), "GET")
+
+        with patch.object(strava_rate_limiter.time, "time", return_value=NOW + 601):
+            assert rate_limiter.reserve(3) == 0
+        assert rate_limiter.short_usage == 0
+        assert rate_limiter.long_usage == 500
+
+    def test_daily_quota_raises(self, rate_limiter):
+        """Test that a used up daily quota stops the sync."""
+        with patch.object(strava_rate_limiter.time, "time", return_value=NOW):
+            rate_limiter(read_headers(10, 999), "GET")
+
+            with pytest.raises(strava_rate_limiter.StravaQuotaExceeded):
+                rate_limiter.reserve(3)
+
+    async def test_acquire_sleeps_until_reserved(self, rate_limiter):
+        """Test that acquire waits and retries when the quota is used up."""
+        with (
+            patch.object(rate_limiter, "reserve", side_effect=[5.0, 0]) as mock_reserve,
+            patch.object(strava_rate_limiter.asyncio, "sleep") as mock_sleep,
+        ):
+            await rate_limiter.acquire(3)
+
+        mock_sleep.assert_awaited_once_with(5.0)
+        assert mock_reserve.call_count == 2
+
+
+class TestGetRateLimiter:
+    """Tests for get_rate_limiter function."""
+
+    def test_rate_limiter_is_shared_per_application(self):
+        """Test that clients of the same application share the usage."""
+        first = strava_rate_limiter.get_rate_limiter("test-app-1")
+
+        assert strava_rate_limiter.get_rate_limiter("test-app-1") is first
+        assert strava_rate_limiter.get_rate_limiter("test-app-2") is not first
@@ -1,5 +1,8 @@
 """Tests for websocket.manager module."""
 
+import asyncio
+import json
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -7,6 +10,28 @@ import pytest
 import websocket.manager as websocket_manager
 
 
+class FakeListenConnection:
+    """Listening connection yielding the given NOTIFY payloads."""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, query):
+        pass
+
+    async def notifies(self):
+        for payload in self.payloads:
+            yield SimpleNamespace(payload=payload)
+        # Keep listening until the relay is stopped
+        await asyncio.Event().wait()
+
+
 class TestWebSocketManager:
     """Tests for WebSocketManager class."""
 
@@ -27,6 +52,7 @@ class TestWebSocketManager:
         """Test manager initialization."""
         assert isinstance(manager.active_connections, dict)
         assert len(manager.active_connections) == 0
+        assert manager.relay_active is False
 
     @patch("websocket.manager.core_logger.print_to_log")
     async def test_connect(self, mock_log, manager, mock_websocket):
@@ -39,8 +65,7 @@ class TestWebSocketManager:
         mock_websocket.accept.assert_awaited_once()
 
         # Verify connection is stored
-        assert user_id in manager.active_connections
-        assert manager.active_connections[user_id] == mock_websocket
+        assert manager.active_connections[user_id] == {mock_websocket}
 
         # Verify logging
         mock_log.assert_called_once_with(
@@ -51,16 +76,30 @@ class TestWebSocketManager:
     async def test_connect_multiple_users(self, mock_log, manager):
         """Test connecting multiple WebSocket connections."""
         ws1 = AsyncMock()
-        ws1.accept = AsyncMock()
         ws2 = AsyncMock()
-        ws2.accept = AsyncMock()
 
         await manager.connect(1, ws1)
         await manager.connect(2, ws2)
 
         assert len(manager.active_connections) == 2
-        assert manager.active_connections[1] == ws1
-        assert manager.active_connections[2] == ws2
+        assert manager.get_connections(1) == [ws1]
+        assert manager.get_connections(2) == [ws2]
+
+    @patch("websocket.manager.core_logger.print_to_log")
+    async def test_connect_multiple_tabs(self, mock_log, manager):
+        """Test a second connection of a user doesn't replace the first."""
+        first_tab = AsyncMock()
+        second_tab = AsyncMock()
+        message = {"message": "NEW_NOTIFICATION"}
+
+        await manager.connect(1, first_tab)
+        await manager.connect(1, second_tab)
+        sent = await manager.send_message(1, message)
+
+        assert sent is True
+        assert manager.active_connections[1] == {first_tab, second_tab}
+        first_tab.send_json.assert_awaited_once_with(message)
+        second_tab.send_json.assert_awaited_once_with(message)
 
     @patch("websocket.manager.core_logger.print_to_log")
     async def test_disconnect(self, mock_log, manager, mock_websocket):
@@ -68,7 +107,7 @@ class TestWebSocketManager:
         user_id = 1
         await manager.connect(user_id, mock_websocket)
 
-        manager.disconnect(user_id)
+        manager.disconnect(user_id, mock_websocket)
 
         # Verify connection is removed
         assert user_id not in manager.active_connections
@@ -77,6 +116,18 @@ class TestWebSocketManager:
         assert mock_log.call_count == 2  # connect + disconnect
         mock_log.assert_any_call(f"WebSocket disconnected for user {user_id}", "debug")
 
+    @patch("websocket.manager.core_logger.print_to_log")
+    async def test_disconnect_keeps_other_tabs(self, mock_log, manager):
+        """Test disconnecting one tab keeps the user's other connections."""
+        first_tab = AsyncMock()
+        second_tab = AsyncMock()
+        await manager.connect(1, first_tab)
+        await manager.connect(1, second_tab)
+
+        manager.disconnect(1, first_tab)
+
+        assert manager.get_connections(1) == [second_tab]
+
     @patch("websocket.manager.core_logger.print_to_log")
     def test_disconnect_nonexistent_user(self, mock_log, manager):
         """Test disconnecting a non-existent user (no error)."""
@@ -94,31 +145,44 @@ class TestWebSocketManager:
         message = {"type": "notification", "data": "test"}
 
         await manager.connect(user_id, mock_websocket)
-        await manager.send_message(user_id, message)
+        sent = await manager.send_message(user_id, message)
 
         # Verify send_json was called with correct message
         mock_websocket.send_json.assert_awaited_once_with(message)
+        assert sent is True
 
     async def test_send_message_nonexistent_user(self, manager):
         """Test sending message to non-existent user (no error)."""
         message = {"type": "notification", "data": "test"}
 
         # Should not raise error
-        await manager.send_message(999, message)
+        assert await manager.send_message(999, message) is False
+
+    @patch("websocket.manager.SEND_TIMEOUT_SECONDS", 0.01)
+    @patch("websocket.manager.core_logger.print_to_log")
+    async def test_send_message_drops_slow_socket(self, mock_log, manager):
+        """Test a socket that doesn't keep up is dropped without delaying others."""
+
+        async def slow_send(message):
+            await asyncio.sleep(10)
+
+        slow = AsyncMock()
+        slow.send_json.side_effect = slow_send
+        fast = AsyncMock()
+
+        await manager.connect(1, slow)
+        await manager.connect(1, fast)
+        sent = await manager.send_message(1, {"message": "NEW_NOTIFICATION"})
+
+        assert sent is True
+        fast.send_json.assert_awaited_once()
+        assert manager.get_connections(1) == [fast]
 
     async def test_broadcast(self, manager):
         """Test broadcasting a message to all connected users."""
         ws1 = AsyncMock()
-        ws1.accept = AsyncMock()
-        ws1.send_json = AsyncMock()
-
         ws2 = AsyncMock()
-        ws2.accept = AsyncMock()
-        ws2.send_json = AsyncMock()
-
         ws3 = AsyncMock()
-        ws3.accept = AsyncMock()
-        ws3.send_json = AsyncMock()
 
         await manager.connect(1, ws1)
         await manager.connect(2, ws2)
@@ -139,41 +203,156 @@ class TestWebSocketManager:
         # Should not raise error
         await manager.broadcast(message)
 
-    async def test_get_connection(self, manager, mock_websocket):
-        """Test retrieving a user's WebSocket connection."""
+    async def test_get_connections(self, manager, mock_websocket):
+        """Test retrieving a user's WebSocket connections."""
         user_id = 1
         await manager.connect(user_id, mock_websocket)
 
-        connection = manager.get_connection(user_id)
+        assert manager.get_connections(user_id) == [mock_websocket]
 
-        assert connection == mock_websocket
+    def test_get_connections_nonexistent_user(self, manager):
+        """Test retrieving connections for non-existent user returns empty."""
+        assert manager.get_connections(999) == []
 
-    def test_get_connection_nonexistent_user(self, manager):
-        """Test retrieving connection for non-existent user returns None."""
-        connection = manager.get_connection(999)
 
-        assert connection is None
+class TestWebSocketRelay:
+    """Tests for relaying WebSocket messages between workers."""
 
-    async def test_replace_connection(self, manager):
-        """Test replacing an existing connection (same user reconnects)."""
-        old_ws = AsyncMock()
-        old_ws.accept = AsyncMock()
+    @pytest.fixture
+    def manager(self):
+        """Create a WebSocketManager with an active relay."""
+        manager = websocket_manager.WebSocketManager()
+        manager._relay_task = MagicMock()
+        manager._relay_task.done.return_value = False
+        return manager
 
-        new_ws = AsyncMock()
-        new_ws.accept = AsyncMock()
+    @pytest.fixture
+    def mock_websocket(self):
+        """Create a mock WebSocket instance."""
+        return AsyncMock()
+
+    @patch("websocket.manager._notify")
+    async def test_send_message_published(self, mock_notify, manager):
+        """Test messages are published for the other workers."""
+        sent = await manager.send_message(7, {"message": "NEW_NOTIFICATION"})
+
+        assert sent is True
+        payload = json.loads(mock_notify.call_args.args[0])
+        assert payload == {
+            "worker_id": manager.worker_id,
+            "user_id": 7,
+            "message": {"message": "NEW_NOTIFICATION"},
+        }
+
+    @patch("websocket.manager._notify")
+    @patch("websocket.manager.core_logger.print_to_log")
+    async def test_large_message_not_published(self, mock_log, mock_notify, manager):
+        """Test messages over the NOTIFY payload limit stay on this worker."""
+        sent = await manager.send_message(7, {"data": "x" * 10000})
 
-        user_id = 1
+        assert sent is False
+        mock_notify.assert_not_called()
+
+    async def test_receive_from_other_worker(self, manager, mock_websocket):
+        """Test messages of other workers are delivered to local sockets."""
+        await manager.connect(7, mock_websocket)
+
+        await manager._receive(
+            json.dumps(
+                {"worker_id": "other", "user_id": 7, "message": {"message": "PING"}}
+            )
+        )
 
-        # Connect with old websocket
-        await manager.connect(user_id, old_ws)
-        assert manager.active_connections[user_id] == old_ws
+        mock_websocket.send_json.assert_awaited_once_with({"message": "PING"})
 
-        # Reconnect with new websocket
-        await manager.connect(user_id, new_ws)
-        assert manager.active_connections[user_id] == new_ws
+    async def test_receive_own_message_ignored(self, manager, mock_websocket):
+        """Test messages published by this worker aren't delivered twice."""
+        await manager.connect(7, mock_websocket)
 
-        # Old connection should be replaced
-        assert len(manager.active_connections) == 1
+        await manager._receive(
+            json.dumps(
+                {
+                    "worker_id": manager.worker_id,
+                    "user_id": 7,
+                    "message": {"message": "PING"},
+                }
+            )
+        )
+
+        mock_websocket.send_json.assert_not_awaited()
+
+    async def test_receive_broadcast(self, manager):
+        """Test relayed broadcasts reach every local socket."""
+        ws1 = AsyncMock()
+        ws2 = AsyncMock()
+        await manager.connect(1, ws1)
+        await manager.connect(2, ws2)
+
+        await manager._receive(
+            json.dumps({"worker_id": "other", "user_id": None, "message": {"a": 1}})
+        )
+
+        ws1.send_json.assert_awaited_once_with({"a": 1})
+        ws2.send_json.assert_awaited_once_with({"a": 1})
+
+    @pytest.mark.parametrize("payload", ["[1, 2]", '"PING"', "null", "not json"])
+    @patch("websocket.manager.core_logger.print_to_log")
+    async def test_receive_malformed_payload_ignored(
+        self, mock_log, payload, manager, mock_websocket
+    ):
+        """Test payloads that aren't relayed messages are ignored."""
+        await manager.connect(7, mock_websocket)
+
+        await manager._receive(payload)
+
+        mock_websocket.send_json.assert_not_awaited()
+        mock_log.assert_called_with(
+            "Ignoring malformed relayed WebSocket message", "warning"
+        )
+
+    @patch("websocket.manager.RELAY_RECONNECT_SECONDS", 0)
+    @patch("websocket.manager.core_database.get_conninfo", return_value="")
+    @patch("websocket.manager.core_logger.print_to_log")
+    async def test_listen_survives_errors_and_slow_sockets(
+        self, mock_log, mock_conninfo
+    ):
+        """Test the relay reconnects after any error and delivers concurrently."""
+        manager = websocket_manager.WebSocketManager()
+        released = asyncio.Event()
+
+        async def slow_send(message):
+            await released.wait()
+
+        slow = AsyncMock()
+        slow.send_json.side_effect = slow_send
+        fast = AsyncMock()
+        await manager.connect(1, slow)
+        await manager.connect(2, fast)
+
+        connection = FakeListenConnection(
+            [
+                json.dumps({"worker_id": "other", "user_id": 1, "message": {"a": 1}}),
+                json.dumps({"worker_id": "other", "user_id": 2, "message": {"b": 2}}),
+            ]
+        )
+        with patch(
+            "websocket.manager.psycopg.AsyncConnection.connect",
+            new_callable=AsyncMock,
+            side_effect=[RuntimeError("unexpected"), connection],
+        ):
+            manager.start_relay()
+            try:
+                async with asyncio.timeout(1):
+                    while not fast.send_json.await_count:
+                        await asyncio.sleep(0.01)
+                assert manager.relay_active
+            finally:
+                released.set()
+                manager.stop_relay()
+                await asyncio.gather(*manager._delivery_tasks)
+
+        fast.send_json.assert_awaited_once_with({"b": 2})
+        slow.send_json.assert_awaited_once_with({"a": 1})
 
 
 class TestGetWebSocketManager:
@@ -49,7 +49,7 @@ class TestWebSocketEndpoint:
         assert mock_websocket.receive_json.await_count == 3
 
         # Verify disconnect was called
-        mock_manager.disconnect.assert_called_once_with(user_id)
+        mock_manager.disconnect.assert_called_once_with(user_id, mock_websocket)
 
         # No error logs for valid JSON
         mock_log.assert_not_called()
@@ -79,7 +79,7 @@ class TestWebSocketEndpoint:
         )
 
         # Verify disconnect was called
-        mock_manager.disconnect.assert_called_once_with(user_id)
+        mock_manager.disconnect.assert_called_once_with(user_id, mock_websocket)
 
     @patch("websocket.router.core_logger.print_to_log")
     async def test_websocket_endpoint_multiple_malformed_json(
@@ -121,7 +121,7 @@ class TestWebSocketEndpoint:
         mock_manager.connect.assert_awaited_once_with(user_id, mock_websocket)
 
         # Verify disconnect was called
-        mock_manager.disconnect.assert_called_once_with(user_id)
+        mock_manager.disconnect.assert_called_once_with(user_id, mock_websocket)
 
         # No logs for normal disconnect
         mock_log.assert_not_called()
@@ -146,8 +146,8 @@ class TestWebSocketEndpoint:
 
         # Verify both disconnects were called
         assert mock_manager.disconnect.call_count == 2
-        mock_manager.disconnect.assert_any_call(1)
-        mock_manager.disconnect.assert_any_call(2)
+        mock_manager.disconnect.assert_any_call(1, ws1)
+        mock_manager.disconnect.assert_any_call(2, ws2)
 
     @pytest.mark.skip(
         reason="Complex test requiring WebSocket protocol understanding - "
@@ -15,34 +15,24 @@ class TestNotifyFrontend:
     def mock_websocket_manager(self):
         """Create a mock WebSocketManager."""
         manager = MagicMock()
-        manager.get_connection = MagicMock()
+        manager.send_message = AsyncMock(return_value=True)
         return manager
 
-    @pytest.fixture
-    def mock_websocket(self):
-        """Create a mock WebSocket instance."""
-        websocket = AsyncMock()
-        websocket.send_json = AsyncMock()
-        return websocket
-
-    async def test_notify_frontend_success(
-        self, mock_websocket_manager, mock_websocket
-    ):
+    async def test_notify_frontend_success(self, mock_websocket_manager):
         """Test successful notification delivery."""
         user_id = 1
         json_data = {"type": "notification", "message": "Test notification"}
 
-        mock_websocket_manager.get_connection.return_value = mock_websocket
+        mock_websocket_manager.send_message.return_value = True
 
         result = await websocket_utils.notify_frontend(
             user_id, mock_websocket_manager, json_data
         )
 
-        # Verify connection was retrieved
-        mock_websocket_manager.get_connection.assert_called_once_with(user_id)
-
         # Verify message was sent
-        mock_websocket.send_json.assert_awaited_once_with(json_data)
+        mock_websocket_manager.send_message.assert_awaited_once_with(
+            user_id, json_data
+        )
 
         # Verify return value
         assert result is True
@@ -52,14 +42,16 @@ class TestNotifyFrontend:
         user_id = 1
         json_data = {"type": "notification", "message": "Test notification"}
 
-        mock_websocket_manager.get_connection.return_value = None
+        mock_websocket_manager.send_message.return_value = False
 
         result = await websocket_utils.notify_frontend(
             user_id, mock_websocket_manager, json_data
         )
 
-        # Verify connection was attempted
-        mock_websocket_manager.get_connection.assert_called_once_with(user_id)
+        # Verify sending was attempted
+        mock_websocket_manager.send_message.assert_awaited_once_with(
+            user_id, json_data
+        )
 
         # Should return False when no connection
         assert result is False
@@ -71,7 +63,7 @@ class TestNotifyFrontend:
         user_id = 1
         json_data = {"message": "MFA_REQUIRED", "type": "mfa"}
 
-        mock_websocket_manager.get_connection.return_value = None
+        mock_websocket_manager.send_message.return_value = False
 
         # Should raise HTTPException for MFA_REQUIRED
         with pytest.raises(HTTPException) as exc_info:
@@ -83,9 +75,7 @@ class TestNotifyFrontend:
         assert exc_info.value.status_code == 400
         assert f"No WebSocket connection for user {user_id}" in exc_info.value.detail
 
-    async def test_notify_frontend_complex_json_data(
-        self, mock_websocket_manager, mock_websocket
-    ):
+    async def test_notify_frontend_complex_json_data(self, mock_websocket_manager):
         """Test notification with complex JSON data."""
         user_id = 1
         json_data = {
@@ -98,23 +88,23 @@ class TestNotifyFrontend:
             "timestamp": "2026-01-07T10:00:00Z",
         }
 
-        mock_websocket_manager.get_connection.return_value = mock_websocket
+        mock_websocket_manager.send_message.return_value = True
 
         result = await websocket_utils.notify_frontend(
             user_id, mock_websocket_manager, json_data
         )
 
         # Verify complex data was sent correctly
-        mock_websocket.send_json.assert_awaited_once_with(json_data)
+        mock_websocket_manager.send_message.assert_awaited_once_with(
+            user_id, json_data
+        )
         assert result is True
 
-    async def test_notify_frontend_multiple_users(
-        self, mock_websocket_manager, mock_websocket
-    ):
+    async def test_notify_frontend_multiple_users(self, mock_websocket_manager):
         """Test notifying multiple users sequentially."""
         json_data = {"type": "announcement", "message": "System update"}
 
-        mock_websocket_manager.get_connection.return_value = mock_websocket
+        mock_websocket_manager.send_message.return_value = True
 
         # Notify multiple users
         result1 = await websocket_utils.notify_frontend(
@@ -132,25 +122,22 @@ class TestNotifyFrontend:
         assert result2 is True
         assert result3 is True
 
-        # Verify all users were checked and notified
-        assert mock_websocket_manager.get_connection.call_count == 3
-        assert mock_websocket.send_json.await_count == 3
+        # Verify all users were notified
+        assert mock_websocket_manager.send_message.await_count == 3
 
-    async def test_notify_frontend_empty_json_data(
-        self, mock_websocket_manager, mock_websocket
-    ):
+    async def test_notify_frontend_empty_json_data(self, mock_websocket_manager):
         """Test notification with empty JSON data."""
         user_id = 1
         json_data = {}
 
-        mock_websocket_manager.get_connection.return_value = mock_websocket
+        mock_websocket_manager.send_message.return_value = True
 
         result = await websocket_utils.notify_frontend(
             user_id, mock_websocket_manager, json_data
         )
 
         # Should still send empty dict
-        mock_websocket.send_json.assert_awaited_once_with({})
+        mock_websocket_manager.send_message.assert_awaited_once_with(user_id, {})
         assert result is True
 
     async def test_notify_frontend_mfa_required_case_sensitive(
@@ -161,7 +148,7 @@ class TestNotifyFrontend:
 
         # Different case - should not raise exception
         json_data1 = {"message": "mfa_required"}
-        mock_websocket_manager.get_connection.return_value = None
+        mock_websocket_manager.send_message.return_value = False
 
         result = await websocket_utils.notify_frontend(
             user_id, mock_websocket_manager, json_data1
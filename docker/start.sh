@@ -51,6 +51,15 @@ for dir in $REQUIRED_DIRS; do
     chown -R "$UID:$GID" "$dir"
 done
 
+# Start with an empty metrics directory, values of previous runs would be
+# added to the new ones
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    echo_info_log "Clearing metrics directory: $PROMETHEUS_MULTIPROC_DIR"
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    chown "$UID:$GID" "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 if [ -n "$ENDURAIN_HOST" ]; then
     FRONTEND_FOLDER="${FRONTEND_DIR:-/app/frontend/dist}"
     echo "window.env = { ENDURAIN_HOST: \"$ENDURAIN_HOST\" };" > "$FRONTEND_FOLDER/env.js"
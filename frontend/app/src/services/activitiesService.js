@@ -103,12 +103,58 @@ export const activities = {
 
     return fetchGetRequest(baseUrl)
   },
+  getUserActivitiesWithCursor(
+    user_id,
+    numRecords,
+    cursor = null,
+    filters = {},
+    sortBy = null,
+    sortOrder = null
+  ) {
+    const params = new URLSearchParams({ num_records: numRecords })
+
+    // Resume after the last activity of the previous page
+    if (cursor) {
+      params.append('cursor', cursor)
+    }
+
+    // Add filters to query parameters if they exist
+    if (filters.type) {
+      params.append('type', filters.type)
+    }
+    if (filters.start_date) {
+      params.append('start_date', filters.start_date)
+    }
+    if (filters.end_date) {
+      params.append('end_date', filters.end_date)
+    }
+    if (filters.name_search) {
+      params.append('name_search', filters.name_search)
+    }
+
+    // Add sorting parameters if they exist
+    if (sortBy) {
+      params.append('sort_by', sortBy)
+    }
+    if (sortOrder) {
+      params.append('sort_order', sortOrder)
+    }
+
+    return fetchGetRequest(`activities/user/${user_id}/cursor?${params.toString()}`)
+  },
   getUserFollowersActivitiesWithPagination(user_id, pageNumber, numRecords) {
     // Note: This endpoint is not yet updated to handle filters
     return fetchGetRequest(
       `activities/user/${user_id}/followed/page_number/${pageNumber}/num_records/${numRecords}`
     )
   },
+  getUserFollowersActivitiesWithCursor(user_id, numRecords, cursor = null) {
+    const params = new URLSearchParams({ num_records: numRecords })
+    if (cursor) {
+      params.append('cursor', cursor)
+    }
+    return fetchGetRequest(`activities/user/${user_id}/followed/cursor?${params.toString()}`)
+  },
   getActivityById(activityId) {
     return fetchGetRequest(`activities/${activityId}`)
   },
@@ -1,21 +1,46 @@
 import { fetchGetRequest } from '@/utils/serviceUtils'
 import { fetchPublicGetRequest } from '@/utils/servicePublicUtils'
 
+// Builds the query string of the optional level of detail and encoded polyline parameters
+function buildStreamQuery(detailLevel = null, encodePolyline = false) {
+  const params = new URLSearchParams()
+  if (detailLevel) params.append('detail_level', detailLevel)
+  if (encodePolyline) params.append('encode_polyline', 'true')
+  const query = params.toString()
+  return query ? `?${query}` : ''
+}
+
 export const activityStreams = {
   // Activity streams authenticated
-  async getActivitySteamsByActivityId(activityId) {
-    return fetchGetRequest(`activities_streams/activity_id/${activityId}/all`)
+  async getActivitySteamsByActivityId(activityId, detailLevel = null) {
+    return fetchGetRequest(
+      `activities_streams/activity_id/${activityId}/all${buildStreamQuery(detailLevel)}`
+    )
   },
-  async getActivitySteamByStreamTypeByActivityId(activityId, streamType) {
-    return fetchGetRequest(`activities_streams/activity_id/${activityId}/stream_type/${streamType}`)
+  async getActivitySteamByStreamTypeByActivityId(
+    activityId,
+    streamType,
+    detailLevel = null,
+    encodePolyline = false
+  ) {
+    return fetchGetRequest(
+      `activities_streams/activity_id/${activityId}/stream_type/${streamType}${buildStreamQuery(detailLevel, encodePolyline)}`
+    )
   },
   // Activity streams public
-  async getPublicActivityStreamsByActivityId(activityId) {
-    return fetchPublicGetRequest(`public/activities_streams/activity_id/${activityId}/all`)
+  async getPublicActivityStreamsByActivityId(activityId, detailLevel = null) {
+    return fetchPublicGetRequest(
+      `public/activities_streams/activity_id/${activityId}/all${buildStreamQuery(detailLevel)}`
+    )
   },
-  async getPublicActivitySteamByStreamTypeByActivityId(activityId, streamType) {
+  async getPublicActivitySteamByStreamTypeByActivityId(
+    activityId,
+    streamType,
+    detailLevel = null,
+    encodePolyline = false
+  ) {
     return fetchPublicGetRequest(
-      `public/activities_streams/activity_id/${activityId}/stream_type/${streamType}`
+      `public/activities_streams/activity_id/${activityId}/stream_type/${streamType}${buildStreamQuery(detailLevel, encodePolyline)}`
     )
   }
 }
@@ -23,6 +23,7 @@ export const useAuthStore = defineStore('auth', {
       first_day_of_week: 'monday',
       currency: null,
       max_heart_rate: null,
+      ftp: null,
       is_strava_linked: null,
       is_garminconnect_linked: null,
       default_activity_visibility: 'public',
@@ -114,6 +115,7 @@ export const useAuthStore = defineStore('auth', {
         first_day_of_week: 'monday',
         currency: null,
         max_heart_rate: null,
+        ftp: null,
         is_strava_linked: null,
         is_garminconnect_linked: null,
         default_activity_visibility: 'public',
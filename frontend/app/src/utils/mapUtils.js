@@ -0,0 +1,34 @@
+/**
+ * Decodes a Google encoded polyline into latitude and longitude pairs.
+ *
+ * @param {string} encoded - The encoded polyline.
+ * @param {number} [precision=5] - Number of decimals the polyline was encoded with.
+ * @returns {number[][]} Array of `[lat, lon]` pairs.
+ */
+export function decodePolyline(encoded, precision = 5) {
+  const factor = 10 ** precision
+  const latlngs = []
+  let index = 0
+  let lat = 0
+  let lon = 0
+
+  while (index < encoded.length) {
+    const deltas = []
+    for (let coordinate = 0; coordinate < 2; coordinate++) {
+      let result = 0
+      let shift = 0
+      let byte
+      do {
+        byte = encoded.charCodeAt(index++) - 63
+        result |= (byte & 0x1f) << shift
+        shift += 5
+      } while (byte >= 0x20)
+      deltas.push(result & 1 ? ~(result >> 1) : result >> 1)
+    }
+    lat += deltas[0]
+    lon += deltas[1]
+    latlngs.push([lat / factor, lon / factor])
+  }
+
+  return latlngs
+}